@@ -0,0 +1,110 @@
+"""Benchmark of the Bayesian optimization on synthetic objective functions.
+
+Compare the evaluations and the rounds of evaluations to reach the target between:
+  - refit: the Gaussian process fitted from scratch, one point per round, the default of the Bayesian strategy.
+  - incremental: the kernel hyperparameters refitted when the points grow by 1.5 times, one point per round.
+  - batch: the kernel hyperparameters refitted when the points grow by 1.5 times, `--batch-size` points per round
+    by the constant liar, the points of a round can be evaluated concurrently.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from neural_compressor.strategy.bayesian import BayesianOptimization
+
+
+def branin(params):
+    """Negative Branin function, the maximum is about -0.398."""
+    x1, x2 = params["x1"], params["x2"]
+    a, b, c, r, s, t = 1, 5.1 / (4 * np.pi**2), 5 / np.pi, 6, 10, 1 / (8 * np.pi)
+    return -(a * (x2 - b * x1**2 + c * x1 - r) ** 2 + s * (1 - t) * np.cos(x1) + s)
+
+
+def hartmann6(params):
+    """Hartmann 6-D function, the maximum is about 3.322."""
+    alpha = np.array([1.0, 1.2, 3.0, 3.2])
+    A = np.array(
+        [[10, 3, 17, 3.5, 1.7, 8], [0.05, 10, 17, 0.1, 8, 14], [3, 3.5, 1.7, 10, 17, 8], [17, 8, 0.05, 10, 0.1, 14]]
+    )
+    P = 1e-4 * np.array(
+        [
+            [1312, 1696, 5569, 124, 8283, 5886],
+            [2329, 4135, 8307, 3736, 1004, 9991],
+            [2348, 1451, 3522, 2883, 3047, 6650],
+            [4047, 8828, 8732, 5743, 1091, 381],
+        ]
+    )
+    x = np.array([params["x{}".format(i)] for i in range(1, 7)])
+    return float(np.sum(alpha * np.exp(-np.sum(A * (x - P) ** 2, axis=1))))
+
+
+def op_wise(params):
+    """Accuracy of an op-wise config like the Bayesian strategy, each of 8 ops chooses one of 4 configs."""
+    impact = np.array([0.02, 0.001, 0.03, 0.004, 0.01, 0.002, 0.05, 0.003])
+    configs = np.array([min(3, int(params["op{}".format(i)])) for i in range(8)])
+    # config 0 is the most accurate one, each op loses accuracy by its impact times the config index
+    return 1.0 - float(np.sum(impact * configs))
+
+
+OBJECTIVES = {
+    "branin": (branin, {"x1": (-5, 10), "x2": (0, 15)}, -0.398 - 0.5),
+    "hartmann6": (hartmann6, {"x{}".format(i): (0, 1) for i in range(1, 7)}, 3.322 * 0.9),
+    "op_wise": (op_wise, {"op{}".format(i): (0, 4) for i in range(8)}, 1.0 - 0.01),
+}
+
+
+def run(objective, pbounds, target, batch_size, max_evals, seed, incremental):
+    """Run the optimization until reaching the target or max_evals.
+
+    Returns:
+        tuple: The evaluations, the rounds and the time of suggestions.
+    """
+    np.random.seed(seed)
+    bayes_opt = BayesianOptimization(pbounds=pbounds, random_seed=seed, refit_growth=1.5 if incremental else 1.0)
+    evals, rounds, suggest_time = 0, 0, 0.0
+    while evals < max_evals:
+        start = time.time()
+        batch = bayes_opt.suggest_batch(batch_size)
+        suggest_time += time.time() - start
+        rounds += 1
+        reached = False
+        for params in batch:
+            evals += 1
+            result = objective(params)
+            try:
+                bayes_opt._space.register(params, result)
+            except KeyError:
+                pass
+            reached = reached or result >= target
+        if reached:
+            break
+    return evals, rounds, suggest_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--objectives", nargs="+", default=list(OBJECTIVES))
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--max-evals", type=int, default=60)
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+
+    modes = [("refit", 1, False), ("incremental", 1, True), ("batch", args.batch_size, True)]
+    print("{:<10} {:<12} {:>8} {:>8} {:>12}".format("objective", "mode", "evals", "rounds", "suggest(s)"))
+    for name in args.objectives:
+        objective, pbounds, target = OBJECTIVES[name]
+        for mode, batch_size, incremental in modes:
+            results = np.array(
+                [
+                    run(objective, pbounds, target, batch_size, args.max_evals, seed, incremental)
+                    for seed in range(args.seeds)
+                ]
+            )
+            evals, rounds, suggest_time = results.mean(axis=0)
+            print("{:<10} {:<12} {:>8.1f} {:>8.1f} {:>12.2f}".format(name, mode, evals, rounds, suggest_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark of the ComposeTransform applied per sample and to batches on a synthetic image dataset.
+
+The ONNX Runtime preprocessing resizes the images per sample, then rescales, normalizes, transposes and casts them,
+which apply_batch fuses over the stacked images of a batch. `--no_resize` drops the resize to time the element-wise
+transforms alone.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from neural_compressor.data import TRANSFORMS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_samples", type=int, default=1024)
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--size", type=int, default=224)
+    parser.add_argument("--no_resize", action="store_true", help="generate the images of the resized size")
+    args = parser.parse_args()
+
+    preprocess = TRANSFORMS("onnxrt_qlinearops", "preprocess")
+    general = TRANSFORMS("onnxrt_qlinearops", "general")
+    transform_list = [
+        preprocess["Rescale"](),
+        preprocess["Normalize"](mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+        preprocess["Transpose"](perm=[2, 0, 1]),
+        general["Cast"](dtype="float32"),
+    ]
+    shape = (args.size, args.size, 3)
+    if not args.no_resize:
+        transform_list.insert(0, preprocess["Resize"](size=args.size))
+        shape = (256, 256, 3)
+    compose = preprocess["Compose"](transform_list)
+    images = [np.random.randint(0, 256, shape, dtype=np.uint8) for _ in range(16)]
+    samples = [(images[i % len(images)], i) for i in range(args.num_samples)]
+    batches = [samples[i : i + args.batch_size] for i in range(0, len(samples), args.batch_size)]
+
+    print(f"{'mode':>10} {'samples/s':>10}")
+    start = time.time()
+    for batch in batches:
+        [compose(sample) for sample in batch]
+    print(f"{'sample':>10} {args.num_samples / (time.time() - start):>10.1f}")
+    start = time.time()
+    for batch in batches:
+        compose.apply_batch(batch)
+    print(f"{'batch':>10} {args.num_samples / (time.time() - start):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark of the TuningSpace construction and queries on a synthetic capability with many ops.
+
+Time the construction of the tuning space, the initial tuning config of each op, the ops collected by quantization
+bits and the iteration of the op-wise and fallback samplers. Run it on two revisions to compare the indexed tuning
+space with the tree walks.
+"""
+
+import argparse
+import time
+from collections import OrderedDict
+
+from neural_compressor.strategy.utils.tuning_sampler import FallbackTuningSampler, OpWiseTuningSampler
+from neural_compressor.strategy.utils.tuning_space import TuningSpace, initial_tuning_cfg_with_quant_mode
+
+
+def build_capability(num_ops):
+    """Build a capability of ops supporting static/dynamic int8 and fp32, a third of them have no weight."""
+    op_cap = OrderedDict()
+    for i in range(num_ops):
+        act_method = {"scheme": ["sym", "asym"], "granularity": ["per_tensor"], "algorithm": ["minmax", "kl"]}
+        weight = {"dtype": ["int8"], "scheme": ["sym"], "granularity": ["per_channel", "per_tensor"]}
+        caps = []
+        for quant_mode in ["static", "dynamic"]:
+            cap = {"activation": dict(act_method, dtype=["int8"], quant_mode=quant_mode)}
+            if i % 3:
+                cap["weight"] = dict(weight)
+            caps.append(cap)
+        caps.append(
+            {"activation": {"dtype": "fp32"}, "weight": {"dtype": "fp32"}}
+            if i % 3
+            else {"activation": {"dtype": "fp32"}}
+        )
+        op_cap[("op_{}".format(i), "op_type{}".format(i % 8))] = caps
+    return {"calib": {"calib_sampling_size": [100]}, "op": op_cap}
+
+
+def timeit(name, func):
+    start = time.time()
+    result = func()
+    print("{:<32} {:>10.3f} s".format(name, time.time() - start))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num-ops", type=int, default=10000)
+    parser.add_argument("--fallback-trials", type=int, default=1000)
+    args = parser.parse_args()
+
+    capability = build_capability(args.num_ops)
+    tuning_space = timeit("construct tuning space", lambda: TuningSpace(capability, None))
+    op_names = [item.name for item in tuning_space.root_item.options if item.item_type == "op"]
+    initial_cfg = timeit(
+        "initial tuning config",
+        lambda: {
+            op_name_type: initial_tuning_cfg_with_quant_mode(op_name_type, "static", tuning_space)
+            for op_name_type in op_names
+        },
+    )
+    initial_cfg["calib_sampling_size"] = 100
+    timeit("collect ops by quant bits", lambda: [tuning_space.collect_op_by_quant_bits("int8") for _ in range(10)])
+    op_dtypes = OrderedDict((op_name_type, "static") for op_name_type in op_names)
+    timeit(
+        "op-wise candidates",
+        lambda: OpWiseTuningSampler(tuning_space, [], [], op_dtypes, initial_cfg).get_opwise_candidate(),
+    )
+    fallback_dtypes = OrderedDict((op_name_type, "fp32") for op_name_type in op_names[: args.fallback_trials])
+    sampler = FallbackTuningSampler(tuning_space, [], initial_cfg, fallback_dtypes, accumulate=True)
+    timeit("fallback sampler iteration", lambda: sum(1 for _ in sampler))
+
+
+if __name__ == "__main__":
+    main()
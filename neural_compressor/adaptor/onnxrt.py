@@ -812,6 +812,7 @@ class ONNXRUNTIMEAdaptor(Adaptor):
             iterations=list(range(0, iterations)),
             backend=self.backend,
             reduce_range=self.reduce_range,
+            num_workers=self.recipes.get("calib_num_workers", 1),
             **kwargs,
         )
         self.min_max = augment.dump_minmax(quantize_config)
@@ -25,7 +25,11 @@
 import copy
 import logging
 import os
+import queue
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from importlib.util import find_spec
 
 import numpy as np
@@ -35,7 +39,7 @@ import onnxruntime
 from onnx import TensorProto, helper, shape_inference
 from packaging.version import Version
 
-from neural_compressor.adaptor.ox_utils.calibrator import CALIBRATOR
+from neural_compressor.adaptor.ox_utils.calibrator import CALIBRATOR, CalibratorBase
 from neural_compressor.adaptor.ox_utils.util import (
     _get_qrange_for_qType,
     calculate_scale_zp,
@@ -50,6 +54,45 @@ ONNX18_VERSION = Version("1.8.0")
 ORT112_VERSION = Version("1.12.0")
 
 
+def _prefetch(iterable, max_size=2):
+    """Iterate over the iterable in a background thread and keep up to max_size items ahead of the consumer."""
+    buffer = queue.Queue(maxsize=max_size)
+    stop = threading.Event()
+    end = object()
+
+    def _put(item):
+        # give up once the consumer stops, otherwise the producer would block on the full buffer forever
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce():
+        try:
+            for item in iterable:
+                if not _put((item, None)):
+                    return
+            _put((end, None))
+        except BaseException as e:  # pragma: no cover
+            _put((end, e))
+
+    producer = threading.Thread(target=_produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is end:
+                if error is not None:  # pragma: no cover
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
 class ONNXRTAugment:
     """Augment input model to dump tensor or for calibration."""
 
@@ -76,6 +119,8 @@ class ONNXRTAugment:
             iterations (list, optional): tensor of which iteration will be collected. Defaults to [].
             backend (list, optional): execution provider for onnxruntime. Defaults to ['CPUExecutionProvider'].
             reduce_range (bool, optional): use 7 bit or not. Defaults to False.
+            num_workers (int, optional): number of concurrent inference requests and calibrator updates during
+                calibration, the calibration ranges don't depend on it. Defaults to 1.
         """
         self.model_wrapper = model_wrapper
         self.model = model_wrapper.model
@@ -94,6 +139,8 @@ class ONNXRTAugment:
         self.dynamically_quantized = False
         self.ort_version = Version(onnxruntime.__version__)
         self.reduce_range = reduce_range
+        self.num_workers = max(1, kwargs.get("num_workers", 1))
+        self.activation_calibrators = {}
 
         self.layer_wise = True if len(kwargs.get("split_model_input_names", [])) != 0 else False
         if self.layer_wise:
@@ -228,9 +275,42 @@ class ONNXRTAugment:
                 convert_attribute=False,
             )
 
+    def _get_calib_inputs(self, inputs_names):
+        """Yield the labels and the onnxruntime inputs of the iterations to be calibrated."""
+        len_inputs = len(inputs_names)
+        for idx, (inputs, labels) in enumerate(self.dataloader):
+            if self.iterations != []:
+                if idx > max(self.iterations):
+                    break
+                if idx not in self.iterations:
+                    continue
+
+            ort_inputs = {}
+            if len_inputs == 1:
+                if isinstance(inputs, dict):
+                    for name, input in inputs.items():
+                        ort_inputs.update({name: to_numpy(input)})
+                else:
+                    ort_inputs.update({inputs_names[0]: to_numpy(inputs)})
+            else:
+                # skip check input length for layer-wise calibration
+                if not self.layer_wise:
+                    assert len_inputs == len(inputs), "number of input tensors must align with graph inputs"
+
+                if isinstance(inputs, dict):
+                    for name, input in inputs.items():
+                        ort_inputs.update({name: to_numpy(input)})
+                else:
+                    ort_inputs = dict(zip(inputs_names, [to_numpy(i) for i in inputs]))
+            yield labels, ort_inputs
+
     def get_activation_tensors_calib_range(self, q_config=None):
         """Get calib ranges of activation tensors.
 
+        The inputs are converted in a background thread, up to `num_workers` inference requests run concurrently
+        on the session and the calibrators are updated in a thread pool. The calibrators are streaming, so the
+        memory doesn't grow with the number of calibration samples.
+
         Args:
             q_config (dict, optional): quantization config. Defaults to None.
 
@@ -244,6 +324,11 @@ class ONNXRTAugment:
             from onnxruntime_extensions import get_library_path
 
             so.register_custom_ops_library(get_library_path())
+        # the order of outputs of layer-wise calibration matters for the next split model
+        num_workers = 1 if self.layer_wise else self.num_workers
+        if num_workers > 1:
+            # the concurrent requests share the cores
+            so.intra_op_num_threads = max(1, (os.cpu_count() or 1) // num_workers)
 
         backend = self.backend if self.backend != "TensorrtExecutionProvider" else "CUDAExecutionProvider"
         session = (
@@ -252,10 +337,8 @@ class ONNXRTAugment:
             else onnxruntime.InferenceSession(self.model_wrapper.model_path + "_augment.onnx", so, providers=[backend])
         )
 
-        len_inputs = len(session.get_inputs())
-        inputs_names = [session.get_inputs()[i].name for i in range(len_inputs)]
-        len_outputs = len(session.get_outputs())
-        outputs_names = [session.get_outputs()[i].name for i in range(len_outputs)]
+        inputs_names = [session_input.name for session_input in session.get_inputs()]
+        outputs_names = [session_output.name for session_output in session.get_outputs()]
 
         node_output_names = [
             output.name if output.name not in self.dequantized_output else self.dequantized_output[output.name]
@@ -278,106 +361,108 @@ class ONNXRTAugment:
             assert node, "{} is neither an input nor an output of nodes in augmented model.".format(data_name)
             name_to_node[data_name] = node.name
 
+        def _get_calib_method(node_name):
+            calib_method = (
+                q_config[node_name]["activation"]["algorithm"]
+                if q_config and node_name in q_config and "activation" in q_config[node_name]
+                else "minmax"
+            )
+            assert calib_method in CALIBRATOR, "Calibration method {} is not registered.".format(calib_method)
+            return calib_method
+
         activation_tensors_calib_range = {}
-        intermediate_tensor = {}
         name_to_calibrator = {}
         ort_inputs_for_next_split_model = []
-        for idx, (inputs, labels) in enumerate(self.dataloader):
-            ort_inputs = {}
-
-            if len_inputs == 1:
-                if isinstance(inputs, dict):
-                    for name, input in inputs.items():
-                        ort_inputs.update({name: to_numpy(input)})
-                else:
-                    ort_inputs.update({inputs_names[0]: to_numpy(inputs)})
-            else:
-                # skip check input length for layer-wise calibration
-                if not self.layer_wise:
-                    assert len_inputs == len(inputs), "number of input tensors must align with graph inputs"
 
-                if isinstance(inputs, dict):
-                    for name, input in inputs.items():
-                        ort_inputs.update({name: to_numpy(input)})
-                else:
-                    ort_inputs = dict(zip(inputs_names, [to_numpy(i) for i in inputs]))
+        def _run(ort_inputs):
+            if self.layer_wise:
+                # for layer-wise calibration
+                ort_inputs = {
+                    input_name: input_tensor
+                    for input_name, input_tensor in ort_inputs.items()
+                    if input_name in self.split_model_input_names
+                }
+            return ort_inputs, session.run(None, ort_inputs)
+
+        def _collect_data(labels, inference):
+            # results are collected in the order of the dataloader, so the ranges are deterministic
+            ort_inputs, outputs = inference.result()
+            updates = []
+            for output_idx, output in enumerate(outputs):
+                output_name = node_output_names[output_idx]
+                if q_config is not None and output.size != 0:
+                    if output_name not in name_to_calibrator:
+                        calib_method = _get_calib_method(name_to_node[output_name])
+                        name_to_calibrator[output_name] = CALIBRATOR[calib_method]()
+                    # the calibrators are streaming, the outputs aren't kept after the update
+                    updates.append((name_to_calibrator[output_name], output))
+                elif q_config is None:
+                    activation_tensors_calib_range.setdefault(output_name, []).append(output)
 
-            def _collect_data(ort_inputs):
                 if self.layer_wise:
                     # for layer-wise calibration
-                    ort_inputs = {
-                        input_name: input_tensor
-                        for input_name, input_tensor in ort_inputs.items()
-                        if input_name in self.split_model_input_names
-                    }
-
-                for output_idx, output in enumerate(session.run(None, ort_inputs)):
-                    if q_config is not None and output.size != 0:
-                        node_name = name_to_node[node_output_names[output_idx]]
-                        if node_output_names[output_idx] not in name_to_calibrator:
-                            calib_method = (
-                                q_config[node_name]["activation"]["algorithm"]
-                                if q_config and node_name in q_config and "activation" in q_config[node_name]
-                                else "minmax"
-                            )
-                            assert calib_method in CALIBRATOR, "Calibration method {} is not registered.".format(
-                                calib_method
-                            )
-                            calibrator = CALIBRATOR[calib_method]()
-                        else:
-                            calibrator = name_to_calibrator[node_output_names[output_idx]]
-
-                        # currently, the calibration range for each iteration is collected if
-                        # the calibration method is minmax, otherwise the tensor data is collected.
-                        # TODO: for kl and percentile method, need to support range collection
-                        # per iteration in the future.
-                        if calibrator.method_name == "minmax":
-                            calibrator.collect(output)
-                            activation_tensors_calib_range[node_output_names[output_idx]] = [
-                                list(calibrator.calib_range)
-                            ]
-                            name_to_calibrator[node_output_names[output_idx]] = calibrator
-                        else:
-                            intermediate_tensor.setdefault((node_output_names[output_idx], node_name), []).append(
-                                output
-                            )
-                    elif q_config is None:
-                        activation_tensors_calib_range.setdefault(node_output_names[output_idx], []).append(output)
-
-                    if self.layer_wise:
-                        # for layer-wise calibration
-                        ort_inputs.update({outputs_names[output_idx]: output})
-                        ort_inputs_for_next_split_model.append((ort_inputs, labels))
-
-            if self.iterations != []:
-                if idx > max(self.iterations):
-                    break
-                if idx in self.iterations:
-                    _collect_data(ort_inputs)
-            else:
-                _collect_data(ort_inputs)
-
-        # for kl and percentile method, collect calibration range after all tensors are collected.
-        merged_dict = intermediate_tensor
-        for (output_name, node_name), datas in merged_dict.items():
-            if any([data is None for data in datas]):
-                continue
-            calib_method = (
-                q_config[node_name]["activation"]["algorithm"]
-                if q_config and node_name in q_config and "activation" in q_config[node_name]
-                else "minmax"
-            )
-            calibrator = CALIBRATOR[calib_method]()
-            calibrator.collect(datas)
-            activation_tensors_calib_range.setdefault(output_name, []).append(list(calibrator.calib_range))
-            calibrator.clear()
-            del calibrator
+                    ort_inputs.update({outputs_names[output_idx]: output})
+                    ort_inputs_for_next_split_model.append((ort_inputs, labels))
+
+            # each tensor has its own calibrator, so the updates of one iteration can run concurrently
+            for _ in collect_map(lambda update: update[0].collect(update[1]), updates):
+                pass
+
+        with ThreadPoolExecutor(max_workers=num_workers) as inference_pool, ThreadPoolExecutor(
+            max_workers=num_workers
+        ) as collect_pool:
+            collect_map = collect_pool.map if num_workers > 1 else map
+            pending = deque()
+            for labels, ort_inputs in _prefetch(self._get_calib_inputs(inputs_names), max_size=2 * num_workers):
+                pending.append((labels, inference_pool.submit(_run, ort_inputs)))
+                # keep at most num_workers inference requests in flight to bound the memory of outputs
+                if len(pending) >= num_workers:
+                    _collect_data(*pending.popleft())
+            while pending:
+                _collect_data(*pending.popleft())
+
+            self.activation_calibrators = name_to_calibrator
+            if q_config is not None:
+                activation_tensors_calib_range = self._get_activation_calib_range(collect_map)
 
         # set for layer-wise quant
         self._dataloder_for_next_split_model = ort_inputs_for_next_split_model
 
         return activation_tensors_calib_range
 
+    def _get_activation_calib_range(self, collect_map=map):
+        """Get calib ranges of activation tensors from the activation calibrators."""
+        # the kl range is computed lazily from the histogram, which is expensive, so compute them concurrently
+        calib_ranges = collect_map(
+            lambda calibrator: list(calibrator.calib_range), self.activation_calibrators.values()
+        )
+        return {name: [calib_range] for name, calib_range in zip(self.activation_calibrators.keys(), calib_ranges)}
+
+    def calibrator_state_dict(self):
+        """Get the states of the activation calibrators of the last calibration.
+
+        The states are python objects and numpy arrays, which can be pickled and merged into the ONNXRTAugment
+        calibrating another data shard by merge_calibrator_state_dict.
+        """
+        return {name: calibrator.state_dict() for name, calibrator in self.activation_calibrators.items()}
+
+    def merge_calibrator_state_dict(self, state_dict):
+        """Merge the states of activation calibrators collected on another data shard.
+
+        Args:
+            state_dict (dict): the states returned by calibrator_state_dict.
+
+        Returns:
+            dict: calib ranges of activation tensors after merging
+        """
+        for name, calibrator_state in state_dict.items():
+            calibrator = CalibratorBase.from_state_dict(calibrator_state)
+            if name in self.activation_calibrators:
+                self.activation_calibrators[name].merge(calibrator)
+            else:
+                self.activation_calibrators[name] = calibrator
+        return self._get_activation_calib_range()
+
     def get_weight_tensors_calib_range(self):
         """Get calib ranges of weight tensors.
 
@@ -68,6 +68,99 @@ class CalibratorBase:
         """Get calibration range value."""
         return self._calib_min, self._calib_max
 
+    def merge(self, other):
+        """Merge the statistics collected by another calibrator of the same method, e.g. on another data shard."""
+        raise NotImplementedError
+
+    def state_dict(self):
+        """Get the statistics and arguments of the calibrator as python objects and numpy arrays."""
+        return {"method": self.method_name, "calib_min": self._calib_min, "calib_max": self._calib_max}
+
+    def load_state_dict(self, state_dict):
+        """Load the statistics and arguments returned by state_dict."""
+        assert state_dict["method"] == self.method_name, "Cannot load the state of a {} calibrator into {}.".format(
+            state_dict["method"], self.method_name
+        )
+        self._calib_min = state_dict["calib_min"]
+        self._calib_max = state_dict["calib_max"]
+
+    @staticmethod
+    def from_state_dict(state_dict):
+        """Create a calibrator from the state returned by state_dict."""
+        calibrator = CALIBRATOR[state_dict["method"]]()
+        calibrator.load_state_dict(state_dict)
+        return calibrator
+
+
+class HistogramCalibratorBase(CalibratorBase):
+    """Base class of the calibrators computing the range from a histogram.
+
+    The histogram is collected in a streaming way with a bounded number of bins, so the memory doesn't grow with
+    the calibration data. The range is computed lazily from the histogram.
+
+    Args:
+        num_bins (int): number of bins to create a new histogram for collecting tensor values.
+    """
+
+    def __init__(self, num_bins):
+        """Initialize histogram calibrator class."""
+        super(HistogramCalibratorBase, self).__init__()
+        self.collector = None
+        self.num_bins = num_bins
+        self._range_outdated = False
+
+    def collect_calib_data(self, datas):
+        """Collect histogram of datas."""
+        if not self.collector:
+            self.collector = HistogramCollector(self.num_bins)
+        self.collector.collect_data(datas)
+        self._range_outdated = True
+
+    def compute_range(self):
+        """Compute calibration range from the histogram."""
+        raise NotImplementedError
+
+    @property
+    def calib_range(self):
+        """Get calibration range value."""
+        if self._range_outdated:
+            self.compute_range()
+            self._range_outdated = False
+        return self._calib_min, self._calib_max
+
+    def merge(self, other):
+        """Merge the histogram collected by another calibrator."""
+        if other.collector is None:
+            return
+        if self.collector is None:
+            self.collector = HistogramCollector(self.num_bins)
+        self.collector.merge(other.collector)
+        self._range_outdated = True
+
+    def state_dict(self):
+        """Get the histogram and arguments of the calibrator."""
+        state_dict = super(HistogramCalibratorBase, self).state_dict()
+        state_dict["num_bins"] = self.num_bins
+        state_dict["collector"] = self.collector.state_dict() if self.collector is not None else None
+        return state_dict
+
+    def load_state_dict(self, state_dict):
+        """Load the histogram and arguments returned by state_dict."""
+        super(HistogramCalibratorBase, self).load_state_dict(state_dict)
+        self.num_bins = state_dict["num_bins"]
+        self.collector = None
+        if state_dict["collector"] is not None:
+            self.collector = HistogramCollector(self.num_bins)
+            self.collector.load_state_dict(state_dict["collector"])
+        self._range_outdated = self.collector is not None
+
+    def clear(self):
+        """Clear calibration range."""
+        self._calib_min = None
+        self._calib_max = None
+        self.collector = None
+        self._range_outdated = False
+
 
 @calib_registry(calib_method="minmax")
 class MinMaxCalibrator(CalibratorBase):
@@ -103,6 +196,16 @@ class MinMaxCalibrator(CalibratorBase):
             self._calib_min = np.minimum(self._calib_min, local_min)
             self._calib_max = np.maximum(self._calib_max, local_max)
 
+    def merge(self, other):
+        """Merge the range collected by another calibrator."""
+        if other._calib_min is None:
+            return
+        if self._calib_min is None:
+            self._calib_min, self._calib_max = other._calib_min, other._calib_max
+        else:
+            self._calib_min = np.minimum(self._calib_min, other._calib_min)
+            self._calib_max = np.maximum(self._calib_max, other._calib_max)
+
     @property
     def method_name(self):
         """Get calibration method name."""
@@ -110,7 +213,7 @@ class MinMaxCalibrator(CalibratorBase):
 
 
 @calib_registry(calib_method="percentile")
-class PercentileCalibrator(CalibratorBase):
+class PercentileCalibrator(HistogramCalibratorBase):
     """Percentile calibrator class.
 
     Args:
@@ -121,16 +224,11 @@ class PercentileCalibrator(CalibratorBase):
 
     def __init__(self, num_bins=2048, percentile=99.999):
         """Initialize percentile calibrator class."""
-        super(PercentileCalibrator, self).__init__()
-        self.collector = None
-        self.num_bins = num_bins
+        super(PercentileCalibrator, self).__init__(num_bins)
         self.percentile = percentile
 
-    def collect_calib_data(self, datas):
-        """Collect calibration range."""
-        if not self.collector:
-            self.collector = HistogramCollector(self.num_bins)
-        self.collector.collect_data(datas)
+    def compute_range(self):
+        """Compute calibration range from the histogram."""
         self.compute_percentile_range(self.percentile)
 
     def compute_percentile_range(self, percentile):
@@ -151,11 +249,16 @@ class PercentileCalibrator(CalibratorBase):
         if self._calib_max > max_range:
             self._calib_max = max_range
 
-    def clear(self):
-        """Clear calibration range."""
-        self._calib_min = None
-        self._calib_max = None
-        self.collector = None
+    def state_dict(self):
+        """Get the histogram and arguments of the calibrator."""
+        state_dict = super(PercentileCalibrator, self).state_dict()
+        state_dict["percentile"] = self.percentile
+        return state_dict
+
+    def load_state_dict(self, state_dict):
+        """Load the histogram and arguments returned by state_dict."""
+        super(PercentileCalibrator, self).load_state_dict(state_dict)
+        self.percentile = state_dict["percentile"]
 
     @property
     def method_name(self):
@@ -164,7 +267,7 @@ class PercentileCalibrator(CalibratorBase):
 
 
 @calib_registry(calib_method="kl")
-class KLCalibrator(CalibratorBase):
+class KLCalibrator(HistogramCalibratorBase):
     """KL calibrator class.
 
     Args:
@@ -175,16 +278,11 @@ class KLCalibrator(CalibratorBase):
 
     def __init__(self, num_bins=128, num_quantized_bins=128):
         """Initialize kl calibrator class."""
-        super(KLCalibrator, self).__init__()
-        self.collector = None
-        self.num_bins = num_bins
+        super(KLCalibrator, self).__init__(num_bins)
         self.num_quantized_bins = num_quantized_bins
 
-    def collect_calib_data(self, datas):
-        """Collect calibration range."""
-        if not self.collector:
-            self.collector = HistogramCollector(self.num_bins)
-        self.collector.collect_data(datas)
+    def compute_range(self):
+        """Compute calibration range from the histogram."""
         self.compute_kl_range()
 
     def compute_kl_range(self):
@@ -280,11 +378,16 @@ class KLCalibrator(CalibratorBase):
             optimal_threshold = (optimal_threshold[0], max_value)
         return optimal_threshold[0], optimal_threshold[1]
 
-    def clear(self):
-        """Clear calibration range."""
-        self._calib_min = None
-        self._calib_max = None
-        self.collector = None
+    def state_dict(self):
+        """Get the histogram and arguments of the calibrator."""
+        state_dict = super(KLCalibrator, self).state_dict()
+        state_dict["num_quantized_bins"] = self.num_quantized_bins
+        return state_dict
+
+    def load_state_dict(self, state_dict):
+        """Load the histogram and arguments returned by state_dict."""
+        super(KLCalibrator, self).load_state_dict(state_dict)
+        self.num_quantized_bins = state_dict["num_quantized_bins"]
 
     @property
     def method_name(self):
@@ -293,11 +396,21 @@ class KLCalibrator(CalibratorBase):
 
 
 class HistogramCollector:
-    """Histogram collctor class."""
+    """Histogram collctor class.
+
+    The histogram is symmetric around 0. When the range grows, the histogram is extended with bins of the same
+    width, and adjacent bins are merged once there are more than max_num_bins bins, so the memory is bounded.
 
-    def __init__(self, num_bins=2048):
+    Args:
+        num_bins (int, optional): number of bins of a new histogram. Defaults to 2048.
+        max_num_bins (int, optional): max number of bins, the histogram keeps at least num_bins bins after merging
+            adjacent bins if max_num_bins >= 4 * num_bins. Defaults to 4 * num_bins.
+    """
+
+    def __init__(self, num_bins=2048, max_num_bins=None):
         """Initialize histogram collctor."""
         self._num_bins = num_bins
+        self._max_num_bins = max_num_bins if max_num_bins is not None else 4 * num_bins
         self._histogram = None
 
     def collect_data(self, datas):
@@ -309,7 +422,7 @@ class HistogramCollector:
                 self._collect_value(data)
         else:
             datas = np.asarray(datas)
-            datas = datas.flatten()
+            datas = datas.ravel()
             assert datas.size > 0, "collected intermediate data size" "should not be 0, please check augmented_model"
             self._collect_value(datas)
 
@@ -324,7 +437,9 @@ class HistogramCollector:
             hist, hist_edges = np.histogram(data, self._num_bins, range=(-th, th))
             self._histogram = (hist, hist_edges, min_range, max_range, th)
         else:
-            self._histogram = self.combine_histogram(self._histogram, data, min_range, max_range, th)
+            self._histogram = self.coarsen_histogram(
+                self.combine_histogram(self._histogram, data, min_range, max_range, th), self._max_num_bins
+            )
 
     def combine_histogram(self, old_hist, data_arr, new_min, new_max, new_th):
         """Combine histogram."""
@@ -360,6 +475,73 @@ class HistogramCollector:
                 new_th,
             )
 
+    @staticmethod
+    def coarsen_histogram(histogram, max_num_bins):
+        """Merge adjacent bins of the histogram until it has at most max_num_bins bins."""
+        hist, hist_edges, min_range, max_range, th = histogram
+        num_bins = len(hist)
+        if num_bins <= max_num_bins:
+            return histogram
+        factor = -(-num_bins // max_num_bins)
+        if num_bins % 2 == 1 and factor % 2 == 0:
+            # an odd number of bins can't be padded symmetrically to a multiple of an even factor
+            factor += 1
+        # pad zero bins on both sides to keep the histogram symmetric around 0
+        pad = next(pad for pad in range(factor) if (num_bins + 2 * pad) % factor == 0)
+        th = th + pad * 2 * th / num_bins
+        hist = np.pad(hist, pad).reshape(-1, factor).sum(axis=1)
+        hist_edges = np.linspace(-th, th, len(hist) + 1)
+        return hist, hist_edges, min_range, max_range, th
+
+    def merge(self, other):
+        """Merge the histogram collected by another collector.
+
+        The counts of the histogram with the smaller range are added to the bins of the other one by bin centers,
+        which is exact when both histograms have the same bins.
+        """
+        if other.histogram is None:
+            return
+        if self._histogram is None:
+            self.load_state_dict(other.state_dict())
+            return
+        base, added = self._histogram, other.histogram
+        if added[4] > base[4]:
+            base, added = added, base
+        base_hist, base_hist_edges, _, _, base_th = base
+        added_hist, added_hist_edges = added[0], added[1]
+        if base_th == 0 or (len(base_hist) == len(added_hist) and base_th == added[4]):
+            hist = base_hist + added_hist
+        else:
+            centers = (added_hist_edges[:-1] + added_hist_edges[1:]) / 2
+            hist, _ = np.histogram(centers, bins=len(base_hist), range=(-base_th, base_th), weights=added_hist)
+            hist = base_hist + hist.astype(base_hist.dtype)
+        self._histogram = (
+            hist,
+            base_hist_edges,
+            min(base[2], added[2]),
+            max(base[3], added[3]),
+            base_th,
+        )
+
+    def state_dict(self):
+        """Get the histogram and arguments of the collector."""
+        return {
+            "num_bins": self._num_bins,
+            "max_num_bins": self._max_num_bins,
+            "histogram": self._histogram,
+        }
+
+    def load_state_dict(self, state_dict):
+        """Load the histogram and arguments returned by state_dict."""
+        self._num_bins = state_dict["num_bins"]
+        self._max_num_bins = state_dict["max_num_bins"]
+        histogram = state_dict["histogram"]
+        self._histogram = (
+            tuple(value.copy() if isinstance(value, np.ndarray) else value for value in histogram)
+            if histogram is not None
+            else None
+        )
+
     @property
     def histogram(self):
         """Get histogram."""
@@ -89,7 +89,7 @@ class PadOperator(Operator):
                     # Suppose this padding constant initializer only used by the node
                     self.quantizer.model.remove_initializer(padding_constant_initializer)
                     self.quantizer.model.add_initializer(quantized_padding_constant_initializer)
-                    node.input[2] = quantized_padding_constant_name
+                    self.quantizer.model.set_node_input(node, 2, quantized_padding_constant_name)
                 else:
                     self.quantizer.quantize_inputs(node, [2], False)
                     node.input[2] = node.input[2] + "_DequantizeLinear"
@@ -452,7 +452,7 @@ class Quantizer:
                 if do_cast_new_tensor:
                     # add cast initializer and update its name
                     self.model.add_initializer(do_cast_new_tensor)
-                    node.input[idx] = do_cast_new_tensor.name
+                    self.model.set_node_input(node, idx, do_cast_new_tensor.name)
 
                     # if origin initializer is no more used, remove it
                     self.model.update()
@@ -474,7 +474,7 @@ class Quantizer:
                 self.new_nodes.append(
                     onnx.helper.make_node("Cast", [tensor_name], [name], to=dtype_mapping[cfg], name=name)
                 )
-                node.input[idx] = name
+                self.model.set_node_input(node, idx, name)
                 self.new_value_info[name] = ValueInfo(tensor_name, TensorProto.FLOAT, dtype_mapping[cfg])
 
     def cast_outputs(self, node, cfg, indices=None):
@@ -570,7 +570,7 @@ class Quantizer:
                 if self.add_qdq_pair_to_weight and self.mode == "qdq":
                     weight = self._get_quantized_weight(initializer, dtype, scheme)
                     self._update_weight(weight)
-                    node.input[idx] = weight.name
+                    self.model.set_node_input(node, idx, weight.name)
                     q_weight_name = weight.name + "_quantized"
                     zp_name = weight.name + "_zero_point"
                     scale_name = weight.name + "_scale"
@@ -594,7 +594,7 @@ class Quantizer:
                 else:
                     weight = self._get_quantized_weight(initializer, dtype, scheme)
                     self._update_weight(weight)
-                    node.input[idx] = weight.name
+                    self.model.set_node_input(node, idx, weight.name)
                     q_weight_name = weight.name + "_quantized"
                     zp_name = weight.name + "_zero_point"
                     scale_name = weight.name + "_scale"
@@ -879,7 +879,7 @@ class Quantizer:
                     [weight_name + "_dequantized"],
                     axis,
                 )
-                node.input[idx] = weight_name
+                self.model.set_node_input(node, idx, weight_name)
                 self.replace_input.append([node, weight_name, dequant_node.output[0]])
                 self.new_nodes.extend([qlinear_node, dequant_node])
             else:
@@ -894,7 +894,7 @@ class Quantizer:
                     axis,
                 )
                 self.new_nodes.append(dequant_node)
-                node.input[idx] = weight_name
+                self.model.set_node_input(node, idx, weight_name)
 
                 # Replace weight_name with output of DequantizeLinear
                 self.replace_input.append([node, weight_name, dequant_node.output[0]])
@@ -189,7 +189,7 @@ def split_shared_bias(model):
                         True,
                     )
                     model.add_initializer(new_input)
-                    node.input[2] = new_input_name
+                    model.set_node_input(node, 2, new_input_name)
     return model
 
 
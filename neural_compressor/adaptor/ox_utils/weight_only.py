@@ -403,7 +403,7 @@ def rtn_quantize(
                     raw=True,
                 )
                 model.add_initializer(q_weight_tensor)
-                node.input[1] = q_weight_tensor.name
+                model.set_node_input(node, 1, q_weight_tensor.name)
             if init_share_num == 1:
                 model.remove_initializer(weight_tensor)
 
@@ -519,7 +519,7 @@ def apply_awq_scale(model, weight_config, absorb_pairs, output_dicts, num_bits,
                 raw=True,
             )
             model.add_initializer(new_tensor)
-            node.input[1] = new_tensor.name
+            model.set_node_input(node, 1, new_tensor.name)
 
             if init_share_num == 1:
                 model.remove_initializer(weight_tensor)
@@ -1164,7 +1164,7 @@ def gptq_quantize(
                     raw=True,
                 )
                 model.add_initializer(q_weight_tensor)
-                node.input[1] = q_weight_tensor.name
+                model.set_node_input(node, 1, q_weight_tensor.name)
             if init_share_num == 1:
                 model.remove_initializer(weight_tensor)
 
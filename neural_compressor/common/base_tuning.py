@@ -13,8 +13,18 @@
 # limitations under the License.
 """The auto-tune module."""
 
+import argparse
 import copy
+import hashlib
+import inspect
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import time
 import uuid
+from collections import deque
 from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Sized, Tuple, Union
 
 from neural_compressor.common.base_config import BaseConfig
@@ -32,11 +42,29 @@ __all__ = [
     "SequentialSampler",
     "default_sampler",
     "ConfigSet",
+    "TrialExecutor",
+    "SequentialTrialExecutor",
+    "ParallelTrialExecutor",
+    "TrialCache",
 ]
 
 
 class EvaluationFuncWrapper:
-    """Evaluation function wrapper."""
+    """Evaluation function wrapper.
+
+    The evaluation function can be a staged evaluation, i.e., a generator function yielding
+    `(partial_result, num_samples)` over the batches of the evaluation set, where `partial_result` is the result
+    of the first `num_samples` samples and the last yielded result is the final one. A staged evaluation can be
+    stopped early by `evaluate_with_early_stop`.
+
+    Examples:
+        def staged_eval_fn(model):
+            correct = total = 0
+            for input, label in eval_dataloader:
+                correct += (model(input).argmax(-1) == label).sum().item()
+                total += len(label)
+                yield correct / total, total
+    """
 
     def __init__(self, eval_fn: Callable, eval_args=None):
         """Evaluation function wrapper.
@@ -48,6 +76,9 @@ class EvaluationFuncWrapper:
         self.eval_fn = eval_fn
         self.eval_args = eval_args
 
+    def _call_eval_fn(self, model):
+        return self.eval_fn(model, *self.eval_args) if self.eval_args else self.eval_fn(model)
+
     def evaluate(self, model) -> Union[float, int]:
         """Evaluates the given model using the evaluation function and arguments provided.
 
@@ -57,9 +88,41 @@ class EvaluationFuncWrapper:
         Returns:
             The evaluation result, which can be a float or an integer.
         """
-        result = self.eval_fn(model, *self.eval_args) if self.eval_args else self.eval_fn(model)
+        result = self._call_eval_fn(model)
+        if inspect.isgenerator(result):
+            result, _ = self._run_staged_evaluation(result)
         return result
 
+    def evaluate_with_early_stop(
+        self, model, need_stop_evaluation: Callable[[Union[float, int], int], bool]
+    ) -> Tuple[Union[float, int], bool]:
+        """Evaluates the given model and stops the staged evaluation once `need_stop_evaluation` returns True.
+
+        Args:
+            model: The model to be evaluated.
+            need_stop_evaluation: A function of `(partial_result, num_samples)`, which returns True if the rest
+                of the evaluation can be skipped.
+
+        Returns:
+            The evaluation result, which is the partial result if stopped early, and whether it's stopped early.
+        """
+        result = self._call_eval_fn(model)
+        if not inspect.isgenerator(result):
+            return result, False
+        return self._run_staged_evaluation(result, need_stop_evaluation)
+
+    @staticmethod
+    def _run_staged_evaluation(staged_results, need_stop_evaluation=None):
+        result = None
+        try:
+            for result, num_samples in staged_results:
+                if need_stop_evaluation is not None and need_stop_evaluation(result, num_samples):
+                    return result, True
+        finally:
+            staged_results.close()
+        assert result is not None, "The staged evaluation function should yield at least one result."
+        return result, False
+
 
 class Evaluator:
     """Evaluator is a collection of evaluation functions.
@@ -330,6 +393,276 @@ class ConfigLoader:
             yield new_config
 
 
+class TrialExecutor:
+    """Base class for trial executors.
+
+    A trial executor runs `trial_fn(quant_config)` for the configs yielded by a config loader and yields
+    `(trial_index, quant_config, trial_result, elapsed_time)` in trial-index order. The caller stops the tuning
+    by closing the generator (e.g. `break` out of the loop), outstanding trials will be cancelled.
+    If `get_cached_result` returns a cached `(trial_result, elapsed_time)` for a config, the trial is skipped.
+    """
+
+    def run(
+        self,
+        trial_fn: Callable[[BaseConfig], Any],
+        config_loader: "ConfigLoader",
+        get_cached_result: Optional[Callable[[BaseConfig], Optional[Tuple[Any, float]]]] = None,
+    ) -> Generator[Tuple[int, BaseConfig, Any, float], None, None]:
+        """Run trials and yield the results in trial-index order."""
+        raise NotImplementedError
+
+
+def _run_trial(trial_fn, quant_config):
+    start = time.time()
+    trial_result = trial_fn(quant_config)
+    return trial_result, time.time() - start
+
+
+class SequentialTrialExecutor(TrialExecutor):
+    """Run trials one by one in the current process."""
+
+    def run(
+        self,
+        trial_fn: Callable[[BaseConfig], Any],
+        config_loader: "ConfigLoader",
+        get_cached_result: Optional[Callable[[BaseConfig], Optional[Tuple[Any, float]]]] = None,
+    ) -> Generator[Tuple[int, BaseConfig, Any, float], None, None]:
+        """Run trials and yield the results in trial-index order."""
+        for trial_index, quant_config in enumerate(config_loader, 1):
+            cached_result = get_cached_result(quant_config) if get_cached_result else None
+            trial_result, elapsed_time = cached_result or _run_trial(trial_fn, quant_config)
+            yield trial_index, quant_config, trial_result, elapsed_time
+
+
+# The trial function of the current worker process of `ParallelTrialExecutor`.
+_worker_trial_fn = None
+
+
+def _init_trial_worker(pickled_trial_fn, core_queue):
+    global _worker_trial_fn
+    cores = core_queue.get()
+    if cores:
+        os.environ["OMP_NUM_THREADS"] = str(len(cores))
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        logger.debug(f"Trial worker {os.getpid()} is pinned to cores {cores}.")
+    # unpickle the trial function after pinning, so that the framework is initialized with the right cores
+    _worker_trial_fn = pickle.loads(pickled_trial_fn)
+
+
+def _run_trial_in_worker(quant_config):
+    return _run_trial(_worker_trial_fn, quant_config)
+
+
+class ParallelTrialExecutor(TrialExecutor):
+    """Run trials concurrently in a process pool.
+
+    Each worker is pinned to a disjoint core set, which is partitioned in the same way as `incbench`
+    partitions instances (see `neural_compressor.common.benchmark.set_cores_for_instance`).
+    At most `num_workers` trials are in flight, results are still reported in trial-index order so the
+    tuning history is deterministic.
+
+    Examples:
+        tune_config = TuningConfig(config_set=..., trial_executor=ParallelTrialExecutor(num_workers=2))
+
+    Note:
+        The trial function (including the model and the evaluation function) and the configs are pickled
+        to the workers, so they should be picklable, e.g. use a module-level evaluation function.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 2,
+        num_cores_per_worker: Optional[int] = None,
+        cores: Optional[str] = None,
+        start_method: str = "spawn",
+    ):
+        """Init a ParallelTrialExecutor.
+
+        Args:
+            num_workers (int, optional): the number of trials running concurrently. Defaults to 2.
+            num_cores_per_worker (int, optional): the number of cores per worker.
+                Defaults to None, all available cores are split evenly among workers.
+            cores (str, optional): the visible core range, e.g. "0-23,48-71". Defaults to None, all physical cores.
+            start_method (str, optional): the start method of worker processes. Defaults to "spawn".
+        """
+        assert num_workers > 0, "num_workers should be a positive integer."
+        self.num_workers = num_workers
+        self.num_cores_per_worker = num_cores_per_worker
+        self.cores = cores
+        self.start_method = start_method
+
+    def get_cores_per_worker(self) -> List[Optional[List[int]]]:
+        """Partition the available cores into disjoint core sets, one for each worker.
+
+        Returns:
+            A list of core lists. None means the worker is not pinned.
+        """
+        from neural_compressor.common.benchmark import (
+            dump_numa_info,
+            format_list2str,
+            parse_str2list,
+            set_cores_for_instance,
+        )
+
+        numa_info = dump_numa_info()
+        available_cores = [core for node in numa_info for core in numa_info[node]]
+        cores = self.cores if self.cores is not None else format_list2str(available_cores)
+        if len(parse_str2list(cores)) < self.num_workers:
+            logger.warning(
+                f"There are fewer available cores than {self.num_workers} workers, trial workers won't be pinned."
+            )
+            return [None] * self.num_workers
+        args = argparse.Namespace(
+            num_instances=self.num_workers,
+            num_cores_per_instance=self.num_cores_per_worker,
+            cores=cores,
+        )
+        core_list_per_instance = set_cores_for_instance(args, numa_info)
+        return [parse_str2list(core_list[1]) for core_list in core_list_per_instance.values()]
+
+    def run(
+        self,
+        trial_fn: Callable[[BaseConfig], Any],
+        config_loader: "ConfigLoader",
+        get_cached_result: Optional[Callable[[BaseConfig], Optional[Tuple[Any, float]]]] = None,
+    ) -> Generator[Tuple[int, BaseConfig, Any, float], None, None]:
+        """Run trials concurrently and yield the results in trial-index order."""
+        mp_context = multiprocessing.get_context(self.start_method)
+        core_queue = mp_context.Queue()
+        for cores in self.get_cores_per_worker():
+            core_queue.put(cores)
+        pool = mp_context.Pool(
+            processes=self.num_workers,
+            initializer=_init_trial_worker,
+            initargs=(pickle.dumps(trial_fn), core_queue),
+        )
+        # pending trials: (trial_index, quant_config, async_result, cached_result)
+        pending_trials = deque()
+        num_running_trials = 0
+        config_iter = enumerate(config_loader, 1)
+        try:
+            while True:
+                while num_running_trials < self.num_workers:
+                    next_trial = next(config_iter, None)
+                    if next_trial is None:
+                        break
+                    trial_index, quant_config = next_trial
+                    cached_result = get_cached_result(quant_config) if get_cached_result else None
+                    if cached_result is not None:
+                        pending_trials.append((trial_index, quant_config, None, cached_result))
+                        continue
+                    async_result = pool.apply_async(_run_trial_in_worker, (quant_config,))
+                    pending_trials.append((trial_index, quant_config, async_result, None))
+                    num_running_trials += 1
+                if not pending_trials:
+                    break
+                trial_index, quant_config, async_result, cached_result = pending_trials.popleft()
+                if async_result is not None:
+                    cached_result = async_result.get()
+                    num_running_trials -= 1
+                trial_result, elapsed_time = cached_result
+                yield trial_index, quant_config, trial_result, elapsed_time
+        finally:
+            if num_running_trials:
+                logger.info(f"Cancel {num_running_trials} outstanding trial(s).")
+            # terminate the workers to cancel outstanding trials
+            pool.terminate()
+            pool.join()
+
+
+class TrialCache:
+    """An on-disk cache of trial results keyed on the model fingerprint and the trial config.
+
+    Every trial result is appended as one JSON line to `<workspace>/trial_cache.jsonl`, together with the
+    fingerprint of the float model, the canonical JSON string of the config and the elapsed time of the trial.
+    Cached results are looked up in the records added in this run and the cache file under `resume_from`,
+    so a crashed or extended tuning can skip the trials that have been evaluated.
+
+    Examples:
+        from neural_compressor.common import set_resume_from
+
+        set_resume_from("./nc_workspace/2024-05-01_10-00-00/")  # the workspace of the previous tuning
+        q_model = autotune(model, tune_config, eval_fn)
+    """
+
+    CACHE_FILE_NAME = "trial_cache.jsonl"
+
+    def __init__(self, model_fingerprint: str, workspace: str, resume_from: Optional[str] = None) -> None:
+        """Init a TrialCache.
+
+        Args:
+            model_fingerprint (str): the fingerprint of the float model.
+            workspace (str): the directory to write the cache file.
+            resume_from (str, optional): the directory to load the cache file from. Defaults to None.
+        """
+        self.model_fingerprint = model_fingerprint
+        self.cache_path = os.path.join(workspace, self.CACHE_FILE_NAME)
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # quantization may update the config (e.g. add local configs), so the key of a config is fixed
+        # at the first lookup. {id(config): (config, key, config_string)}
+        self._config_keys: Dict[int, Tuple[BaseConfig, str, str]] = {}
+        if resume_from is not None:
+            self._load(os.path.join(resume_from, self.CACHE_FILE_NAME))
+
+    def _load(self, cache_path: str) -> None:
+        if not os.path.exists(cache_path):
+            logger.warning(f"No trial cache is found in {cache_path}.")
+            return
+        with open(cache_path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:  # pragma: no cover
+                    # the last line may be truncated if the previous tuning crashed
+                    continue
+                self._records[record["key"]] = record
+        logger.info(f"Loaded {len(self._records)} trial result(s) from {cache_path}.")
+
+    @staticmethod
+    def get_canonical_config_string(quant_config: BaseConfig) -> str:
+        """Get the canonical JSON string of the config, which doesn't depend on the order of items."""
+        config_json = quant_config.to_json_string()
+        config_dict = json.loads(config_json) if isinstance(config_json, str) else config_json
+        return json.dumps(config_dict, sort_keys=True, default=str)
+
+    def _get_key_and_config_string(self, quant_config: BaseConfig) -> Tuple[str, str]:
+        if id(quant_config) not in self._config_keys:
+            config_string = self.get_canonical_config_string(quant_config)
+            key = hashlib.sha256((self.model_fingerprint + config_string).encode()).hexdigest()
+            self._config_keys[id(quant_config)] = (quant_config, key, config_string)
+        _, key, config_string = self._config_keys[id(quant_config)]
+        return key, config_string
+
+    def get_key(self, quant_config: BaseConfig) -> str:
+        """Get the cache key of the config."""
+        return self._get_key_and_config_string(quant_config)[0]
+
+    def get(self, quant_config: BaseConfig) -> Optional[Dict[str, Any]]:
+        """Get the cached record of the config, None if the config is not cached."""
+        return self._records.get(self.get_key(quant_config))
+
+    def add(self, quant_config: BaseConfig, trial_result: Union[int, float], elapsed_time: Optional[float]) -> None:
+        """Add a trial result to the cache and append it to the cache file."""
+        key, config_string = self._get_key_and_config_string(quant_config)
+        record = {
+            "key": key,
+            "model_fingerprint": self.model_fingerprint,
+            "quant_config": config_string,
+            "trial_result": trial_result,
+            "elapsed_time": elapsed_time,
+        }
+        try:
+            line = json.dumps(record)
+        except TypeError:
+            logger.warning(f"Trial result {trial_result} is not JSON serializable, skip caching it.")
+            return
+        self._records[key] = record
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(self.cache_path, "a") as f:
+            f.write(line + "\n")
+
+
 class TuningConfig:
     """Config for auto tuning pipeline.
 
@@ -361,6 +694,8 @@ class TuningConfig:
         sampler: Sampler = default_sampler,
         tolerable_loss=0.01,
         max_trials=100,
+        trial_executor: Optional[TrialExecutor] = None,
+        early_stop_confidence: Optional[float] = 0.99,
     ):
         """Initial a TuningConfig.
 
@@ -370,11 +705,22 @@ class TuningConfig:
             tolerable_loss: This float indicates how much metric loss we can accept.
                 The metric loss is relative, it can be both positive and negative. Default is 0.01.
             max_trials: Max tuning times. Combine with `tolerable_loss` field to decide when to stop. Default is 100.
+            trial_executor: The executor that runs trials, e.g. `ParallelTrialExecutor` to run several trials
+                concurrently. Defaults to None, trials run one by one in the current process.
+            early_stop_confidence: The confidence to stop the staged evaluation of a trial early (see
+                `EvaluationFuncWrapper`), when the trial can neither meet `tolerable_loss` nor beat the best trial.
+                The upper confidence bound of the final result is derived from the Hoeffding inequality, which
+                assumes the per-sample scores are within [0, 1] and the evaluation set is shuffled. The bound is
+                checked at geometrically spaced sample counts and the error budget `1 - early_stop_confidence` is
+                split over the checks, so a trial is wrongly stopped with at most that probability.
+                Set it to None to always finish the evaluation. Default is 0.99.
         """
         self.config_set = config_set
         self.sampler = sampler
         self.tolerable_loss = tolerable_loss
         self.max_trials = max_trials
+        self.trial_executor = trial_executor
+        self.early_stop_confidence = early_stop_confidence
 
 
 class _TrialRecord:
@@ -383,12 +729,22 @@ class _TrialRecord:
         unique_id = str(uuid.uuid4())
         return unique_id
 
-    def __init__(self, trial_index: int, trial_result: Union[int, float], quant_config: BaseConfig):
+    def __init__(
+        self,
+        trial_index: int,
+        trial_result: Union[int, float],
+        quant_config: BaseConfig,
+        elapsed_time: Optional[float] = None,
+        early_stopped: bool = False,
+    ):
         # The unique id to refer to one trial
         self.trial_id = _TrialRecord._generate_unique_id()
         self.trial_index = trial_index
         self.trial_result = trial_result
         self.quant_config = quant_config
+        self.elapsed_time = elapsed_time
+        # The trial_result is a partial result if the evaluation is stopped early
+        self.early_stopped = early_stopped
 
 
 class TuningMonitor:
@@ -405,23 +761,72 @@ class TuningMonitor:
             trial_cnt (int): The number of trials performed.
             tuning_history (List[_TrialRecord]): The history of tuning records.
             baseline: The baseline value for comparison.
+            trial_cache (TrialCache): The on-disk cache of trial results, enabled by `set_model_fingerprint`.
         """
         self.tuning_config = tuning_config
         self.trial_cnt = 0
         self.tuning_history: List[_TrialRecord] = []
         self.baseline = None
+        self.trial_cache: Optional[TrialCache] = None
+        # the checks of the staged evaluation of current trial, reset by `add_trial_result`
+        self._num_evaluation_checks = 0
+        self._next_evaluation_check = 0
+        self._warned_result_range = False
+
+    def set_model_fingerprint(self, model_fingerprint: str) -> None:
+        """Enable the trial cache for the float model with the given fingerprint.
+
+        The cache is written to `options.workspace` and loaded from `options.resume_from`.
+
+        Args:
+            model_fingerprint (str): The fingerprint of the float model.
+        """
+        from neural_compressor.common import options
+
+        self.trial_cache = TrialCache(model_fingerprint, options.workspace, options.resume_from)
 
-    def add_trial_result(self, trial_index: int, trial_result: Union[int, float], quant_config: BaseConfig) -> None:
-        """Adds a trial result to the tuning history.
+    def get_cached_trial_result(self, quant_config: BaseConfig) -> Optional[Tuple[Union[int, float], float]]:
+        """Get the cached result of the config.
+
+        Args:
+            quant_config (BaseConfig): The quantization configuration.
+
+        Returns:
+            The cached `(trial_result, elapsed_time)`, or None if the trial result is not cached.
+        """
+        if self.trial_cache is None:
+            return None
+        record = self.trial_cache.get(quant_config)
+        if record is None:
+            return None
+        logger.info(f"Found cached trial result {record['trial_result']}, skip the trial.")
+        return record["trial_result"], record["elapsed_time"]
+
+    def add_trial_result(
+        self,
+        trial_index: int,
+        trial_result: Union[int, float],
+        quant_config: BaseConfig,
+        elapsed_time: Optional[float] = None,
+        early_stopped: bool = False,
+    ) -> None:
+        """Adds a trial result to the tuning history and the trial cache.
 
         Args:
             trial_index (int): The index of the trial.
             trial_result (Union[int, float]): The result of the trial.
             quant_config (BaseConfig): The quantization configuration used for the trial.
+            elapsed_time (float, optional): The elapsed time of the trial in seconds. Defaults to None.
+            early_stopped (bool, optional): Whether the evaluation is stopped early, the partial result
+                isn't cached. Defaults to False.
         """
         self.trial_cnt += 1
-        trial_record = _TrialRecord(trial_index, trial_result, quant_config)
+        self._num_evaluation_checks = 0
+        self._next_evaluation_check = 0
+        trial_record = _TrialRecord(trial_index, trial_result, quant_config, elapsed_time, early_stopped)
         self.tuning_history.append(trial_record)
+        if self.trial_cache is not None and not early_stopped:
+            self.trial_cache.add(quant_config, trial_result, elapsed_time)
 
     def set_baseline(self, baseline: float):
         """Set the baseline value for auto-tune.
@@ -478,6 +883,52 @@ class TuningMonitor:
         # [-1] is the last element representing the latest trail record.
         return reach_max_trials or meet_accuracy_goal
 
+    def need_stop_evaluation(self, partial_result: Union[int, float], num_samples: int) -> bool:
+        """Check if the staged evaluation of current trial can be stopped early.
+
+        It's stopped if the upper confidence bound of the final result is lower than both the accuracy goal and
+        the result of the best trial finishing the evaluation, i.e., the trial can't change the tuning result with
+        `early_stop_confidence`. The bound is checked at the first stage and then whenever the number of samples
+        is doubled, and the k-th check takes 1 / (k * (k + 1)) of the error budget, so the probability that any
+        check of the trial is wrong is at most `1 - early_stop_confidence` (union bound).
+
+        Args:
+            partial_result (Union[int, float]): The result of the evaluated samples.
+            num_samples (int): The number of the evaluated samples.
+
+        Returns:
+            True if the rest of the evaluation can be skipped, otherwise False.
+        """
+        confidence = self.tuning_config.early_stop_confidence
+        if confidence is None or self.baseline is None or num_samples <= 0:
+            return False
+        if not 0 <= partial_result <= 1:
+            if not self._warned_result_range:
+                logger.warning(
+                    f"The partial result {partial_result} is out of [0, 1], which the confidence bound assumes, "
+                    "skip stopping the evaluation early."
+                )
+                self._warned_result_range = True
+            return False
+        if num_samples < self._next_evaluation_check:
+            return False
+        self._num_evaluation_checks += 1
+        self._next_evaluation_check = 2 * num_samples
+        finished_results = [record.trial_result for record in self.tuning_history if not record.early_stopped]
+        if not finished_results:
+            return False
+        error = (1 - confidence) / (self._num_evaluation_checks * (self._num_evaluation_checks + 1))
+        # Hoeffding bound: P(final_result >= partial_result + t) <= exp(-2 * num_samples * t^2)
+        upper_bound = partial_result + math.sqrt(math.log(1 / error) / (2 * num_samples))
+        accuracy_goal = self.baseline * (1 - self.tuning_config.tolerable_loss)
+        if upper_bound < accuracy_goal and upper_bound < max(finished_results):
+            logger.info(
+                f"Stop the evaluation early after {num_samples} samples, the result is at most {upper_bound:.4f} "
+                f"with {confidence} confidence."
+            )
+            return True
+        return False
+
 
 def init_tuning(tuning_config: TuningConfig) -> Tuple[ConfigLoader, TuningLogger, TuningMonitor]:
     """Initializes the tuning process.
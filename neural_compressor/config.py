@@ -742,6 +742,8 @@ class _BaseQuantizationConfig:
                  "add_qdq_pair_to_weight": whether add QDQ pair for weights, only valid for onnxrt_trt_ep
                  "optypes_to_exclude_output_quant": don"t quantize output of specified optypes
                  "dedicated_qdq_pair": whether dedicate QDQ pair, only valid for onnxrt_trt_ep
+                 "calib_num_workers": number of concurrent inference requests during calibration,
+                                      only valid for onnx models
         quant_format: Support "default", "QDQ" and "QOperator", only required in ONNXRuntime.
         device: Support "cpu", "gpu", "npu" and "xpu".
         calibration_sampling_size: Number of calibration sample.
@@ -997,6 +999,12 @@ class _BaseQuantizationConfig:
             else:
                 return False
 
+        def calib_num_workers(val=None):
+            if val is not None:
+                return _check_value("calib_num_workers", val, int)
+            else:
+                return 1
+
         RECIPES = {
             "smooth_quant": smooth_quant,
             "smooth_quant_args": smooth_quant_args,
@@ -1012,6 +1020,7 @@ class _BaseQuantizationConfig:
             "add_qdq_pair_to_weight": add_qdq_pair_to_weight,
             "optypes_to_exclude_output_quant": optypes_to_exclude_output_quant,
             "dedicated_qdq_pair": dedicated_qdq_pair,
+            "calib_num_workers": calib_num_workers,
             "rtn_args": rtn_args,
             "awq_args": awq_args,
             "gptq_args": gptq_args,
@@ -1211,6 +1220,8 @@ class PostTrainingQuantConfig(_BaseQuantizationConfig):
                  "add_qdq_pair_to_weight": whether add QDQ pair for weights, only valid for onnxrt_trt_ep
                  "optypes_to_exclude_output_quant": don"t quantize output of specified optypes
                  "dedicated_qdq_pair": whether dedicate QDQ pair, only valid for onnxrt_trt_ep
+                 "calib_num_workers": number of concurrent inference requests during calibration,
+                                      only valid for onnx models
         quant_format: Support "default", "QDQ" and "QOperator", only required in ONNXRuntime.
         inputs: Inputs of model, only required in tensorflow.
         outputs: Outputs of model, only required in tensorflow.
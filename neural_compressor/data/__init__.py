@@ -21,9 +21,11 @@
 import neural_compressor.data.datasets
 import neural_compressor.data.transforms
 from .datasets import Datasets, Dataset, IterableDataset, dataset_registry, TensorflowImageRecord, COCORecordDataset
+from .datasets import CachedDataset
 from .dataloaders import DATALOADERS, DataLoader
 from .dataloaders.dataloader import check_dataloader
 from .dataloaders.default_dataloader import DefaultDataLoader
+from .dataloaders.collate import SchemaCollate
 from .transforms import TRANSFORMS, BaseTransform, ComposeTransform, transform_registry, Postprocess
 from .transforms import LabelShift, BilinearImagenetTransform, TensorflowResizeCropImagenetTransform
 from .transforms import TFSquadV1PostTransform, TFSquadV1ModelZooPostTransform
@@ -37,9 +39,11 @@ __all__ = [
     "DataLoader",
     "DATALOADERS",
     "DefaultDataLoader",
+    "SchemaCollate",
     "Datasets",
     "Dataset",
     "IterableDataset",
+    "CachedDataset",
     "COCORecordDataset",
     "dataset_registry",
     "TensorflowImageRecord",
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2024 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Collate which fills preallocated buffers according to the schema of samples."""
+
+import collections
+import math
+import operator
+
+import numpy as np
+
+
+def _getter(path):
+    """Get the function which fetches the item at path of a sample."""
+    if not path:
+        return lambda sample: sample
+    if len(path) == 1:
+        return operator.itemgetter(path[0])
+    if len(path) == 2:
+        first, second = path
+        return lambda sample: sample[first][second]
+
+    def get(sample):
+        for key in path:
+            sample = sample[key]
+        return sample
+
+    return get
+
+
+class _Leaf:
+    """An array of the samples, which is collated into a preallocated buffer."""
+
+    def __init__(self, path, dtype, shape, ragged, dtypes=None):
+        self.path = path
+        self.get = _getter(path)
+        self.dtype = dtype
+        # the dtypes of the samples the leaf is built from, which are cast into the promoted dtype
+        self.dtypes = frozenset(dtypes or (dtype,))
+        # the max shape of samples, and whether each axis is ragged
+        self.shape = shape
+        self.ragged = ragged
+        self.is_ragged = any(ragged)
+        self.buffers = []
+        self.masks = []
+
+    @staticmethod
+    def _view(storages, index, dtype, shape):
+        """Get a contiguous array of shape from the storage at index, which is enlarged if it's too small."""
+        numel = math.prod(shape)
+        while len(storages) <= index:
+            storages.append(None)
+        if storages[index] is None or storages[index].size < numel:
+            storages[index] = np.empty(numel, dtype=dtype)
+        return storages[index][:numel].reshape(shape)
+
+    def collate(self, values, index, pad_value):
+        """Collate the arrays of a batch into the buffer at index.
+
+        Returns:
+            tuple: the collated array and the mask of the ragged axes, which is None if no axis is ragged.
+        """
+        # the values which aren't arrays raise AttributeError
+        if not self.is_ragged:
+            specs = {(value.dtype, value.shape) for value in values}
+            if any(dtype not in self.dtypes or shape != self.shape for dtype, shape in specs):
+                raise _SchemaMismatch(self.path)
+            out = self._view(self.buffers, index, self.dtype, (len(values),) + self.shape)
+            if not self.shape:
+                return np.stack(values, out=out), None
+            # concatenating the arrays into the buffer flattened along the first two axes is cheaper than stacking
+            np.concatenate(values, out=out.reshape((-1,) + self.shape[1:]))
+            return out, None
+        specs = {(value.dtype, value.ndim) for value in values}
+        if any(dtype not in self.dtypes or ndim != len(self.shape) for dtype, ndim in specs):
+            raise _SchemaMismatch(self.path)
+        shape = tuple(
+            max(value.shape[axis] for value in values) if ragged else size
+            for axis, (size, ragged) in enumerate(zip(self.shape, self.ragged))
+        )
+        for value in values:
+            if any(not ragged and dim != size for dim, size, ragged in zip(value.shape, shape, self.ragged)):
+                raise _SchemaMismatch(self.path)
+        out = self._view(self.buffers, index, self.dtype, (len(values),) + shape)
+        mask = self._view(
+            self.masks, index, np.bool_, (len(values),) + tuple(size for size, r in zip(shape, self.ragged) if r)
+        )
+        out.fill(pad_value)
+        mask.fill(False)
+        for i, value in enumerate(values):
+            out[i][tuple(slice(0, dim) for dim in value.shape)] = value
+            mask[i][tuple(slice(0, dim) for dim, r in zip(value.shape, self.ragged) if r)] = True
+        return out, mask
+
+
+class _SchemaMismatch(Exception):
+    """The batch doesn't match the schema, which needs to be rebuilt."""
+
+
+class SchemaCollate:
+    """Collate the samples into preallocated buffers according to their schema.
+
+    The schema, i.e. the nested dict/sequence structure of the samples and the dtype and shape of their numpy
+    arrays, is built from the first batch. Then the arrays of each batch are copied into reusable buffers
+    without recursing over the samples or allocating new arrays. The arrays of different shapes are padded with
+    pad_value and get a boolean mask of the ragged axes, which is put next to the padded array under the key
+    `key + mask_suffix` in a dict, or paired with the padded array as a tuple elsewhere. The other objects, e.g.
+    the python number labels, are collected into lists as `default_collate` does. The arrays of different dtypes
+    are cast to their promoted dtype. When a batch doesn't match the schema, e.g. an array gets a different shape
+    or dtype, the schema is rebuilt from it.
+
+    The buffers are reused in a ring of num_buffers, so a collated batch is only valid until another
+    num_buffers batches are collated. Copy the arrays of the batch to keep them.
+    """
+
+    def __init__(self, pad_value=0, mask_suffix="_mask", num_buffers=2):
+        """Initialize SchemaCollate.
+
+        Args:
+            pad_value (int or float, optional): value to pad the arrays of different shapes. Defaults to 0.
+            mask_suffix (str, optional): suffix of the dict key of masks. Defaults to "_mask".
+            num_buffers (int, optional): number of buffers reused in turn. Defaults to 2.
+        """
+        self.pad_value = pad_value
+        self.mask_suffix = mask_suffix
+        self.num_buffers = num_buffers
+        self.schema = None
+        self._leaves = {}
+        self._step = 0
+
+    def _build(self, values, path):
+        """Build the schema node of values, the items at path of the samples."""
+        first = values[0]
+        if isinstance(first, np.ndarray) and not first.dtype.hasobject:
+            if any(not isinstance(value, np.ndarray) or value.ndim != first.ndim for value in values):
+                raise ValueError("Can't collate the arrays of different ranks at {}.".format(list(path)))
+            dtypes = {value.dtype for value in values}
+            dtype = np.result_type(*dtypes)
+            shape = tuple(max(dims) for dims in zip(*(value.shape for value in values)))
+            ragged = tuple(min(dims) != max(dims) for dims in zip(*(value.shape for value in values)))
+            leaf = self._leaves.get(path)
+            if leaf is not None and len(leaf.shape) == len(shape):
+                # merge the shape of previous schema, so the axis changing between batches is ragged
+                ragged = tuple(r or p or s != ps for r, p, s, ps in zip(ragged, leaf.ragged, shape, leaf.shape))
+                shape = tuple(max(s, ps) for s, ps in zip(shape, leaf.shape))
+            if leaf is not None and leaf.dtype == dtype:
+                dtypes |= leaf.dtypes
+            new_leaf = _Leaf(path, dtype, shape, ragged, dtypes)
+            if leaf is not None and leaf.dtype == dtype:
+                new_leaf.buffers, new_leaf.masks = leaf.buffers, leaf.masks
+            self._leaves[path] = new_leaf
+            return ("array", new_leaf)
+        if isinstance(first, collections.abc.Mapping):
+            return ("mapping", [(key, self._build([value[key] for value in values], path + (key,))) for key in first])
+        if (
+            isinstance(first, collections.abc.Sequence)
+            and not isinstance(first, (str, bytes))
+            and all(isinstance(value, collections.abc.Sequence) and len(value) == len(first) for value in values)
+        ):
+            return ("sequence", [self._build([value[i] for value in values], path + (i,)) for i in range(len(first))])
+        return ("object", _getter(path))
+
+    def _matches(self, node, sample):
+        """Check the structure of a sample against the schema node."""
+        kind, content = node
+        if kind == "mapping":
+            return (
+                isinstance(sample, collections.abc.Mapping)
+                and len(sample) == len(content)
+                and all(key in sample and self._matches(child, sample[key]) for key, child in content)
+            )
+        if kind == "sequence":
+            return (
+                isinstance(sample, collections.abc.Sequence)
+                and len(sample) == len(content)
+                and all(self._matches(child, item) for child, item in zip(content, sample))
+            )
+        return True
+
+    def _collate(self, node, batch, index):
+        kind, content = node
+        if kind == "array":
+            out, mask = content.collate([content.get(sample) for sample in batch], index, self.pad_value)
+            return out if mask is None else (out, mask)
+        if kind == "mapping":
+            result = {}
+            for key, child in content:
+                if child[0] != "array" or not child[1].is_ragged:
+                    result[key] = self._collate(child, batch, index)
+                    continue
+                result[key], mask = self._collate(child, batch, index)
+                # the masks provided by the samples are padded as other arrays, and don't get masks of their own
+                if not isinstance(key, str) or key.endswith(self.mask_suffix):
+                    continue
+                mask_key = key + self.mask_suffix
+                if all(mask_key != other for other, _ in content):
+                    result[mask_key] = mask
+            return result
+        if kind == "sequence":
+            return [self._collate(child, batch, index) for child in content]
+        return [content(sample) for sample in batch]
+
+    def __call__(self, batch):
+        """Collate a batch of samples.
+
+        Args:
+            batch (list): the samples.
+
+        Returns:
+            The collated batch.
+        """
+        index = self._step % self.num_buffers
+        self._step += 1
+        if self.schema is not None and self._matches(self.schema, batch[0]):
+            try:
+                return self._collate(self.schema, batch, index)
+            except (_SchemaMismatch, AttributeError, KeyError, IndexError, TypeError):
+                pass
+        self.schema = self._build(list(batch), ())
+        try:
+            return self._collate(self.schema, batch, index)
+        except _SchemaMismatch as e:
+            raise ValueError("Can't collate the arrays at {} into the schema of the batch.".format(list(e.args[0])))
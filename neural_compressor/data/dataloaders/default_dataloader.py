@@ -18,13 +18,17 @@
 """Default dataloader for multiple framework backends."""
 
 import collections
+import copy
 from abc import abstractmethod
 from math import ceil, floor
 
 import numpy as np
 
+from neural_compressor.utils import logger
+
 from .base_dataloader import BaseDataLoader
 from .fetcher import FETCHERS
+from .prefetcher import MultiWorkerPrefetcher
 from .sampler import BatchSampler, IterableSampler, SequentialSampler
 
 
@@ -45,6 +49,17 @@ def default_collate(batch):  # pragma: no cover
         return batch
 
 
+class _BatchTransformCollate:
+    """Apply the transform of the dataset to the fetched samples at once, then merge them."""
+
+    def __init__(self, transform, collate_fn):
+        self.transform = transform
+        self.collate_fn = collate_fn
+
+    def __call__(self, batch):
+        return self.collate_fn(self.transform.apply_batch(batch))
+
+
 class DefaultDataLoader(BaseDataLoader):  # pragma: no cover
     """DefaultDataLoader for multiple framework backends."""
 
@@ -60,6 +75,8 @@ class DefaultDataLoader(BaseDataLoader):  # pragma: no cover
         pin_memory=False,
         shuffle=False,
         distributed=False,
+        prefetch_factor=2,
+        batch_transform=False,
     ):
         """Initialize DefaultDataLoader.
 
@@ -72,10 +89,17 @@ class DefaultDataLoader(BaseDataLoader):  # pragma: no cover
             collate_fn (callable, optional): merge data with outer dimension batch size. Defaults to None.
             sampler (Sampler, optional): Sampler object to sample data. Defaults to None.
             batch_sampler (BatchSampler, optional): BatchSampler object to generate batch of indices. Defaults to None.
-            num_workers (int, optional): number of subprocesses to use for data loading. Defaults to 0.
+            num_workers (int, optional): number of subprocesses to use for data loading. The workers load the
+                                         batches of index-style dataset in parallel and pass them through shared
+                                         memory, 0 means loading in the main process. Defaults to 0.
             pin_memory (bool, optional): whether to copy data into pinned memory before returning. Defaults to False.
             shuffle (bool, optional): whether to shuffle data. Defaults to False.
             distributed (bool, optional): whether the dataloader is distributed. Defaults to False.
+            prefetch_factor (int, optional): number of batches loaded in advance by each worker. Defaults to 2.
+            batch_transform (bool, optional): whether to apply the transform of the dataset, e.g. ComposeTransform,
+                                              to the fetched batch by its `apply_batch` instead of to each sample.
+                                              The dataset should apply `self.transform` to the (image, label)
+                                              sample, as the built-in datasets do. Defaults to False.
         """
         self.dataset = dataset
         self.last_batch = last_batch
@@ -87,6 +111,8 @@ class DefaultDataLoader(BaseDataLoader):  # pragma: no cover
         self._batch_size = batch_size
         self.shuffle = shuffle
         self.distributed = distributed
+        self.prefetch_factor = prefetch_factor
+        self.batch_transform = batch_transform
         self.drop_last = False if last_batch == "rollover" else True
         if self.collate_fn is None:
             self.collate_fn = default_collate
@@ -149,7 +175,16 @@ class DefaultDataLoader(BaseDataLoader):  # pragma: no cover
         distributed,
     ):
         sampler = self._generate_sampler(dataset, distributed)
+        if self.batch_transform:
+            dataset, collate_fn = self._move_transform_to_batch(dataset, collate_fn)
         self.batch_sampler = BatchSampler(sampler, batch_size, self.drop_last)
+        if num_workers > 0:
+            if self.dataset_type == "index":
+                yield from MultiWorkerPrefetcher(
+                    dataset, collate_fn, self.batch_sampler, num_workers, self.prefetch_factor
+                )
+                return
+            logger.warning("Iterable-style dataset is loaded in the main process, ignoring num_workers.")
         self.fetcher = FETCHERS[self.dataset_type](dataset, collate_fn, self.drop_last, distributed)
 
         for batched_indices in self.batch_sampler:
@@ -159,6 +194,17 @@ class DefaultDataLoader(BaseDataLoader):  # pragma: no cover
             except StopIteration:
                 return
 
+    @staticmethod
+    def _move_transform_to_batch(dataset, collate_fn):
+        """Get a copy of the dataset without its transform, and the collate_fn applying the transform to a batch."""
+        transform = getattr(dataset, "transform", None)
+        if not hasattr(transform, "apply_batch"):
+            logger.warning("The transform of the dataset can't be applied to a batch, ignoring batch_transform.")
+            return dataset, collate_fn
+        dataset = copy.copy(dataset)
+        dataset.transform = None
+        return dataset, _BatchTransformCollate(transform, collate_fn)
+
     def _generate_sampler(self, dataset, distributed):
         if hasattr(dataset, "__getitem__"):
             self.dataset_type = "index"
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2024 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Multi-worker prefetcher which passes the collated batches through a shared-memory ring buffer."""
+
+import collections
+import multiprocessing
+import queue
+import traceback
+
+import numpy as np
+
+from neural_compressor.utils import logger
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # pragma: no cover
+    # python 3.7, the batches are pickled through the queue
+    shared_memory = None
+
+# the alignment of arrays in a slot
+ALIGNMENT = 64
+# the headroom of a slot over the batch which sizes it, so the batches of a bit larger size still fit in
+SLOT_HEADROOM = 1.25
+# seconds to wait for a batch before checking whether the workers are alive
+POLL_INTERVAL = 5.0
+
+
+class _ArrayRef:
+    """The placeholder of an array written in a slot."""
+
+    __slots__ = ("offset", "shape", "dtype")
+
+    def __init__(self, offset, shape, dtype):
+        self.offset = offset
+        self.shape = shape
+        self.dtype = dtype
+
+
+def _align(nbytes):
+    return (nbytes + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _flatten(batch, arrays):
+    """Replace the numpy arrays in a nested batch with placeholders, and collect (placeholder, array) pairs."""
+    if isinstance(batch, np.ndarray) and not batch.dtype.hasobject:
+        ref = _ArrayRef(None, batch.shape, batch.dtype)
+        arrays.append((ref, batch))
+        return ref
+    if isinstance(batch, collections.abc.Mapping):
+        return {key: _flatten(value, arrays) for key, value in batch.items()}
+    if isinstance(batch, (list, tuple)):
+        return type(batch)(_flatten(item, arrays) for item in batch)
+    return batch
+
+
+def _unflatten(skeleton, buf):
+    """Copy the arrays out of the slot to rebuild the batch."""
+    if isinstance(skeleton, _ArrayRef):
+        return np.ndarray(skeleton.shape, skeleton.dtype, buffer=buf, offset=skeleton.offset).copy()
+    if isinstance(skeleton, dict):
+        return {key: _unflatten(value, buf) for key, value in skeleton.items()}
+    if isinstance(skeleton, (list, tuple)):
+        return type(skeleton)(_unflatten(item, buf) for item in skeleton)
+    return skeleton
+
+
+def _worker_loop(dataset, collate_fn, index_queue, result_queue, done_event):
+    """Fetch and collate the batches of the tasks, and write their arrays into the slots.
+
+    A task is (batch index, sample indices, slot index, slot name), the result is (batch index, kind, payload,
+    bytes of arrays), where kind is "shm" with the batch skeleton, "pickle" with the batch which doesn't fit in
+    the slot, or "error" with the traceback.
+    """
+    # the results not sent yet are dropped when the main process stops iterating
+    result_queue.cancel_join_thread()
+    attached = {}
+    while True:
+        task = index_queue.get()
+        if task is None or done_event.is_set():
+            break
+        batch_idx, batched_indices, slot_idx, slot_name = task
+        try:
+            batch = collate_fn([dataset[idx] for idx in batched_indices])
+            arrays = []
+            skeleton = _flatten(batch, arrays)
+            nbytes = 0
+            for ref, array in arrays:
+                ref.offset = nbytes
+                nbytes += _align(array.nbytes)
+            slot = None
+            if slot_name is not None:
+                if slot_idx not in attached or attached[slot_idx].name != slot_name:
+                    if slot_idx in attached:
+                        attached[slot_idx].close()
+                    attached[slot_idx] = shared_memory.SharedMemory(name=slot_name)
+                slot = attached[slot_idx]
+            if not arrays or slot is None or nbytes > slot.size:
+                result_queue.put((batch_idx, "pickle", batch, nbytes))
+                continue
+            for ref, array in arrays:
+                np.ndarray(ref.shape, ref.dtype, buffer=slot.buf, offset=ref.offset)[...] = array
+            result_queue.put((batch_idx, "shm", skeleton, nbytes))
+        except Exception:
+            result_queue.put((batch_idx, "error", traceback.format_exc(), 0))
+    for slot in attached.values():
+        slot.close()
+
+
+class MultiWorkerPrefetcher:
+    """Load the batches of an index-style dataset in worker processes.
+
+    Each worker runs the dataset `__getitem__`, which applies the transforms, and the collate_fn, then writes
+    the numpy arrays of the batch into a slot of a shared-memory ring buffer. The number of slots bounds the
+    batches prefetched, and a slot is reused once its batch is copied out by the main process. The slots are
+    sized by the first batches, the batch which doesn't fit in its slot and the objects other than numpy arrays
+    are pickled through the queue, then the slot is enlarged for the next batches.
+    The batches are yielded in the order of batch_sampler.
+    """
+
+    def __init__(self, dataset, collate_fn, batch_sampler, num_workers, prefetch_factor=2):
+        """Initialize MultiWorkerPrefetcher.
+
+        Args:
+            dataset (object): index-style dataset from which to load the data
+            collate_fn (callable): merge data with outer dimension batch size
+            batch_sampler (BatchSampler): BatchSampler object to generate batch of indices
+            num_workers (int): number of worker processes
+            prefetch_factor (int, optional): number of batches prefetched per worker. Defaults to 2.
+        """
+        self.dataset = dataset
+        self.collate_fn = collate_fn
+        self.batch_sampler = batch_sampler
+        self.num_workers = num_workers
+        self.depth = max(num_workers * prefetch_factor, 1)
+
+    def __iter__(self):
+        """Yield the batches loaded by the workers."""
+        ctx = multiprocessing.get_context()
+        if shared_memory is not None:
+            # the workers share the resource tracker of the main process, otherwise the tracker started by a
+            # worker unlinks the slots attached when the worker exits
+            resource_tracker.ensure_running()
+        result_queue = ctx.Queue()
+        index_queues = [ctx.Queue() for _ in range(self.num_workers)]
+        done_event = ctx.Event()
+        workers = [
+            ctx.Process(
+                target=_worker_loop,
+                args=(self.dataset, self.collate_fn, index_queue, result_queue, done_event),
+                daemon=True,
+            )
+            for index_queue in index_queues
+        ]
+        for worker in workers:
+            worker.start()
+        slots = [None] * self.depth
+        free_slots = collections.deque(range(self.depth))
+        slot_of_batch = {}
+        batched_indices_iter = iter(self.batch_sampler)
+        exhausted = False
+        num_sent = num_yielded = 0
+        results = {}
+        try:
+            while True:
+                while free_slots and not exhausted:
+                    try:
+                        batched_indices = next(batched_indices_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    slot_idx = free_slots.popleft()
+                    slot_name = slots[slot_idx].name if slots[slot_idx] is not None else None
+                    index_queues[num_sent % self.num_workers].put((num_sent, batched_indices, slot_idx, slot_name))
+                    slot_of_batch[num_sent] = slot_idx
+                    num_sent += 1
+                if num_yielded == num_sent:
+                    return
+                while num_yielded not in results:
+                    try:
+                        batch_idx, kind, payload, nbytes = result_queue.get(timeout=POLL_INTERVAL)
+                    except queue.Empty:
+                        if any(not worker.is_alive() for worker in workers):
+                            raise RuntimeError("DataLoader worker exited unexpectedly.")
+                        continue
+                    results[batch_idx] = (kind, payload, nbytes)
+                kind, payload, nbytes = results.pop(num_yielded)
+                slot_idx = slot_of_batch.pop(num_yielded)
+                if kind == "error":
+                    raise RuntimeError(f"Caught an exception in DataLoader worker:\n{payload}")
+                if kind == "shm":
+                    batch = _unflatten(payload, slots[slot_idx].buf)
+                else:
+                    batch = payload
+                    if shared_memory is not None and nbytes > 0:
+                        self._resize_slot(slots, slot_idx, nbytes)
+                free_slots.append(slot_idx)
+                num_yielded += 1
+                yield batch
+        finally:
+            self._shutdown(workers, index_queues, result_queue, done_event, slots)
+
+    @staticmethod
+    def _resize_slot(slots, slot_idx, nbytes):
+        """Replace the slot with a larger one, the workers attach to it by the new name."""
+        if slots[slot_idx] is not None:
+            slots[slot_idx].close()
+            slots[slot_idx].unlink()
+        slots[slot_idx] = shared_memory.SharedMemory(create=True, size=_align(int(nbytes * SLOT_HEADROOM)))
+
+    @staticmethod
+    def _shutdown(workers, index_queues, result_queue, done_event, slots):
+        done_event.set()
+        for index_queue in index_queues:
+            index_queue.put(None)
+        for worker in workers:
+            worker.join(timeout=POLL_INTERVAL)
+            if worker.is_alive():  # pragma: no cover
+                logger.warning(f"DataLoader worker {worker.pid} doesn't exit, terminate it.")
+                worker.terminate()
+        for q in index_queues + [result_queue]:
+            q.cancel_join_thread()
+            q.close()
+        for slot in slots:
+            if slot is not None:
+                slot.close()
+                slot.unlink()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2024 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Dataset which caches the decoded and transformed samples in a memory-mapped file."""
+
+import collections
+import functools
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import types
+
+import numpy as np
+
+from neural_compressor.utils import logger
+
+from ..dataloaders.prefetcher import _align, _ArrayRef, _flatten
+from .dataset import Dataset
+
+DEFAULT_CACHE_DIR = os.path.join("nc_workspace", "dataset_cache")
+
+
+def _fingerprint(obj, hasher, seen):
+    """Feed the type and the content of obj into hasher."""
+    if obj is None or isinstance(obj, (str, bytes, int, float, bool)):
+        hasher.update(repr(obj).encode())
+        return
+    if not isinstance(obj, np.ndarray) and hasattr(obj, "__array__"):
+        # e.g. the tensors of frameworks
+        obj = np.asarray(obj)
+    if isinstance(obj, np.ndarray):
+        hasher.update(repr((obj.dtype.str, obj.shape)).encode())
+        if obj.dtype.hasobject:
+            _fingerprint(obj.tolist(), hasher, seen)
+        else:
+            hasher.update(np.ascontiguousarray(obj).data)
+        return
+    if id(obj) in seen:
+        hasher.update(b"<cycle>")
+        return
+    seen.add(id(obj))
+    hasher.update("{}.{}".format(type(obj).__module__, type(obj).__qualname__).encode())
+    if isinstance(obj, collections.abc.Mapping):
+        for key, value in obj.items():
+            _fingerprint(key, hasher, seen)
+            _fingerprint(value, hasher, seen)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _fingerprint(item, hasher, seen)
+    elif isinstance(obj, (set, frozenset)):
+        for item in sorted(obj, key=repr):
+            _fingerprint(item, hasher, seen)
+    elif isinstance(obj, functools.partial):
+        for item in (obj.func, obj.args, obj.keywords):
+            _fingerprint(item, hasher, seen)
+    elif isinstance(obj, types.MethodType):
+        _fingerprint(obj.__func__, hasher, seen)
+        _fingerprint(obj.__self__, hasher, seen)
+    elif isinstance(obj, types.FunctionType):
+        # lambdas and local functions share the name, hash what they compute and the values they capture
+        hasher.update("{}.{}".format(obj.__module__, obj.__qualname__).encode())
+        cells = []
+        for cell in obj.__closure__ or ():
+            try:
+                cells.append(cell.cell_contents)
+            except ValueError:
+                cells.append("<empty cell>")
+        for item in (obj.__code__, obj.__defaults__, obj.__kwdefaults__, cells):
+            _fingerprint(item, hasher, seen)
+    elif isinstance(obj, types.CodeType):
+        for item in (obj.co_code, obj.co_consts, obj.co_names):
+            _fingerprint(item, hasher, seen)
+    elif callable(obj) and hasattr(obj, "__qualname__") and not hasattr(obj, "__wrapped__"):
+        # classes and the functions implemented in C
+        hasher.update("{}.{}".format(getattr(obj, "__module__", ""), obj.__qualname__).encode())
+        bound = getattr(obj, "__self__", None)
+        if bound is not None and not isinstance(bound, types.ModuleType):
+            _fingerprint(bound, hasher, seen)
+    elif hasattr(obj, "__dict__"):
+        _fingerprint(vars(obj), hasher, seen)
+    elif callable(obj) and " at 0x" in repr(obj):
+        raise ValueError(
+            "Can't fingerprint the callable {!r} of the dataset, pass the key of the cache instead.".format(obj)
+        )
+    else:
+        hasher.update(repr(obj).encode())
+
+
+def dataset_fingerprint(dataset):
+    """Get the hash of the dataset and its transforms, which are hashed by their types and attributes.
+
+    The functions are hashed by their code, default arguments and closures, the global variables they read are
+    not covered.
+
+    Args:
+        dataset (object): the dataset.
+
+    Returns:
+        str: the hex digest.
+
+    Raises:
+        ValueError: if a callable of the dataset can't be hashed.
+    """
+    hasher = hashlib.sha256()
+    _fingerprint(dataset, hasher, set())
+    return hasher.hexdigest()[:32]
+
+
+def _view(skeleton, data):
+    """Rebuild the sample with the arrays viewed from the memory-mapped data."""
+    if isinstance(skeleton, _ArrayRef):
+        return np.ndarray(skeleton.shape, skeleton.dtype, buffer=data, offset=skeleton.offset)
+    if isinstance(skeleton, dict):
+        return {key: _view(value, data) for key, value in skeleton.items()}
+    if isinstance(skeleton, (list, tuple)):
+        return type(skeleton)(_view(item, data) for item in skeleton)
+    return skeleton
+
+
+class CachedDataset(Dataset):
+    """Cache the samples of an index-style dataset, which are decoded and transformed, in a memory-mapped file.
+
+    The first pass over the dataset writes the numpy arrays of the samples into a file under cache_dir keyed by
+    the hash of the dataset and its transforms, the other objects of the samples, e.g. labels, are pickled in the
+    index of the file. Once all the samples are written, the samples are read from the file as read-only arrays
+    viewing the memory map without copies, so the later evaluations, e.g. the tuning trials, don't read, decode
+    and transform the samples again, neither do the processes created later with the same key.
+
+    The key doesn't cover the content of the files read by the dataset, nor the global variables read by its
+    functions, pass another key or remove the cache when they change. The samples are only written by the process
+    creating CachedDataset, iterate it with `num_workers=0` until the cache is complete, the dataloader workers
+    only fetch the samples from the dataset.
+    """
+
+    def __init__(self, dataset, cache_dir=None, key=None):
+        """Initialize CachedDataset.
+
+        Args:
+            dataset (object): index-style dataset implementing `__getitem__` and `__len__`.
+            cache_dir (str, optional): directory of the caches. Defaults to "nc_workspace/dataset_cache".
+            key (str, optional): key of the cache. Defaults to None, the hash of the dataset and its transforms.
+
+        Raises:
+            ValueError: if key is None and a callable of the dataset can't be hashed.
+        """
+        self.dataset = dataset
+        self.length = len(dataset)
+        self.key = key if key is not None else dataset_fingerprint(dataset)
+        self.cache_dir = cache_dir if cache_dir is not None else DEFAULT_CACHE_DIR
+        self.path = os.path.join(self.cache_dir, self.key)
+        self._pid = os.getpid()
+        self._skeletons = None
+        self._data = None
+        # the samples written into the temporary directory by the first pass
+        self._pending = {}
+        self._tmp_dir = None
+        self._file = None
+        self._nbytes = 0
+        self._disabled = False
+        self._warned_pid = None
+        self._load()
+
+    @property
+    def cached(self):
+        """Whether all the samples are read from the cache."""
+        return self._skeletons is not None
+
+    def _load(self):
+        index_path, data_path = os.path.join(self.path, "index.pkl"), os.path.join(self.path, "data.bin")
+        if not os.path.exists(index_path) or not os.path.exists(data_path):
+            return
+        with open(index_path, "rb") as f:
+            skeletons = pickle.load(f)
+        if len(skeletons) != self.length:
+            logger.warning("The dataset cache {} doesn't match the dataset length, ignore it.".format(self.path))
+            return
+        self._skeletons = skeletons
+        if os.path.getsize(data_path) > 0:
+            self._data = np.memmap(data_path, dtype=np.uint8, mode="r")
+        else:
+            self._data = np.empty(0, dtype=np.uint8)
+        logger.info("Load the {} cached samples from {}.".format(self.length, self.path))
+
+    def _write(self, index, sample):
+        arrays = []
+        skeleton = _flatten(sample, arrays)
+        if self._file is None:
+            try:
+                pickle.dumps(skeleton)
+            except Exception as e:
+                logger.warning("The samples can't be cached, because they can't be pickled: {}".format(e))
+                self._disabled = True
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._tmp_dir = tempfile.mkdtemp(prefix=self.key + ".", suffix=".partial", dir=self.cache_dir)
+            self._file = open(os.path.join(self._tmp_dir, "data.bin"), "wb")
+        for ref, array in arrays:
+            offset = _align(self._nbytes)
+            self._file.write(b"\0" * (offset - self._nbytes))
+            ref.offset = offset
+            self._file.write(np.ascontiguousarray(array).data)
+            self._nbytes = offset + array.nbytes
+        self._pending[index] = skeleton
+        if len(self._pending) == self.length:
+            self._finalize()
+
+    def _finalize(self):
+        """Publish the cache once all the samples are written, then read the samples from it."""
+        self._file.close()
+        self._file = None
+        with open(os.path.join(self._tmp_dir, "index.pkl"), "wb") as f:
+            pickle.dump([self._pending[index] for index in range(self.length)], f)
+        self._pending = {}
+        try:
+            os.rename(self._tmp_dir, self.path)
+        except OSError:
+            # another process has published the cache of the same key
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        self._tmp_dir = None
+        self._load()
+
+    def __getitem__(self, index):
+        """Return the sample at index, from the cache once it's complete."""
+        if index < 0:
+            index += self.length
+        if self._skeletons is not None:
+            return _view(self._skeletons[index], self._data)
+        sample = self.dataset[index]
+        if os.getpid() != self._pid:
+            if self._warned_pid != os.getpid():
+                self._warned_pid = os.getpid()
+                logger.warning(
+                    "CachedDataset only writes the cache in the process creating it, "
+                    "iterate it with num_workers=0 to complete the cache {}.".format(self.path)
+                )
+        elif not self._disabled and index not in self._pending:
+            self._write(index, sample)
+        return sample
+
+    def __len__(self):
+        """Return the length of the dataset."""
+        return self.length
+
+    def __del__(self):
+        """Remove the temporary directory of the incomplete cache."""
+        if getattr(self, "_tmp_dir", None) is not None and os.getpid() == self._pid:
+            self._file.close()
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
@@ -400,6 +400,17 @@ class BaseTransform(object):
         """__call__ method is needed when write user specific transform."""
         raise NotImplementedError
 
+    def batch_steps(self):
+        """Get the element-wise steps of the transform, which ComposeTransform applies to a batch of images at once.
+
+        A step is ("cast", dtype), ("affine", scale, shift) computing `image * scale + shift` with scale and shift
+        broadcast to the last axis, or ("transpose", perm). The transform must not change the labels.
+
+        Returns:
+            list of steps, or None if the transform isn't element-wise, e.g. it changes the geometry of images.
+        """
+        return None
+
 
 class TensorflowWrapFunction(object):
     """Tensorflow wrapper function class."""
@@ -486,6 +497,9 @@ class PytorchMxnetTransform(BaseTransform):
         return (image, label)
 
 
+# the bytes of the images in float64 transformed at once by ComposeTransform.apply_batch
+BATCH_CHUNK_BYTES = 1 << 20
+
 interpolation_map = {
     "nearest": cv2.INTER_NEAREST,
     "bilinear": cv2.INTER_LINEAR,
@@ -546,6 +560,119 @@ class ComposeTransform(BaseTransform):
             sample = transform(sample)
         return sample
 
+    def batch_steps(self):
+        """Get the element-wise steps of the transforms, or None if any of them isn't element-wise."""
+        steps = []
+        for transform in self.transform_list:
+            transform_steps = transform.batch_steps()
+            if transform_steps is None:
+                return None
+            steps.extend(transform_steps)
+        return steps
+
+    def apply_batch(self, samples):
+        """Apply the transforms to a batch of samples.
+
+        The consecutive element-wise transforms, e.g. cast, rescale, normalize and transpose, are fused and applied
+        at once to the images of the batch stacked in an array, the others, e.g. resize and crop, are called per
+        sample. The fused transforms fall back to the per-sample calls if the images aren't numpy arrays of the same
+        shape and dtype. The results match the per-sample calls up to floating-point rounding.
+
+        Args:
+            samples (list): the samples of (image, label).
+
+        Returns:
+            list: the transformed samples, whose images are views of one contiguous array if they're fused.
+        """
+        samples = list(samples)
+        start = 0
+        while start < len(self.transform_list):
+            end, steps = start, []
+            while end < len(self.transform_list):
+                transform_steps = self.transform_list[end].batch_steps()
+                if transform_steps is None:
+                    break
+                steps.extend(transform_steps)
+                end += 1
+            if end > start and _stackable([image for image, _ in samples]):
+                images = _apply_batch_steps([image for image, _ in samples], steps)
+                samples = [(image, label) for image, (_, label) in zip(images, samples)]
+                start = end
+                continue
+            for transform in self.transform_list[start : max(end, start + 1)]:
+                samples = [transform(sample) for sample in samples]
+            start = max(end, start + 1)
+        return samples
+
+
+def _stackable(images):
+    """Check whether the images are numpy arrays of the same shape and dtype."""
+    return all(
+        isinstance(image, np.ndarray) and image.shape == images[0].shape and image.dtype == images[0].dtype
+        for image in images
+    )
+
+
+def _apply_affine(images, dtype, scale, shift):
+    """Compute `images * scale + shift` in dtype, in place if the images are already in dtype."""
+    images = images.astype(dtype, copy=False)
+    if np.any(scale != 1):
+        np.multiply(images, scale, out=images, casting="unsafe")
+    if np.any(shift != 0):
+        np.add(images, shift, out=images, casting="unsafe")
+    return images
+
+
+def _apply_batch_steps(images, steps):
+    """Apply the element-wise steps to the images stacked in chunks, which fit in the cache, into a contiguous array."""
+    chunk_size = max(1, BATCH_CHUNK_BYTES // max(images[0].size * 8, 1))
+    out = None
+    for i in range(0, len(images), chunk_size):
+        chunk = _apply_chunk_steps(np.stack(images[i : i + chunk_size]), steps)
+        if out is None:
+            out = np.empty((len(images),) + chunk.shape[1:], chunk.dtype)
+        out[i : i + len(chunk)] = chunk
+    return out
+
+
+def _apply_chunk_steps(images, steps):
+    """Apply the element-wise steps to the stacked images, which are modified in place.
+
+    The consecutive affine steps are folded into one scale and shift, which is computed in place after the cast
+    before it, so the images are passed once per run of casts and affine steps.
+    """
+    dtype = images.dtype
+    scale = shift = None
+    for step in steps:
+        kind = step[0]
+        if kind == "affine":
+            # the dtype of the result follows the numpy promotion of the per-sample computation
+            dtype = np.result_type(dtype, *step[1:])
+            step_scale, step_shift = np.asarray(step[1], np.float64), np.asarray(step[2], np.float64)
+            if scale is None:
+                scale, shift = step_scale, step_shift
+            else:
+                scale, shift = scale * step_scale, shift * step_scale + step_shift
+            continue
+        if kind == "cast" and scale is not None and np.dtype(step[1]).kind == dtype.kind == "f":
+            # compute the pending affine steps in the float dtype they're cast to
+            dtype = np.dtype(step[1])
+            continue
+        if scale is not None:
+            images = _apply_affine(images, dtype, scale, shift)
+            scale = shift = None
+        if kind == "cast":
+            dtype = np.dtype(step[1])
+            images = images.astype(dtype, copy=False)
+        elif kind == "transpose":
+            assert images.ndim - 1 == len(step[1]), "Image rank doesn't match Perm rank"
+            images = images.transpose([0] + [axis + 1 for axis in step[1]])
+        else:
+            raise ValueError("Unknown batch step {}.".format(kind))
+    if scale is not None:
+        images = _apply_affine(images, dtype, scale, shift)
+    return images
+
 
 @transform_registry(transform_type="CropToBoundingBox", process="preprocess", framework="pytorch")
 class CropToBoundingBox(BaseTransform):
@@ -814,6 +941,10 @@ class Transpose(BaseTransform):
         image = np.transpose(image, axes=self.perm)
         return (image, label)
 
+    def batch_steps(self):
+        """Get the element-wise steps of the transform."""
+        return [("transpose", self.perm)]
+
 
 @transform_registry(transform_type="Transpose", process="preprocess", framework="tensorflow, tensorflow_itex")
 class TensorflowTranspose(Transpose):
@@ -1040,6 +1171,10 @@ class CastTFTransform(BaseTransform):
             image = image.astype(np_dtype_map[self.dtype])
         return (image, label)
 
+    def batch_steps(self):
+        """Get the element-wise steps of the transform on numpy images."""
+        return [("cast", np_dtype_map[self.dtype])]
+
 
 @transform_registry(transform_type="Cast", process="general", framework="onnxrt_qlinearops, onnxrt_integerops")
 class CastONNXTransform(BaseTransform):
@@ -1063,6 +1198,10 @@ class CastONNXTransform(BaseTransform):
         image = image.astype(np_dtype_map[self.dtype])
         return (image, label)
 
+    def batch_steps(self):
+        """Get the element-wise steps of the transform."""
+        return [("cast", np_dtype_map[self.dtype])]
+
 
 @transform_registry(transform_type="Cast", process="general", framework="pytorch")
 class CastPyTorchTransform(BaseTransform):
@@ -1531,6 +1670,13 @@ class NormalizeTFTransform(BaseTransform):
             image -= self.rescale[1]
         return (image, label)
 
+    def batch_steps(self):
+        """Get the element-wise steps of the transform on numpy images."""
+        steps = NormalizeTransform(self.mean, self.std).batch_steps()
+        if self.rescale:
+            steps.append(("affine", 1 / self.rescale[0], -self.rescale[1]))
+        return steps
+
 
 @transform_registry(transform_type="KerasRescale", process="preprocess", framework="tensorflow, tensorflow_itex")
 class RescaleKerasPretrainTransform(BaseTransform):
@@ -1572,6 +1718,10 @@ class RescaleTFTransform(BaseTransform):
             image = image.astype("float32") / 255.0
         return (image, label)
 
+    def batch_steps(self):
+        """Get the element-wise steps of the transform on numpy images."""
+        return [("cast", np.float32), ("affine", 1 / 255.0, 0.0)]
+
 
 @transform_registry(transform_type="Rescale", process="preprocess", framework="onnxrt_qlinearops, onnxrt_integerops")
 class RescaleTransform(BaseTransform):
@@ -1588,6 +1738,10 @@ class RescaleTransform(BaseTransform):
             image = image.astype("float32") / 255.0
         return (image, label)
 
+    def batch_steps(self):
+        """Get the element-wise steps of the transform."""
+        return [("cast", np.float32), ("affine", 1 / 255.0, 0.0)]
+
 
 @transform_registry(
     transform_type="AlignImageChannel",
@@ -2043,6 +2197,11 @@ class NormalizeTransform(BaseTransform):
         image = (image - self.mean) / self.std
         return (image, label)
 
+    def batch_steps(self):
+        """Get the element-wise steps of the transform."""
+        mean, std = np.asarray(self.mean), np.asarray(self.std)
+        return [("affine", 1 / std, -mean / std)]
+
 
 @transform_registry(
     transform_type="RandomCrop", process="preprocess", framework="mxnet, onnxrt_qlinearops, onnxrt_integerops"
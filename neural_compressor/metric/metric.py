@@ -511,8 +511,9 @@ class F1(BaseMetric):
     """
 
     def __init__(self):
-        """Initialize the F1 score list."""
-        self._score_list = []
+        """Initialize the sum and the number of F1 scores."""
+        self._score_sum = 0.0
+        self._score_num = 0
 
     def update(self, preds, labels):
         """Add the predictions and labels.
@@ -532,16 +533,17 @@ class F1(BaseMetric):
                 temp_labels_list += gathered_labels_list[i]
             preds = temp_preds_list
             labels = temp_labels_list
-        result = f1_score(preds, labels)
-        self._score_list.append(result)
+        self._score_sum += f1_score(preds, labels)
+        self._score_num += 1
 
     def reset(self):
         """Clear the predictions and labels."""
-        self._score_list = []
+        self._score_sum = 0.0
+        self._score_num = 0
 
     def result(self):
-        """Compute the F1 score."""
-        return np.array(self._score_list).mean()
+        """Compute the mean of the F1 scores of the updates, which are gathered from all ranks under horovod."""
+        return self._score_sum / self._score_num if self._score_num else np.nan
 
 
 def _accuracy_shape_check(preds, labels):
@@ -602,15 +604,13 @@ class Accuracy(BaseMetric):
     that were correct classified.
 
     Attributes:
-        pred_list: List of prediction to score.
-        label_list: List of labels to score.
+        correct_num: The number of correct predictions.
         sample: The total number of samples.
     """
 
     def __init__(self):
-        """Initialize predictions, labels and sample."""
-        self.pred_list = []
-        self.label_list = []
+        """Initialize the number of correct predictions and samples."""
+        self.correct_num = 0
         self.sample = 0
 
     def update(self, preds, labels, sample_weight=None):
@@ -624,12 +624,11 @@ class Accuracy(BaseMetric):
         preds, labels = _accuracy_shape_check(preds, labels)
         update_type = _accuracy_type_check(preds, labels)
         if update_type == "binary":
-            self.pred_list.extend(preds)
-            self.label_list.extend(labels)
+            # (N, 1) -> (N,) if the labels are (N,)
+            self.correct_num += int(np.sum(preds.reshape(labels.shape) == labels))
             self.sample += labels.shape[0]
         elif update_type == "multiclass":
-            self.pred_list.extend(np.argmax(preds, axis=1).astype("int32"))
-            self.label_list.extend(labels)
+            self.correct_num += int(np.sum(np.argmax(preds, axis=1).astype("int32") == labels))
             self.sample += labels.shape[0]
         elif update_type == "multilabel":
             # (N, C, ...) -> (N*..., C)
@@ -642,23 +641,20 @@ class Accuracy(BaseMetric):
                 preds = preds.transpose(trans_list).reshape(-1, num_label)
                 labels = labels.transpose(trans_list).reshape(-1, num_label)
             self.sample += preds.shape[0] * preds.shape[1]
-            self.pred_list.append(preds)
-            self.label_list.append(labels)
+            self.correct_num += int(np.sum(preds == labels))
 
     def reset(self):
         """Clear the predictions and labels."""
-        self.pred_list = []
-        self.label_list = []
+        self.correct_num = 0
         self.sample = 0
 
     def result(self):
         """Compute the accuracy."""
-        correct_num = np.sum(np.array(self.pred_list) == np.array(self.label_list))
         if getattr(self, "_hvd", None) is not None:
-            allghter_correct_num = sum(self._hvd.allgather_object(correct_num))
+            allghter_correct_num = sum(self._hvd.allgather_object(self.correct_num))
             allgather_sample = sum(self._hvd.allgather_object(self.sample))
             return allghter_correct_num / allgather_sample
-        return correct_num / self.sample
+        return self.correct_num / self.sample
 
 
 class PyTorchLoss:
@@ -763,21 +759,21 @@ class MAE(BaseMetric):
     difference between the predicted and actual numeric values.
 
     Attributes:
-        pred_list: List of prediction to score.
-        label_list: List of references corresponding to the prediction result.
+        aes_sum: The sum of absolute errors.
+        aes_size: The number of absolute errors.
         compare_label (bool): Whether to compare label. False if there are no
           labels and will use FP32 preds as labels.
     """
 
     def __init__(self, compare_label=True):
-        """Initialize the list of prediction and labels.
+        """Initialize the sum and the number of absolute errors.
 
         Args:
             compare_label: Whether to compare label. False if there are no
               labels and will use FP32 preds as labels.
         """
-        self.label_list = []
-        self.pred_list = []
+        self.aes_sum = 0
+        self.aes_size = 0
         self.compare_label = compare_label
 
     def update(self, preds, labels, sample_weight=None):
@@ -789,13 +785,15 @@ class MAE(BaseMetric):
             sample_weight: The sample weight.
         """
         preds, labels = _shape_validate(preds, labels)
-        self.label_list.extend(labels)
-        self.pred_list.extend(preds)
+        for pred, label in zip(preds, labels):
+            ae = abs(label - pred)
+            self.aes_sum += np.sum(ae)
+            self.aes_size += ae.size
 
     def reset(self):
         """Clear the predictions and labels."""
-        self.label_list = []
-        self.pred_list = []
+        self.aes_sum = 0
+        self.aes_size = 0
 
     def result(self):
         """Compute the MAE score.
@@ -803,9 +801,7 @@ class MAE(BaseMetric):
         Returns:
             The MAE score.
         """
-        aes = [abs(a - b) for (a, b) in zip(self.label_list, self.pred_list)]
-        aes_sum = sum([np.sum(ae) for ae in aes])
-        aes_size = sum([ae.size for ae in aes])
+        aes_sum, aes_size = self.aes_sum, self.aes_size
         assert aes_size, "predictions shouldn't be none"
         if getattr(self, "_hvd", None) is not None:
             aes_sum = sum(self._hvd.allgather_object(aes_sum))
@@ -864,21 +860,21 @@ class MSE(BaseMetric):
     and the actual values.
 
     Attributes:
-        pred_list: List of prediction to score.
-        label_list: List of references corresponding to the prediction result.
+        squares_sum: The sum of squared errors.
+        squares_size: The number of squared errors.
         compare_label (bool): Whether to compare label. False if there are no labels
                               and will use FP32 preds as labels.
     """
 
     def __init__(self, compare_label=True):
-        """Initialize the list of prediction and labels.
+        """Initialize the sum and the number of squared errors.
 
         Args:
             compare_label: Whether to compare label. False if there are no
               labels and will use FP32 preds as labels.
         """
-        self.label_list = []
-        self.pred_list = []
+        self.squares_sum = 0
+        self.squares_size = 0
         self.compare_label = compare_label
 
     def update(self, preds, labels, sample_weight=None):
@@ -890,13 +886,15 @@ class MSE(BaseMetric):
             sample_weight: The sample weight.
         """
         preds, labels = _shape_validate(preds, labels)
-        self.pred_list.extend(preds)
-        self.label_list.extend(labels)
+        for pred, label in zip(preds, labels):
+            square = (label - pred) ** 2.0
+            self.squares_sum += np.sum(square)
+            self.squares_size += square.size
 
     def reset(self):
         """Clear the predictions and labels."""
-        self.label_list = []
-        self.pred_list = []
+        self.squares_sum = 0
+        self.squares_size = 0
 
     def result(self):
         """Compute the MSE score.
@@ -904,9 +902,7 @@ class MSE(BaseMetric):
         Returns:
             The MSE score.
         """
-        squares = [(a - b) ** 2.0 for (a, b) in zip(self.label_list, self.pred_list)]
-        squares_sum = sum([np.sum(square) for square in squares])
-        squares_size = sum([square.size for square in squares])
+        squares_sum, squares_size = self.squares_sum, self.squares_size
         assert squares_size, "predictions shouldn't be None"
         if getattr(self, "_hvd", None) is not None:
             squares_sum = sum(self._hvd.allgather_object(squares_sum))
@@ -1579,23 +1575,34 @@ class ONNXRTGLUE(BaseMetric):
 
 @metric_registry("ROC", "pytorch")
 class ROC(BaseMetric):
-    """Computes ROC score."""
+    """Computes ROC score.
+
+    The result is the accuracy of the rounded scores. The ROC AUC is computed from the histograms of the scores of
+    positive and negative samples over num_bins bins in [0, 1].
+
+    Attributes:
+        correct_num: The number of correct rounded scores.
+        sample: The total number of samples.
+        pos_hist: The histogram of the scores of positive samples.
+        neg_hist: The histogram of the scores of negative samples.
+    """
 
-    def __init__(self, task="dlrm"):
+    def __init__(self, task="dlrm", num_bins=10000):
         """Initialize the metric.
 
         Args:
             task:The name of the task (Choices: dlrm, dien, wide_deep.).
+            num_bins: The number of bins of the score histograms for the ROC AUC.
         """
         assert task in ["dlrm", "dien", "wide_deep"], "Unsupported task type"
-        self.pred_list = None
-        self.label_list = None
         self.task = task
+        self.num_bins = num_bins
         self.return_key = {
             "dlrm": "acc",
             "dien": "acc",
             "wide_deep": "acc",
         }
+        self.reset()
 
     def update(self, preds, labels):
         """Add the predictions and labels.
@@ -1608,27 +1615,39 @@ class ROC(BaseMetric):
             preds = preds[0]
         if isinstance(labels, list) and len(labels) == 1:
             labels = labels[0]
-        if self.pred_list is None:
-            self.pred_list = preds
-            self.label_list = labels
-        else:
-            self.pred_list = np.append(self.pred_list, preds, axis=0)
-            self.label_list = np.append(self.label_list, labels, axis=0)
+        scores = np.asarray(preds).reshape(-1)
+        targets = np.asarray(labels).reshape(-1)
+        self.correct_num += int(np.sum(np.round(scores) == targets))
+        self.sample += targets.size
+        bins = np.clip((scores * self.num_bins).astype(np.int64), 0, self.num_bins - 1)
+        positive = targets == 1
+        self.pos_hist += np.bincount(bins[positive], minlength=self.num_bins)
+        self.neg_hist += np.bincount(bins[~positive], minlength=self.num_bins)
 
     def reset(self):
         """Reset the prediction and labels."""
-        self.pred_list = None
-        self.label_list = None
+        self.correct_num = 0
+        self.sample = 0
+        self.pos_hist = np.zeros(self.num_bins, dtype=np.int64)
+        self.neg_hist = np.zeros(self.num_bins, dtype=np.int64)
+
+    def roc_auc(self):
+        """Compute the ROC AUC, the scores in the same bin count as ties."""
+        pos_hist, neg_hist = self.pos_hist, self.neg_hist
+        if getattr(self, "_hvd", None) is not None:
+            pos_hist = sum(self._hvd.allgather_object(pos_hist))
+            neg_hist = sum(self._hvd.allgather_object(neg_hist))
+        # the number of positive samples scored higher than the negative samples of each bin
+        pos_above = pos_hist[::-1].cumsum()[::-1] - pos_hist
+        return np.sum(neg_hist * (pos_above + pos_hist / 2)) / (pos_hist.sum() * neg_hist.sum())
 
     def result(self):
         """Compute the ROC score."""
-        import sklearn.metrics
-
-        scores = np.squeeze(self.pred_list)
-        targets = np.squeeze(self.label_list)
-        roc_auc = sklearn.metrics.roc_auc_score(targets, scores)
-        acc = sklearn.metrics.accuracy_score(targets, np.round(scores))
-        return acc
+        if getattr(self, "_hvd", None) is not None:
+            correct_num = sum(self._hvd.allgather_object(self.correct_num))
+            sample = sum(self._hvd.allgather_object(self.sample))
+            return correct_num / sample
+        return self.correct_num / self.sample
 
 
 def register_customer_metric(user_metric, framework):
@@ -16,7 +16,6 @@
 # limitations under the License.
 """Mix Precision for Neural Compressor."""
 import os
-import pickle
 import random
 import sys
 
@@ -141,8 +140,9 @@ def fit(model, conf, eval_func=None, eval_dataloader=None, eval_metric=None, **k
     )
     if resume_file:
         assert os.path.exists(resume_file), "The specified resume file {} doesn't exist!".format(resume_file)
-        with open(resume_file, "rb") as f:
-            _resume = pickle.load(f).__dict__
+        from .strategy.utils.tuning_history import TuningHistoryJournal
+
+        _resume = {"tuning_history": TuningHistoryJournal.load(resume_file)}
 
     strategy = STRATEGIES["automixedprecision"](
         model=wrapped_model,
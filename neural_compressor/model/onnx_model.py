@@ -19,6 +19,7 @@
 import logging
 import os
 import sys
+from collections import Counter
 from pathlib import Path
 
 from neural_compressor.adaptor.ox_utils.util import MAXIMUM_PROTOBUF
@@ -69,6 +70,7 @@ class ONNXModel(BaseModel):
         self._graph_info = {}
         self._get_graph_info()
         self._q_config = None
+        self._reset_name_indexes()
 
     def check_is_large_model(self):
         """Check model > 2GB."""
@@ -142,6 +144,7 @@ class ONNXModel(BaseModel):
         self._input_name_to_nodes = {}
         self._get_input_name_to_nodes(self._model.graph.node)
         self._get_output_name_to_node(self._model.graph.node)
+        self._reset_name_indexes()
 
     def input(self):
         """Return input of model."""
@@ -159,6 +162,7 @@ class ONNXModel(BaseModel):
         self._input_name_to_nodes = {}
         self._get_input_name_to_nodes(self._model.graph.node)
         self._get_output_name_to_node(self._model.graph.node)
+        self._reset_name_indexes()
 
     @property
     def graph_info(self):
@@ -216,68 +220,195 @@ class ONNXModel(BaseModel):
         """Return model opset_import."""
         return self._model.opset_import
 
+    def _reset_name_indexes(self):
+        """Drop the name indexes of nodes and initializers, they are rebuilt on the next lookup."""
+        self._name_to_node = None
+        self._indexed_node_ids = None
+        self._num_indexed_nodes = 0
+        self._name_to_initializer = None
+        self._num_indexed_initializers = 0
+        self._input_name_to_num_consumers = None
+
+    def _index_node(self, node):
+        # keep the first node if names are duplicated, the same as scanning the graph
+        self._name_to_node.setdefault(node.name, node)
+        self._indexed_node_ids.add(id(node))
+
+    def _get_node_index(self):
+        """Get the name->node index of the main graph.
+
+        The index is kept by the methods which add or remove nodes. It's rebuilt if the graph is edited directly
+        and the number or the first/last nodes change, call `update` after other direct edits.
+        """
+        nodes = self._model.graph.node
+        if self._name_to_node is not None and (
+            self._num_indexed_nodes != len(nodes)
+            or (
+                len(nodes) > 0
+                and not (id(nodes[0]) in self._indexed_node_ids and id(nodes[-1]) in self._indexed_node_ids)
+            )
+        ):
+            # the nodes are added or removed directly
+            self._name_to_node = None
+            self._input_name_to_num_consumers = None
+        if self._name_to_node is None:
+            self._name_to_node = {}
+            self._indexed_node_ids = set()
+            for node in self._model.graph.node:
+                self._index_node(node)
+            self._num_indexed_nodes = len(self._model.graph.node)
+        return self._name_to_node
+
+    def _get_initializer_index(self):
+        """Get the name->initializer index of the main graph, it's kept the same way as the node index."""
+        initializers = self._model.graph.initializer
+        if (
+            self._name_to_initializer is None
+            or self._num_indexed_initializers != len(initializers)
+            or (len(initializers) > 0 and self._name_to_initializer.get(initializers[-1].name) is not initializers[-1])
+        ):
+            self._name_to_initializer = {}
+            for tensor in self._model.graph.initializer:
+                self._name_to_initializer.setdefault(tensor.name, tensor)
+            self._num_indexed_initializers = len(self._model.graph.initializer)
+        return self._name_to_initializer
+
+    def _count_consumers(self, node, num):
+        # a node is one consumer of an input name however many times it's used, as in `name in node.input`
+        for input_name in set(node.input):
+            self._input_name_to_num_consumers[input_name] += num
+
+    def _get_consumer_count_index(self):
+        """Get the input name->number of consumer nodes index of the main graph.
+
+        The index is kept by add_nodes, remove_nodes, set_node_input and replace_input_of_all_nodes, call `update`
+        after assigning the inputs of nodes directly.
+        """
+        self._get_node_index()
+        if self._input_name_to_num_consumers is None:
+            self._input_name_to_num_consumers = Counter()
+            for node in self._model.graph.node:
+                self._count_consumers(node, 1)
+        return self._input_name_to_num_consumers
+
     def remove_node(self, node):
         """Remove a node from model."""
-        if node in self._model.graph.node:
-            self._model.graph.node.remove(node)
+        self.remove_nodes([node])
 
     def remove_nodes(self, nodes_to_remove):
         """Remove nodes from model."""
+        name_to_node = self._get_node_index()
+        ids_to_remove = set()
         for node in nodes_to_remove:
-            self.remove_node(node)
+            if id(node) in self._indexed_node_ids:
+                ids_to_remove.add(id(node))
+            elif node in self._model.graph.node:
+                # a copy of a node of the graph
+                self._model.graph.node.remove(node)
+                self._reset_name_indexes()
+                name_to_node = self._get_node_index()
+        if len(ids_to_remove) == 0:
+            return
+        indexes_to_remove = [i for i, node in enumerate(self._model.graph.node) if id(node) in ids_to_remove]
+        for i in reversed(indexes_to_remove):
+            node = self._model.graph.node[i]
+            if name_to_node.get(node.name) is node:
+                del name_to_node[node.name]
+            self._indexed_node_ids.discard(id(node))
+            if self._input_name_to_num_consumers is not None:
+                self._count_consumers(node, -1)
+            del self._model.graph.node[i]
+        self._num_indexed_nodes = len(self._model.graph.node)
 
     def add_node(self, node):
         """Add a node to model."""
-        self._model.graph.node.extend([node])
+        self.add_nodes([node])
 
     def add_nodes(self, nodes_to_add):
         """Add nodes to model."""
+        self._get_node_index()
+        num_nodes = len(self._model.graph.node)
         self._model.graph.node.extend(nodes_to_add)
+        # extend copies the nodes, index the nodes of the graph
+        for node in self._model.graph.node[num_nodes:]:
+            self._index_node(node)
+            if self._input_name_to_num_consumers is not None:
+                self._count_consumers(node, 1)
+        self._num_indexed_nodes = len(self._model.graph.node)
 
     def add_initializer(self, tensor):
         """Add a initializer to model."""
-        if ortq.find_by_name(tensor.name, self._model.graph.initializer) is None:
-            self._model.graph.initializer.extend([tensor])
+        self.add_initializers([tensor])
 
     def add_initializers(self, tensors):
         """Add initializers to model."""
+        name_to_initializer = self._get_initializer_index()
         for tensor in tensors:
-            self.add_initializer(tensor)
+            if tensor.name not in name_to_initializer:
+                self._model.graph.initializer.extend([tensor])
+                name_to_initializer[tensor.name] = self._model.graph.initializer[-1]
+        self._num_indexed_initializers = len(self._model.graph.initializer)
 
     def get_initializer(self, name):
         """Get an initializer by name."""
+        indexed = self._get_initializer_index().get(name)
+        if indexed is not None and indexed.name == name:
+            return indexed
+        # the initializers may be renamed in place after they are indexed, scan the graph on a miss
+        # and rebuild the index on the next lookup if it's stale
         for tensor in self._model.graph.initializer:
             if tensor.name == name:
+                self._name_to_initializer = None
                 return tensor
+        if indexed is not None:
+            self._name_to_initializer = None
         return None
 
     def get_initializer_share_num(self, name):
         """Get the number of shares of initializer."""
-        num = 0
         if self.get_initializer(name) is None:
-            return num
-
-        for node in self.nodes():
-            if name in node.input:
-                num += 1
-        return num
+            return 0
+        return self._get_consumer_count_index()[name]
 
     def get_node(self, name):
         """Get a node by name."""
+        indexed = self._get_node_index().get(name)
+        if indexed is not None and indexed.name == name:
+            return indexed
+        # the nodes may be renamed in place after they are indexed, scan the graph on a miss
+        # and rebuild the index on the next lookup if it's stale
         for node in self._model.graph.node:
             if node.name == name:
+                self._name_to_node = None
                 return node
+        if indexed is not None:
+            self._name_to_node = None
         return None
 
     def remove_initializer(self, tensor):
         """Remove an initializer from model."""
-        if tensor in self._model.graph.initializer:
-            self._model.graph.initializer.remove(tensor)
+        self.remove_initializers([tensor])
 
     def remove_initializers(self, init_to_remove):
         """Remove initializers from model."""
-        for initializer in init_to_remove:
-            self.remove_initializer(initializer)
+        name_to_initializer = self._get_initializer_index()
+        ids_to_remove = set()
+        for tensor in init_to_remove:
+            if name_to_initializer.get(tensor.name) is tensor:
+                ids_to_remove.add(id(tensor))
+            elif tensor in self._model.graph.initializer:
+                # a copy of an initializer of the graph
+                self._model.graph.initializer.remove(tensor)
+                self._name_to_initializer = None
+                name_to_initializer = self._get_initializer_index()
+        if len(ids_to_remove) == 0:
+            return
+        initializers = self._model.graph.initializer
+        indexes_to_remove = [i for i, tensor in enumerate(initializers) if id(tensor) in ids_to_remove]
+        for i in reversed(indexes_to_remove):
+            del name_to_initializer[initializers[i].name]
+            del initializers[i]
+        self._num_indexed_initializers = len(initializers)
 
     def set_initializer(self, tensor, array, raw=False):
         """Update initializer."""
@@ -467,16 +598,30 @@ class ONNXModel(BaseModel):
             if node.input[j] == old_input_name:
                 node.input[j] = new_input_name
 
+    def set_node_input(self, node, index, input_name):
+        """Set an input of a node, use it instead of `node.input[index] = input_name` to keep the consumer counts."""
+        self._get_node_index()
+        counted = self._input_name_to_num_consumers is not None and id(node) in self._indexed_node_ids
+        if counted:
+            self._count_consumers(node, -1)
+        node.input[index] = input_name
+        if counted:
+            self._count_consumers(node, 1)
+
     def replace_input_of_all_nodes(self, old_input_name, new_input_name, white_optype=[], black_optype=[]):
         """Replace inputs of all nodes."""
-        if len(white_optype) > 0:
-            for node in self.model.graph.node:
-                if node.op_type in white_optype:
-                    ONNXModel.replace_node_input(node, old_input_name, new_input_name)
-        else:
-            for node in self.model.graph.node:
-                if node.op_type not in black_optype:
-                    ONNXModel.replace_node_input(node, old_input_name, new_input_name)
+        self._get_node_index()
+        counted = self._input_name_to_num_consumers is not None
+        for node in self.model.graph.node:
+            if old_input_name not in node.input:
+                continue
+            if node.op_type not in white_optype if len(white_optype) > 0 else node.op_type in black_optype:
+                continue
+            if counted:
+                self._count_consumers(node, -1)
+            ONNXModel.replace_node_input(node, old_input_name, new_input_name)
+            if counted:
+                self._count_consumers(node, 1)
 
     @staticmethod
     def replace_node_output(node, old_output_name, new_output_name):
@@ -596,6 +741,7 @@ class ONNXModel(BaseModel):
         assert len(list(set([n.name for n in nodes]))) == len(list(set([n.name for n in self.model.graph.node])))
         self.model.graph.ClearField("node")
         self.model.graph.node.extend(nodes)
+        self._reset_name_indexes()
 
     def get_nodes_chain(self, start, stop, result_chain=[]):
         """Get nodes chain with given start node and stop node."""
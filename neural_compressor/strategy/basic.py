@@ -396,6 +396,9 @@ class BasicTuneStrategy(TuneStrategy):
                     logger.info(f"Start to fallback op to {target_dtype} one by one.")
                     self._fallback_started()
                 fallback_items_name_lst = [item.name for item in fallback_items_lst][::-1]  # from bottom to up
+                fallback_items_name_lst, skipped_items_name_lst = self._select_fallback_items_by_surrogate(
+                    fallback_items_name_lst, best_op_tuning_cfg_stage1, [item.name for item in quant_ops]
+                )
                 op_dtypes = OrderedDict(zip(fallback_items_name_lst, [target_dtype] * len(fallback_items_name_lst)))
                 initial_op_tuning_cfg = deepcopy(best_op_tuning_cfg_stage1)
                 fallback_sampler = FallbackTuningSampler(
@@ -419,7 +422,9 @@ class BasicTuneStrategy(TuneStrategy):
                         key=lambda key: op_fallback_acc_impact[key],
                         reverse=self.higher_is_better,
                     )
-                    op_dtypes = OrderedDict(zip(ordered_ops, [target_dtype] * len(fallback_items_name_lst)))
+                    # the ops skipped by the surrogate are accumulated at last
+                    ordered_ops += skipped_items_name_lst
+                    op_dtypes = OrderedDict(zip(ordered_ops, [target_dtype] * len(ordered_ops)))
                     logger.info(f"Start to accumulate fallback to {target_dtype}.")
                     initial_op_tuning_cfg = deepcopy(best_op_tuning_cfg_stage1)
                     fallback_sampler = FallbackTuningSampler(
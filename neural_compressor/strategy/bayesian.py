@@ -16,10 +16,12 @@
 # limitations under the License.
 """The Bayesian tuning strategy."""
 
+import copy
 import warnings
 from copy import deepcopy
 
 import numpy as np
+from scipy.linalg import cho_solve, cholesky, solve_triangular
 from scipy.optimize import minimize
 from sklearn.gaussian_process import GaussianProcessRegressor
 from sklearn.gaussian_process.kernels import Matern
@@ -34,6 +36,10 @@ from .utils.tuning_sampler import OpWiseTuningSampler
 class BayesianTuneStrategy(TuneStrategy):
     """The Bayesian tuning strategy."""
 
+    # the points of a batch are proposed before evaluating, and the points pending evaluation are treated as
+    # observed with a constant lie, so the next trials can be quantized in advance.
+    supports_pipelined_tuning = True
+
     def __init__(
         self,
         model,
@@ -102,6 +108,46 @@ class BayesianTuneStrategy(TuneStrategy):
         op_tuning_cfg["calib_sampling_size"] = calib_sampling_size
         return op_tuning_cfg
 
+    def _get_evaluated_result(self, op_tuning_cfg):
+        """Get the evaluated result of the op tuning config from the tuning history.
+
+        Args:
+            op_tuning_cfg (dict): The op tuning config.
+
+        Returns:
+            The tuning result, or None if it's not evaluated yet.
+        """
+        tune_cfg = self._tune_cfg_converter(op_tuning_cfg)
+        tuning_history = self._find_tuning_history(tune_cfg)
+        if tuning_history is None:
+            return None
+        key = self._tuning_history_index.key(tune_cfg)
+        for trial in reversed(tuning_history["history"]):
+            if trial and self._tuning_history_index.key(trial["tune_cfg"]) == key:
+                return trial["tune_result"]
+        return None
+
+    def _register_evaluated_params(self, pending):
+        """Register the evaluated params to the target space.
+
+        Args:
+            pending (list): The pairs of params and op tuning config pending registration.
+
+        Returns:
+            list: The pairs still pending evaluation.
+        """
+        still_pending = []
+        for params, op_tuning_cfg in pending:
+            tune_result = self._get_evaluated_result(op_tuning_cfg)
+            if tune_result is None:
+                still_pending.append((params, op_tuning_cfg))
+                continue
+            try:
+                self.bayes_opt._space.register(params, tune_result[0])
+            except KeyError:
+                logger.debug("Find registered params, skip it.")
+        return still_pending
+
     def next_tune_cfg(self):
         """Generate the next tuning config according to bayesian search algorithm.
 
@@ -110,6 +156,12 @@ class BayesianTuneStrategy(TuneStrategy):
         function with the tuning history and then finds the tuning configuration that maximizes
         the expected improvement.
 
+        With `strategy_kwargs={"acquisition_batch_size": q}`, q points are proposed per round, the results of
+        the trials are registered when proposing the next round. Together with `pipeline_lookahead`, the trials
+        of a batch are quantized while evaluating the previous ones. The kernel hyperparameters of the Gaussian
+        process are refitted for every trial, or when the trials grow by 1.5 times for batches, which is set by
+        `gp_refit_growth` in `strategy_kwargs`.
+
         Returns:
             tune_config (dict): A dict containing the tuning configuration for quantization.
         """
@@ -129,17 +181,24 @@ class BayesianTuneStrategy(TuneStrategy):
         if len(pbounds) == 0:
             yield self._params_to_tune_configs(params)
             return
+        strategy_kwargs = self.config.tuning_criterion.strategy_kwargs or {}
+        batch_size = strategy_kwargs.get("acquisition_batch_size", 1)
         if self.bayes_opt is None:
-            self.bayes_opt = BayesianOptimization(pbounds=pbounds, random_seed=options.random_seed)
+            self.bayes_opt = BayesianOptimization(
+                pbounds=pbounds,
+                random_seed=options.random_seed,
+                refit_growth=strategy_kwargs.get("gp_refit_growth", 1.0 if batch_size == 1 else 1.5),
+            )
+        # the pairs of params and op tuning config yielded but not registered
+        pending = []
         while True:
-            params = self.bayes_opt.gen_next_params()
-            logger.debug("Dump current bayesian params:")
-            logger.debug(params)
-            yield self._params_to_tune_configs(params)
-            try:
-                self.bayes_opt._space.register(params, self.last_tune_result[0])
-            except KeyError:
-                logger.debug("Find registered params, skip it.")
+            pending = self._register_evaluated_params(pending)
+            for params in self.bayes_opt.suggest_batch(batch_size, pending=[params for params, _ in pending]):
+                logger.debug("Dump current bayesian params:")
+                logger.debug(params)
+                op_tuning_cfg = self._params_to_tune_configs(params)
+                pending.append((params, op_tuning_cfg))
+                yield op_tuning_cfg
 
 
 # Util part
@@ -379,6 +438,146 @@ class TargetSpace(object):
         return [{"target": target, "params": param} for target, param in zip(self.target, params)]
 
 
+# Gaussian process part
+class IncrementalGaussianProcess:
+    """Gaussian process regressor updated incrementally by the new observations.
+
+    The kernel hyperparameters are fitted from scratch only when the number of observations grows by a ratio.
+    Between the refits, the Cholesky factor of the kernel matrix is extended by one row per observation, which costs
+    O(n^2) instead of the O(n^3) of a full fit with the optimizer restarts.
+    """
+
+    def __init__(self, kernel=None, alpha=1e-6, n_restarts_optimizer=5, random_state=None, refit_growth=1.5):
+        """Init the Gaussian process.
+
+        Args:
+            kernel (Kernel, optional): The kernel whose hyperparameters are fitted. Defaults to Matern(nu=2.5).
+            alpha (float, optional): The value added to the diagonal of the kernel matrix. Defaults to 1e-6.
+            n_restarts_optimizer (int, optional): The restarts of the hyperparameter optimizer. Defaults to 5.
+            random_state (int, optional): The seed of the hyperparameter optimizer. Defaults to None.
+            refit_growth (float, optional): The kernel hyperparameters are refitted when the number of observations
+                grows by this ratio since last fit. Defaults to 1.5.
+        """
+        self.alpha = alpha
+        self.refit_growth = refit_growth
+        self._regressor = GaussianProcessRegressor(
+            kernel=kernel if kernel is not None else Matern(nu=2.5),
+            alpha=alpha,
+            normalize_y=True,
+            n_restarts_optimizer=n_restarts_optimizer,
+            random_state=random_state,
+        )
+        self.kernel_ = None
+        self._X = None
+        self._y = None
+        self._L = None
+        self._weights = None
+        self._y_mean = 0.0
+        self._y_std = 1.0
+        self._num_fitted = 0
+
+    def __len__(self):
+        """Get the number of observations."""
+        return 0 if self._y is None else len(self._y)
+
+    def fit(self, X, y):
+        """Fit the kernel hyperparameters and factorize the kernel matrix from scratch.
+
+        Args:
+            X (np.ndarray): The observed points.
+            y (np.ndarray): The observed targets.
+        """
+        # Sklearn's GP throws a large number of warnings at times, but
+        # we don't really need to see them here.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self._regressor.fit(X, y)
+        self.kernel_ = self._regressor.kernel_
+        self._X = np.array(X, dtype=float)
+        self._y = np.array(y, dtype=float)
+        kernel_matrix = self.kernel_(self._X)
+        kernel_matrix[np.diag_indices_from(kernel_matrix)] += self.alpha
+        self._L = cholesky(kernel_matrix, lower=True)
+        self._num_fitted = len(self._y)
+        self._update_weights()
+
+    def add(self, x, y):
+        """Add an observation by extending the Cholesky factor.
+
+        Args:
+            x (np.ndarray): The observed point.
+            y (float): The observed target.
+        """
+        x = np.asarray(x, dtype=float).reshape(1, -1)
+        cross = self.kernel_(self._X, x).ravel()
+        row = solve_triangular(self._L, cross, lower=True)
+        # clip to keep it positive definite when x is close to the observed points
+        diag = np.sqrt(max(self.kernel_.diag(x)[0] + self.alpha - row @ row, self.alpha))
+        n = len(self._y)
+        L = np.zeros((n + 1, n + 1))
+        L[:n, :n] = self._L
+        L[n, :n] = row
+        L[n, n] = diag
+        # the arrays are replaced instead of modified, so the copies are not affected
+        self._L = L
+        self._X = np.vstack([self._X, x])
+        self._y = np.append(self._y, y)
+        self._update_weights()
+
+    def update(self, X, y):
+        """Update the Gaussian process with the observations, whose first rows are observed before.
+
+        Args:
+            X (np.ndarray): All the observed points.
+            y (np.ndarray): All the observed targets.
+        """
+        if self.kernel_ is None or len(y) >= self.refit_growth * self._num_fitted:
+            self.fit(X, y)
+            return
+        for x_i, y_i in zip(X[len(self) :], y[len(self) :]):
+            self.add(x_i, y_i)
+
+    def with_observation(self, x, y):
+        """Get a copy of the Gaussian process with a fantasy observation added.
+
+        Args:
+            x (np.ndarray): The fantasy point.
+            y (float): The fantasy target.
+
+        Returns:
+            IncrementalGaussianProcess: The copy.
+        """
+        gp = copy.copy(self)
+        gp.add(x, y)
+        return gp
+
+    def _update_weights(self):
+        self._y_mean = np.mean(self._y)
+        self._y_std = np.std(self._y)
+        if self._y_std == 0:
+            self._y_std = 1.0
+        self._weights = cho_solve((self._L, True), (self._y - self._y_mean) / self._y_std)
+
+    def predict(self, X, return_std=False):
+        """Predict the targets of points.
+
+        Args:
+            X (np.ndarray): The points.
+            return_std (bool, optional): Whether to return the standard deviation. Defaults to False.
+
+        Returns:
+            The mean, and the standard deviation if return_std is True.
+        """
+        X = np.asarray(X, dtype=float)
+        cross = self.kernel_(X, self._X)
+        mean = cross @ self._weights * self._y_std + self._y_mean
+        if not return_std:
+            return mean
+        v = solve_triangular(self._L, cross.T, lower=True)
+        var = np.clip(self.kernel_.diag(X) - np.einsum("ij,ij->j", v, v), 0, None)
+        return mean, np.sqrt(var) * self._y_std
+
+
 # Tuning part
 class BayesianOptimization:
     """The class for bayesian optimization.
@@ -387,7 +586,7 @@ class BayesianOptimization:
     the parameters yield the maximum value using bayesian optimization.
     """
 
-    def __init__(self, pbounds, random_seed=9527, verbose=2):
+    def __init__(self, pbounds, random_seed=9527, verbose=2, refit_growth=1.0):
         """Init bayesian optimization.
 
         Args:
@@ -395,6 +594,8 @@ class BayesianOptimization:
               minimum and maximum values.
             random_seed (int, optional): The seed for random searching. Default to 9527.
             verbose (int, optional): The level of verbosity. Default to 2.
+            refit_growth (float, optional): The growth ratio of observations to refit the kernel hyperparameters
+              of the Gaussian process. Default to 1.0, refit for every observation.
         """
         self._random_seed = random_seed
         # Data structure containing the bounds of its domain,
@@ -402,12 +603,12 @@ class BayesianOptimization:
         self._space = TargetSpace(pbounds, random_seed)
 
         # Internal GP regressor
-        self._gp = GaussianProcessRegressor(
+        self._gp = IncrementalGaussianProcess(
             kernel=Matern(nu=2.5),
             alpha=1e-6,
-            normalize_y=True,
             n_restarts_optimizer=5,
             random_state=self._random_seed,
+            refit_growth=refit_growth,
         )
         self._verbose = verbose
 
@@ -435,24 +636,43 @@ class BayesianOptimization:
 
     def suggest(self):
         """Suggest the most promising points."""
-        if len(set(self._space.target)) < 2:
-            return self._space.array_to_params(self._space.random_sample())
+        return self.suggest_batch(1)[0]
 
-        # Sklearn's GP throws a large number of warnings at times, but
-        # we don't really need to see them here.
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            self._gp.fit(self._space.params, self._space.target)
-
-        # Finding argmax of the acquisition function.
-        suggestion = acq_max(
-            ac=self._ucb,
-            gp=self._gp,
-            y_max=self._space.target.max(),
-            bounds=self._space.bounds,
-            random_seed=self._random_seed,
-        )
-        return self._space.array_to_params(suggestion)
+    def suggest_batch(self, batch_size=1, pending=None):
+        """Suggest a batch of promising points which can be evaluated concurrently.
+
+        The points are selected one by one with the constant liar: the pending points and the selected ones are
+        assumed to be observed with the minimum target, which lowers the uncertainty around them, so the next
+        points of the batch explore elsewhere.
+
+        Args:
+            batch_size (int, optional): The number of points to suggest. Defaults to 1.
+            pending (list, optional): The params suggested before and pending evaluation. Defaults to None.
+
+        Returns:
+            list: The suggested params.
+        """
+        if len(set(self._space.target)) < 2:
+            return [self._space.array_to_params(self._space.random_sample()) for _ in range(batch_size)]
+
+        self._gp.update(self._space.params, self._space.target)
+        gp = self._gp
+        lie = self._space.target.min()
+        for params in pending or []:
+            gp = gp.with_observation(self._space._as_array(params), lie)
+        suggestions = []
+        for _ in range(batch_size):
+            # Finding argmax of the acquisition function.
+            suggestion = acq_max(
+                ac=self._ucb,
+                gp=gp,
+                y_max=self._space.target.max(),
+                bounds=self._space.bounds,
+                random_seed=self._random_seed,
+            )
+            suggestions.append(self._space.array_to_params(suggestion))
+            gp = gp.with_observation(suggestion, lie)
+        return suggestions
 
     def gen_next_params(self):
         """Get the next parameter."""
@@ -23,6 +23,8 @@ from .utils.tuning_sampler import OpWiseTuningSampler
 class ExhaustiveTuneStrategy(TuneStrategy):
     """The exhaustive tuning strategy."""
 
+    supports_pipelined_tuning = True
+
     def next_tune_cfg(self):
         """Generate and yield the next tuning config using exhaustive search in tuning space.
 
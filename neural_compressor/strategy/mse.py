@@ -123,37 +123,13 @@ class MSETuneStrategy(TuneStrategy):
         op_mapping = {}
         for op_name, op_type in list(op_list):
             op_mapping[op_name] = (op_name, op_type)
-        current_best_tune_cfg = self._tune_cfg_converter(self.cur_best_tuning_cfg)
-        fp32_dump_content = self.adaptor.inspect_tensor(
-            fp32_model,
-            self.calib_dataloader,
-            op_name_lst,
-            [1],
-            inspect_type="activation",
-            save_to_disk=True,
-            save_path="./nc_workspace/",
-            quantization_cfg=current_best_tune_cfg,
-        )
-        fp32_tensor_dict = fp32_dump_content["activation"][0]
-        best_qmodel = self.adaptor.quantize(current_best_tune_cfg, self.model, self.calib_dataloader, self.q_func)
-        quant_dump_content = self.adaptor.inspect_tensor(
-            best_qmodel,
-            self.calib_dataloader,
-            op_name_lst,
-            [1],
-            inspect_type="activation",
-            save_to_disk=True,
-            save_path="./nc_workspace/",
-            quantization_cfg=current_best_tune_cfg,
-        )
-        dequantize_tensor_dict = quant_dump_content["activation"][0]
-        ops_mse = {
-            op: self._mse_metric_gap(
-                list(fp32_tensor_dict[op].values())[0], list(dequantize_tensor_dict[op].values())[0]
-            )
-            for op in fp32_tensor_dict
-        }
-        ordered_op_names = sorted(ops_mse.keys(), key=lambda key: ops_mse[key], reverse=self.higher_is_better)
+        # the MSE of ops are inspected once and cached until the current best tuning config is changed
+        surrogate = self._get_op_divergence_surrogate(self.cur_best_tuning_cfg, op_name_lst, self._mse_metric_gap)
+        ordered_op_names = [op_name for op_name in surrogate.rank(op_name_lst) if op_name in surrogate.divergence]
+        if not self.higher_is_better:
+            ordered_op_names = ordered_op_names[::-1]
+        # the ops can't be inspected are put at the end
+        ordered_op_names += [op_name for op_name in op_name_lst if op_name not in surrogate.divergence]
 
         ordered_op_name_types = [op_mapping[name] for name in ordered_op_names]
         return ordered_op_name_types
@@ -217,8 +193,12 @@ class MSETuneStrategy(TuneStrategy):
                 fallback_items_name_lst = [item.name for item in fallback_items_lst]
                 # TODO check the best_qmodel
                 ordered_op_name_types = self.mse_impact_lst(fallback_items_name_lst, self.model, self.best_qmodel)
+                selected_op_name_types, skipped_op_name_types = self._select_fallback_items_by_surrogate(
+                    ordered_op_name_types, self.cur_best_tuning_cfg, fallback_items_name_lst
+                )
+                ordered_op_name_types = [item for item in ordered_op_name_types if item in selected_op_name_types]
                 self.ordered_ops = [op_name for (op_name, op_type) in ordered_op_name_types]
-                op_dtypes = OrderedDict(zip(ordered_op_name_types, [target_dtype] * len(fallback_items_name_lst)))
+                op_dtypes = OrderedDict(zip(ordered_op_name_types, [target_dtype] * len(ordered_op_name_types)))
                 initial_op_tuning_cfg = deepcopy(best_op_tuning_cfg_stage1)
                 fallback_sampler = FallbackTuningSampler(
                     tuning_space,
@@ -232,7 +212,7 @@ class MSETuneStrategy(TuneStrategy):
                     op_tuning_cfg["calib_sampling_size"] = calib_sampling_size
                     yield op_tuning_cfg
                     acc, _ = self.last_tune_result
-                    op_fallback_acc_impact[fallback_items_name_lst[op_index]] = acc
+                    op_fallback_acc_impact[ordered_op_name_types[op_index]] = acc
 
                 # Do accumulated fallback according to the order in the previous stage
                 if len(op_fallback_acc_impact) > 0:
@@ -241,7 +221,9 @@ class MSETuneStrategy(TuneStrategy):
                         key=lambda key: op_fallback_acc_impact[key],
                         reverse=self.higher_is_better,
                     )
-                    op_dtypes = OrderedDict(zip(ordered_ops, [target_dtype] * len(fallback_items_name_lst)))
+                    # the ops skipped by the surrogate are accumulated at last
+                    ordered_ops += skipped_op_name_types
+                    op_dtypes = OrderedDict(zip(ordered_ops, [target_dtype] * len(ordered_ops)))
                     logger.info(f"Start to accumulate fallback to {target_dtype}.")
                     initial_op_tuning_cfg = deepcopy(best_op_tuning_cfg_stage1)
                     fallback_sampler = FallbackTuningSampler(
@@ -20,10 +20,10 @@
 import copy
 import math
 import os
-import pickle
 import sys
 from abc import abstractmethod
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from pathlib import Path
 from time import time
@@ -48,8 +48,6 @@ from ..utils.utility import (
     Statistics,
     check_key_exist,
     dump_table,
-    equal_dicts,
-    fault_tolerant_file,
     get_weights_details,
     print_op_list,
     print_table,
@@ -57,6 +55,8 @@ from ..utils.utility import (
 from ..utils.weights_details import WeightsDetails
 from ..version import __version__
 from .utils.constant import FALLBACK_RECIPES_SET, TUNING_ITEMS_LST
+from .utils.surrogate import OpDivergenceSurrogate
+from .utils.tuning_history import TuningHistoryIndex, TuningHistoryJournal
 from .utils.tuning_sampler import tuning_sampler_dict
 from .utils.tuning_space import TuningSpace
 from .utils.tuning_structs import OpTuningConfig
@@ -117,6 +117,10 @@ class TuneStrategyMeta(type):
 class TuneStrategy(metaclass=TuneStrategyMeta):
     """Basic class for tuning strategy."""
 
+    # Whether the tuning configs yielded by `next_tune_cfg` don't depend on the evaluation results of previous
+    # trials, so the next trials can be quantized in advance while evaluating the current one.
+    supports_pipelined_tuning = False
+
     def __init__(
         self,
         model,
@@ -171,6 +175,16 @@ class TuneStrategy(metaclass=TuneStrategyMeta):
         self.tune_data = {}
         self.tune_result_record = []
         self.tuning_history = []
+        # the append-only journal of tuning history and the index of the evaluated tune_cfgs
+        self._history_journal = None
+        self._tuning_history_index = TuningHistoryIndex()
+        # the worker quantizing the next trials in pipelined tuning, and its own adaptor and algo scheduler
+        self._trial_executor = None
+        self._trial_adaptor = None
+        self._trial_algo_scheduler = None
+        # the surrogate scorer of fallback candidates, and the tuning config and ops it's based on
+        self._surrogate = None
+        self._surrogate_key = None
         self.tuning_result_data = []
         self._baseline = None
         self.last_tune_result = None
@@ -360,12 +374,12 @@ class TuneStrategy(metaclass=TuneStrategyMeta):
             # execute the pre_tuning_algo_scheduler
             self.model = self._pre_tuning_algo_scheduler("pre_quantization")
 
-    def _initialize_algo_scheduler(self):
+    def _initialize_algo_scheduler(self, adaptor=None):
         algo_scheduler = AlgorithmScheduler(self.config.recipes)
         # reuse the calibration iteration
         algo_scheduler.dataloader = self.calib_dataloader
         algo_scheduler.origin_model = self.model
-        algo_scheduler.adaptor = self.adaptor
+        algo_scheduler.adaptor = adaptor or self.adaptor
         return algo_scheduler
 
     def _initial_adaptor(self):
@@ -374,6 +388,17 @@ class TuneStrategy(metaclass=TuneStrategyMeta):
         self.framework = self.framework or framework
         self.cur_best_acc = self.cur_best_acc or self.initial_best_acc()
 
+    def _create_trial_adaptor(self):
+        """Create another adaptor for the worker of pipelined tuning.
+
+        The adaptors keep the state of the last quantization, e.g., the tuning config and the pre-optimized model,
+        so the worker quantizes the trials with its own adaptor while the current trial is evaluated.
+        """
+        framework, framework_specific_info = self._set_framework_info(self.calib_dataloader, self.q_func)
+        adaptor = FRAMEWORKS[framework](framework_specific_info)
+        adaptor.query_fw_capability(self.model)
+        return adaptor
+
     def _prepare_tuning(self):
         """Prepare to tune and avoid repeated initialization of the adaptor and tuning space."""
         # query capability and build tuning space
@@ -482,86 +507,282 @@ class TuneStrategy(metaclass=TuneStrategyMeta):
         self._setup_pre_tuning_algo_scheduler()
         self._prepare_tuning()
         traverse_start_time = time()
-        for op_tuning_cfg in self.next_tune_cfg():
-            tuning_start_time = time()
-            self.trials_count += 1
-            tune_cfg = self._tune_cfg_converter(op_tuning_cfg)
-            tuning_history = self._find_tuning_history(tune_cfg)
-            if tuning_history and self.trials_count < self.config.tuning_criterion.max_trials:  # pragma: no cover
-                self.last_tune_result = tuning_history["last_tune_result"]
-                self.best_tune_result = tuning_history["best_tune_result"]
-                logger.warn("Find evaluated tuning config, skip.")
-                continue
-            self._remove_redundant_qmodel()
-            self.tuning_times += 1
-            # set the parameter for pre quantization algos and run
-            self.set_param_for_pre_quantization_algos(self.algo_scheduler, tune_cfg, self.model)
-            self.model = self.algo_scheduler("pre_quantization")  # pylint: disable=E1102
-            logger.debug("Dump current tuning configuration:")
-            logger.debug(tune_cfg)
-            # quantize
-            q_model = self.adaptor.quantize(copy.deepcopy(tune_cfg), self.model, self.calib_dataloader, self.q_func)
-            assert self.adaptor.pre_optimized_model
-            # set the parameter for post quantization algos and run
-            self.set_param_for_post_quantization_algos(
-                self.algo_scheduler, tune_cfg, self.adaptor.pre_optimized_model, q_model
-            )
-            self.last_qmodel = self.algo_scheduler("post_quantization")  # pylint: disable=E1102
-            self.last_tune_cfg = copy.deepcopy(tune_cfg)
-            # remove the reference to model
-            self.algo_scheduler.reset_exec_algorithms()
-            assert self.last_qmodel
-            # return the last quantized model as a result. if not tune.
-            if self._not_tuning:
-                self.best_qmodel = self.last_qmodel
-                self._add_tuning_history(copy.deepcopy(tune_cfg), (-1, [0]), q_config=self.last_qmodel.q_config)
-                return
-            self.last_tune_result = self._evaluate(self.last_qmodel)
-            self.cur_best_acc, self.cur_best_tuning_cfg = self.update_best_op_tuning_cfg(op_tuning_cfg)
-            need_stop = self.stop(self.config.tuning_criterion.timeout, self.trials_count)
-
-            # record the tuning history
-            saved_tune_cfg = copy.deepcopy(tune_cfg)
-            saved_last_tune_result = copy.deepcopy(self.last_tune_result)
-            self._add_tuning_history(saved_tune_cfg, saved_last_tune_result, q_config=q_model.q_config)
-            self.tune_result_record.append(copy.deepcopy(self.last_tune_result))
-            self.tune_cfg = tune_cfg
-            now_time = time()
-            acc_res_msg = ""
-            performance_res_msg = ""
-            if self.tuning_result_data:
-                acc_res_msg = "[ " + "| ".join(self.tuning_result_data[0]) + " ]"
-                performance_res_msg = "[ " + "| ".join(self.tuning_result_data[1]) + " ]"
-            logger.debug(f"*** The accuracy of last tuning is: {acc_res_msg}")
-            logger.debug(f"*** The performance of last tuning is: {performance_res_msg}")
-            logger.debug(f"*** The last tuning time: {(now_time - tuning_start_time):.2f} s")
-            logger.debug(f"*** The tuning process lasted time: {(now_time - traverse_start_time):.2f} s")
-
-            self._dump_tuning_process_statistics()
-            if need_stop:
-                if self.re_quant:
-                    logger.info("*** Do not stop the tuning process, re-quantize the ops.")
+        trials = self._next_trial()
+        try:
+            for op_tuning_cfg, speculative_trial in trials:
+                tuning_start_time = time()
+                self.trials_count += 1
+                tune_cfg = self._tune_cfg_converter(op_tuning_cfg)
+                tuning_history = self._find_tuning_history(tune_cfg)
+                if tuning_history and self.trials_count < self.config.tuning_criterion.max_trials:  # pragma: no cover
+                    self.last_tune_result = tuning_history["last_tune_result"]
+                    self.best_tune_result = tuning_history["best_tune_result"]
+                    logger.warn("Find evaluated tuning config, skip.")
                     continue
-                # recover the best quantized model from tuning config
-                self._recover_best_qmodel_from_tuning_cfg()
-                if (
-                    self.use_multi_objective and len(self.tune_result_record) > 1 and self.best_tune_result is not None
-                ):  # pragma: no cover
-                    best_trail, best_result = self.objectives.best_result(
-                        self.tune_result_record, copy.deepcopy(self.baseline)
-                    )
-                    if best_result != self.best_tune_result:
-                        from neural_compressor.utils.utility import recover
-
-                        self.best_qmodel = recover(
-                            self.model.model, os.path.join(options.workspace, "history.snapshot"), best_trail
+                self._remove_redundant_qmodel()
+                self.tuning_times += 1
+                q_model, self.last_qmodel = self._quantize_trial(tune_cfg, speculative_trial)
+                self.last_tune_cfg = copy.deepcopy(tune_cfg)
+                # return the last quantized model as a result. if not tune.
+                if self._not_tuning:
+                    trials.close()
+                    self.best_qmodel = self.last_qmodel
+                    self._add_tuning_history(copy.deepcopy(tune_cfg), (-1, [0]), q_config=self.last_qmodel.q_config)
+                    return
+                self.last_tune_result = self._evaluate(self.last_qmodel)
+                self.cur_best_acc, self.cur_best_tuning_cfg = self.update_best_op_tuning_cfg(op_tuning_cfg)
+                need_stop = self.stop(self.config.tuning_criterion.timeout, self.trials_count)
+
+                # record the tuning history
+                saved_tune_cfg = copy.deepcopy(tune_cfg)
+                saved_last_tune_result = copy.deepcopy(self.last_tune_result)
+                self._add_tuning_history(saved_tune_cfg, saved_last_tune_result, q_config=q_model.q_config)
+                self.tune_result_record.append(copy.deepcopy(self.last_tune_result))
+                self.tune_cfg = tune_cfg
+                now_time = time()
+                acc_res_msg = ""
+                performance_res_msg = ""
+                if self.tuning_result_data:
+                    acc_res_msg = "[ " + "| ".join(self.tuning_result_data[0]) + " ]"
+                    performance_res_msg = "[ " + "| ".join(self.tuning_result_data[1]) + " ]"
+                logger.debug(f"*** The accuracy of last tuning is: {acc_res_msg}")
+                logger.debug(f"*** The performance of last tuning is: {performance_res_msg}")
+                logger.debug(f"*** The last tuning time: {(now_time - tuning_start_time):.2f} s")
+                logger.debug(f"*** The tuning process lasted time: {(now_time - traverse_start_time):.2f} s")
+
+                self._dump_tuning_process_statistics()
+                if need_stop:
+                    if self.re_quant:
+                        logger.info("*** Do not stop the tuning process, re-quantize the ops.")
+                        continue
+                    # discard the speculative trials before recovering the best quantized model
+                    trials.close()
+                    # recover the best quantized model from tuning config
+                    self._recover_best_qmodel_from_tuning_cfg()
+                    if (
+                        self.use_multi_objective
+                        and len(self.tune_result_record) > 1
+                        and self.best_tune_result is not None
+                    ):  # pragma: no cover
+                        best_trail, best_result = self.objectives.best_result(
+                            self.tune_result_record, copy.deepcopy(self.baseline)
                         )
-                        logger.debug("*** Update the best qmodel by recovering from history.")
-                        self.best_tune_result = best_result
-                    self._dump_tuning_process_statistics()
-                break
+                        if best_result != self.best_tune_result:
+                            from neural_compressor.utils.utility import recover
+
+                            self.best_qmodel = recover(
+                                self.model.model, os.path.join(options.workspace, "history.snapshot"), best_trail
+                            )
+                            logger.debug("*** Update the best qmodel by recovering from history.")
+                            self.best_tune_result = best_result
+                        self._dump_tuning_process_statistics()
+                    break
+        finally:
+            # the speculative trials are also discarded if the tuning fails
+            trials.close()
+        # discard the speculative trials before recovering the best quantized model
+        trials.close()
         self._recover_best_qmodel_from_tuning_cfg()
 
+    def _quantize(self, tune_cfg, adaptor=None, algo_scheduler=None):
+        """Quantize the model with the tuning config and run the pre and post quantization algos.
+
+        Args:
+            tune_cfg (dict): The tuning config.
+            adaptor (Adaptor, optional): The adaptor to quantize the model. Defaults to None, i.e., self.adaptor.
+            algo_scheduler (AlgorithmScheduler, optional): The scheduler of the pre and post quantization algos.
+                Defaults to None, i.e., self.algo_scheduler.
+
+        Returns:
+            tuple: The quantized model and the model after post quantization algos.
+        """
+        adaptor = adaptor or self.adaptor
+        algo_scheduler = algo_scheduler or self.algo_scheduler
+        # set the parameter for pre quantization algos and run
+        self.set_param_for_pre_quantization_algos(algo_scheduler, tune_cfg, self.model)
+        self.model = algo_scheduler("pre_quantization")  # pylint: disable=E1102
+        logger.debug("Dump current tuning configuration:")
+        logger.debug(tune_cfg)
+        # quantize
+        q_model = adaptor.quantize(copy.deepcopy(tune_cfg), self.model, self.calib_dataloader, self.q_func)
+        assert adaptor.pre_optimized_model
+        # set the parameter for post quantization algos and run
+        self.set_param_for_post_quantization_algos(algo_scheduler, tune_cfg, adaptor.pre_optimized_model, q_model)
+        last_qmodel = algo_scheduler("post_quantization")  # pylint: disable=E1102
+        # remove the reference to model
+        algo_scheduler.reset_exec_algorithms()
+        assert last_qmodel
+        return q_model, last_qmodel
+
+    def _quantize_in_worker(self, tune_cfg):
+        """Quantize a trial with the adaptor of the pipelined tuning worker.
+
+        Returns:
+            tuple: The quantized models and the op type statistics of the quantization.
+        """
+        qmodels = self._quantize(tune_cfg, self._trial_adaptor, self._trial_algo_scheduler)
+        return qmodels, getattr(self._trial_adaptor, "optype_statistics", None)
+
+    def _quantize_trial(self, tune_cfg, speculative_trial=None):
+        """Get the quantized model of current trial, which may be quantized in advance by pipelined tuning.
+
+        Args:
+            tune_cfg (dict): The tuning config of current trial.
+            speculative_trial (tuple, optional): The tuning config speculated for current trial and the future of
+                its quantization. Defaults to None.
+
+        Returns:
+            tuple: The quantized model and the model after post quantization algos.
+        """
+        if self._trial_executor is None:
+            return self._quantize(tune_cfg)
+        future = None
+        if speculative_trial is not None:
+            speculative_tune_cfg, future = speculative_trial
+            if speculative_tune_cfg != tune_cfg:
+                logger.debug("[Strategy] Discard the speculative trial as its tuning config is changed.")
+                future = None
+        if future is None:
+            # keep the model and the algo scheduler used by the worker only
+            future = self._trial_executor.submit(self._quantize_in_worker, tune_cfg)
+        qmodels, optype_statistics = future.result()
+        if optype_statistics is not None:
+            self.adaptor.optype_statistics = optype_statistics
+        return qmodels
+
+    def _next_trial(self):
+        """Yield the next tuning config and its speculative trial.
+
+        In pipelined tuning, i.e., `strategy_kwargs={"pipeline_lookahead": n}`, up to n next trials are quantized in
+        a worker thread while the current trial is evaluated. The worker has its own adaptor and algo scheduler, and
+        the calibration and evaluation dataloaders must be different objects. The tuning config of a speculative
+        trial is converted with the predicted trial number and compared with the actual one when it's consumed, so
+        the tuning result is the same as the sequential one. The speculative trials left are discarded when the
+        generator is closed.
+
+        Yields:
+            tuple: The op tuning config, and the speculative trial or None.
+        """
+        strategy_kwargs = self.config.tuning_criterion.strategy_kwargs or {}
+        lookahead = strategy_kwargs.get("pipeline_lookahead", 0)
+        if lookahead and not self.supports_pipelined_tuning:
+            logger.warning(
+                "[Strategy] {} tunes depending on the previous results, ignore the pipelined tuning.".format(
+                    type(self).__name__
+                )
+            )
+            lookahead = 0
+        if lookahead and self.calib_dataloader is not None and self.calib_dataloader is self.eval_dataloader:
+            logger.warning(
+                "[Strategy] The calibration and evaluation dataloaders are the same object, "
+                "which can't be iterated by two threads, ignore the pipelined tuning."
+            )
+            lookahead = 0
+        if not lookahead or self._not_tuning:
+            for op_tuning_cfg in self.next_tune_cfg():
+                yield op_tuning_cfg, None
+            return
+        logger.info("[Strategy] Quantize up to {} next trials in advance.".format(lookahead))
+        self._trial_adaptor = self._create_trial_adaptor()
+        self._trial_algo_scheduler = self._initialize_algo_scheduler(self._trial_adaptor)
+        self._trial_executor = ThreadPoolExecutor(max_workers=1)
+        op_tuning_cfgs = self.next_tune_cfg()
+        pending = deque()
+        exhausted = False
+        try:
+            while True:
+                # the current trial and the lookahead ones
+                while not exhausted and len(pending) <= lookahead:
+                    op_tuning_cfg = next(op_tuning_cfgs, None)
+                    if op_tuning_cfg is None:
+                        exhausted = True
+                        break
+                    op_tuning_cfg = deepcopy(op_tuning_cfg)
+                    tune_cfg = self._tune_cfg_converter(op_tuning_cfg)
+                    tune_cfg["trial_number"] = self.trials_count + len(pending) + 1
+                    speculative_trial = None
+                    if not self._find_tuning_history(tune_cfg):
+                        speculative_trial = (tune_cfg, self._trial_executor.submit(self._quantize_in_worker, tune_cfg))
+                    pending.append((op_tuning_cfg, speculative_trial))
+                if not pending:
+                    break
+                yield pending.popleft()
+        finally:
+            for _, speculative_trial in pending:
+                if speculative_trial is not None:
+                    speculative_trial[1].cancel()
+            self._trial_executor.shutdown(wait=True)
+            self._trial_executor = None
+            self._trial_adaptor = None
+            self._trial_algo_scheduler = None
+
+    def _get_op_divergence_surrogate(self, op_tuning_cfg, op_names, divergence_fn=None):
+        """Get the surrogate scorer of the fallback candidates based on the op tuning config.
+
+        The model quantized with `op_tuning_cfg` and the FP32 model run `surrogate_batches` calibration batches
+        (`strategy_kwargs`, defaults to 1), the output divergences of ops are cached until the config is changed.
+
+        Args:
+            op_tuning_cfg (dict): The op tuning config the fallback candidates are based on.
+            op_names (List[str]): The names of ops to inspect.
+            divergence_fn (Callable, optional): The function to calculate the divergence. Defaults to None.
+
+        Returns:
+            OpDivergenceSurrogate: The surrogate scorer.
+        """
+        tune_cfg = self._tune_cfg_converter(op_tuning_cfg)
+        tune_cfg.pop("trial_number", None)
+        if self._surrogate is not None and self._surrogate_key == (tune_cfg, list(op_names)):
+            return self._surrogate
+        if self._surrogate is None:
+            strategy_kwargs = self.config.tuning_criterion.strategy_kwargs or {}
+            self._surrogate = OpDivergenceSurrogate(
+                self.adaptor,
+                self.calib_dataloader,
+                num_batches=strategy_kwargs.get("surrogate_batches", 1),
+                divergence_fn=divergence_fn,
+            )
+        logger.info("[Strategy] Inspect the output divergence of {} ops.".format(len(op_names)))
+        q_model = self.adaptor.quantize(copy.deepcopy(tune_cfg), self.model, self.calib_dataloader, self.q_func)
+        self._surrogate.update(self.model, q_model, op_names, tune_cfg)
+        self._surrogate_key = (tune_cfg, list(op_names))
+        return self._surrogate
+
+    def _select_fallback_items_by_surrogate(self, fallback_items_name_lst, op_tuning_cfg, inspected_items_name_lst):
+        """Rank the items to fall back one by one by the surrogate scorer and skip the ones predicted to fail.
+
+        It's enabled by `surrogate_coverage` in `strategy_kwargs`, the top ranked items covering this ratio of
+        the total output divergence are selected, falling back any other item is predicted to hardly change the
+        accuracy.
+
+        Args:
+            fallback_items_name_lst (List[Tuple[str, str]]): The (op name, op type) of the items to fall back.
+            op_tuning_cfg (dict): The op tuning config the fallback candidates are based on.
+            inspected_items_name_lst (List[Tuple[str, str]]): The (op name, op type) of the items to inspect,
+                which includes `fallback_items_name_lst`.
+
+        Returns:
+            tuple: The selected items in the ranked order and the skipped items.
+        """
+        strategy_kwargs = self.config.tuning_criterion.strategy_kwargs or {}
+        coverage = strategy_kwargs.get("surrogate_coverage", None)
+        if coverage is None or not fallback_items_name_lst:
+            return fallback_items_name_lst, []
+        surrogate = self._get_op_divergence_surrogate(
+            op_tuning_cfg, [op_name for op_name, _ in inspected_items_name_lst]
+        )
+        name_to_item = OrderedDict((item[0], item) for item in fallback_items_name_lst)
+        selected_op_names = surrogate.select(list(name_to_item), coverage)
+        selected_items = [name_to_item[op_name] for op_name in selected_op_names]
+        skipped_items = [name_to_item[op_name] for op_name in surrogate.rank(list(name_to_item))]
+        skipped_items = [item for item in skipped_items if item not in selected_items]
+        logger.info(
+            "[Strategy] Select {} of {} ops to fall back one by one by the surrogate.".format(
+                len(selected_items), len(fallback_items_name_lst)
+            )
+        )
+        return selected_items, skipped_items
+
     def _initialize_recipe(self):
         """Divide the recipe into two categories tuning/not tuning."""
         from ..utils.constant import RECIPES as fwk_recipes
@@ -1970,11 +2191,25 @@ class TuneStrategy(metaclass=TuneStrategyMeta):
 
         return need_stop
 
-    def _save(self):
-        """Save current tuning state to snapshot for resuming."""
+    def _save(self, trial=None):
+        """Save current tuning state to the tuning history journal for resuming.
+
+        Args:
+            trial (dict, optional): The trial just added to the tuning history of current config. Defaults to None.
+        """
         logger.info("Save tuning history to {}.".format(self.history_path))
-        with fault_tolerant_file(self.history_path) as f:
-            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # subclasses put their states for resuming into the tuning history
+        self.__getstate__()
+        if self._history_journal is None:
+            # the history may be resumed or from previous strategy, rewrite it once and append later
+            self._history_journal = TuningHistoryJournal(self.history_path)
+            self._history_journal.reset(self.tuning_history)
+            return
+        self_history = self._find_self_tuning_history()
+        if self_history is None:
+            return
+        entry_index = next(idx for idx, history in enumerate(self.tuning_history) if history is self_history)
+        self._history_journal.append(self.tuning_history, entry_index, trial)
 
     def _find_tuning_history(self, tune_cfg):
         """Check if the specified tune_cfg is evaluated or not on same config.
@@ -1985,13 +2220,11 @@ class TuneStrategy(metaclass=TuneStrategyMeta):
         Returns:
             tuning_history or None: The tuning history containing evaluated tune_cfg.
         """
-        for tuning_history in self.tuning_history:
+        for tuning_history in self._tuning_history_index.find(self.tuning_history, tune_cfg):
             # only check if a tune_cfg is evaluated under same config, excluding
             # some fields in tuning section of config, such as tensorboard, snapshot, resume.
             if self._same_conf(tuning_history["cfg"], self.conf):
-                for history in tuning_history["history"]:
-                    if history and equal_dicts(history["tune_cfg"], tune_cfg, ignore_keys=["trial_number"]):
-                        return tuning_history
+                return tuning_history
 
         return None
 
@@ -2038,11 +2271,13 @@ class TuneStrategy(metaclass=TuneStrategyMeta):
         Note this record is added under same config.
         """
         found = False
+        trial = None
         d = {"tune_cfg": tune_cfg, "tune_result": tune_result}
         for tuning_history in self.tuning_history:
             if self._same_conf(tuning_history["cfg"], self.conf):
                 d.update(kwargs)
                 tuning_history["history"].append(d)
+                trial = d
                 tuning_history["last_tune_result"] = self.last_tune_result
                 tuning_history["best_tune_result"] = self.best_tune_result
                 tuning_history["cfg"] = self.conf
@@ -2062,7 +2297,7 @@ class TuneStrategy(metaclass=TuneStrategyMeta):
                 tuning_history["history"].append(d)
             self.tuning_history.append(tuning_history)
 
-        self._save()
+        self._save(trial)
 
     def _collect_ops_by_quant_mode(self, tune_cfg, quant_mode):
         ops_lst = []
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2024 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Surrogate scorer to rank the fallback candidates before the full evaluation."""
+
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ...utils import logger
+
+
+def op_output_divergence(fp32_tensor, dequantize_tensor):
+    """Calculate the divergence between the fp32 output and the dequantized output of an op.
+
+    It's the mean of the normalized MSE (MSE divided by the variance of fp32 tensor) and the cosine distance,
+    both of which don't depend on the scale of the output.
+
+    Args:
+        fp32_tensor (np.ndarray): The FP32 tensor.
+        dequantize_tensor (np.ndarray): The dequantized tensor.
+
+    Returns:
+        float: The divergence.
+    """
+    fp32_tensor = np.asarray(fp32_tensor, dtype=np.float64).flatten()
+    dequantize_tensor = np.asarray(dequantize_tensor, dtype=np.float64).flatten()
+    eps = np.finfo(np.float64).eps
+    normalized_mse = np.mean((fp32_tensor - dequantize_tensor) ** 2) / (np.var(fp32_tensor) + eps)
+    cosine = np.dot(fp32_tensor, dequantize_tensor) / (
+        np.linalg.norm(fp32_tensor) * np.linalg.norm(dequantize_tensor) + eps
+    )
+    return float((normalized_mse + 1 - cosine) / 2)
+
+
+class OpDivergenceSurrogate:
+    """Surrogate scorer ranking the fallback candidates by the output divergence of ops.
+
+    It runs a few calibration batches through the fp32 model and the quantized model once, and caches the
+    output divergence of each op in a table. The quality of a candidate falling back some ops is predicted by
+    the divergence left in the quantized ops, so the candidates can be evaluated in the predicted order, and the
+    ones which can hardly change the result are skipped.
+    """
+
+    def __init__(
+        self,
+        adaptor,
+        dataloader,
+        num_batches: int = 1,
+        divergence_fn: Optional[Callable] = None,
+    ):
+        """Init the surrogate scorer.
+
+        Args:
+            adaptor: The framework adaptor to inspect the tensors.
+            dataloader: The calibration dataloader.
+            num_batches (int, optional): The number of batches to inspect. Defaults to 1.
+            divergence_fn (Callable, optional): The function of (fp32_tensor, dequantize_tensor) to calculate
+                the divergence. Defaults to None, `op_output_divergence` is used.
+        """
+        self.adaptor = adaptor
+        self.dataloader = dataloader
+        self.num_batches = num_batches
+        self.divergence_fn = divergence_fn or op_output_divergence
+        # op name -> output divergence
+        self.divergence: Dict[str, float] = {}
+        self._fp32_dump = None
+        self._fp32_op_names = None
+
+    def _inspect(self, model, op_names, tune_cfg):
+        dump_content = self.adaptor.inspect_tensor(
+            model,
+            self.dataloader,
+            op_names,
+            list(range(1, self.num_batches + 1)),
+            inspect_type="activation",
+            quantization_cfg=tune_cfg,
+        )
+        return dump_content["activation"]
+
+    def update(self, fp32_model, q_model, op_names: List[str], tune_cfg: Dict):
+        """Inspect the outputs of ops and cache their divergences.
+
+        The fp32 outputs are inspected only once for the same ops and reused.
+
+        Args:
+            fp32_model: The FP32 model.
+            q_model: The quantized model.
+            op_names (List[str]): The names of ops to inspect.
+            tune_cfg (dict): The tuning config of the quantized model.
+        """
+        if self._fp32_op_names != list(op_names):
+            self._fp32_dump = self._inspect(fp32_model, op_names, tune_cfg)
+            self._fp32_op_names = list(op_names)
+        q_dump = self._inspect(q_model, op_names, tune_cfg)
+        self.divergence = {}
+        for op_name in op_names:
+            divergences = []
+            for fp32_tensors, q_tensors in zip(self._fp32_dump, q_dump):
+                if op_name not in fp32_tensors or op_name not in q_tensors:
+                    continue
+                divergences += [
+                    self.divergence_fn(fp32_tensor, q_tensor)
+                    for fp32_tensor, q_tensor in zip(fp32_tensors[op_name].values(), q_tensors[op_name].values())
+                ]
+            if divergences:
+                self.divergence[op_name] = float(np.mean(divergences))
+            else:
+                logger.debug(f"[Strategy] Can't inspect the output of {op_name}, it's not ranked by the surrogate.")
+
+    def predict(self, fallback_op_names: List[str]) -> float:
+        """Predict the quality of a candidate by the divergence left after falling back the ops.
+
+        Args:
+            fallback_op_names (List[str]): The names of ops to fall back.
+
+        Returns:
+            float: The predicted quality, the higher the better.
+        """
+        fallback_op_names = set(fallback_op_names)
+        return -sum(divergence for op_name, divergence in self.divergence.items() if op_name not in fallback_op_names)
+
+    def rank(self, op_names: List[str]) -> List[str]:
+        """Sort the ops by the predicted quality of falling back each of them, from the best to the worst.
+
+        The ops not inspected are put at the end in the original order.
+
+        Args:
+            op_names (List[str]): The names of ops.
+
+        Returns:
+            List[str]: The sorted op names.
+        """
+        # falling back the op with larger divergence leaves less divergence
+        ranked = sorted([op for op in op_names if op in self.divergence], key=lambda op: -self.divergence[op])
+        return ranked + [op for op in op_names if op not in self.divergence]
+
+    def select(self, op_names: List[str], coverage: float) -> List[str]:
+        """Select the top ranked ops which cover the given ratio of the total divergence.
+
+        Falling back the other ops one by one is predicted to fail, as each of them hardly changes the output.
+        The ops not inspected are always selected.
+
+        Args:
+            op_names (List[str]): The names of ops.
+            coverage (float): The ratio of the total divergence to cover.
+
+        Returns:
+            List[str]: The selected op names in the ranked order.
+        """
+        ranked = self.rank(op_names)
+        total = sum(self.divergence.get(op, 0.0) for op in op_names)
+        selected, covered = [], 0.0
+        for op in ranked:
+            if op in self.divergence and total > 0 and covered >= coverage * total:
+                continue
+            selected.append(op)
+            covered += self.divergence.get(op, 0.0)
+        return selected
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2024 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Append-only journal and index of the tuning history."""
+
+import os
+import pickle
+
+from ...utils import logger
+from ...utils.utility import fault_tolerant_file
+
+
+def canonicalize(obj):
+    """Convert a nested config to a hashable object, which is equal for the equal configs.
+
+    Args:
+        obj: the config, such as a tune_cfg.
+
+    Returns:
+        A hashable object.
+    """
+    if isinstance(obj, dict):
+        # the keys of a dict are unique, so the set of items doesn't depend on the insertion order
+        return (dict, frozenset((canonicalize(k), canonicalize(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return (type(obj), tuple(canonicalize(v) for v in obj))
+    if isinstance(obj, (set, frozenset)):
+        return (frozenset, frozenset(canonicalize(v) for v in obj))
+    try:
+        hash(obj)
+        return obj
+    except TypeError:
+        return (type(obj), repr(obj))
+
+
+class TuningHistoryIndex:
+    """Hash index of the evaluated tune_cfgs in the tuning history.
+
+    The trials appended to the tuning history are indexed incrementally when looking up, so the cost of a lookup
+    doesn't grow with the length of the history.
+    """
+
+    def __init__(self, ignore_keys=("trial_number",)):
+        """Init the index.
+
+        Args:
+            ignore_keys (tuple, optional): the keys of tune_cfg ignored when comparing. Defaults to ("trial_number",).
+        """
+        self.ignore_keys = ignore_keys
+        # canonical tune_cfg -> tuning history entries containing it
+        self._index = {}
+        # id of tuning history entry -> (entry, number of indexed trials)
+        self._indexed = {}
+
+    def key(self, tune_cfg):
+        """Get the index key of tune_cfg."""
+        return canonicalize({k: v for k, v in tune_cfg.items() if k not in self.ignore_keys})
+
+    def update(self, tuning_history):
+        """Index the trials added to the tuning history since last update."""
+        for entry in tuning_history:
+            _, num_indexed = self._indexed.get(id(entry), (entry, 0))
+            for trial in entry["history"][num_indexed:]:
+                if trial and isinstance(trial.get("tune_cfg"), dict):
+                    entries = self._index.setdefault(self.key(trial["tune_cfg"]), [])
+                    if not any(e is entry for e in entries):
+                        entries.append(entry)
+            # keep the reference of entry, so its id isn't reused
+            self._indexed[id(entry)] = (entry, len(entry["history"]))
+
+    def find(self, tuning_history, tune_cfg):
+        """Get the tuning history entries containing tune_cfg.
+
+        Args:
+            tuning_history (list): the tuning history.
+            tune_cfg (dict): the tune_cfg to find.
+
+        Returns:
+            list: the tuning history entries.
+        """
+        self.update(tuning_history)
+        return self._index.get(self.key(tune_cfg), [])
+
+
+class TuningHistoryJournal:
+    """Append-only journal of the tuning history, which is replayed for resuming.
+
+    The records are pickled one after another:
+        ("entry", fields): a tuning history entry under a new config, without its "history".
+        ("trial", entry_index, trial): a trial appended to the "history" of the entry.
+        ("state", entry_index, fields): the fields of the entry changed since they were journaled, such as
+            best_tune_result.
+    So adding a trial doesn't rewrite the history. The fields which change every trial, e.g. the states of the
+    bayesian and TPE strategies, are journaled again each time, so the journal is compacted by rewriting it once it
+    grows over compact_ratio times its size when last rewritten.
+    """
+
+    def __init__(self, path, compact_ratio=4):
+        """Init the journal.
+
+        Args:
+            path (str): the journal path.
+            compact_ratio (int, optional): the growth ratio of the journal to rewrite it. Defaults to 4.
+        """
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.num_entries = 0
+        # entry index -> field -> the pickled value last journaled
+        self._journaled_fields = {}
+        self._compacted_size = 0
+
+    def _changed_fields(self, entry_index, entry):
+        journaled = self._journaled_fields.setdefault(entry_index, {})
+        fields = {}
+        for key, value in entry.items():
+            if key == "history":
+                continue
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            if journaled.get(key) != data:
+                journaled[key] = data
+                fields[key] = value
+        return fields
+
+    def _entry_records(self, entry_index, entry):
+        records = [("entry", self._changed_fields(entry_index, entry))]
+        records += [("trial", entry_index, trial) for trial in entry["history"]]
+        return records
+
+    def reset(self, tuning_history):
+        """Rewrite the journal with the whole tuning history, e.g. the history resumed or from previous strategy.
+
+        Args:
+            tuning_history (list): the tuning history.
+        """
+        self._journaled_fields = {}
+        with fault_tolerant_file(self.path) as f:
+            for entry_index, entry in enumerate(tuning_history):
+                for record in self._entry_records(entry_index, entry):
+                    pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.num_entries = len(tuning_history)
+        self._compacted_size = os.path.getsize(self.path)
+
+    def append(self, tuning_history, entry_index, trial=None):
+        """Append a trial and the changed fields of an entry to the journal.
+
+        Args:
+            tuning_history (list): the tuning history, whose new entries are appended too.
+            entry_index (int): the index of the entry updated.
+            trial (dict, optional): the trial appended to the entry. Defaults to None.
+        """
+        records = []
+        for new_index in range(self.num_entries, len(tuning_history)):
+            records += self._entry_records(new_index, tuning_history[new_index])
+        if trial is not None and entry_index < self.num_entries:
+            records.append(("trial", entry_index, trial))
+        fields = self._changed_fields(entry_index, tuning_history[entry_index])
+        if fields:
+            records.append(("state", entry_index, fields))
+        with open(self.path, "ab") as f:
+            for record in records:
+                pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        self.num_entries = len(tuning_history)
+        if os.path.getsize(self.path) > self.compact_ratio * max(self._compacted_size, 1):
+            self.reset(tuning_history)
+
+    @staticmethod
+    def load(path):
+        """Replay the journal to get the tuning history.
+
+        The legacy snapshot, which pickles the whole strategy, is loaded too.
+
+        Args:
+            path (str): the journal path.
+
+        Returns:
+            list: the tuning history.
+        """
+        tuning_history = []
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    record = pickle.load(f)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError, AttributeError, IndexError) as e:  # pragma: no cover
+                    logger.warning("The tuning history journal {} is truncated: {}.".format(path, e))
+                    break
+                if not isinstance(record, tuple):
+                    return record.tuning_history
+                if record[0] == "entry":
+                    tuning_history.append(dict(record[1], history=[]))
+                elif record[0] == "trial":
+                    tuning_history[record[1]]["history"].append(record[2])
+                elif record[0] == "state":
+                    tuning_history[record[1]].update(record[2])
+        return tuning_history
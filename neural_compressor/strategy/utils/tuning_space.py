@@ -32,6 +32,8 @@ from .utility import OrderedDefaultDict, preprocess_user_cfg, quant_options
 class TuningItem:
     """Not displayed in API Docs."""
 
+    __slots__ = ("name", "_options", "item_type", "_option_index", "_num_indexed")
+
     def __init__(self, name, options=[], item_type=None):
         """Init the tuning item.
 
@@ -43,6 +45,9 @@ class TuningItem:
         self.name = name
         self._options = options
         self.item_type = item_type
+        # option name -> the first option item with the name, built lazily
+        self._option_index = None
+        self._num_indexed = 0
 
     @property
     def options(self):
@@ -73,6 +78,7 @@ class TuningItem:
         """
         if option in self._options:
             self._options.remove(option)
+            self._option_index = None
 
     def get_option_by_name(self, option_name):
         """Get the option item by name.
@@ -83,10 +89,14 @@ class TuningItem:
         Returns:
             option: the queried option.
         """
-        for option in self.options:
-            if isinstance(option, TuningItem) and option.name == option_name:
-                return option
-        return None
+        # the options may be appended after indexing
+        if self._option_index is None or self._num_indexed != len(self._options):
+            self._option_index = {}
+            for option in self._options:
+                if isinstance(option, TuningItem):
+                    self._option_index.setdefault(option.name, option)
+            self._num_indexed = len(self._options)
+        return self._option_index.get(option_name)
 
     def get_details(self, depth=0):
         """Get the tuning item and its options recursively.
@@ -142,6 +152,13 @@ class TuningSpace:
         self.ops_attr = {"activation": set(), "weight": set()}
         # {(op_name, op_type): {path1, path2, ...}
         self.ops_path_set = defaultdict(set)
+        # (op_name_type, *path): item, the flat index of the tuning items
+        self._path_index = {}
+        # quant_bits: [op_item, ...]
+        self._quant_bits_ops = defaultdict(list)
+        # the memos of the default paths, (op_name_type, path/pattern): default path
+        self._default_full_path_cache = {}
+        self._default_path_by_pattern_cache = {}
         self._create_tuning_space(capability, self._usr_cfg)
 
     def _init_usr_cfg(self):
@@ -197,6 +214,32 @@ class TuningSpace:
                             self.quant_mode_wise_items[dtype_item.name].append(op_item)
                 else:
                     self.quant_mode_wise_items[q_option.name].append(op_item)
+        self._build_index()
+
+    def _build_index(self):
+        """Compile the tuning items into the flat indexes, so the queries don't walk the tree."""
+        self._path_index = {}
+        stack = [((), self.root_item)]
+        while stack:
+            path, item = stack.pop()
+            # the same as walking by `get_option_by_name`, the first option with the name is indexed
+            for option in reversed(item.options):
+                if isinstance(option, TuningItem):
+                    stack.append(((*path, option.name), option))
+            if path:
+                self._path_index.setdefault(path, item)
+        self._quant_bits_ops = defaultdict(list)
+        for op_name_type, op_item in self.op_items.items():
+            quant_bits_set = OrderedDict()
+            for quant_mode, att in itertools.product(["static", "dynamic"], ["activation", "weight"]):
+                att_item = self._path_index.get((op_name_type, quant_mode, att))
+                for option in att_item.options if att_item else []:
+                    if isinstance(option, TuningItem):
+                        quant_bits_set[option.name] = None
+            for quant_bits in quant_bits_set:
+                self._quant_bits_ops[quant_bits].append(op_item)
+        self._default_full_path_cache = {}
+        self._default_path_by_pattern_cache = {}
 
     def _merge_op_cfg(self, cur_op_cap, op_user_cfg, fw_op_cap):
         """Merge the op cfg with user cfg.
@@ -399,6 +442,8 @@ class TuningSpace:
         :param user_cfg:
         :return:
         """
+        if user_cfg["optype_wise"] is None and user_cfg["op_wise"] is None:
+            return
         fw_capability = deepcopy(capability)
         if user_cfg["optype_wise"] is not None:
             self._merge_optype_wise_cfg(capability, user_cfg["optype_wise"], fw_capability)
@@ -510,11 +555,14 @@ class TuningSpace:
         :param usr_cfg:
         :return:
         """
-        capability["op"] = self._parse_cap_helper(deepcopy(capability["op"]))
+        # `_parse_cap_helper` copies the capability itself
+        capability["op"] = self._parse_cap_helper(capability["op"])
         if usr_cfg:
             self._merge_with_user_cfg(capability, usr_cfg["quantization"])
-            logger.debug("***********  After Merged with user cfg ***********")
-            logger.debug(capability)
+            # skip formatting the whole capability if it's not logged
+            if logger.level == logger.DEBUG:
+                logger.debug("***********  After Merged with user cfg ***********")
+                logger.debug(capability)
         self._parse_capability(capability)
 
     def query_item_option(self, op_name_type, path, method_name, method_val):
@@ -572,14 +620,15 @@ class TuningSpace:
 
     def get_item_by_path(self, path, default=None):
         """Get the item according to the path."""
-        item = self.root_item
-        for val in path:
-            if item is None:
-                logger.debug(f"Did not found the item according to the path {path}")
-                return default
-            item = item.get_option_by_name(val)
+        path = tuple(path)
+        if not path:
+            return self.root_item
+        item = self._path_index.get(path)
         if item is None:
             logger.debug(f"Did not found the item according to the path {path}")
+            # return default if the parent is not found either
+            if len(path) > 1 and path[:-1] not in self._path_index:
+                return default
         return item
 
     def get_default_full_path(self, op_name_type, path):
@@ -592,6 +641,12 @@ class TuningSpace:
         Returns:
             new_path: the complete path.
         """
+        key = (op_name_type, tuple(path))
+        if key not in self._default_full_path_cache:
+            self._default_full_path_cache[key] = self._get_default_full_path(op_name_type, path)
+        return self._default_full_path_cache[key]
+
+    def _get_default_full_path(self, op_name_type, path):
         # For precision
         if path[0] == "precision":
             # If the path is ('precision', 'activation', dtype), return it directly.
@@ -652,6 +707,13 @@ class TuningSpace:
         Returns:
             result(Dict): The default full path of activation and weight if have.
         """
+        key = (op_name_type, pattern)
+        if key not in self._default_path_by_pattern_cache:
+            self._default_path_by_pattern_cache[key] = self._get_op_default_path_by_pattern(op_name_type, pattern)
+        # the callers may modify the result
+        return dict(self._default_path_by_pattern_cache[key])
+
+    def _get_op_default_path_by_pattern(self, op_name_type, pattern):
         internal_pattern = pattern_to_internal(pattern)
         full_path = {"activation": None, "weight": None}
         full_path["activation"], full_path["weight"] = pattern_to_path(internal_pattern)
@@ -693,18 +755,7 @@ class TuningSpace:
         Args:
             quant_bits: the target quantization bits, like int4, int8.
         """
-        quant_modes = ["static", "dynamic"]
-        attribute_options = ["activation", "weight"]
-        quant_bits = [quant_bits]
-
-        quant_op_items = set(self.query_items_by_quant_mode("static")).union(self.query_items_by_quant_mode("dynamic"))
-        op_items = []
-        for op in quant_op_items:
-            for path in itertools.product(quant_modes, attribute_options, quant_bits):
-                if self.query_quant_mode_item_by_full_path(op.name, path):
-                    op_items.append(op)
-                    break
-        return op_items
+        return list(self._quant_bits_ops.get(quant_bits, []))
 
 
 def pattern_to_internal(pattern, default_dtype="int8"):
@@ -56,6 +56,8 @@ def autotune(
     config_loader, tuning_logger, tuning_monitor = init_tuning(tuning_config=tune_config)
     baseline: float = eval_func_wrapper.evaluate(model)
     tuning_monitor.set_baseline(baseline)
+    if tune_config.trial_executor is not None:  # pragma: no cover
+        logger.warning("Trial executor is not supported by TensorFlow auto-tune yet, trials will run sequentially.")
     tuning_logger.tuning_start()
     for trial_index, quant_config in enumerate(config_loader, 1):
         tuning_logger.trial_start(trial_index=trial_index)
@@ -64,9 +66,11 @@ def autotune(
         q_model = quantize_model(model, quant_config, calib_dataloader, calib_iteration, calib_func)
         tuning_logger.execution_end()
         tuning_logger.evaluation_start()
-        eval_result: float = eval_func_wrapper.evaluate(q_model)
+        eval_result, early_stopped = eval_func_wrapper.evaluate_with_early_stop(
+            q_model, tuning_monitor.need_stop_evaluation
+        )
         tuning_logger.evaluation_end()
-        tuning_monitor.add_trial_result(trial_index, eval_result, quant_config)
+        tuning_monitor.add_trial_result(trial_index, eval_result, quant_config, early_stopped=early_stopped)
         tuning_logger.trial_end(trial_index)
         if tuning_monitor.need_stop():
             logger.info("Stopped tuning.")
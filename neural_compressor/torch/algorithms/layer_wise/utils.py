@@ -19,6 +19,9 @@
 import gc
 import json
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import torch
 from accelerate.utils import set_module_tensor_to_device
@@ -31,6 +34,30 @@ from neural_compressor.torch.utils.utility import dowload_hf_model, load_empty_m
 from .load import load
 
 LWQ_WORKSPACE = os.path.join(options.workspace, "lwq_tmpdir")
+# number of upcoming blocks whose weights are prefetched while the current block runs
+DEFAULT_PREFETCH_BLOCKS = 1
+# bytes of the prefetched tensors kept in memory by a weight loader
+DEFAULT_PREFETCH_BYTES = 1 << 30
+# number of checkpoints whose weight loaders, with their opened files, are cached
+MAX_WEIGHT_LOADERS = 2
+# bytes per element of the safetensors dtypes
+SAFETENSORS_DTYPE_SIZE = {
+    "BOOL": 1,
+    "U8": 1,
+    "I8": 1,
+    "F8_E4M3": 1,
+    "F8_E5M2": 1,
+    "I16": 2,
+    "U16": 2,
+    "F16": 2,
+    "BF16": 2,
+    "I32": 4,
+    "U32": 4,
+    "F32": 4,
+    "I64": 8,
+    "U64": 8,
+    "F64": 8,
+}
 
 
 class QDQLayer(torch.nn.Module):
@@ -190,36 +217,310 @@ def _get_path(pretrained_model_name_or_path):
 get_path = _get_path
 
 
-def load_value(model, param_name, path, device="cpu"):
-    """Load the module value.
+class LayerWiseWeightLoader:
+    """Load the weights of a checkpoint tensor by tensor for layer-wise quantization.
+
+    The checkpoint files and the shard index are scanned once, the files are kept open and memory mapped until
+    `close`, and the tensors of the upcoming layers can be prefetched on a background thread while the current
+    layer runs. The loader can be used as a context manager, which closes it on exit.
+
+    Args:
+        path (str): local directory of the checkpoint.
+        prefix (str, optional): base model prefix, which may be missing from the tensor names of the checkpoint.
+            Defaults to None.
+        max_prefetched_bytes (int, optional): maximum bytes of the prefetched tensors kept in memory, the tensors
+            over it are loaded when they're got. Defaults to DEFAULT_PREFETCH_BYTES.
+    """
+
+    def __init__(self, path, prefix=None, max_prefetched_bytes=DEFAULT_PREFETCH_BYTES):
+        """Init the LayerWiseWeightLoader object."""
+        self.path = path
+        self.prefix = prefix
+        self.max_prefetched_bytes = max_prefetched_bytes
+        self._lock = threading.Lock()
+        self._files = {}
+        # tensor name -> (future, bytes, index of the prefetch call)
+        self._prefetched = OrderedDict()
+        self._prefetched_bytes = 0
+        self._num_prefetch_calls = 0
+        self._executor = None
+        self.weight_map = self._get_weight_map()
+
+    def __enter__(self):
+        """Return the loader itself."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the loader."""
+        self.close()
+
+    def _get_weight_map(self):
+        """Map the tensor names to the files containing them, None means the single pytorch_model.bin."""
+        files = os.listdir(self.path)
+        safetensors_files = [filename for filename in files if filename.endswith(".safetensors")]
+        if len(safetensors_files) == 1:
+            return {name: safetensors_files[0] for name in self._open(safetensors_files[0]).keys()}
+        index_file = "model.safetensors.index.json" if safetensors_files else "pytorch_model.bin.index.json"
+        if index_file in files:
+            with open(os.path.join(self.path, index_file), "r") as f:
+                return json.load(f)["weight_map"]
+        state_dict = self._open("pytorch_model.bin")
+        return {name: "pytorch_model.bin" for name in state_dict} if state_dict is not None else None
+
+    def _open(self, filename):
+        """Open a checkpoint file once, safetensors files and zipped bin files are memory mapped."""
+        with self._lock:
+            if filename not in self._files:
+                file_path = os.path.join(self.path, filename)
+                if filename.endswith(".safetensors"):
+                    self._files[filename] = safe_open(file_path, framework="pt", device="cpu")
+                else:
+                    try:
+                        self._files[filename] = torch.load(file_path, map_location="cpu", mmap=True, weights_only=True)
+                    except Exception:  # pragma: no cover
+                        # legacy format or torch without mmap support, load the tensors one by one
+                        self._files[filename] = None
+            return self._files[filename]
+
+    def _resolve(self, tensor_name):
+        """Get the name in the checkpoint of the tensor."""
+        if self.weight_map is None or tensor_name in self.weight_map:
+            return tensor_name
+        candidates = [tensor_name.replace(f"{self.prefix}.", "")] if self.prefix else []
+        # transformers.modeling_utils
+        candidates.append(tensor_name.replace("gamma", "weight").replace("beta", "bias"))
+        for name in candidates:
+            if name in self.weight_map:
+                return name
+        assert False, "{} not in the checkpoint {}".format(tensor_name, self.path)
+
+    def _locate(self, tensor_name):
+        """Get the name in the checkpoint, the file name and the opened file of the tensor."""
+        name = self._resolve(tensor_name)
+        filename = self.weight_map[name] if self.weight_map is not None else "pytorch_model.bin"
+        return name, filename, self._open(filename)
+
+    def _nbytes(self, tensor_name):
+        """Get the bytes of a tensor from the metadata of the checkpoint, without reading its data."""
+        name, filename, handle = self._locate(tensor_name)
+        if handle is None:  # pragma: no cover
+            return 0
+        if filename.endswith(".safetensors"):
+            tensor_slice = handle.get_slice(name)
+            numel = 1
+            for dim in tensor_slice.get_shape():
+                numel *= dim
+            return numel * SAFETENSORS_DTYPE_SIZE.get(tensor_slice.get_dtype(), 4)
+        return handle[name].nbytes
+
+    def _load(self, tensor_name):
+        """Load a tensor from the checkpoint files."""
+        name, filename, handle = self._locate(tensor_name)
+        if handle is None:  # pragma: no cover
+            return load_tensor(os.path.join(self.path, filename), name, self.prefix)
+        value = handle.get_tensor(name) if filename.endswith(".safetensors") else handle[name]
+        # the mapped tensors share memory with the following loads of the same tensor, return a private copy
+        return value.clone()
+
+    def get_tensor(self, tensor_name, device="cpu"):
+        """Get a tensor, which is prefetched or loaded now.
+
+        Args:
+            tensor_name (str): tensor name.
+            device (str, optional): device of the tensor. Defaults to "cpu".
+
+        Returns:
+            tensor: the tensor value.
+        """
+        future = None
+        with self._lock:
+            if tensor_name in self._prefetched:
+                future, nbytes, call_idx = self._prefetched.pop(tensor_name)
+                self._prefetched_bytes -= nbytes
+                # the tensors prefetched by the earlier calls, i.e. for the earlier layers, are never consumed
+                for name, (stale_future, stale_nbytes, stale_call_idx) in list(self._prefetched.items()):
+                    if stale_call_idx < call_idx:
+                        stale_future.cancel()
+                        self._prefetched_bytes -= stale_nbytes
+                        del self._prefetched[name]
+        value = future.result() if future is not None else self._load(tensor_name)
+        return value.to(device)
+
+    def prefetch(self, tensor_names):
+        """Load the tensors on the background thread, until the prefetched tensors reach `max_prefetched_bytes`.
+
+        Args:
+            tensor_names (list): tensor names in loading order.
+        """
+        sizes = [(tensor_name, self._nbytes(tensor_name)) for tensor_name in tensor_names]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lwq_prefetch")
+            call_idx = self._num_prefetch_calls
+            self._num_prefetch_calls += 1
+            for tensor_name, nbytes in sizes:
+                if tensor_name in self._prefetched:
+                    continue
+                if self._prefetched_bytes + nbytes > self.max_prefetched_bytes:
+                    break
+                future = self._executor.submit(self._load, tensor_name)
+                self._prefetched[tensor_name] = (future, nbytes, call_idx)
+                self._prefetched_bytes += nbytes
+
+    def close(self):
+        """Stop prefetching and release the opened files."""
+        with self._lock:
+            for future, _, _ in self._prefetched.values():
+                future.cancel()
+            self._prefetched.clear()
+            self._prefetched_bytes = 0
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        # drop the references to the safetensors handles and the mapped state dicts, which unmaps the files
+        self._files.clear()
+
+
+# path -> (loader, stats of the checkpoint files), in least recently used order
+_weight_loaders = OrderedDict()
+
+
+def _get_checkpoint_stats(path):
+    """Get the (name, mtime, size) of the checkpoint files in the directory."""
+    stats = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith((".safetensors", ".bin", ".json")):
+                stat = entry.stat()
+                stats.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return sorted(stats)
+
+
+def get_weight_loader(model, path):
+    """Get the weight loader of a checkpoint, which is created once and rebuilt if any checkpoint file is modified.
+
+    At most MAX_WEIGHT_LOADERS loaders are cached, the least recently used one is closed when another checkpoint
+    is loaded.
 
     Args:
         model (torch.nn.module): torch model.
-        param_name (str): module name.
-        path (str): path to load state_dict per layer.
-        device (str, optional): module device. Defaults to "cpu".
+        path (str): local directory of the checkpoint.
 
     Returns:
-        tensor: the module value.
+        LayerWiseWeightLoader: the weight loader.
     """
+    path = os.path.abspath(path)
+    stats = _get_checkpoint_stats(path)
+    loader, loader_stats = _weight_loaders.pop(path, (None, None))
+    if loader is None or loader_stats != stats:
+        if loader is not None:
+            loader.close()
+        loader = LayerWiseWeightLoader(path, prefix=model.base_model_prefix)
+    _weight_loaders[path] = (loader, stats)
+    while len(_weight_loaders) > MAX_WEIGHT_LOADERS:
+        _weight_loaders.popitem(last=False)[1][0].close()
+    return loader
+
+
+def close_weight_loaders(path=None):
+    """Close the cached weight loaders, which releases their opened checkpoint files.
+
+    Args:
+        path (str, optional): local directory of the checkpoint whose loader is closed. Defaults to None, which
+            closes all of them.
+    """
+    paths = list(_weight_loaders) if path is None else [os.path.abspath(path)]
+    for p in paths:
+        loader, _ = _weight_loaders.pop(p, (None, None))
+        if loader is not None:
+            loader.close()
+
+
+def get_param_name(model, param_name):
+    """Get the name of the parameter in the checkpoint, the tied lm_head is loaded from the input embeddings."""
     if "lm_head" in param_name and getattr(model.config, "tie_word_embeddings", True):
         input_embeddings = model.get_input_embeddings()
         modules = get_named_children(model)
         for name, module in modules:
             if module == input_embeddings:
                 param_name = name + "." + param_name.split(".")[-1]
-    prefix = model.base_model_prefix
-    files = os.listdir(path)
-    safetensors_files = [filename for filename in files if filename.endswith(".safetensors")]
-    if len(safetensors_files) == 1:
-        value = load_tensor_from_safetensors(os.path.join(path, "model.safetensors"), param_name, device=device)
-    elif len(safetensors_files) >= 2:
-        value = load_tensor_from_safetensors_shard(path, param_name, device=device)
-    elif "pytorch_model.bin.index.json" in files:
-        value = load_tensor_from_shard(path, param_name, prefix)
-    else:
-        value = load_tensor(os.path.join(path, "pytorch_model.bin"), param_name, prefix)
-    return value
+    return param_name
+
+
+def load_value(model, param_name, path, device="cpu"):
+    """Load the module value.
+
+    Args:
+        model (torch.nn.module): torch model.
+        param_name (str): module name.
+        path (str): path to load state_dict per layer.
+        device (str, optional): module device. Defaults to "cpu".
+
+    Returns:
+        tensor: the module value.
+    """
+    return get_weight_loader(model, path).get_tensor(get_param_name(model, param_name), device=device)
+
+
+def get_block_name(module_name):
+    """Get the name of the block containing the module, which is the prefix up to the first layer index.
+
+    The modules out of any block, e.g. embeddings and lm_head, get an empty name.
+    """
+    parts = module_name.split(".")
+    for i, part in enumerate(parts):
+        if part.isdigit():
+            return ".".join(parts[: i + 1])
+    return ""
+
+
+class BlockPrefetcher:
+    """Prefetch the weights of the upcoming blocks when the modules of a block start loading.
+
+    Args:
+        model (torch.nn.module): torch model.
+        path (str): path to load state_dict per layer.
+        module_names (list): names of the modules in loading order.
+        num_blocks (int, optional): number of upcoming blocks to prefetch, 0 to disable prefetching.
+            Defaults to DEFAULT_PREFETCH_BLOCKS.
+    """
+
+    def __init__(self, model, path, module_names, num_blocks=DEFAULT_PREFETCH_BLOCKS):
+        """Init the BlockPrefetcher object."""
+        self.model = model
+        self.path = path
+        self.num_blocks = num_blocks
+        # consecutive modules of the same block, the modules out of any block are grouped by their neighbours
+        self.blocks = []
+        block_name = None
+        for name in module_names:
+            if get_block_name(name) != block_name or not self.blocks:
+                block_name = get_block_name(name)
+                self.blocks.append([])
+            self.blocks[-1].append(name)
+        # the first module of a block to the block index
+        self.block_starts = {block[0]: idx for idx, block in enumerate(self.blocks)}
+
+    def __call__(self, module_name, need_prefetch=None):
+        """Prefetch the upcoming blocks if the module starts a block.
+
+        Args:
+            module_name (str): name of the module to load.
+            need_prefetch (callable, optional): filter of the module names to prefetch. Defaults to None.
+        """
+        if self.num_blocks <= 0 or module_name not in self.block_starts:
+            return
+        idx = self.block_starts[module_name]
+        # the first block isn't prefetched by any previous block
+        start = idx if idx == 0 else idx + self.num_blocks
+        tensor_names = []
+        for block in self.blocks[start : idx + self.num_blocks + 1]:
+            for name in block:
+                if need_prefetch is not None and not need_prefetch(name):
+                    continue
+                for n, _ in get_module(self.model, name).named_parameters():
+                    tensor_names.append(get_param_name(self.model, name + "." + n))
+        get_weight_loader(self.model, self.path).prefetch(tensor_names)
 
 
 def load_module(model, module_name, path, device="cpu"):
@@ -238,7 +539,9 @@ def load_module(model, module_name, path, device="cpu"):
         set_module_tensor_to_device(model, param_name, device, value)
 
 
-def register_weight_hooks(model, path, device="cpu", clean_weight=True, saved_path=None):
+def register_weight_hooks(
+    model, path, device="cpu", clean_weight=True, saved_path=None, prefetch_blocks=DEFAULT_PREFETCH_BLOCKS
+):
     """Register weight hooks for model.
 
     Args:
@@ -247,15 +550,22 @@ def register_weight_hooks(model, path, device="cpu", clean_weight=True, saved_pa
         device (str, optional): module device. Defaults to "cpu".
         clean_weight (bool, optional): to clean model weight. Defaults to True.
         saved_path (str, optional): path to save module weight. Defaults to None.
+        prefetch_blocks (int, optional): number of upcoming blocks to prefetch. Defaults to DEFAULT_PREFETCH_BLOCKS.
 
     Returns:
         list: handlers.
     """
     if saved_path:
         os.makedirs(saved_path, exist_ok=True)
+    modules = get_named_children(model)
+    prefetcher = BlockPrefetcher(model, path, [name for name, _ in modules], num_blocks=prefetch_blocks)
+
+    def not_saved(name):
+        return not os.path.exists(os.path.join(LWQ_WORKSPACE, f"{name}.pt"))
 
     def forward_pre_hook(name):
         def hook(module, input):
+            prefetcher(name, need_prefetch=not_saved)
             state_dict = None
             if os.path.exists(os.path.join(LWQ_WORKSPACE, f"{name}.pt")):
                 state_dict = torch.load(os.path.join(LWQ_WORKSPACE, f"{name}.pt"))
@@ -279,7 +589,6 @@ def register_weight_hooks(model, path, device="cpu", clean_weight=True, saved_pa
         return hook
 
     handle = {}
-    modules = get_named_children(model)
     for name, module in modules:
         handle[name] = [module.register_forward_pre_hook(forward_pre_hook(name))]
         if clean_weight:
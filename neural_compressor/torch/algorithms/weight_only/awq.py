@@ -24,6 +24,8 @@ from neural_compressor.torch.utils import get_accelerator, logger
 
 from .modules import MulLinear
 from .utility import (
+    BlockInputList,
+    BlockInputStore,
     fetch_module,
     get_absorb_layers,
     get_block_prefix,
@@ -247,8 +249,8 @@ class ActAwareWeightQuant:
             if use_auto_scale:
                 scale_info = self.search_scale(block, block_name, module_list, input_values)
             # Step 2: update self.total_block_args, self.total_block_kwargs for next block
-            out_list = self.block_inference(block)
-            self.update_block_input(out_list)
+            # the output of each batch replaces its input once computed, so they are not all kept at the same time
+            self.update_block_input(self.iter_block_inference(block))
             # Step 4: get input of next block before update scale
             # weights of linear is updated by scale
             if use_auto_scale:
@@ -495,26 +497,30 @@ class ActAwareWeightQuant:
         """Update block input for next block inference.
 
         Args:
-            input_list (list): A list of previous block outputs to serve as input to the next block.
+            input_list (iterable): The previous block outputs to serve as input to the next block.
         """
         for i, inp in enumerate(input_list):
+            # set the items back, as the items of BlockInputList are copies
             if len(self.total_block_args[i]) > 0:
-                self.total_block_args[i][0] = inp
+                args = self.total_block_args[i]
+                args[0] = inp
+                self.total_block_args[i] = args
             elif "hidden_states" in self.total_block_kwargs[i]:
-                self.total_block_kwargs[i]["hidden_states"] = inp
+                kwargs = self.total_block_kwargs[i]
+                kwargs["hidden_states"] = inp
+                self.total_block_kwargs[i] = kwargs
             else:  # pragma: no cover
                 assert False, "cannot find hidden_states position for next block"
 
-    def block_inference(self, model):
-        """Collect output of block.
+    def iter_block_inference(self, model):
+        """Run the block batch by batch and yield its outputs.
 
         Args:
             model (torch.nn.Module): input model.
 
-        Returns:
-            output(list):  a list of block output.
+        Yields:
+            The block output of each batch.
         """
-        total_out = []
         for args, kwargs in zip(self.total_block_args, self.total_block_kwargs):
             # to avoid layer_past: Dynamic_cache when transformers higher than 4.45.1
             if "layer_past" in kwargs.keys() and kwargs["layer_past"] is not None:
@@ -522,8 +528,18 @@ class ActAwareWeightQuant:
             out = model(*args, **kwargs)
             if isinstance(out, tuple):  # pragma: no cover
                 out = out[0]
-            total_out.append(out)
-        return total_out
+            yield out
+
+    def block_inference(self, model):
+        """Collect output of block.
+
+        Args:
+            model (torch.nn.Module): input model.
+
+        Returns:
+            output(list):  a list of block output.
+        """
+        return list(self.iter_block_inference(model))
 
     def module_inference(self, model, inputs):
         """Collect output of module.
@@ -558,17 +574,34 @@ class AWQQuantizer(Quantizer):
         self.absorb_layer_dict = absorb_layer_dict
 
     @torch.no_grad()
-    def prepare(self, model, *args, **kwargs):
+    def prepare(
+        self,
+        model,
+        *args,
+        block_input_memory_budget=None,
+        block_input_dtype=None,
+        block_input_spill_dir=None,
+        **kwargs,
+    ):
         """Prepare a given model to get hidden states and kwargs of first block.
 
         Args:
             model: A float torch model.
+            block_input_memory_budget (int, optional): The bytes of block inputs kept in memory, the others are
+                spilled to memory-mapped files. Defaults to None, which keeps all of them in memory.
+            block_input_dtype (str, optional): The storage dtype of block inputs, "fp16" or "bf16".
+                Defaults to None, which keeps the original dtype.
+            block_input_spill_dir (str, optional): The directory of the spill files. Defaults to None, the
+                temporary directory of the system.
 
         Returns:
             A prepared model.
         """
         assert isinstance(model, torch.nn.Module), "AWQ algorithm only supports torch module"
-        model = replace_forward(model)
+        block_input_store = None
+        if block_input_memory_budget is not None or block_input_dtype is not None:
+            block_input_store = BlockInputStore(block_input_memory_budget, block_input_dtype, block_input_spill_dir)
+        model = replace_forward(model, block_input_store)
         return model
 
     @torch.no_grad()
@@ -632,4 +665,6 @@ class AWQQuantizer(Quantizer):
             folding=folding,
             return_int=return_int,
         )
+        if isinstance(total_block_args, BlockInputList):
+            total_block_args.store.close()
         return qdq_model
@@ -21,6 +21,7 @@ import math
 import random
 import re
 import time
+import weakref
 from collections import UserDict, defaultdict
 from functools import partial
 
@@ -38,6 +39,10 @@ from neural_compressor.torch.utils import (
 from neural_compressor.torch.utils.auto_accelerator import auto_detect_accelerator
 
 from .modules import INCWeightOnlyLinear
+from .utility import BlockInputStore
+
+# number of tokens per matmul when accumulating the Hessian
+DEFAULT_HESSIAN_CHUNK_SIZE = 2048
 
 if is_transformers_imported():
     import transformers
@@ -188,6 +193,12 @@ class RAWGPTQuantizer(object):
         model_path="",
         quant_lm_head=False,
         dataloader=None,
+        share_hessian=True,
+        hessian_chunk_size=DEFAULT_HESSIAN_CHUNK_SIZE,
+        pack_hessian=False,
+        block_input_memory_budget=None,
+        block_input_dtype=None,
+        block_input_spill_dir=None,
         *args,
         **kwargs,
     ):
@@ -214,6 +225,16 @@ class RAWGPTQuantizer(object):
             use_layer_wise (bool): Enables quantize model per layer. Defaults to False.
             model_path (str): Model path that is used to load state_dict per layer.
             quant_lm_head (bool): Indicates whether quantize the lm_head layer in transformers. Defaults to False.
+            share_hessian (bool): Accumulate one Hessian for the layers sharing the same input. Defaults to True.
+            hessian_chunk_size (int): Number of tokens per matmul when accumulating the Hessian.
+                Defaults to DEFAULT_HESSIAN_CHUNK_SIZE.
+            pack_hessian (bool): Store the upper triangle of the Hessian only. Defaults to False.
+            block_input_memory_budget (int): The bytes of block inputs kept in memory, the others are spilled to
+                memory-mapped files. Defaults to None, which keeps all of them in memory.
+            block_input_dtype (str): The storage dtype of block inputs, "fp16" or "bf16". Defaults to None, which
+                keeps the original dtype.
+            block_input_spill_dir (str): The directory of the spill files. Defaults to None, the temporary
+                directory of the system.
             device (str): cpu or cuda.
         """
         # model
@@ -253,6 +274,18 @@ class RAWGPTQuantizer(object):
         if use_layer_wise:
             self.prepare_layer_wise(model_path)
 
+        # hessian
+        self.share_hessian = share_hessian
+        self.hessian_chunk_size = hessian_chunk_size
+        self.pack_hessian = pack_hessian
+
+        # block inputs are saved in the store instead of lists when a memory budget or storage dtype is set
+        self.block_input_store = None
+        if block_input_memory_budget is not None or block_input_dtype is not None:
+            self.block_input_store = BlockInputStore(
+                block_input_memory_budget, block_input_dtype, block_input_spill_dir
+            )
+
         # dataloader
         self.use_max_length = use_max_length
         self.max_seq_length = max_seq_length
@@ -381,7 +414,7 @@ class RAWGPTQuantizer(object):
                 # each outputs can be different shape, hence also use list to store
                 if isinstance(kwargs[arg], torch.Tensor) or arg == "alibi":
                     if self.cache_key_arguments.get(arg, None) is None:
-                        self.cache_key_arguments[arg] = []
+                        self.cache_key_arguments[arg] = self.new_cache_list()
                     self.cache_key_arguments[arg].append(kwargs[arg])
                 continue
             # copy positional arguments, positional arguments are sensitive for their order, be cautious!
@@ -390,7 +423,7 @@ class RAWGPTQuantizer(object):
             for idx, item in enumerate(args):
                 if (idx + 1) > len(self.cache_positional_arguments):
                     # initialize
-                    self.cache_positional_arguments.append([])
+                    self.cache_positional_arguments.append(self.new_cache_list())
                 self.cache_positional_arguments[idx].append(item)
             raise ValueError
 
@@ -426,8 +459,9 @@ class RAWGPTQuantizer(object):
         logger.info("All calibration data's shape =>")
         # check all hidden_states shape
         try:
-            for hidden_states in self.cache_positional_arguments[0]:
-                logger.info(hidden_states.shape)
+            hidden_states_list = self.cache_positional_arguments[0]
+            for shape in getattr(hidden_states_list, "shapes", None) or [h.shape for h in hidden_states_list]:
+                logger.info(shape)
         except:
             pass
         logger.info("Done.")
@@ -443,6 +477,16 @@ class RAWGPTQuantizer(object):
         # end
         logger.info("GPTQ quantization prepared.")
 
+    def new_cache_list(self):
+        """Create a list to cache the inputs of the first block.
+
+        Returns:
+            list or BlockInputList: a list saving its items in the block input store if it's enabled.
+        """
+        if self.block_input_store is None:
+            return []
+        return self.block_input_store.new_list()
+
     def gather_single_batch_from_dict(self, data_dict, idx):
         """Gather single batch from a dict.
 
@@ -595,25 +639,30 @@ class RAWGPTQuantizer(object):
                         else:
                             W = sequential_layers[layer_name].weight.data.clone()
 
-                    gptq_for_this_block[layer_name] = GPTQ(sequential_layers[layer_name], W, self.device)
+                    gptq_for_this_block[layer_name] = GPTQ(
+                        sequential_layers[layer_name],
+                        W,
+                        self.device,
+                        hessian_chunk_size=self.hessian_chunk_size,
+                        pack_hessian=self.pack_hessian,
+                    )
                     # gptq_for_this_block[layer_name].quantizer = Quantizer()
                     gptq_for_this_block[layer_name].quantizer.configure(weight_config_this_layer)
 
                 # Step 2.3: modify forward functions to hook inputs data (used in gptq execution)
-                def add_batch(_name):
-                    def tmp(_, inp, out):
-                        gptq_for_this_block[_name].add_batch(inp[0].data, out.data)  # noqa: F821
-
-                    return tmp
-
+                # layers sharing the same input, e.g. q/k/v projections, accumulate one Hessian
+                hessian_sharing = HessianSharing(gptq_for_this_block, enable=self.share_hessian)
                 handles = []  # register handles which add inputs and outputs to gptq object
                 for layer_name in sequential_layers:
-                    handles.append(sequential_layers[layer_name].register_forward_hook(add_batch(layer_name)))
+                    handles.append(
+                        sequential_layers[layer_name].register_forward_hook(hessian_sharing.hook(layer_name))
+                    )
                 batch_num = self.cache_key_arguments.pop("batch_num")
                 for j in range(batch_num):
                     cache_keyword_batch = self.gather_single_batch_from_dict(self.cache_key_arguments, j)
                     cache_positional_batch = self.gather_single_batch_from_list(self.cache_positional_arguments, j)
                     out = transformer_block(*cache_positional_batch, **cache_keyword_batch)
+                    hessian_sharing.flush()
                     accelerator.synchronize()
                     out = self.track_hidden_states(out)
                 self.cache_key_arguments["batch_num"] = batch_num
@@ -785,12 +834,7 @@ class RAWGPTQuantizer(object):
             del sub_layers
             sub_layers = sub_layers_to_quant
             gptq_post_block = {}
-
-            def add_batch_post(_name):
-                def tmp(_, inp, out):
-                    gptq_post_block[_name].add_batch(inp[0].data, out.data)
-
-                return tmp
+            hessian_sharing = HessianSharing(gptq_post_block, enable=self.share_hessian)
 
             for layer_name in sub_layers:
                 full_layer_name = self.gptq_related_blocks["transformers_post"]["name"]
@@ -809,18 +853,25 @@ class RAWGPTQuantizer(object):
                     else:
                         W = sub_layers[layer_name].weight.data.clone()
 
-                gptq_post_block[layer_name] = GPTQ(sub_layers[layer_name], W, self.device)
+                gptq_post_block[layer_name] = GPTQ(
+                    sub_layers[layer_name],
+                    W,
+                    self.device,
+                    hessian_chunk_size=self.hessian_chunk_size,
+                    pack_hessian=self.pack_hessian,
+                )
                 # gptq_for_this_block[layer_name].quantizer = Quantizer()
                 gptq_post_block[layer_name].quantizer.configure(weight_config_this_layer)
             # generate the gptq quantizer
             handles = []  # register handles which add inputs and outputs to gptq object
             for layer_name in sub_layers:
-                handles.append(sub_layers[layer_name].register_forward_hook(add_batch_post(layer_name)))
+                handles.append(sub_layers[layer_name].register_forward_hook(hessian_sharing.hook(layer_name)))
             for j in range(len(self.dataloader)):
                 if "hidden_states" in self.cache_key_arguments:
                     out = sub_layers[layer_name](self.cache_key_arguments["hidden_states"][j])
                 else:
                     out = sub_layers[layer_name](self.cache_positional_arguments[0][j])
+                hessian_sharing.flush()
 
             # if "hidden_states" in self.cache_key_arguments:
             #     self.cache_key_arguments["hidden_states"] = outs[:]
@@ -945,19 +996,226 @@ class RAWGPTQuantizer(object):
                 new_module.pack(int_weight, gptq_scale, gptq_zp, bias, gptq_perm)
                 set_module(self.model, layer_name, new_module)
 
+        if self.block_input_store is not None:
+            self.block_input_store.close()
+        if self.use_layer_wise:
+            from neural_compressor.torch.algorithms.layer_wise import close_weight_loaders
+
+            # release the opened checkpoint files
+            close_weight_loaders(self.model_path)
         logger.info("Quantization done")
         # self.model.config.use_cache = self.use_cache
         return self.model
 
 
+class HessianAccumulator:
+    """Accumulate the Hessian H = 2 / nsamples * sum(X^T X) of the inputs X of a layer.
+
+    The tokens are accumulated in chunks to cap the peak memory of long sequences. H can be stored in a packed
+    form, which keeps the rows of the upper triangle only and halves its memory, and is unpacked when it's taken.
+
+    Args:
+        columns (int): number of input channels.
+        device (str, optional): device of H. Defaults to "cpu".
+        chunk_size (int, optional): number of tokens per matmul, None to accumulate all tokens at once.
+            Defaults to DEFAULT_HESSIAN_CHUNK_SIZE.
+        packed (bool, optional): whether to store H in the packed form. Defaults to False.
+    """
+
+    def __init__(self, columns, device="cpu", chunk_size=DEFAULT_HESSIAN_CHUNK_SIZE, packed=False):
+        """Init HessianAccumulator."""
+        self.columns = columns
+        self.device = device
+        self.chunk_size = chunk_size
+        self.packed = packed
+        # H is allocated by the first batch, so the accumulators replaced by shared ones cost nothing
+        self.H = None
+        self.nsamples = 0
+        # number of layers which will take H
+        self.num_consumers = 1
+        # rows per block when packing/unpacking, to bound the temporary memory
+        self._block_rows = max(1, 2**22 // columns)
+
+    def _row_offset(self, row):
+        """Get the offset of the row in the packed upper triangle."""
+        return row * self.columns - row * (row - 1) // 2
+
+    def _iter_row_blocks(self):
+        for start in range(0, self.columns, self._block_rows):
+            end = min(start + self._block_rows, self.columns)
+            # the upper triangle of rows [start, end) and columns [start, columns)
+            mask = torch.ones((end - start, self.columns - start), dtype=torch.bool, device=self.device).triu_()
+            yield start, end, mask
+
+    def add_batch(self, inp, nsamples):
+        """Add inputs to H.
+
+        Args:
+            inp (torch.Tensor): inputs, shape: [tokens, columns].
+            nsamples (int): number of samples of the inputs.
+        """
+        if self.H is None:
+            numel = self.columns * (self.columns + 1) // 2 if self.packed else self.columns * self.columns
+            self.H = torch.zeros(numel, device=self.device)
+            if not self.packed:
+                self.H = self.H.view(self.columns, self.columns)
+        self.H *= self.nsamples / (self.nsamples + nsamples)
+        self.nsamples += nsamples
+        self._accumulate(inp, 1)
+
+    def remove_batch(self, inp, nsamples):
+        """Remove the inputs of the last `add_batch` from H.
+
+        Args:
+            inp (torch.Tensor): inputs, shape: [tokens, columns].
+            nsamples (int): number of samples of the inputs.
+        """
+        self._accumulate(inp, -1)
+        self.nsamples -= nsamples
+        if self.nsamples == 0:
+            self.H.zero_()
+        else:
+            self.H *= (self.nsamples + nsamples) / self.nsamples
+
+    def _accumulate(self, inp, alpha):
+        scale = math.sqrt(2 / self.nsamples)
+        chunk_size = self.chunk_size or inp.shape[0]
+        for start in range(0, inp.shape[0], chunk_size):
+            x = scale * inp[start : start + chunk_size].float()
+            if not self.packed:
+                self.H.addmm_(x.t(), x, alpha=alpha)  # H = X^T * X, which should be a sym matrix
+                continue
+            for row_start, row_end, mask in self._iter_row_blocks():
+                block = x[:, row_start:row_end].t().matmul(x[:, row_start:])
+                self.H[self._row_offset(row_start) : self._row_offset(row_end)] += alpha * block[mask]
+
+    def clone(self):
+        """Clone the accumulator."""
+        accumulator = HessianAccumulator(self.columns, self.device, self.chunk_size, self.packed)
+        accumulator.H = self.H.clone() if self.H is not None else None
+        accumulator.nsamples = self.nsamples
+        return accumulator
+
+    def take(self):
+        """Take the dense H for one of its consumers, which can modify it in place."""
+        self.num_consumers -= 1
+        if self.H is None:
+            H = torch.zeros((self.columns, self.columns), device=self.device)
+        elif not self.packed:
+            H = self.H if self.num_consumers <= 0 else self.H.clone()
+        else:
+            H = torch.empty((self.columns, self.columns), device=self.device)
+            for row_start, row_end, mask in self._iter_row_blocks():
+                block = torch.zeros(mask.shape, device=self.device)
+                block[mask] = self.H[self._row_offset(row_start) : self._row_offset(row_end)]
+                diag = block[:, : row_end - row_start]
+                diag += diag.triu(1).t()
+                H[row_start:row_end, row_start:] = block
+                H[row_start:, row_start:row_end] = block.t()
+        if self.num_consumers <= 0:
+            self.H = None
+        return H
+
+
+class HessianSharing:
+    """Share the Hessian accumulators among the layers consuming the same input tensor.
+
+    An input is accumulated by the first layer which gets it, the other layers getting the same tensor, identified by
+    `(id(x), x._version)`, share that accumulator. So the layers sharing the same input, e.g. q/k/v projections or
+    gate/up projections, compute and store their common Hessian once, and the hooks don't keep the inputs alive.
+    If a layer gets another input than the other layers of its accumulator in a later forward pass, e.g. the input
+    is modified in place in between, it's split off and accumulates its own Hessian.
+
+    Args:
+        gptq_objs (dict): layer name to GPTQ object.
+        enable (bool, optional): whether to share the Hessians, otherwise every layer accumulates its own one.
+            Defaults to True.
+    """
+
+    def __init__(self, gptq_objs, enable=True):
+        """Init HessianSharing."""
+        self.gptq_objs = gptq_objs
+        self.enable = enable
+        # the inputs of the current forward pass: (id, version) -> [input reference, accumulator, layer name]
+        self._inputs = {}
+        # the shared accumulators updated in the current forward pass: id -> [input reference, input version]
+        self._updated = {}
+
+    def hook(self, name):
+        """Get the forward hook of the layer."""
+
+        def tmp(_, inp, out):
+            gptq = self.gptq_objs[name]
+            if not self.enable:
+                gptq.add_batch(inp[0].data, out.data)
+                return
+            x = inp[0]
+            key = (id(x), x._version)
+            entry = self._inputs.get(key)
+            if entry is not None and entry[0]() is x and self._compatible(entry[2], name):
+                if gptq.hessian is entry[1]:
+                    return
+                if gptq.hessian.nsamples == 0:
+                    # the empty accumulators of the first batch are merged into the one of the input
+                    entry[1].num_consumers += 1
+                    gptq.hessian = entry[1]
+                    return
+            hessian = gptq.hessian
+            if hessian.num_consumers > 1 and id(hessian) in self._updated:
+                self._split(name, x)
+            else:
+                gptq.add_batch(x.data, None)
+                if hessian.num_consumers > 1:
+                    self._updated[id(hessian)] = [weakref.ref(x), x._version]
+            if entry is None:
+                self._inputs[key] = [weakref.ref(x), gptq.hessian, name]
+
+        return tmp
+
+    def _compatible(self, name, other_name):
+        gptq, other_gptq = self.gptq_objs[name], self.gptq_objs[other_name]
+        return gptq.columns == other_gptq.columns and gptq.is_linear == other_gptq.is_linear
+
+    def _split(self, name, x):
+        """Split the layer off its shared accumulator, which got another input in the current forward pass."""
+        gptq = self.gptq_objs[name]
+        shared_input, version = self._updated[id(gptq.hessian)]
+        shared_input = shared_input()
+        gptq.hessian.num_consumers -= 1
+        gptq.hessian = gptq.hessian.clone()
+        if shared_input is not None and shared_input._version == version:
+            gptq.remove_batch(shared_input.data)
+            gptq.add_batch(x.data, None)
+        else:
+            logger.warning(
+                f"The input of {name} differs from the one of the layers sharing its Hessian, which is released or "
+                "modified, so its Hessian takes their input of this batch. Disable share_hessian to avoid it."
+            )
+
+    def flush(self):
+        """End the current forward pass."""
+        self._inputs = {}
+        self._updated = {}
+
+
 class GPTQ:
     """Please refer to the following.
 
     GPTQ: Accurate Post-training Compression for Generative Pretrained Transformers (https://arxiv.org/abs/2210.17323)
     """
 
-    def __init__(self, layer, W, device="cpu"):
-        """Init GPTQ."""
+    def __init__(self, layer, W, device="cpu", hessian_chunk_size=DEFAULT_HESSIAN_CHUNK_SIZE, pack_hessian=False):
+        """Init GPTQ.
+
+        Args:
+            layer (torch.nn.Module): the layer to quantize.
+            W (torch.Tensor): the weight of the layer.
+            device (str, optional): device of the Hessian. Defaults to "cpu".
+            hessian_chunk_size (int, optional): number of tokens per matmul when accumulating the Hessian.
+                Defaults to DEFAULT_HESSIAN_CHUNK_SIZE.
+            pack_hessian (bool, optional): whether to store the upper triangle of the Hessian only.
+                Defaults to False.
+        """
         self.layer = layer
         self.device = device
         # W = layer.weight.data.clone()
@@ -967,8 +1225,10 @@ class GPTQ:
             W = W.t()
         self.rows = W.shape[0]  # output channels
         self.columns = W.shape[1]  # input channels
-        self.H = torch.zeros((self.columns, self.columns), device=self.device)
-        self.nsamples = 0
+        self.is_linear = isinstance(self.layer, nn.Linear) or (
+            is_transformers_imported() and isinstance(self.layer, transformers.Conv1D)
+        )
+        self.hessian = HessianAccumulator(self.columns, self.device, hessian_chunk_size, pack_hessian)
         self.quantizer = Quantizer()
         self.perm = None  # act_order choice
 
@@ -977,15 +1237,19 @@ class GPTQ:
         # if DEBUG:
         #     self.inp1 = inp
         #     self.out1 = out
+        self.hessian.add_batch(*self._flatten_input(inp))
+
+    def remove_batch(self, inp):
+        """Remove the inputs of the last `add_batch` from the Hessian."""
+        self.hessian.remove_batch(*self._flatten_input(inp))
+
+    def _flatten_input(self, inp):
         if len(inp.shape) == 2:
             inp = inp.unsqueeze(0)
         tmp = inp.shape[0]
-        if isinstance(self.layer, nn.Linear) or (
-            is_transformers_imported() and isinstance(self.layer, transformers.Conv1D)
-        ):
+        if self.is_linear:
             if len(inp.shape) == 3:
                 inp = inp.reshape((-1, inp.shape[-1]))
-            inp = inp.t()
         # TODO: llm's transformer sequential with nn.conv2d is currently not under test
         # if isinstance(self.layer, nn.Conv2d):
         #     unfold = nn.Unfold(
@@ -997,12 +1261,8 @@ class GPTQ:
         #     inp = unfold(inp)
         #     inp = inp.permute([1, 0, 2])
         #     inp = inp.flatten(1)
-        self.H *= self.nsamples / (self.nsamples + tmp)
-        self.nsamples += tmp
-        # inp = inp.float()
-        inp = math.sqrt(2 / self.nsamples) * inp.float()
-        # self.H += 2 / self.nsamples * inp.matmul(inp.t())
-        self.H += inp.matmul(inp.t())  # H = X*X, which should be a sym matrix
+        #     inp = inp.t()
+        return inp, tmp
 
     def fasterquant(self, W, blocksize=128, percdamp=0.01, groupsize=-1, act_order=False, static_groups=False):
         """Run quantization.
@@ -1034,10 +1294,10 @@ class GPTQ:
         if not self.quantizer.ready():
             self.quantizer.find_params(W, weight=True)
 
-        H = self.H
+        H = self.hessian.take()
         if "hpu" in self.device:
             H = H.to("cpu")
-        del self.H
+        self.hessian = None
         dead = torch.diag(H) == 0
         H[dead, dead] = 1
         W[:, dead] = 0  # such channel makes no contribution to quantization computation
@@ -1156,7 +1416,7 @@ class GPTQ:
         if DEBUG:
             self.inp1 = None
             self.out1 = None
-        self.H = None
+        self.hessian = None
         self.Losses = None
         self.Trace = None
         torch.cuda.empty_cache()
@@ -1358,6 +1618,12 @@ class GPTQuantizer(INCQuantizer):
         use_layer_wise=False,
         model_path=None,
         quant_lm_head=False,
+        share_hessian=True,
+        hessian_chunk_size=DEFAULT_HESSIAN_CHUNK_SIZE,
+        pack_hessian=False,
+        block_input_memory_budget=None,
+        block_input_dtype=None,
+        block_input_spill_dir=None,
         *args,
         **kwargs,
     ):
@@ -1378,6 +1644,12 @@ class GPTQuantizer(INCQuantizer):
             use_layer_wise=use_layer_wise,
             model_path=model_path,
             quant_lm_head=quant_lm_head,
+            share_hessian=share_hessian,
+            hessian_chunk_size=hessian_chunk_size,
+            pack_hessian=pack_hessian,
+            block_input_memory_budget=block_input_memory_budget,
+            block_input_dtype=block_input_dtype,
+            block_input_spill_dir=block_input_spill_dir,
         )
         self.gptq_quantizer.prepare_for_calibration()
         return self.gptq_quantizer.model
@@ -25,10 +25,13 @@ import torch
 from torch.autograd import Function
 from torch.nn import functional as F
 
-from neural_compressor.torch.utils import accelerator, logger
+from neural_compressor.torch.utils import logger
+from neural_compressor.torch.utils.bit_packer import pack_array, unpack_array
 
 from .utility import quant_tensor
 
+DEFAULT_TILE_SIZE = 1024
+
 
 class QDQLayer(torch.nn.Module):
     """Quantized and dequantized layer."""
@@ -266,6 +269,8 @@ class INCWeightOnlyLinear(WeightOnlyLinear):
             self.register_buffer("g_idx", torch.zeros(in_features, dtype=torch.int32).to(device))
         else:
             self.g_idx = None
+        # None means recovering and caching the whole float weight in forward, see `enable_tiled_forward`.
+        self.tile_size = None
 
     def pack(self, int_weight, scales, zp, bias=None, g_idx=None, **kwargs):
         """Pack int weight."""
@@ -397,18 +402,16 @@ class INCWeightOnlyLinear(WeightOnlyLinear):
             tensor: packed tensor.
         """
         target_len = math.ceil(raw_tensor.shape[1] / self.n_pack)
-        packed_tensor = torch.zeros(raw_tensor.shape[0], target_len, dtype=self.compression_dtype).to(raw_tensor.device)
-        mask = torch.tensor(2**self.bits - 1, dtype=self.compression_dtype).to(raw_tensor.device)
-        for j in range(packed_tensor.shape[1]):
-            start = self.n_pack * j
-            end = self.n_pack * (j + 1)
-            tmp = raw_tensor[:, start:end].type(self.compression_dtype)
-            tmp &= mask
-            for e in range(tmp.shape[1]):
-                tmp[:, e] = tmp[:, e] << (self.bits * e)
-                packed_tensor[:, j] |= tmp[:, e]
-                accelerator.synchronize()
-        return packed_tensor
+        tmp = torch.zeros(
+            raw_tensor.shape[0], target_len * self.n_pack, dtype=self.compression_dtype, device=raw_tensor.device
+        )
+        tmp[:, : raw_tensor.shape[1]] = raw_tensor
+        if self.bits < self.compress_bits:
+            tmp &= 2**self.bits - 1
+        shifts = torch.arange(self.n_pack, dtype=self.compression_dtype, device=raw_tensor.device) * self.bits
+        tmp = tmp.reshape(raw_tensor.shape[0], target_len, self.n_pack) << shifts
+        # the bits of elements are disjoint, so the sum is the same as bitwise or
+        return tmp.sum(dim=-1, dtype=self.compression_dtype)
 
     def unpack_tensor_with_torch(self, packed_tensor):
         """Unpack the tensor with torch.
@@ -419,118 +422,30 @@ class INCWeightOnlyLinear(WeightOnlyLinear):
         Returns:
             tensor: unpacked tensor.
         """
-        target_dtype = torch.int16
-        target_len = packed_tensor.shape[1] * self.n_pack
-        unpacked_tensor = torch.zeros(packed_tensor.shape[0], target_len, dtype=target_dtype).to(packed_tensor.device)
-        mask = torch.tensor(2**self.bits - 1, dtype=self.compression_dtype).to(packed_tensor.device)
-        for j in range(packed_tensor.shape[1]):
-            for e in range(self.n_pack):
-                index = j * self.n_pack + e
-                tmp = packed_tensor[:, j]
-                tmp = tmp << (self.compress_bits - self.bits * (e + 1))
-                tmp = tmp >> self.compress_bits - self.bits
-                if hasattr(self, "qzeros"):
-                    tmp &= mask  # remove sign bit
-                unpacked_tensor[:, index].copy_(tmp.type(target_dtype))
-                accelerator.synchronize()
-        return unpacked_tensor
-
-    def pack_array_with_numba(
-        self, raw_array: np.ndarray, n_pack: int, bits: int, compress_bits: int, compression_dtype=np.int32
-    ) -> np.ndarray:
-        """Packs the input array by combining elements into a specified bit-width format using NumPy.
-
-        Args:
-            raw_array (np.ndarray): The array to be packed. Shape: [out_features, in_features] or [1, in_features].
-            n_pack (int): The number of elements to be packed together.
-            bits (int): The number of bits for each element.
-            compress_bits (int): The number of bits for each element of the compressed array, supported 2, 4, 8.
-            compression_dtype (np.dtype, optional): The data type of the compressed array. Defaults to np.int32.
-
-        Returns:
-            np.ndarray: The packed array.
-        """
-        # Try to pack with numba to accelerate the packing process.
-        # If numba is not availabll or the packing method is not supported,
-        # fallback to the torch implementation.
-        try:
-            import numba
-
-            numba.config.THREADING_LAYER = "safe"
-        except ImportError:
-            logger.warning("To accelerate packing, please install numba with `pip install numba tbb`.")
-            return self.pack_tensor_with_torch(torch.from_numpy(raw_array)).cpu().numpy()
-        except Exception as e:
-            logger.warning(f"Import numba failed with error: {e}, fallback to torch implementation.")
-            return self.pack_tensor_with_torch(torch.from_numpy(raw_array)).cpu().numpy()
-        from neural_compressor.torch.utils.bit_packer import bit_packers
-
-        pack_func_name = (bits, compress_bits)
-        if pack_func_name not in bit_packers:
-            logger.warning(
-                f"Unsupported packing with bits: {bits}, compress_bits: {compress_bits} using numba, fallback to torch implementation."
-            )
-            return self.pack_tensor_with_torch(torch.from_numpy(raw_array)).cpu().numpy()
-        out_features, in_features = raw_array.shape
-        new_in_features = (in_features + n_pack - 1) // n_pack
-        packed_array = np.zeros((out_features, new_in_features), dtype=compression_dtype)
-        raw_array = raw_array.astype(compression_dtype)
-        pack_method = bit_packers[pack_func_name]
-        return pack_method(raw_array, packed_array, n_pack, new_in_features)
-
-    def pack_tensor_with_numpy_impl(self, raw_tensor):
-        """The implement of packing tensor with numpy."""
-        raw_array = raw_tensor.cpu().numpy()
-        target_len = np.ceil(raw_array.shape[1] / self.n_pack).astype(int)
-        target_dtype = torch.tensor(0, dtype=self.compression_dtype).numpy().dtype
-        packed_array = np.zeros((raw_array.shape[0], target_len), dtype=target_dtype)
-        mask = np.uint8(2**self.bits - 1)
-        for j in range(packed_array.shape[1]):
-            start = self.n_pack * j
-            end = self.n_pack * (j + 1)
-            tmp = raw_array[:, start:end].astype(target_dtype)
-            tmp &= mask
-            for e in range(tmp.shape[1]):
-                tmp[:, e] = np.left_shift(tmp[:, e], self.bits * e)
-                packed_array[:, j] |= tmp[:, e]
-                accelerator.synchronize()
-        packed_tensor = torch.from_numpy(packed_array).to(device=raw_tensor.device)
-        return packed_tensor
+        return self.unpack_tensor_with_shift(packed_tensor).type(torch.int16)
 
     def pack_tensor_with_numpy(self, raw_tensor):
         """Pack the tensor with numpy."""
         if self.bits == 8 and self.compression_dtype == torch.int8:
             return raw_tensor
-        if self.bits not in [2, 4, 8]:
-            return self.pack_tensor_with_numpy_impl(raw_tensor)
         compression_dtype = torch.tensor(0, dtype=self.compression_dtype).numpy().dtype
-        packed_array = self.pack_array_with_numba(
-            raw_tensor.cpu().numpy(), self.n_pack, self.bits, self.compress_bits, compression_dtype
-        )
+        packed_array = pack_array(raw_tensor.cpu().numpy(), self.bits, self.compress_bits, compression_dtype)
         return torch.from_numpy(packed_array).to(device=raw_tensor.device)
 
     def unpack_tensor_with_numpy(self, packed_tensor):
         """Unpack the packed tensor with numpy."""
-        packed_array = packed_tensor.cpu().numpy()
         target_dtype = np.int16
         if self.bits == 8 and self.compression_dtype == torch.int8 and hasattr(self, "qzeros"):
             # special case for unpacking uint8 date from int8 compression_dtype
             target_dtype = np.uint8
-        target_len = packed_array.shape[1] * self.n_pack
-        unpacked_array = np.zeros((packed_array.shape[0], target_len), dtype=target_dtype)
-        mask = np.uint8(2**self.bits - 1)
-        for j in range(packed_array.shape[1]):
-            for e in range(self.n_pack):
-                index = j * self.n_pack + e
-                tmp = packed_array[:, j]
-                tmp = np.left_shift(tmp, self.compress_bits - self.bits * (e + 1))
-                tmp = np.right_shift(tmp, self.compress_bits - self.bits)
-                if hasattr(self, "qzeros"):
-                    tmp &= mask
-                unpacked_array[:, index] = tmp.astype(target_dtype)
-                accelerator.synchronize()
-        unpacked_tensor = torch.from_numpy(unpacked_array).to(device=packed_tensor.device)
-        return unpacked_tensor
+        unpacked_array = unpack_array(
+            packed_tensor.cpu().numpy(),
+            self.bits,
+            self.compress_bits,
+            signed=not hasattr(self, "qzeros"),
+            target_dtype=target_dtype,
+        )
+        return torch.from_numpy(unpacked_array).to(device=packed_tensor.device)
 
     def pack_tensor(self, raw_tensor):
         """Pack tensor."""
@@ -546,8 +461,141 @@ class INCWeightOnlyLinear(WeightOnlyLinear):
         else:
             return self.unpack_tensor_with_numpy(packed_tensor)
 
+    def enable_tiled_forward(self, tile_size=DEFAULT_TILE_SIZE):
+        """Keep the weight packed in forward.
+
+        The float weight is recovered tile by tile, each tile covers `tile_size` input channels and is
+        discarded right after its matmul, so the resident memory stays at the packed size.
+
+        Args:
+            tile_size (int, optional): number of input channels per tile, it's rounded up to a multiple of
+                group_size and the number of packed elements. None restores the default forward which caches
+                the recovered float weight. Defaults to 1024.
+        """
+        if tile_size is not None:
+            assert tile_size > 0, "tile_size should be larger than 0."
+            align = self.n_pack * self.group_size // math.gcd(self.n_pack, self.group_size)
+            tile_size = math.ceil(tile_size / align) * align
+        self.tile_size = tile_size
+        if hasattr(self, "weight"):
+            del self.weight
+
+    def unpack_tensor_with_shift(self, packed_tensor, dim=-1):
+        """Unpack the packed tensor along dim with vectorized bit shifts, used by the tiled forward.
+
+        Args:
+            packed_tensor (tensor): packed tensor.
+            dim (int, optional): the packed dim. Defaults to -1.
+
+        Returns:
+            tensor: unpacked tensor in torch.int32, the packed dim is n_pack times larger.
+        """
+        dim = dim % packed_tensor.dim()
+        shape = [1] * (packed_tensor.dim() + 1)
+        shape[dim + 1] = self.n_pack
+        packed_tensor = packed_tensor.unsqueeze(dim + 1)
+        index = torch.arange(self.n_pack, dtype=packed_tensor.dtype, device=packed_tensor.device).reshape(shape)
+        if hasattr(self, "qzeros"):
+            unpacked_tensor = (packed_tensor >> (index * self.bits)).type(torch.int32)
+            unpacked_tensor &= 2**self.bits - 1  # remove sign bit
+        else:
+            # move the element to the highest bits, then shift it back with sign
+            unpacked_tensor = (packed_tensor << (self.compress_bits - self.bits * (index + 1))) >> (
+                self.compress_bits - self.bits
+            )
+            unpacked_tensor = unpacked_tensor.type(torch.int32)
+        return unpacked_tensor.flatten(dim, dim + 1)
+
+    def _get_int_weight_tile(self, start, end):
+        """Unpack the int weight of input channels [start, end) in [end - start, out_features] layout.
+
+        start is a multiple of n_pack.
+        """
+        if self.use_optimum_format:
+            packed_start, packed_end = start // self.n_pack, math.ceil(end / self.n_pack)
+            int_weight = self.unpack_tensor_with_shift(self.qweight[packed_start:packed_end], dim=0)
+            return int_weight[: end - start]
+        if self.compression_dim == 0:
+            int_weight = self.unpack_tensor_with_shift(self.qweight[:, start:end], dim=0)
+            return int_weight[: self.out_features].T
+        packed_start, packed_end = start // self.n_pack, math.ceil(end / self.n_pack)
+        int_weight = self.unpack_tensor_with_shift(self.qweight[:, packed_start:packed_end])
+        return int_weight[:, : end - start].T
+
+    def _get_tiled_forward_params(self):
+        """Get the scales and zero points in [n_groups, out_features] layout and g_idx for the tiled forward."""
+        scales = self.scales if self.use_optimum_format else self.scales.T
+        zp = None
+        if hasattr(self, "qzeros"):
+            if self.use_optimum_format:
+                zp = self.unpack_tensor_with_shift(self.qzeros)
+            elif self.compression_dim == 0:
+                zp = self.unpack_tensor_with_shift(self.qzeros, dim=0).T
+            else:
+                zp = self.unpack_tensor_with_shift(self.qzeros).T
+            zp = zp[: scales.shape[0], : scales.shape[1]]  # avoid oversize
+            if self.use_optimum_format:
+                # zp -= 1 may cause zp == -1, after recover it becomes 2**self.bits - 1
+                zp = zp + 1
+                zp = torch.where(zp > (2**self.bits - 1), 0, zp)
+        default_g_idx = torch.arange(self.in_features, device=scales.device) // self.group_size
+        if self.g_idx is None or torch.equal(self.g_idx.long(), default_g_idx):
+            g_idx = None  # channels of one group are contiguous
+        else:
+            g_idx = self.g_idx.long()
+        return scales, zp, g_idx
+
+    def tiled_forward(self, input):
+        """Forward with the packed weight, the float weight is recovered tile by tile."""
+        scales, zp, g_idx = self._get_tiled_forward_params()
+        float_type = self.float_type
+        if float_type == torch.float16 and scales.device.type == "cpu":
+            float_type = torch.float32
+        scales = scales.type(float_type)
+        # (int_weight - zp) * scales == int_weight * scales - zp * scales, the latter avoids an int subtraction
+        neg_zp_scales = None if zp is None else -zp * scales
+        if "int" not in self.dtype:
+            # map the low bits of the int value to the float value, the same as int2float_mapping
+            float_table = torch.zeros(2**self.bits, dtype=float_type, device=scales.device)
+            for k, v in self.int2float_mapping.items():
+                float_table[k & (2**self.bits - 1)] = v
+        orig_shape = input.shape
+        input = input.reshape(-1, self.in_features).type(float_type)
+        output = torch.zeros(input.shape[0], self.out_features, dtype=float_type, device=input.device)
+        for start in range(0, self.in_features, self.tile_size):
+            end = min(start + self.tile_size, self.in_features)
+            # [end - start, out_features]
+            weight = self._get_int_weight_tile(start, end)
+            if g_idx is None and (end - start) % self.group_size == 0:
+                # broadcast the scales and zero points of whole groups
+                group_start, num_groups = start // self.group_size, (end - start) // self.group_size
+                weight = weight.reshape(num_groups, self.group_size, -1)
+                tile_index = slice(group_start, group_start + num_groups)
+                tile_scales = scales[tile_index].unsqueeze(1)
+                tile_neg_zp_scales = None if zp is None else neg_zp_scales[tile_index].unsqueeze(1)
+            else:
+                tile_g_idx = torch.arange(start, end) // self.group_size if g_idx is None else g_idx[start:end]
+                tile_scales = scales[tile_g_idx]
+                tile_neg_zp_scales = None if zp is None else neg_zp_scales[tile_g_idx]
+            if "int" not in self.dtype:
+                weight = float_table[weight & (2**self.bits - 1)]
+            else:
+                weight = weight.type(float_type)
+            if tile_neg_zp_scales is not None:
+                weight = torch.addcmul(tile_neg_zp_scales, weight, tile_scales)
+            else:
+                weight *= tile_scales
+            output.addmm_(input[:, start:end], weight.reshape(end - start, -1))
+            del weight
+        if self.bias is not None:
+            output += self.bias
+        return output.reshape(*orig_shape[:-1], self.out_features)
+
     def forward(self, input):
         """Forward function."""
+        if getattr(self, "tile_size", None) is not None:  # modules pickled by older versions have no tile_size
+            logger.debug(f"Calculating {self} with tile size {self.tile_size}")
+            return self.tiled_forward(input)
         if not hasattr(self, "weight"):
             weight = self.recover()
             device = self.scales.device
@@ -582,6 +630,23 @@ class INCWeightOnlyLinear(WeightOnlyLinear):
         return tmp_str
 
 
+def enable_tiled_forward(model, tile_size=DEFAULT_TILE_SIZE):
+    """Make all INCWeightOnlyLinear modules in the model keep their weights packed in forward.
+
+    Args:
+        model (torch.nn.Module): the quantized model.
+        tile_size (int, optional): number of input channels per tile, None restores the default forward
+            which caches the recovered float weight. Defaults to 1024.
+
+    Returns:
+        torch.nn.Module: the model itself.
+    """
+    for module in model.modules():
+        if isinstance(module, INCWeightOnlyLinear):
+            module.enable_tiled_forward(tile_size)
+    return model
+
+
 class HPUWeightOnlyLinear(WeightOnlyLinear):
     """Weight Only Linear for HPU device."""
 
@@ -130,15 +130,25 @@ class RTNQuantizer(Quantizer):
 
         if use_layer_wise:
             from neural_compressor.common.utils import DEFAULT_WORKSPACE
-            from neural_compressor.torch.algorithms.layer_wise.utils import get_path, load_module
+            from neural_compressor.torch.algorithms.layer_wise.utils import (
+                BlockPrefetcher,
+                close_weight_loaders,
+                get_path,
+                load_module,
+            )
 
             if model_path == "":
                 model_path = model.path
             assert model_path, "model_path should not be None."
             model_path = get_path(model_path)
+            # load the weights of the next block in the background while quantizing the current one
+            prefetcher = BlockPrefetcher(
+                model, model_path, [name for name, m in model.named_modules() if len(list(m.named_children())) == 0]
+            )
 
         for name, m in model.named_modules():
             if use_layer_wise and len(list(m.named_children())) == 0:
+                prefetcher(name)
                 load_module(model, name, model_path, device=device)
             if not isinstance(m, supported_layers):
                 continue
@@ -153,7 +163,9 @@ class RTNQuantizer(Quantizer):
                 ### FP8 cast part
                 if dtype in ["fp8_e5m2", "fp8_e5m2fnuz", "fp8_e4m3fn", "fp8_e4m3fnuz"]:
                     logger.debug("Cast module {} to FP8 using qdq mode, no scaling".format(name))
-                    m.weight = cast_fp8(m.weight, dtype, use_qdq=True)
+                    m.weight = torch.nn.Parameter(
+                        cast_fp8(m.weight.detach().clone(), dtype, use_qdq=True), requires_grad=m.weight.requires_grad
+                    )
                     continue
                 ####
                 logger.debug("Apply RTN on module %s.", name)
@@ -199,9 +211,10 @@ class RTNQuantizer(Quantizer):
             if transpose:
                 weight = m.weight.detach().T.contiguous()
             else:
-                weight = m.weight.detach()
+                # quant_tensor is in-place, keep the original weight untouched.
+                weight = m.weight.detach().clone()
             if use_mse_search:
-                quantile = search_clip(m, bits, group_size, scheme, dtype, use_full_range)
+                quantile = search_clip(m, bits, group_size, scheme, dtype, use_full_range, weight=weight)
             int_weight, scale, zp = quant_tensor(
                 weight,
                 dtype=dtype,
@@ -249,6 +262,9 @@ class RTNQuantizer(Quantizer):
             if not use_layer_wise:
                 m.to(model_device)
                 new_module.to(model_device)
-        if not use_layer_wise:
+        if use_layer_wise:
+            # release the opened checkpoint files
+            close_weight_loaders(model_path)
+        else:
             model.to(model_device)
         return model
@@ -19,6 +19,7 @@ import json
 import os
 import re
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 import torch
 
@@ -27,6 +28,7 @@ from neural_compressor.torch.utils import (
     HPU_SAFE_WEIGHTS_NAME,
     HPU_WEIGHT_NAME,
     QCONFIG_NAME,
+    SAFE_WEIGHT_NAME,
     WEIGHT_NAME,
     LoadFormat,
     logger,
@@ -48,16 +50,39 @@ def save(model, output_dir="./saved_results", format=LoadFormat.DEFAULT, **kwarg
         output_dir (str, optional): output path to save.
         format (str, optional): The format in which to save the model. Options include "default" and "huggingface". Defaults to "default".
         kwargs: Additional arguments for specific formats. For example:
-            - safe_serialization (bool): Whether to use safe serialization when saving (only applicable for 'huggingface' format). Defaults to True.
+            - safe_serialization (bool): Whether to use safe serialization when saving. Defaults to True for
+              'huggingface' format and False for 'default' format, whose safetensors file is memory mapped by `load`.
             - tokenizer (Tokenizer, optional): The tokenizer to be saved along with the model (only applicable for 'huggingface' format).
-            - max_shard_size (str, optional): The maximum size for each shard (only applicable for 'huggingface' format). Defaults to "5GB".
+            - max_shard_size (int or str, optional): The maximum size for each shard, such as "5GB". The shards are
+              listed in an index json file. Defaults to "5GB" for 'huggingface' format and None, a single file,
+              for 'default' format.
+            - num_workers (int, optional): The number of threads writing the shards. Defaults to the number of shards,
+              up to the number of CPUs.
     """
     os.makedirs(output_dir, exist_ok=True)
+    num_workers = kwargs.get("num_workers", None)
     if format == LoadFormat.HUGGINGFACE:  # pragma: no cover
         config = model.config
         config_file = "quantize_config.json"
         quantization_config = config.quantization_config if hasattr(config, "quantization_config") else None
-        if "backend" in quantization_config and "auto_round" in quantization_config["backend"]:
+        if quantization_config is not None and "backend" not in quantization_config:
+            # save the config and transformers-style weights, which are loaded by `load_hf_format_woq_model`
+            safe_serialization = kwargs.get("safe_serialization", True)
+            tokenizer = kwargs.get("tokenizer", None)
+            if tokenizer is not None:
+                tokenizer.save_pretrained(output_dir)
+            config.save_pretrained(output_dir)
+            del model.save
+            save_state_dict(
+                model.state_dict(),
+                output_dir,
+                "model.safetensors" if safe_serialization else "pytorch_model.bin",
+                max_shard_size=kwargs.get("max_shard_size", "5GB"),
+                num_workers=num_workers,
+            )
+            logger.info("Save quantized model to {}.".format(output_dir))
+            return
+        if quantization_config is not None and "auto_round" in quantization_config["backend"]:
             safe_serialization = kwargs.get("safe_serialization", True)
             tokenizer = kwargs.get("tokenizer", None)
             max_shard_size = kwargs.get("max_shard_size", "5GB")
@@ -69,19 +94,151 @@ def save(model, output_dir="./saved_results", format=LoadFormat.DEFAULT, **kwarg
                 json.dump(quantization_config, f, indent=2)
             return
 
-    qmodel_weight_file_path = os.path.join(os.path.abspath(os.path.expanduser(output_dir)), WEIGHT_NAME)
+    safe_serialization = kwargs.get("safe_serialization", False)
+    weight_name = SAFE_WEIGHT_NAME if safe_serialization else WEIGHT_NAME
     qconfig_file_path = os.path.join(os.path.abspath(os.path.expanduser(output_dir)), QCONFIG_NAME)
     # saving process
     save_config_mapping(model.qconfig, qconfig_file_path)
 
     # MethodType 'save' not in state_dict
     del model.save
-    torch.save(model.state_dict(), qmodel_weight_file_path)
+    save_state_dict(
+        model.state_dict(),
+        output_dir,
+        weight_name,
+        max_shard_size=kwargs.get("max_shard_size", None),
+        num_workers=num_workers,
+    )
 
-    logger.info("Save quantized model weight to {}.".format(qmodel_weight_file_path))
     logger.info("Save configuration of quantized model to {}.".format(qconfig_file_path))
 
 
+def _parse_size(size):
+    """Convert a size like 5GB or 500MiB to the number of bytes."""
+    if isinstance(size, int):
+        return size
+    units = {
+        "KIB": 2**10,
+        "MIB": 2**20,
+        "GIB": 2**30,
+        "TIB": 2**40,
+        "KB": 10**3,
+        "MB": 10**6,
+        "GB": 10**9,
+        "TB": 10**12,
+    }
+    size = size.upper().strip()
+    for unit, factor in units.items():
+        if size.endswith(unit):
+            return int(float(size[: -len(unit)]) * factor)
+    if size.endswith("B"):
+        size = size[:-1]
+    return int(size)
+
+
+def _save_shard(tensors, aliases, filename):
+    """Save a shard to a safetensors or torch file, the aliases refer to the tensors sharing memory."""
+    if filename.endswith(".safetensors"):
+        from safetensors.torch import save_file
+
+        save_file(tensors, filename, metadata={"format": "pt", "aliases": json.dumps(aliases)})
+    else:
+        # torch.save keeps the shared memory
+        torch.save({**tensors, **{name: tensors[target] for name, target in aliases.items()}}, filename)
+
+
+def save_state_dict(state_dict, output_dir, weights_name, max_shard_size=None, num_workers=None):
+    """Save state_dict to output_dir, split into shards written concurrently if it exceeds max_shard_size.
+
+    The shards are named like transformers, e.g. model-00001-of-00002.safetensors, and listed in the index file
+    `weights_name`.index.json. Tensors sharing memory, like tied weights, are saved once in the same shard.
+
+    Args:
+        state_dict (dict): state_dict to save.
+        output_dir (str): output directory.
+        weights_name (str): weight file name, a safetensors file if it ends with .safetensors, otherwise a torch file.
+        max_shard_size (int or str, optional): maximum size of a shard, such as "5GB". Defaults to None, no sharding.
+        num_workers (int, optional): number of threads writing the shards. Defaults to None, the number of shards
+            up to the number of CPUs.
+    """
+    max_shard_size = _parse_size(max_shard_size) if max_shard_size is not None else None
+    shards, saved, storages = [], {}, set()
+    shard_size, total_size = 0, 0
+    for name, tensor in state_dict.items():
+        storage = (tensor.device, tensor.untyped_storage().data_ptr())
+        key = storage + (tensor.dtype, tensor.storage_offset(), tensor.shape, tensor.stride())
+        if key in saved:
+            shard_idx, target = saved[key]
+            shards[shard_idx][1][name] = target
+            continue
+        tensor = tensor.detach().cpu().contiguous()
+        # other views of a saved storage are copied, since safetensors doesn't allow sharing memory
+        if storage in storages and weights_name.endswith(".safetensors"):
+            tensor = tensor.clone()
+        storages.add(storage)
+        size = tensor.numel() * tensor.element_size()
+        if not shards or (max_shard_size is not None and shard_size + size > max_shard_size and shards[-1][0]):
+            shards.append(({}, {}))
+            shard_size = 0
+        shards[-1][0][name] = tensor
+        saved[key] = (len(shards) - 1, name)
+        shard_size += size
+        total_size += size
+    if not shards:
+        shards.append(({}, {}))
+
+    prefix, ext = os.path.splitext(weights_name)
+    if len(shards) == 1:
+        filenames = [weights_name]
+    else:
+        filenames = [f"{prefix}-{idx + 1:05d}-of-{len(shards):05d}{ext}" for idx in range(len(shards))]
+    num_workers = num_workers or min(len(shards), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(_save_shard, tensors, aliases, os.path.join(output_dir, filename))
+            for (tensors, aliases), filename in zip(shards, filenames)
+        ]
+        for future in futures:
+            future.result()
+    logger.info("Save quantized model weight to {}.".format(os.path.join(output_dir, filenames[0])))
+    if len(shards) == 1:
+        return
+
+    weight_map = {}
+    for (tensors, aliases), filename in zip(shards, filenames):
+        weight_map.update({name: filename for name in tensors})
+        weight_map.update({name: filename for name in aliases})
+    index = {"metadata": {"total_size": total_size}, "weight_map": weight_map}
+    with open(os.path.join(output_dir, weights_name + ".index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+
+def _load_safetensors(filename):
+    """Load state_dict from a safetensors file saved by `save`, the tensors are memory mapped without copy."""
+    from safetensors import safe_open
+
+    with safe_open(filename, framework="pt", device="cpu") as f:
+        state_dict = {name: f.get_tensor(name) for name in f.keys()}
+        aliases = json.loads((f.metadata() or {}).get("aliases", "{}"))
+    for name, target in aliases.items():
+        state_dict[name] = state_dict[target]
+    return state_dict
+
+
+def _load_state_dict(filename):
+    """Load state_dict from a weight file or the shards listed in an index file saved by `save_state_dict`."""
+    if filename.endswith(".index.json"):
+        with open(filename, "r") as f:
+            weight_map = json.load(f)["weight_map"]
+        state_dict = {}
+        for shard in sorted(set(weight_map.values())):
+            state_dict.update(_load_state_dict(os.path.join(os.path.dirname(filename), shard)))
+        return state_dict
+    if filename.endswith(".safetensors"):
+        return _load_safetensors(filename)
+    return torch.load(filename)
+
+
 def load(model_name_or_path, original_model=None, format=LoadFormat.DEFAULT, device="cpu", **kwargs):
     """Load quantized weight-only quantization model.
 
@@ -131,6 +288,8 @@ class WOQModelLoader:
         self.loaded_state_dict_keys = []
         self._should_save_hpu_format_tensor = False
         self._model_local_dir = None  # local directory where model files are saved
+        # build WeightOnlyLinear modules on meta device and assign the loaded tensors to them without copy
+        self._assign_loaded_tensors = False
 
     def load_woq_model(self):
         """Load quantized weight-only quantization model.
@@ -171,6 +330,15 @@ class WOQModelLoader:
             qmodel_weight_file_path = os.path.join(
                 os.path.abspath(os.path.expanduser(self.model_name_or_path)), HPU_WEIGHT_NAME
             )
+        else:
+            # prefer the memory mapped safetensors file, then the shards listed in an index file
+            for weight_name in [SAFE_WEIGHT_NAME, SAFE_WEIGHT_NAME + ".index.json", WEIGHT_NAME + ".index.json"]:
+                weight_file_path = os.path.join(
+                    os.path.abspath(os.path.expanduser(self.model_name_or_path)), weight_name
+                )
+                if os.path.exists(weight_file_path):
+                    qmodel_weight_file_path = weight_file_path
+                    break
         assert os.path.exists(qmodel_weight_file_path), (
             "Cannot load model weight from path {}. "
             "Please make sure '{}' file is saved in your '{}' directory ".format(
@@ -188,7 +356,8 @@ class WOQModelLoader:
         )
 
         # get loaded state_dict
-        self.loaded_state_dict = torch.load(qmodel_weight_file_path)
+        self.loaded_state_dict = _load_state_dict(qmodel_weight_file_path)
+        self._assign_loaded_tensors = SAFE_WEIGHT_NAME in os.path.basename(qmodel_weight_file_path)
         self.loaded_state_dict_keys = list(set(self.loaded_state_dict.keys()))
 
         # get qconfig
@@ -374,7 +543,11 @@ class WOQModelLoader:
             )
 
         # initialize the new WeightOnlyLinearClass
-        new_module = WeightOnlyLinearClass(**module_kwargs)
+        if self._assign_loaded_tensors:
+            new_module = WeightOnlyLinearClass(**module_kwargs, device="meta")
+            new_module.device = module_kwargs.get("device", "cpu")
+        else:
+            new_module = WeightOnlyLinearClass(**module_kwargs)
 
         # load quantized data of current module
         self._load_data_to_new_module(new_module, name)
@@ -391,7 +564,14 @@ class WOQModelLoader:
             if full_name in self.loaded_state_dict:
                 new_module_state_dict[key[1:]] = self.loaded_state_dict.pop(full_name)
                 self.loaded_state_dict_keys.remove(full_name)
-        new_module.load_state_dict(new_module_state_dict, strict=False)  # bias is not needed.
+        if not self._assign_loaded_tensors:
+            new_module.load_state_dict(new_module_state_dict, strict=False)  # bias is not needed.
+            return
+        new_module.load_state_dict(new_module_state_dict, strict=False, assign=True)
+        # materialize the buffers which aren't saved, e.g. bias of the module without bias
+        for buffer_name, buffer in new_module.named_buffers(recurse=False):
+            if buffer.is_meta:
+                setattr(new_module, buffer_name, torch.zeros_like(buffer, device=new_module.device))
 
     def _update_mapped_woqlinear_modules(self, name, format_woqlinear_module, module_kwargs):
         """Checks whether the format mapping module needs to be updated to the device mapping module."""
@@ -560,6 +740,7 @@ class WOQModelLoader:
             "_commit_hash": commit_hash,
         }
         resolved_archive_file = self._get_resolved_archive_file(**kwargs)
+        is_sharded = resolved_archive_file.endswith(".index.json")
 
         self._model_local_dir = os.path.abspath(os.path.expanduser(os.path.dirname(resolved_archive_file)))
         # if hpu format tensor can be used directly, then update resolved_archive_file to the hpu format tensor file
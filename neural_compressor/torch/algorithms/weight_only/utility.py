@@ -12,12 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Weight-Only utility."""
+import math
+import os
+import shutil
+import tempfile
+import weakref
+
 import numpy as np
 import torch
 
 from neural_compressor.torch.utils import accelerator, device_synchronize, logger
 
 __all__ = [
+    "BlockInputList",
+    "BlockInputStore",
     "FLOAT_MAPPING",
     "FP4_BNB",
     "FP4_BNB_BIT",
@@ -287,7 +295,8 @@ def quant_tensor(
         bits (int, optional): bits. Defaults to 4.
         group_size (int, optional): how many elements share one scale/zp. Defaults to -1.
         scheme (str, optional): sym or asym. Defaults to "asym".
-        quantile (float, optional): percentile of clip. Defaults to 1.0.
+        quantile (float or torch.Tensor, optional): percentile of clip, or the percentile of each group
+            in [out_features, num_groups] layout, e.g. the result of `search_clip`. Defaults to 1.0.
         dtype (str, optional): select from int, nf4, fp4. Defaults to int.
         return_int (bool, optional): Choose return fp32 or int8/uint8 data.
                                      Defaults to False.
@@ -305,6 +314,8 @@ def quant_tensor(
     # case 2, reshape based on group size
     orig_shape = weight.shape
     orig_weight = weight
+    # quantile of each group, [out_features, num_groups] like scale
+    per_group_quantile = isinstance(quantile, torch.Tensor)
     if weight.shape[1] % group_size == 0:
         weight = weight.reshape(-1, group_size)
         # return weight for unpacking scale and zp
@@ -312,7 +323,7 @@ def quant_tensor(
             weight,
             bits,
             scheme=scheme,
-            quantile=quantile,
+            quantile=quantile.reshape(-1) if per_group_quantile else quantile,
             return_int=return_int,
             full_range=full_range,
             dtype=dtype,
@@ -339,7 +350,7 @@ def quant_tensor(
             weight1,
             bits,
             scheme=scheme,
-            quantile=quantile,
+            quantile=quantile[:, :-1].reshape(-1) if per_group_quantile else quantile,
             return_int=return_int,
             full_range=full_range,
             dtype=dtype,
@@ -357,7 +368,7 @@ def quant_tensor(
             bits,
             scheme=scheme,
             dtype=dtype,
-            quantile=quantile,
+            quantile=quantile[:, -1] if per_group_quantile else quantile,
             return_int=return_int,
             full_range=full_range,
             **kwargs,
@@ -435,8 +446,86 @@ def quant_tensor(
         return q_state
 
 
-def search_clip(m, bits=4, group_size=32, scheme="asym", dtype="int", enable_full_range=False):
-    """Search best clip range of each linear in current block. It's not an in-place function.
+def _get_int_qdq_params(weight, ratios, bits, scheme, full_range):
+    """Get the scale and the clamp range of each (ratio, row) pair, the same as qdq_weight_sym/qdq_weight_asym.
+
+    The clamp range is shifted by the zero point, so that `clamp(round(w / scale), lower, upper) * scale`
+    is the qdq weight.
+    """
+    ratios = ratios.unsqueeze(-1)  # [num_ratios, 1]
+    max_val = weight.max(1)[0]
+    min_val = weight.min(1)[0]
+    if scheme == "sym":
+        maxq = 2 ** (bits - 1) - 1
+        minq = -(2 ** (bits - 1))
+        flip_flag = torch.abs(max_val) > torch.abs(min_val)
+        wmax = torch.max(torch.abs(max_val), torch.abs(min_val)) * ratios
+        wmax[wmax == 0] = 1
+        if full_range:
+            scale = wmax / (-minq)
+            scale = torch.where(flip_flag, -scale, scale)
+        else:
+            scale = wmax / maxq
+        lower, upper = minq, maxq
+    else:
+        maxq = 2**bits - 1
+        zeros = torch.zeros_like(max_val)
+        wmin = torch.minimum(min_val, zeros) * ratios
+        wmax = torch.maximum(max_val, zeros) * ratios
+        tmp = (wmin == 0) & (wmax == 0)
+        wmin[tmp] = -1
+        wmax[tmp] = +1
+        scale = (wmax - wmin) / maxq
+        zp = torch.round(-wmin / scale)
+        lower, upper = (-zp).unsqueeze(-1), (maxq - zp).unsqueeze(-1)
+    return scale.unsqueeze(-1), lower, upper
+
+
+def _search_group_clip_ratios(weight, ratios, bits, scheme, dtype, full_range, chunk_numel):
+    """Search the best clip ratio of each row in weight, one row is one group.
+
+    All ratios are evaluated together by broadcasting the rows along a new leading ratio dimension,
+    rows are processed in chunks so that at most `chunk_numel` elements are fake quantized at once.
+    """
+    num_rows, group_size = weight.shape
+    num_ratios = ratios.numel()
+    rows_per_chunk = max(1, chunk_numel // (num_ratios * group_size))
+    best_ratios = torch.empty(num_rows, dtype=ratios.dtype, device=weight.device)
+    for start in range(0, num_rows, rows_per_chunk):
+        group = weight[start : start + rows_per_chunk]
+        num_groups = group.shape[0]
+        if dtype == "int" and bits > 1:
+            scale, lower, upper = _get_int_qdq_params(group, ratios, bits, scheme, full_range)
+            # [num_ratios, num_groups, group_size]
+            qdq_group = torch.div(group, scale).round_().clamp_(lower, upper).mul_(scale)
+        else:
+            # [num_ratios * num_groups, group_size], ratio is the outer dim
+            qdq_group = qdq_weight_actor(
+                group.repeat(num_ratios, 1),
+                bits,
+                scheme=scheme,
+                quantile=ratios.repeat_interleave(num_groups),
+                dtype=dtype,
+                full_range=full_range,
+            ).reshape(num_ratios, num_groups, group_size)
+        loss = torch.linalg.vector_norm(qdq_group.sub_(group).float(), dim=-1)
+        # the first ratio wins if several ratios have the same loss, same as the sequential search
+        best_ratios[start : start + num_groups] = ratios[loss.argmin(dim=0)]
+    return best_ratios
+
+
+@torch.no_grad()
+def search_clip(
+    m,
+    bits=4,
+    group_size=32,
+    scheme="asym",
+    dtype="int",
+    enable_full_range=False,
+    weight=None,
+    chunk_numel=2**18,
+):
+    """Search best clip range of each group in the weight of a linear. It's not an in-place function.
 
     Args:
         m (torch.nn.Module): torch module.
@@ -445,37 +534,38 @@ def search_clip(m, bits=4, group_size=32, scheme="asym", dtype="int", enable_ful
         scheme (str, optional): sym or asym.
         dtype (str, optional): select from int, nf4, fp4. Defaults to int.
         enable_full_range (bool, optional): Choose sym range whether use -2**(bits-1).
+        weight (torch.Tensor, optional): the weight to be quantized, in [out_features, in_features] layout.
+            Defaults to m.weight.
+        chunk_numel (int, optional): max number of elements fake quantized at once, small chunks stay
+            in cache. Defaults to 2**18.
 
     Returns:
-        best_clip_ratio (float): best percentile of clip
+        best_clip_ratio (torch.Tensor): best percentile of clip of each group, in [out_features, num_groups] layout,
+            it can be passed to `quant_tensor` as `quantile`.
     """
-    org_weight = m.weight.data.clone()
+    org_weight = m.weight.data if weight is None else weight
     logger.debug("Searching the best clip range with RTN algorithm")
-    best_error = float("inf")
-    best_clip_ratio = None
     n_grid = 200
     max_shrink = 0.2
-    history = []
-    for i_s in range(int(max_shrink * n_grid)):
-        ratio = 1 - i_s / n_grid  # 1, 0.805-1.0
-        quant_tensor(
-            m.weight.data,  # in-place mode
-            dtype=dtype,
-            bits=bits,
-            group_size=group_size,
-            scheme=scheme,
-            full_range=enable_full_range,
-            quantile=ratio,
+    ratios = 1 - torch.arange(int(max_shrink * n_grid), device=org_weight.device) / n_grid  # 1, 0.805-1.0
+    if group_size == -1 or org_weight.shape[1] < group_size:
+        group_size = org_weight.shape[1]
+    split_index = org_weight.shape[1] // group_size * group_size
+    best_clip_ratio = _search_group_clip_ratios(
+        org_weight[:, :split_index].reshape(-1, group_size),
+        ratios,
+        bits,
+        scheme,
+        dtype,
+        enable_full_range,
+        chunk_numel,
+    ).reshape(org_weight.shape[0], -1)
+    if split_index != org_weight.shape[1]:
+        left_clip_ratio = _search_group_clip_ratios(
+            org_weight[:, split_index:], ratios, bits, scheme, dtype, enable_full_range, chunk_numel
         )
-        loss = (org_weight - m.weight.data).float().pow(2).mean()
-        m.weight.data.copy_(org_weight)
-        history.append(loss)
-        is_best = loss < best_error
-        if is_best:
-            best_error = loss
-            best_clip_ratio = ratio
-    logger.debug("The loss history of different clip range:{}".format(history))
-    logger.debug("The best clip ratio is {}".format(best_clip_ratio))
+        best_clip_ratio = torch.cat([best_clip_ratio, left_clip_ratio.unsqueeze(-1)], dim=1)
+    logger.debug("The best clip ratios are {}".format(best_clip_ratio))
     return best_clip_ratio
 
 
@@ -1023,11 +1113,235 @@ def get_example_input(dataloader, i=1):
     return example_inp
 
 
-def replace_forward(model):
+class _BlockInputSlot:
+    """The location of a tensor saved in a BlockInputStore."""
+
+    __slots__ = ("segment", "offset", "shape", "dtype", "device")
+
+    def __init__(self, segment, offset, shape, dtype, device):
+        self.segment = segment
+        self.offset = offset
+        self.shape = shape
+        self.dtype = dtype
+        self.device = device
+
+    @property
+    def numel(self):
+        return math.prod(self.shape)
+
+
+class BlockInputStore:
+    """Store of the block inputs captured for calibration, such as the hidden states of GPTQ and AWQ.
+
+    The tensors are copied into preallocated contiguous segments instead of being kept as separate tensors on the
+    device. Once the segments in memory exceed `memory_budget`, the new segments are memory-mapped files under
+    `spill_dir`, so the number of calibration samples is no longer capped by RAM. The floating tensors can be
+    stored in fp16/bf16, unless their values overflow the storage dtype, e.g. the attention masks filled with the
+    min value of fp32. A tensor is read back as a new tensor on its original device and dtype.
+
+    The block inputs are saved by the lists created by `new_list`, which have the same interface as the lists
+    of block inputs, so the block forward is streamed batch by batch from the store.
+    """
+
+    def __init__(self, memory_budget=None, dtype=None, spill_dir=None, segment_size=64 * 1024**2):
+        """Init the store.
+
+        Args:
+            memory_budget (int, optional): The bytes of the segments kept in memory, the other segments are spilled
+                to disk. Defaults to None, which keeps all segments in memory.
+            dtype (str or torch.dtype, optional): The storage dtype of floating tensors, "fp16" or "bf16".
+                Defaults to None, which keeps the original dtype.
+            spill_dir (str, optional): The directory to create the spill files in. Defaults to None, the temporary
+                directory of the system.
+            segment_size (int, optional): The bytes of a segment, a larger tensor takes a segment of its own.
+                Defaults to 64MB.
+        """
+        self.memory_budget = memory_budget
+        self.dtype = convert_dtype_str2torch(dtype)
+        assert self.dtype in [None, torch.float16, torch.bfloat16], "Only support fp16 and bf16 as the storage dtype."
+        self.spill_dir = spill_dir
+        self.segment_size = segment_size
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self._segments = []
+        # storage dtype -> (index of the segment being filled, used elements)
+        self._filling = {}
+        self._spill_path = None
+        self._finalizer = None
+
+    def _storage_dtype(self, tensor):
+        if self.dtype is None or not tensor.is_floating_point() or tensor.dtype == self.dtype:
+            return tensor.dtype
+        if tensor.numel() and tensor.abs().max() > torch.finfo(self.dtype).max:
+            return tensor.dtype
+        return self.dtype
+
+    @staticmethod
+    def _element_size(dtype):
+        return torch.empty(0, dtype=dtype).element_size()
+
+    def _new_segment(self, dtype, numel):
+        nbytes = numel * self._element_size(dtype)
+        if self.memory_budget is None or self.memory_bytes + nbytes <= self.memory_budget:
+            segment = torch.empty(numel, dtype=dtype)
+            self.memory_bytes += nbytes
+        else:
+            if self._spill_path is None:
+                self._spill_path = tempfile.mkdtemp(prefix="block_inputs_", dir=self.spill_dir)
+                self._finalizer = weakref.finalize(self, shutil.rmtree, self._spill_path, True)
+                logger.info(f"Block inputs exceed the memory budget, spill them to {self._spill_path}.")
+            path = os.path.join(self._spill_path, f"segment_{len(self._segments)}.bin")
+            with open(path, "wb") as f:
+                f.truncate(nbytes)
+            segment = torch.from_file(path, shared=True, size=numel, dtype=dtype)
+            self.disk_bytes += nbytes
+        self._segments.append(segment)
+        return len(self._segments) - 1
+
+    def _allocate(self, dtype, numel):
+        segment_numel = max(self.segment_size // self._element_size(dtype), 1)
+        if numel > segment_numel:
+            return self._new_segment(dtype, numel), 0
+        index, used = self._filling.get(dtype, (None, segment_numel))
+        if used + numel > segment_numel:
+            index, used = self._new_segment(dtype, segment_numel), 0
+        self._filling[dtype] = (index, used + numel)
+        return index, used
+
+    def _write(self, slot, tensor):
+        self._segments[slot.segment][slot.offset : slot.offset + slot.numel].copy_(tensor.reshape(-1))
+
+    def save(self, tensor):
+        """Save a tensor into the store.
+
+        Args:
+            tensor (torch.Tensor): The tensor.
+
+        Returns:
+            The slot of the tensor, which is used to load and update it.
+        """
+        tensor = tensor.detach()
+        storage_dtype = self._storage_dtype(tensor)
+        segment, offset = self._allocate(storage_dtype, tensor.numel())
+        slot = _BlockInputSlot(segment, offset, tuple(tensor.shape), tensor.dtype, tensor.device)
+        self._write(slot, tensor)
+        return slot
+
+    def load(self, slot):
+        """Load a tensor from the store.
+
+        Args:
+            slot: The slot returned by `save`.
+
+        Returns:
+            torch.Tensor: A new tensor on the original device and dtype.
+        """
+        data = self._segments[slot.segment][slot.offset : slot.offset + slot.numel].view(slot.shape)
+        return data.to(device=slot.device, dtype=slot.dtype, copy=True)
+
+    def update(self, slot, tensor):
+        """Overwrite the tensor in a slot, which is reused if the new tensor fits in.
+
+        Args:
+            slot: The slot returned by `save`.
+            tensor (torch.Tensor): The new tensor.
+
+        Returns:
+            The slot of the new tensor.
+        """
+        tensor = tensor.detach()
+        segment_dtype = self._segments[slot.segment].dtype
+        if tensor.numel() != slot.numel or self._storage_dtype(tensor) != segment_dtype:
+            return self.save(tensor)
+        slot.shape, slot.dtype, slot.device = tuple(tensor.shape), tensor.dtype, tensor.device
+        self._write(slot, tensor)
+        return slot
+
+    def pack(self, obj):
+        """Save the tensors in a nested list/tuple/dict, the other objects are kept as they are."""
+        if isinstance(obj, torch.Tensor) and obj.layout == torch.strided:
+            return self.save(obj)
+        if isinstance(obj, (list, tuple)):
+            return type(obj)(self.pack(item) for item in obj)
+        if isinstance(obj, dict):
+            return {key: self.pack(value) for key, value in obj.items()}
+        return obj
+
+    def unpack(self, packed):
+        """Load the tensors in a nested list/tuple/dict packed by `pack`."""
+        if isinstance(packed, _BlockInputSlot):
+            return self.load(packed)
+        if isinstance(packed, (list, tuple)):
+            return type(packed)(self.unpack(item) for item in packed)
+        if isinstance(packed, dict):
+            return {key: self.unpack(value) for key, value in packed.items()}
+        return packed
+
+    def repack(self, packed, obj):
+        """Overwrite the tensors packed by `pack` with obj, reusing their slots where possible."""
+        if isinstance(packed, _BlockInputSlot) and isinstance(obj, torch.Tensor) and obj.layout == torch.strided:
+            return self.update(packed, obj)
+        return self.pack(obj)
+
+    def new_list(self):
+        """Create a list saving its items into the store."""
+        return BlockInputList(self)
+
+    def close(self):
+        """Release the segments and remove the spill files."""
+        self._segments.clear()
+        self._filling.clear()
+        self.memory_bytes = self.disk_bytes = 0
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = self._spill_path = None
+
+
+class BlockInputList:
+    """A list whose items, tensors or nested list/tuple/dict of tensors, are saved in a BlockInputStore.
+
+    Getting an item loads a new copy of it, so modifying the item doesn't change the list until it's set back.
+    """
+
+    def __init__(self, store):
+        """Init the list.
+
+        Args:
+            store (BlockInputStore): The store to save the items.
+        """
+        self.store = store
+        self._items = []
+
+    def append(self, item):
+        """Append an item."""
+        self._items.append(self.store.pack(item))
+
+    def __getitem__(self, idx):
+        return self.store.unpack(self._items[idx])
+
+    def __setitem__(self, idx, item):
+        self._items[idx] = self.store.repack(self._items[idx], item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        for packed in self._items:
+            yield self.store.unpack(packed)
+
+    @property
+    def shapes(self):
+        """The shapes of the tensor items, without loading them."""
+        return [packed.shape for packed in self._items if isinstance(packed, _BlockInputSlot)]
+
+
+def replace_forward(model, block_input_store=None):
     """Replace forward to get the input args and kwargs of first block for AWQ algorithm.
 
     Args:
         model (torch.nn.Module): input model.
+        block_input_store (BlockInputStore, optional): the store to save the input args and kwargs. Defaults to
+            None, which keeps them in lists.
 
     Raises:
         ValueError: to avoid inference of rest parts in model.
@@ -1036,8 +1350,9 @@ def replace_forward(model):
         torch.nn.Module: model with replaced forward.
     """
     # Step 1: replace block_forward to collect block inputs and avoid entire inference
-    setattr(model, "total_block_args", [])
-    setattr(model, "total_block_kwargs", [])
+    new_list = list if block_input_store is None else block_input_store.new_list
+    setattr(model, "total_block_args", new_list())
+    setattr(model, "total_block_kwargs", new_list())
 
     def forward(layer, *args, **kwargs):
         # update total_hidden_states, total_block_kwargs, per batch
@@ -166,6 +166,9 @@ def gptq_entry(
             "use_layer_wise": quant_config.use_layer_wise,
             "model_path": quant_config.model_path,
             "quant_lm_head": quant_config.quant_lm_head,
+            "block_input_memory_budget": quant_config.block_input_memory_budget,
+            "block_input_dtype": quant_config.block_input_dtype,
+            "block_input_spill_dir": quant_config.block_input_spill_dir,
         }
     )
     kwargs.pop("example_inputs")
@@ -447,6 +450,9 @@ def awq_quantize_entry(
             folding = quant_config.folding
             use_full_range = quant_config.use_full_range
             absorb_layer_dict = quant_config.absorb_layer_dict
+            block_input_memory_budget = quant_config.block_input_memory_budget
+            block_input_dtype = quant_config.block_input_dtype
+            block_input_spill_dir = quant_config.block_input_spill_dir
 
     run_fn = kwargs.get("run_fn", None)
     run_args = kwargs.get("run_args", None)
@@ -467,6 +473,9 @@ def awq_quantize_entry(
         use_mse_search=use_mse_search,
         folding=folding,
         use_full_range=use_full_range,
+        block_input_memory_budget=block_input_memory_budget,
+        block_input_dtype=block_input_dtype,
+        block_input_spill_dir=block_input_spill_dir,
     )
 
     model.qconfig = configs_mapping
@@ -14,17 +14,27 @@
 """Intel Neural Compressor Pytorch quantization AutoTune API."""
 
 
+from contextlib import closing
 from copy import deepcopy
 from typing import Callable, List, Optional, Union
 
 import torch
 
-from neural_compressor.common.base_config import BaseConfig, get_all_config_set_from_config_registry
-from neural_compressor.common.base_tuning import EvaluationFuncWrapper, TuningConfig, init_tuning
-from neural_compressor.common.utils import dump_elapsed_time
+from neural_compressor.common.base_config import (
+    BaseConfig,
+    ComposableConfig,
+    get_all_config_set_from_config_registry,
+)
+from neural_compressor.common.base_tuning import (
+    EvaluationFuncWrapper,
+    SequentialTrialExecutor,
+    TuningConfig,
+    init_tuning,
+)
+from neural_compressor.common.utils import GPTQ, RTN, dump_elapsed_time
 from neural_compressor.torch.quantization import quantize
 from neural_compressor.torch.quantization.config import FRAMEWORK_NAME, RTNConfig
-from neural_compressor.torch.utils import constants, logger
+from neural_compressor.torch.utils import ModelSnapshot, constants, get_model_fingerprint, logger
 
 __all__ = [
     "autotune",
@@ -32,6 +42,9 @@ __all__ = [
     "get_rtn_double_quant_config_set",
 ]
 
+# Algorithms that don't modify the weights of the float model in place.
+SNAPSHOT_SUPPORTED_ALGOS = [RTN, GPTQ]
+
 
 def get_rtn_double_quant_config_set() -> List[RTNConfig]:
     """Generate RTN double quant config set.
@@ -54,6 +67,154 @@ def get_all_config_set() -> Union[BaseConfig, List[BaseConfig]]:
     return get_all_config_set_from_config_registry(fwk_name=FRAMEWORK_NAME)
 
 
+def _support_model_snapshot(quant_config: BaseConfig) -> bool:
+    """Check whether all algorithms in quant_config leave the weights of the float model untouched.
+
+    Such algorithms only replace modules or re-bind `param.data`, so the float model can be recovered
+    from a `ModelSnapshot` instead of being deep-copied before each trial.
+    """
+    if isinstance(quant_config, ComposableConfig):
+        return all(_support_model_snapshot(config) for config in quant_config.config_list)
+    return quant_config.name in SNAPSHOT_SUPPORTED_ALGOS
+
+
+def _quantize_trial_model(model, quant_config, run_fn, run_args, example_inputs):
+    """Quantize the float model for one trial, inplace if it can be recovered from the snapshot."""
+    use_snapshot = _support_model_snapshot(quant_config)
+    # !!! Make sure to use deepcopy only when inplace is set to `True`.
+    q_model = quantize(
+        model if use_snapshot else deepcopy(model),
+        quant_config=quant_config,
+        run_fn=run_fn,
+        run_args=run_args,
+        inplace=True,
+        example_inputs=example_inputs,
+    )
+    return q_model, use_snapshot
+
+
+def _restore_model(model_snapshot: ModelSnapshot):
+    """Restore the float model after one trial."""
+    if not model_snapshot.restore():
+        raise RuntimeError(
+            "The float model was modified in place during quantization and can't be restored for the next trial."
+        )
+
+
+class _TrialRunner:
+    """Quantize and evaluate the float model for one trial.
+
+    It's picklable as long as the model and the evaluation function are, so it can run in trial workers. When it
+    runs in the current process, the staged evaluation can be stopped early by `need_stop_evaluation`, and the
+    quantized model of the last trial is kept until the next trial or `release`, so the best trial isn't quantized
+    again if it's the last one.
+    """
+
+    def __init__(
+        self,
+        model,
+        eval_func_wrapper,
+        run_fn,
+        run_args,
+        example_inputs,
+        tuning_logger,
+        model_snapshot=None,
+        need_stop_evaluation=None,
+        keep_last_trial=False,
+    ):
+        self.model = model
+        self.eval_func_wrapper = eval_func_wrapper
+        self.run_fn = run_fn
+        self.run_args = run_args
+        self.example_inputs = example_inputs
+        self.tuning_logger = tuning_logger
+        self.need_stop_evaluation = need_stop_evaluation
+        self.keep_last_trial = keep_last_trial
+        self._model_snapshot = model_snapshot
+        # (quant_config, q_model, use_snapshot, early_stopped) of the last trial run
+        self.last_trial = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_model_snapshot"] = None
+        state["last_trial"] = None
+        return state
+
+    def release(self):
+        """Drop the quantized model of the last trial and restore the float model."""
+        if self.last_trial is None:
+            return
+        _, q_model, use_snapshot, _ = self.last_trial
+        self.last_trial = None
+        del q_model  # maybe gc.collect() is needed for memory release
+        if use_snapshot:
+            _restore_model(self._model_snapshot)
+
+    def __call__(self, quant_config: BaseConfig) -> float:
+        self.release()
+        if self._model_snapshot is None:
+            self._model_snapshot = ModelSnapshot(self.model)
+        self.tuning_logger.execution_start()
+        q_model, use_snapshot = _quantize_trial_model(
+            self.model, quant_config, self.run_fn, self.run_args, self.example_inputs
+        )
+        self.tuning_logger.execution_end()
+        self.tuning_logger.evaluation_start()
+        if self.need_stop_evaluation is not None:
+            eval_result, early_stopped = self.eval_func_wrapper.evaluate_with_early_stop(
+                q_model, self.need_stop_evaluation
+            )
+        else:
+            eval_result, early_stopped = self.eval_func_wrapper.evaluate(q_model), False
+        self.tuning_logger.evaluation_end()
+        self.last_trial = (quant_config, q_model, use_snapshot, early_stopped)
+        del q_model
+        if not self.keep_last_trial:
+            self.release()
+        return eval_result
+
+
+def _run_trials(
+    model,
+    trial_executor,
+    trial_runner,
+    config_loader,
+    tuning_logger,
+    tuning_monitor,
+    run_fn,
+    run_args,
+    example_inputs,
+):
+    """Run trials with the trial executor and return the model quantized with the best config once tuning stops."""
+    trial_results = trial_executor.run(trial_runner, config_loader, tuning_monitor.get_cached_trial_result)
+    with closing(trial_results):
+        for trial_index, quant_config, eval_result, elapsed_time in trial_results:
+            last_trial = trial_runner.last_trial
+            # the trial is run in the current process, or skipped by the cached result
+            is_last_trial = last_trial is not None and last_trial[0] is quant_config
+            early_stopped = is_last_trial and last_trial[3]
+            tuning_logger.trial_start(trial_index=trial_index)
+            logger.info(quant_config.to_dict())
+            tuning_monitor.add_trial_result(trial_index, eval_result, quant_config, elapsed_time, early_stopped)
+            tuning_logger.trial_end(trial_index)
+            if tuning_monitor.need_stop():
+                logger.info("Stopped tuning.")
+                best_trial_record = tuning_monitor.get_best_trial_record()
+                break
+        else:
+            trial_runner.release()
+            return None
+    if is_last_trial and best_trial_record.trial_index == trial_index:
+        q_model = last_trial[1]
+        trial_runner.last_trial = None
+        return q_model  # quantize model inplace
+    trial_runner.release()
+    logger.info("Re-quantizing with best quantization config...")
+    best_quant_config: BaseConfig = best_trial_record.quant_config
+    best_quant_model, _ = _quantize_trial_model(model, best_quant_config, run_fn, run_args, example_inputs)
+    return best_quant_model
+
+
 @dump_elapsed_time("Pass auto-tune")
 def autotune(
     model: torch.nn.Module,
@@ -66,6 +227,19 @@ def autotune(
 ):
     """The main entry of auto-tune.
 
+    For algorithms that don't modify the float weights in place (see `SNAPSHOT_SUPPORTED_ALGOS`), trials quantize
+    the model in place and restore it from a `ModelSnapshot` afterwards instead of deep-copying it, so the peak
+    memory stays near the size of the float model. In that case the returned model is the input model quantized
+    in place.
+
+    If `eval_fn` is a staged evaluation yielding partial results (see `EvaluationFuncWrapper`), the evaluation of
+    a trial is stopped early once it can neither meet `tolerable_loss` nor beat the best trial with the confidence
+    of `tune_config.early_stop_confidence`. Trials run in worker processes by `tune_config.trial_executor`, e.g.
+    `ParallelTrialExecutor`, are always fully evaluated.
+
+    Trial results are cached under `options.workspace`. To skip the trials evaluated by a crashed or previous
+    tuning of the same model, set `resume_from` to its workspace with `set_resume_from`.
+
     Args:
         model (torch.nn.Module): _description_
         tune_config (TuningConfig): _description_
@@ -81,45 +255,36 @@ def autotune(
     best_quant_model = None
     eval_func_wrapper = EvaluationFuncWrapper(eval_fn, eval_args)
     config_loader, tuning_logger, tuning_monitor = init_tuning(tuning_config=tune_config)
-    baseline: float = eval_func_wrapper.evaluate(deepcopy(model))
+    tuning_monitor.set_model_fingerprint(get_model_fingerprint(model))
+    model_snapshot = ModelSnapshot(model)
+    baseline: float = eval_func_wrapper.evaluate(model)
+    _restore_model(model_snapshot)
     tuning_monitor.set_baseline(baseline)
     tuning_logger.tuning_start()
-    for trial_index, quant_config in enumerate(config_loader, 1):
-        tuning_logger.trial_start(trial_index=trial_index)
-        tuning_logger.execution_start()
-        logger.info(quant_config.to_dict())
-        # !!! Make sure to use deepcopy only when inplace is set to `True`.
-        q_model = quantize(
-            deepcopy(model),
-            quant_config=quant_config,
-            run_fn=run_fn,
-            run_args=run_args,
-            inplace=True,
-            example_inputs=example_inputs,
-        )
-        tuning_logger.execution_end()
-        tuning_logger.evaluation_start()
-        eval_result: float = eval_func_wrapper.evaluate(q_model)
-        tuning_logger.evaluation_end()
-        tuning_monitor.add_trial_result(trial_index, eval_result, quant_config)
-        tuning_logger.trial_end(trial_index)
-        if tuning_monitor.need_stop():
-            logger.info("Stopped tuning.")
-            best_trial_record = tuning_monitor.get_best_trial_record()
-            if best_trial_record.trial_index != trial_index:
-                logger.info("Re-quantizing with best quantization config...")
-                del q_model  # maybe gc.collect() is needed for memory release
-                best_quant_config: BaseConfig = best_trial_record.quant_config
-                # !!! Make sure to use deepcopy only when inplace is set to `True`.
-                q_model = quantize(
-                    deepcopy(model),
-                    quant_config=best_quant_config,
-                    run_fn=run_fn,
-                    run_args=run_args,
-                    inplace=True,
-                    example_inputs=example_inputs,
-                )
-            best_quant_model = q_model  # quantize model inplace
-            break
+    trial_executor = tune_config.trial_executor or SequentialTrialExecutor()
+    # the trials run in the current process can be stopped early, and the last quantized model is kept
+    in_process = isinstance(trial_executor, SequentialTrialExecutor)
+    trial_runner = _TrialRunner(
+        model,
+        eval_func_wrapper,
+        run_fn,
+        run_args,
+        example_inputs,
+        tuning_logger,
+        model_snapshot=model_snapshot,
+        need_stop_evaluation=tuning_monitor.need_stop_evaluation if in_process else None,
+        keep_last_trial=in_process,
+    )
+    best_quant_model = _run_trials(
+        model,
+        trial_executor,
+        trial_runner,
+        config_loader,
+        tuning_logger,
+        tuning_monitor,
+        run_fn,
+        run_args,
+        example_inputs,
+    )
     tuning_logger.tuning_end()
     return best_quant_model
@@ -379,6 +379,10 @@ class GPTQConfig(TorchBaseConfig):
         block_size: int = 2048,
         static_groups: bool = False,
         true_sequential: bool = False,
+        # block input store
+        block_input_memory_budget: Optional[int] = None,
+        block_input_dtype: Optional[str] = None,
+        block_input_spill_dir: Optional[str] = None,
         # Tuning space
         white_list: Optional[List[OP_NAME_OR_MODULE_TYPE]] = DEFAULT_WHITE_LIST,
         **kwargs,
@@ -411,6 +415,12 @@ class GPTQConfig(TorchBaseConfig):
             true_sequential (bool): Whether to quantize layers within a transformer block in their original order.
                                   This can lead to higher accuracy but slower overall quantization process.
                                   Default is False.
+            block_input_memory_budget (Optional[int]): The bytes of block inputs kept in memory, the others are
+                                  spilled to memory-mapped files. Default is None, which keeps all of them in memory.
+            block_input_dtype (Optional[str]): The storage dtype of block inputs, "fp16" or "bf16".
+                                  Default is None, which keeps the original dtype.
+            block_input_spill_dir (Optional[str]): The directory of the spill files.
+                                  Default is None, the temporary directory of the system.
             white_list (Optional[List[OP_NAME_OR_MODULE_TYPE]]): White list of operator names or module types.
                                                                  Default is DEFAULT_WHITE_LIST.
         """
@@ -436,6 +446,10 @@ class GPTQConfig(TorchBaseConfig):
         self.static_groups = static_groups
         self.true_sequential = true_sequential
         self.quant_lm_head = quant_lm_head
+        # block input store
+        self.block_input_memory_budget = block_input_memory_budget
+        self.block_input_dtype = block_input_dtype
+        self.block_input_spill_dir = block_input_spill_dir
         self._post_init()  # initialize global & local configuration
 
     @classmethod
@@ -467,7 +481,15 @@ class GPTQConfig(TorchBaseConfig):
         """
         if not self.quant_lm_head:
             self.set_local(
-                LM_HEAD_NAMES, GPTQConfig(dtype="fp32", use_layer_wise=self.use_layer_wise, model_path=self.model_path)
+                LM_HEAD_NAMES,
+                GPTQConfig(
+                    dtype="fp32",
+                    use_layer_wise=self.use_layer_wise,
+                    model_path=self.model_path,
+                    block_input_memory_budget=self.block_input_memory_budget,
+                    block_input_dtype=self.block_input_dtype,
+                    block_input_spill_dir=self.block_input_spill_dir,
+                ),
             )
         config_mapping = super().to_config_mapping(config_list, model_info)
         return config_mapping
@@ -586,6 +608,10 @@ class AWQConfig(TorchBaseConfig):
         use_auto_scale: bool = True,
         use_auto_clip: bool = True,
         folding: bool = False,
+        # block input store
+        block_input_memory_budget: Optional[int] = None,
+        block_input_dtype: Optional[str] = None,
+        block_input_spill_dir: Optional[str] = None,
         white_list: Optional[List[OP_NAME_OR_MODULE_TYPE]] = DEFAULT_WHITE_LIST,
         absorb_layer_dict: dict = {},
         **kwargs,
@@ -612,6 +638,12 @@ class AWQConfig(TorchBaseConfig):
             use_auto_clip (bool):  Enables clip range search. Defaults to True.
             folding(bool): Allow insert mul before linear when the scale cannot be absorbed by last layer,
               default is False.
+            block_input_memory_budget (Optional[int]): The bytes of block inputs kept in memory, the others are
+              spilled to memory-mapped files, default is None, which keeps all of them in memory.
+            block_input_dtype (Optional[str]): The storage dtype of block inputs, "fp16" or "bf16", default is None,
+              which keeps the original dtype.
+            block_input_spill_dir (Optional[str]): The directory of the spill files, default is None, the temporary
+              directory of the system.
             absorb_layer_dict (dict): The layer dict that scale can be absorbed, default is {}.
             white_list (Optional[List[OP_NAME_OR_MODULE_TYPE]]): White list of operator names or module types.
               Default is DEFAULT_WHITE_LIST.
@@ -636,6 +668,9 @@ class AWQConfig(TorchBaseConfig):
         self.use_auto_scale = use_auto_scale
         self.use_auto_clip = use_auto_clip
         self.folding = folding
+        self.block_input_memory_budget = block_input_memory_budget
+        self.block_input_dtype = block_input_dtype
+        self.block_input_spill_dir = block_input_spill_dir
         self.absorb_layer_dict = absorb_layer_dict
         self._post_init()
 
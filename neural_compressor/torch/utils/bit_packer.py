@@ -11,269 +11,126 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Utility functions for bit packing."""
+"""Utility functions for bit packing.
 
+Every `n_pack = compress_bits // bits` elements along the last dim are packed into one element of the
+compressed array, the e-th element is stored at bits [bits * e, bits * (e + 1)).
+Packing and unpacking are vectorized with NumPy over chunks of rows, and the chunks run in a thread pool
+since NumPy releases the GIL in its ufuncs.
+"""
 
-from typing import Callable, Dict, Tuple
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 
-import numba
 import numpy as np
 
-#  key: (bits, compress_bits), value: pack function
-bit_packers: Dict[Tuple[int, int], Callable] = {}
+__all__ = ["pack_array", "unpack_array"]
 
+# number of elements of the raw array processed by one task
+CHUNK_NUMEL = 2**20
 
-def register_pack_func(orig_bits: int, compress_bits: int):
-    """Register the pack function."""
+UNSIGNED_DTYPE_MAPPING = {1: np.uint8, 2: np.uint16, 4: np.uint32, 8: np.uint64}
 
-    def decorator(func):
-        bit_packers[(orig_bits, compress_bits)] = func
-        return func
 
-    return decorator
+def _run_in_chunks(func: Callable, array: np.ndarray, out: np.ndarray, row_numel: int, num_threads: Optional[int]):
+    """Call func(array[rows], out[rows]) for each chunk of rows, in a thread pool if there are several chunks."""
+    rows_per_chunk = max(1, CHUNK_NUMEL // max(1, row_numel))
+    chunks = [slice(start, start + rows_per_chunk) for start in range(0, array.shape[0], rows_per_chunk)]
+    if num_threads is None:
+        num_threads = os.cpu_count() or 1
+    num_threads = min(num_threads, len(chunks))
+    if num_threads <= 1:
+        for chunk in chunks:
+            func(array[chunk], out[chunk])
+        return
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        # consume the results to raise the exceptions of tasks
+        list(executor.map(lambda chunk: func(array[chunk], out[chunk]), chunks))
 
 
-@register_pack_func(4, 32)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b4_c32(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
+def pack_array(
+    raw_array: np.ndarray,
+    bits: int,
+    compress_bits: int,
+    compression_dtype=np.int32,
+    num_threads: Optional[int] = None,
 ) -> np.ndarray:
-    """Pack the array with numba when bits=4 and compress_bits=32."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 7] & 0b1111) << 28)
-            | ((raw_array[:, i * n_pack + 6] & 0b1111) << 24)
-            | ((raw_array[:, i * n_pack + 5] & 0b1111) << 20)
-            | ((raw_array[:, i * n_pack + 4] & 0b1111) << 16)
-            | ((raw_array[:, i * n_pack + 3] & 0b1111) << 12)
-            | ((raw_array[:, i * n_pack + 2] & 0b1111) << 8)
-            | ((raw_array[:, i * n_pack + 1] & 0b1111) << 4)
-            | (raw_array[:, i * n_pack] & 0b1111)
-        )
+    """Pack the last dim of the raw array.
+
+    Args:
+        raw_array (np.ndarray): the int array to be packed, shape: [rows, columns].
+        bits (int): the number of bits of each element, e.g. 2, 3, 4, 8.
+        compress_bits (int): the number of bits of each element of the compressed array, e.g. 8, 16, 32, 64.
+        compression_dtype (np.dtype, optional): the data type of the compressed array. Defaults to np.int32.
+        num_threads (int, optional): the number of threads. Defaults to the number of CPUs.
+
+    Returns:
+        np.ndarray: the packed array, shape: [rows, ceil(columns / n_pack)].
+    """
+    n_pack = compress_bits // bits
+    rows, columns = raw_array.shape
+    packed_columns = (columns + n_pack - 1) // n_pack
+    packed_array = np.empty((rows, packed_columns), dtype=compression_dtype)
+    unsigned_dtype = UNSIGNED_DTYPE_MAPPING[packed_array.itemsize]
+    mask = unsigned_dtype(2**bits - 1)
+
+    def pack_chunk(raw_chunk, packed_chunk):
+        packed_chunk = packed_chunk.view(unsigned_dtype)
+        packed_chunk[:] = 0
+        for e in range(n_pack):
+            # the e-th elements of all packed elements, casting negative values to unsigned keeps their low bits
+            tmp = raw_chunk[:, e::n_pack].astype(unsigned_dtype)
+            tmp &= mask
+            tmp <<= unsigned_dtype(bits * e)
+            packed_chunk[:, : tmp.shape[1]] |= tmp
+
+    _run_in_chunks(pack_chunk, raw_array, packed_array, columns, num_threads)
     return packed_array
 
 
-@register_pack_func(4, 16)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b4_c16(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
+def unpack_array(
+    packed_array: np.ndarray,
+    bits: int,
+    compress_bits: int,
+    signed: bool = True,
+    target_dtype=np.int16,
+    num_threads: Optional[int] = None,
 ) -> np.ndarray:
-    """Pack the array with numba when bits=4 and compress_bits=16."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 3] & 0b1111) << 12)
-            | ((raw_array[:, i * n_pack + 2] & 0b1111) << 8)
-            | ((raw_array[:, i * n_pack + 1] & 0b1111) << 4)
-            | (raw_array[:, i * n_pack] & 0b1111)
-        )
-    return packed_array
-
-
-@register_pack_func(4, 8)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b4_c8(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=4 and compress_bits=8."""
-    for i in range(new_in_features):
-        packed_array[:, i] = ((raw_array[:, i * n_pack + 1] & 0b1111) << 4) | (raw_array[:, i * n_pack] & 0b1111)
-    return packed_array
-
-
-@register_pack_func(4, 64)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b4_c64(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=4 and compress_bits=64."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 15] & 0b1111) << 60)
-            | ((raw_array[:, i * n_pack + 14] & 0b1111) << 56)
-            | ((raw_array[:, i * n_pack + 13] & 0b1111) << 52)
-            | ((raw_array[:, i * n_pack + 12] & 0b1111) << 48)
-            | ((raw_array[:, i * n_pack + 11] & 0b1111) << 44)
-            | ((raw_array[:, i * n_pack + 10] & 0b1111) << 40)
-            | ((raw_array[:, i * n_pack + 9] & 0b1111) << 36)
-            | ((raw_array[:, i * n_pack + 8] & 0b1111) << 32)
-            | ((raw_array[:, i * n_pack + 7] & 0b1111) << 28)
-            | ((raw_array[:, i * n_pack + 6] & 0b1111) << 24)
-            | ((raw_array[:, i * n_pack + 5] & 0b1111) << 20)
-            | ((raw_array[:, i * n_pack + 4] & 0b1111) << 16)
-            | ((raw_array[:, i * n_pack + 3] & 0b1111) << 12)
-            | ((raw_array[:, i * n_pack + 2] & 0b1111) << 8)
-            | ((raw_array[:, i * n_pack + 1] & 0b1111) << 4)
-            | (raw_array[:, i * n_pack] & 0b1111)
-        )
-    return packed_array
-
-
-@register_pack_func(8, 32)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b8_c32(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=8 and compress_bits=32."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 3] & 0b11111111) << 24)
-            | ((raw_array[:, i * n_pack + 2] & 0b11111111) << 16)
-            | ((raw_array[:, i * n_pack + 1] & 0b11111111) << 8)
-            | (raw_array[:, i * n_pack] & 0b11111111)
-        )
-    return packed_array
-
-
-@register_pack_func(8, 16)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b8_c16(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=8 and compress_bits=16."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 3] & 0b11111111) << 24)
-            | ((raw_array[:, i * n_pack + 2] & 0b11111111) << 16)
-            | ((raw_array[:, i * n_pack + 1] & 0b11111111) << 8)
-            | (raw_array[:, i * n_pack] & 0b11111111)
-        )
-    return packed_array
-
-
-@register_pack_func(8, 8)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b8_c8(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=8 and compress_bits=8."""
-    for i in range(new_in_features):
-        packed_array[:, i] = raw_array[:, i * n_pack] & 0b11111111
-    return packed_array
-
-
-@register_pack_func(8, 64)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b8_c64(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=8 and compress_bits=64."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 7] & 0b11111111) << 56)
-            | ((raw_array[:, i * n_pack + 6] & 0b11111111) << 48)
-            | ((raw_array[:, i * n_pack + 5] & 0b11111111) << 40)
-            | ((raw_array[:, i * n_pack + 4] & 0b11111111) << 32)
-            | ((raw_array[:, i * n_pack + 3] & 0b11111111) << 24)
-            | ((raw_array[:, i * n_pack + 2] & 0b11111111) << 16)
-            | ((raw_array[:, i * n_pack + 1] & 0b11111111) << 8)
-            | (raw_array[:, i * n_pack] & 0b11111111)
-        )
-    return packed_array
-
-
-@register_pack_func(2, 32)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b2_c32(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=2 and compress_bits=32."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 15] & 0b11) << 30)
-            | ((raw_array[:, i * n_pack + 14] & 0b11) << 28)
-            | ((raw_array[:, i * n_pack + 13] & 0b11) << 26)
-            | ((raw_array[:, i * n_pack + 12] & 0b11) << 24)
-            | ((raw_array[:, i * n_pack + 11] & 0b11) << 22)
-            | ((raw_array[:, i * n_pack + 10] & 0b11) << 20)
-            | ((raw_array[:, i * n_pack + 9] & 0b11) << 18)
-            | ((raw_array[:, i * n_pack + 8] & 0b11) << 16)
-            | ((raw_array[:, i * n_pack + 7] & 0b11) << 14)
-            | ((raw_array[:, i * n_pack + 6] & 0b11) << 12)
-            | ((raw_array[:, i * n_pack + 5] & 0b11) << 10)
-            | ((raw_array[:, i * n_pack + 4] & 0b11) << 8)
-            | ((raw_array[:, i * n_pack + 3] & 0b11) << 6)
-            | ((raw_array[:, i * n_pack + 2] & 0b11) << 4)
-            | ((raw_array[:, i * n_pack + 1] & 0b11) << 2)
-            | (raw_array[:, i * n_pack] & 0b11)
-        )
-    return packed_array
-
-
-@register_pack_func(2, 16)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b2_c16(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=2 and compress_bits=16."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 7] & 0b11) << 14)
-            | ((raw_array[:, i * n_pack + 6] & 0b11) << 12)
-            | ((raw_array[:, i * n_pack + 5] & 0b11) << 10)
-            | ((raw_array[:, i * n_pack + 4] & 0b11) << 8)
-            | ((raw_array[:, i * n_pack + 3] & 0b11) << 6)
-            | ((raw_array[:, i * n_pack + 2] & 0b11) << 4)
-            | ((raw_array[:, i * n_pack + 1] & 0b11) << 2)
-            | (raw_array[:, i * n_pack] & 0b11)
-        )
-    return packed_array
-
-
-@register_pack_func(2, 8)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b2_c8(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=2 and compress_bits=8."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 3] & 0b11) << 6)
-            | ((raw_array[:, i * n_pack + 2] & 0b11) << 4)
-            | ((raw_array[:, i * n_pack + 1] & 0b11) << 2)
-            | (raw_array[:, i * n_pack] & 0b11)
-        )
-    return packed_array
-
-
-@register_pack_func(2, 64)
-@numba.jit(nopython=True, parallel=True)
-def pack_array_with_numba_b2_c64(
-    raw_array: np.ndarray, packed_array: np.ndarray, n_pack: int, new_in_features: int
-) -> np.ndarray:
-    """Pack the array with numba when bits=2 and compress_bits=64."""
-    for i in range(new_in_features):
-        packed_array[:, i] = (
-            ((raw_array[:, i * n_pack + 31] & 0b11) << 62)
-            | ((raw_array[:, i * n_pack + 30] & 0b11) << 60)
-            | ((raw_array[:, i * n_pack + 29] & 0b11) << 58)
-            | ((raw_array[:, i * n_pack + 28] & 0b11) << 56)
-            | ((raw_array[:, i * n_pack + 27] & 0b11) << 54)
-            | ((raw_array[:, i * n_pack + 26] & 0b11) << 52)
-            | ((raw_array[:, i * n_pack + 25] & 0b11) << 50)
-            | ((raw_array[:, i * n_pack + 24] & 0b11) << 48)
-            | ((raw_array[:, i * n_pack + 23] & 0b11) << 46)
-            | ((raw_array[:, i * n_pack + 22] & 0b11) << 44)
-            | ((raw_array[:, i * n_pack + 21] & 0b11) << 42)
-            | ((raw_array[:, i * n_pack + 20] & 0b11) << 40)
-            | ((raw_array[:, i * n_pack + 19] & 0b11) << 38)
-            | ((raw_array[:, i * n_pack + 18] & 0b11) << 36)
-            | ((raw_array[:, i * n_pack + 17] & 0b11) << 34)
-            | ((raw_array[:, i * n_pack + 16] & 0b11) << 32)
-            | ((raw_array[:, i * n_pack + 15] & 0b11) << 30)
-            | ((raw_array[:, i * n_pack + 14] & 0b11) << 28)
-            | ((raw_array[:, i * n_pack + 13] & 0b11) << 26)
-            | ((raw_array[:, i * n_pack + 12] & 0b11) << 24)
-            | ((raw_array[:, i * n_pack + 11] & 0b11) << 22)
-            | ((raw_array[:, i * n_pack + 10] & 0b11) << 20)
-            | ((raw_array[:, i * n_pack + 9] & 0b11) << 18)
-            | ((raw_array[:, i * n_pack + 8] & 0b11) << 16)
-            | ((raw_array[:, i * n_pack + 7] & 0b11) << 14)
-            | ((raw_array[:, i * n_pack + 6] & 0b11) << 12)
-            | ((raw_array[:, i * n_pack + 5] & 0b11) << 10)
-            | ((raw_array[:, i * n_pack + 4] & 0b11) << 8)
-            | ((raw_array[:, i * n_pack + 3] & 0b11) << 6)
-            | ((raw_array[:, i * n_pack + 2] & 0b11) << 4)
-            | ((raw_array[:, i * n_pack + 1] & 0b11) << 2)
-            | (raw_array[:, i * n_pack] & 0b11)
-        )
-    return packed_array
+    """Unpack the last dim of the packed array.
+
+    Args:
+        packed_array (np.ndarray): the packed array, shape: [rows, packed_columns].
+        bits (int): the number of bits of each element, e.g. 2, 3, 4, 8.
+        compress_bits (int): the number of bits of each element of the packed array, e.g. 8, 16, 32, 64.
+        signed (bool, optional): whether the elements are signed ints. Defaults to True.
+        target_dtype (np.dtype, optional): the data type of the unpacked array. Defaults to np.int16.
+        num_threads (int, optional): the number of threads. Defaults to the number of CPUs.
+
+    Returns:
+        np.ndarray: the unpacked array, shape: [rows, packed_columns * n_pack].
+    """
+    n_pack = compress_bits // bits
+    rows, packed_columns = packed_array.shape
+    unpacked_array = np.empty((rows, packed_columns * n_pack), dtype=target_dtype)
+    index = np.arange(n_pack)
+    if signed:
+        # move the element to the highest bits, then shift it back with sign
+        left_shifts = (compress_bits - bits * (index + 1)).astype(packed_array.dtype)
+        right_shift = packed_array.dtype.type(compress_bits - bits)
+    else:
+        unsigned_dtype = UNSIGNED_DTYPE_MAPPING[packed_array.itemsize]
+        right_shifts = (index * bits).astype(unsigned_dtype)
+        mask = unsigned_dtype(2**bits - 1)
+
+    def unpack_chunk(packed_chunk, unpacked_chunk):
+        if signed:
+            tmp = packed_chunk[..., None] << left_shifts
+            tmp >>= right_shift
+        else:
+            tmp = packed_chunk.view(unsigned_dtype)[..., None] >> right_shifts
+            tmp &= mask
+        unpacked_chunk[:] = tmp.reshape(packed_chunk.shape[0], -1)
+
+    _run_in_chunks(unpack_chunk, packed_array, unpacked_array, packed_columns * n_pack, num_threads)
+    return unpacked_array
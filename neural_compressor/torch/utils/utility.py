@@ -14,8 +14,11 @@
 """Intel Neural Compressor PyTorch utilities."""
 
 
+import copy
 import enum
+import hashlib
 import importlib
+import itertools
 from collections import UserDict
 from typing import Callable, Dict, List, Optional, Tuple, Union
 
@@ -50,8 +53,12 @@ algos_mapping: Dict[str, Callable] = {}
 # All constants for torch
 WHITE_MODULE_LIST = [torch.nn.Linear, torch.nn.Conv1d, torch.nn.Conv2d, torch.nn.Conv3d]
 
+# the bytes of a tensor copied to CPU and hashed at once by get_model_fingerprint
+FINGERPRINT_CHUNK_BYTES = 64 * 1024**2
+
 HPU_SAFE_WEIGHTS_NAME = "hpu_model.safetensors"
 WEIGHT_NAME = "quantized_weight.pt"
+SAFE_WEIGHT_NAME = "quantized_weight.safetensors"
 HPU_WEIGHT_NAME = "quantized_hpu_weight.pt"
 QCONFIG_NAME = "qconfig.json"
 
@@ -127,6 +134,106 @@ get_attr = fetch_module
 set_attr = set_module
 
 
+class ModelSnapshot:
+    """A copy-free snapshot of the module tree of a model.
+
+    The snapshot keeps references to every submodule, parameter and buffer instead of copying weights.
+    `restore` puts the recorded objects back in place, which undoes modules replaced by quantization
+    (e.g. Linear -> INCWeightOnlyLinear), re-bound `param.data` and attributes attached to modules,
+    while the peak memory stays near the size of the original model.
+    Tensors modified in place cannot be recovered, `restore` reports them by returning False.
+
+    Usage example:
+        snapshot = ModelSnapshot(model)
+        q_model = quantize(model, quant_config, inplace=True)
+        ...
+        snapshot.restore()
+    """
+
+    def __init__(self, model: torch.nn.Module):
+        """Init a ModelSnapshot object.
+
+        Args:
+            model (torch.nn.Module): the model to record.
+        """
+        self.model = model
+        self._module_states = []
+        self._tensor_states = []
+        recorded_tensors = set()
+        for module in model.modules():
+            self._module_states.append((module, self._copy_module_state(module.__dict__)))
+            for tensor in itertools.chain(module._parameters.values(), module._buffers.values()):
+                if tensor is None or id(tensor) in recorded_tensors:
+                    continue
+                recorded_tensors.add(id(tensor))
+                # the alias shares storage and version counter with the original tensor
+                alias = tensor.detach()
+                self._tensor_states.append((tensor, alias, alias._version))
+
+    @staticmethod
+    def _copy_module_state(state):
+        # `_modules`, `_parameters`, `_buffers` and hooks are dicts, a shallow copy is enough to record them.
+        return {key: copy.copy(value) if isinstance(value, dict) else value for key, value in state.items()}
+
+    def is_modified(self) -> bool:
+        """Check whether any recorded tensor has been modified in place."""
+        return any(alias._version != version for _, alias, version in self._tensor_states)
+
+    def restore(self) -> bool:
+        """Restore the recorded model in place.
+
+        The snapshot can be restored multiple times, e.g. once after every tuning trial.
+
+        Returns:
+            bool: False if some recorded tensors were modified in place and can't be recovered, else True.
+        """
+        for module, state in self._module_states:
+            module.__dict__.clear()
+            module.__dict__.update(self._copy_module_state(state))
+        for tensor, alias, _ in self._tensor_states:
+            if (
+                tensor.data_ptr() != alias.data_ptr()
+                or tensor.shape != alias.shape
+                or tensor.dtype != alias.dtype
+                or tensor.device != alias.device
+            ):
+                tensor.data = alias
+        modified = self.is_modified()
+        if modified:
+            logger.warning("Some tensors of the model were modified in place and can't be restored from the snapshot.")
+        return not modified
+
+
+def get_model_fingerprint(model: torch.nn.Module, chunk_bytes: int = FINGERPRINT_CHUNK_BYTES) -> str:
+    """Get the fingerprint of model weights.
+
+    The name, shape and dtype of every parameter and buffer are hashed together with all bytes of it, which are
+    copied to CPU and hashed chunk by chunk, so the peak memory is bounded by `chunk_bytes` even for LLMs on devices.
+
+    Args:
+        model (torch.nn.Module): the input model.
+        chunk_bytes (int, optional): the bytes of a tensor hashed at once. Defaults to FINGERPRINT_CHUNK_BYTES.
+
+    Returns:
+        fingerprint (str): a hex string.
+    """
+    hasher = hashlib.sha256(type(model).__name__.encode())
+    for name, tensor in itertools.chain(model.named_parameters(), model.named_buffers()):
+        hasher.update(f"{name}:{tuple(tensor.shape)}:{tensor.dtype}".encode())
+        if tensor.numel() == 0 or tensor.is_meta:
+            continue
+        flat_tensor = tensor.detach()
+        if flat_tensor.is_quantized:
+            flat_tensor = flat_tensor.int_repr()
+        flat_tensor = flat_tensor.reshape(-1)
+        chunk_numel = max(chunk_bytes // flat_tensor.element_size(), 1)
+        for start in range(0, flat_tensor.numel(), chunk_numel):
+            chunk = flat_tensor[start : start + chunk_numel].to("cpu")
+            # hash the raw bytes, numpy doesn't support some dtypes such as bfloat16
+            hasher.update(chunk.view(torch.uint8).numpy().data)
+    return hasher.hexdigest()
+
+
 def get_model_info(model: torch.nn.Module, white_module_list: List[Callable]) -> List[Tuple[str, str]]:
     """Get model info according to white_module_list."""
     module_dict = dict(model.named_modules())
@@ -16,7 +16,6 @@
 # limitations under the License.
 """The configuration of the training loop."""
 import os
-import pickle
 import random
 from typing import Callable, List, Union
 
@@ -311,8 +310,9 @@ def fit(compression_manager, train_func, eval_func=None, eval_dataloader=None, e
     )
     if resume_file:
         assert os.path.exists(resume_file), "The specified resume file {} doesn't exist!".format(resume_file)
-        with open(resume_file, "rb") as f:
-            _resume = pickle.load(f).__dict__
+        from .strategy.utils.tuning_history import TuningHistoryJournal
+
+        _resume = {"tuning_history": TuningHistoryJournal.load(resume_file)}
 
     if eval_func is None and eval_dataloader is None:  # pragma: no cover
         logger.info("Quantize model without tuning!")
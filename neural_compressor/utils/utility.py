@@ -397,10 +397,9 @@ def get_tuning_history(tuning_history_path):
     Args:
         tuning_history_path: The tuning history path, which need users to assign
     """
-    with open(tuning_history_path, "rb") as f:
-        strategy_object = pickle.load(f)
-    tuning_history = strategy_object.tuning_history
-    return tuning_history
+    from neural_compressor.strategy.utils.tuning_history import TuningHistoryJournal
+
+    return TuningHistoryJournal.load(tuning_history_path)
 
 
 def recover(fp32_model, tuning_history_path, num, **kwargs):
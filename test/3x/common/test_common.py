@@ -35,6 +35,9 @@ torch_included_folder:
 """
 
 import copy
+import shutil
+import tempfile
+import time
 import unittest
 
 from neural_compressor.common import Logger
@@ -55,7 +58,10 @@ from neural_compressor.common.base_tuning import (
     ConfigSet,
     EvaluationFuncWrapper,
     Evaluator,
+    ParallelTrialExecutor,
     SequentialSampler,
+    SequentialTrialExecutor,
+    TrialCache,
     TuningConfig,
     init_tuning,
 )
@@ -372,6 +378,59 @@ class TestEvaluationFuncWrapper(unittest.TestCase):
         result = wrapper.evaluate(5)
         self.assertEqual(result, 10)
 
+    def test_staged_evaluate(self):
+        num_evaluated_batches = []
+
+        def staged_eval_fn(model):
+            for i in range(1, 5):
+                num_evaluated_batches.append(i)
+                yield model * i / 4, i * 10
+
+        wrapper = EvaluationFuncWrapper(staged_eval_fn)
+        self.assertEqual(wrapper.evaluate(1.0), 1.0)
+        self.assertEqual(len(num_evaluated_batches), 4)
+        num_evaluated_batches.clear()
+        result, early_stopped = wrapper.evaluate_with_early_stop(1.0, lambda result, num_samples: num_samples >= 20)
+        self.assertEqual((result, early_stopped), (0.5, True))
+        self.assertEqual(num_evaluated_batches, [1, 2])
+        result, early_stopped = wrapper.evaluate_with_early_stop(1.0, lambda result, num_samples: False)
+        self.assertEqual((result, early_stopped), (1.0, False))
+        # the evaluation function which isn't staged
+        self.assertEqual(EvaluationFuncWrapper(lambda model: model).evaluate_with_early_stop(0.8, None), (0.8, False))
+
+    def test_tuning_monitor_need_stop_evaluation(self):
+        config_set = [FakeAlgoConfig(weight_bits=4), FakeAlgoConfig(weight_bits=8)]
+        _, _, tuning_monitor = init_tuning(TuningConfig(config_set=config_set, tolerable_loss=0.01))
+        tuning_monitor.set_baseline(0.9)
+        # no finished trial to compare with
+        self.assertFalse(tuning_monitor.need_stop_evaluation(0.1, 10000))
+        tuning_monitor.add_trial_result(1, 0.8, config_set[0])
+        # the upper bound is lower than both the accuracy goal and the best trial
+        self.assertTrue(tuning_monitor.need_stop_evaluation(0.5, 1000))
+        tuning_monitor.add_trial_result(2, 0.5, config_set[1], early_stopped=True)
+        self.assertEqual(tuning_monitor.get_best_trial_record().trial_index, 1)
+        # not enough samples to be confident
+        self.assertFalse(tuning_monitor.need_stop_evaluation(0.5, 10))
+        # not checked until the number of samples is doubled
+        self.assertFalse(tuning_monitor.need_stop_evaluation(0.5, 19))
+        self.assertTrue(tuning_monitor.need_stop_evaluation(0.5, 1000))
+        tuning_monitor.add_trial_result(3, 0.5, config_set[1], early_stopped=True)
+        # may beat the best trial
+        self.assertFalse(tuning_monitor.need_stop_evaluation(0.79, 1000))
+        tuning_monitor.add_trial_result(4, 0.79, config_set[1])
+        # the later checks take a smaller error budget, so the bound at the 2nd check is wider than at the 1st one
+        self.assertTrue(tuning_monitor.need_stop_evaluation(0.746, 1000))
+        tuning_monitor.add_trial_result(5, 0.746, config_set[1], early_stopped=True)
+        self.assertFalse(tuning_monitor.need_stop_evaluation(0.746, 500))
+        self.assertFalse(tuning_monitor.need_stop_evaluation(0.746, 1000))
+        tuning_monitor.add_trial_result(6, 0.746, config_set[1])
+        # the bound doesn't apply to the results out of [0, 1]
+        tuning_monitor.set_baseline(90.0)
+        self.assertFalse(tuning_monitor.need_stop_evaluation(10.0, 10000))
+        tuning_monitor.set_baseline(0.9)
+        tuning_monitor.tuning_config.early_stop_confidence = None
+        self.assertFalse(tuning_monitor.need_stop_evaluation(0.5, 1000))
+
 
 class TestAutoTune(unittest.TestCase):
     def test_autotune(self):
@@ -424,5 +483,90 @@ class TestAutoTune(unittest.TestCase):
         self.assertIsNotNone(q_model)
 
 
+def fake_trial_fn(config):
+    # the later trials finish earlier
+    time.sleep(0.05 * (16 - config.weight_bits) / 2)
+    return config.weight_bits
+
+
+class TestTrialExecutor(unittest.TestCase):
+    def setUp(self):
+        self.config_set = [FakeAlgoConfig(weight_bits=bits) for bits in [2, 4, 6, 8, 16]]
+
+    def test_sequential_trial_executor(self):
+        config_loader = ConfigLoader(self.config_set)
+        results = list(SequentialTrialExecutor().run(fake_trial_fn, config_loader))
+        self.assertEqual([res[0] for res in results], [1, 2, 3, 4, 5])
+        self.assertEqual([res[2] for res in results], [2, 4, 6, 8, 16])
+
+    def test_parallel_trial_executor(self):
+        executor = ParallelTrialExecutor(num_workers=3)
+        self.assertEqual(len(executor.get_cores_per_worker()), 3)
+        results = list(executor.run(fake_trial_fn, ConfigLoader(self.config_set)))
+        # the results are reported in trial-index order
+        self.assertEqual([res[0] for res in results], [1, 2, 3, 4, 5])
+        self.assertEqual([res[2] for res in results], [2, 4, 6, 8, 16])
+
+    def test_parallel_trial_executor_stop(self):
+        config_loader, _, tuning_monitor = init_tuning(
+            TuningConfig(config_set=self.config_set, trial_executor=ParallelTrialExecutor(num_workers=2))
+        )
+        tuning_monitor.set_baseline(8)
+        trial_results = tuning_monitor.tuning_config.trial_executor.run(fake_trial_fn, config_loader)
+        for trial_index, quant_config, trial_result, _ in trial_results:
+            tuning_monitor.add_trial_result(trial_index, trial_result, quant_config)
+            if tuning_monitor.need_stop():
+                trial_results.close()
+                break
+        self.assertEqual(tuning_monitor.get_number_of_trials(), 4)
+        self.assertEqual(tuning_monitor.get_best_quant_config().weight_bits, 8)
+
+    def test_trial_executor_skip_cached_trials(self):
+        def get_cached_result(config):
+            return (-1, 0.0) if config.weight_bits == 4 else None
+
+        for executor in [SequentialTrialExecutor(), ParallelTrialExecutor(num_workers=2)]:
+            results = list(executor.run(fake_trial_fn, ConfigLoader(self.config_set), get_cached_result))
+            self.assertEqual([res[0] for res in results], [1, 2, 3, 4, 5])
+            self.assertEqual([res[2] for res in results], [2, -1, 6, 8, 16])
+
+
+class TestTrialCache(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace, ignore_errors=True)
+
+    def test_trial_cache(self):
+        trial_cache = TrialCache("fake_model", self.workspace)
+        trial_cache.add(FakeAlgoConfig(weight_bits=4), 0.9, 1.5)
+        self.assertEqual(trial_cache.get(FakeAlgoConfig(weight_bits=4))["trial_result"], 0.9)
+        self.assertIsNone(trial_cache.get(FakeAlgoConfig(weight_bits=8)))
+        # resume from the cache file
+        resumed_cache = TrialCache("fake_model", self.workspace, resume_from=self.workspace)
+        self.assertEqual(resumed_cache.get(FakeAlgoConfig(weight_bits=4))["elapsed_time"], 1.5)
+        # the cache is keyed on the model fingerprint
+        other_model_cache = TrialCache("other_fake_model", self.workspace, resume_from=self.workspace)
+        self.assertIsNone(other_model_cache.get(FakeAlgoConfig(weight_bits=4)))
+
+    def test_tuning_monitor_with_trial_cache(self):
+        from neural_compressor.common import options
+
+        workspace, resume_from = options.workspace, options.resume_from
+        options.workspace = self.workspace
+        config_set = [FakeAlgoConfig(weight_bits=4), FakeAlgoConfig(weight_bits=8)]
+        _, _, tuning_monitor = init_tuning(TuningConfig(config_set=config_set))
+        tuning_monitor.set_model_fingerprint("fake_model")
+        self.assertIsNone(tuning_monitor.get_cached_trial_result(config_set[0]))
+        tuning_monitor.add_trial_result(1, 0.9, config_set[0], 1.5)
+        options.resume_from = self.workspace
+        _, _, resumed_tuning_monitor = init_tuning(TuningConfig(config_set=config_set))
+        resumed_tuning_monitor.set_model_fingerprint("fake_model")
+        self.assertEqual(resumed_tuning_monitor.get_cached_trial_result(config_set[0]), (0.9, 1.5))
+        self.assertIsNone(resumed_tuning_monitor.get_cached_trial_result(config_set[1]))
+        options.workspace, options.resume_from = workspace, resume_from
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+import shutil
+
+import pytest
+import torch
+import transformers
+
+from neural_compressor.torch.algorithms.layer_wise.utils import (
+    BlockPrefetcher,
+    LayerWiseWeightLoader,
+    _weight_loaders,
+    close_weight_loaders,
+    get_block_name,
+    get_weight_loader,
+    load_value,
+)
+
+
+class TestLayerWiseWeightLoader:
+    def setup_class(self):
+        self.model = transformers.AutoModelForCausalLM.from_pretrained(
+            "hf-internal-testing/tiny-random-GPTJForCausalLM"
+        )
+        self.state_dict = self.model.state_dict()
+
+    def teardown_class(self):
+        shutil.rmtree("lwq_checkpoints", ignore_errors=True)
+
+    @pytest.mark.parametrize(
+        "safe_serialization, max_shard_size", [(True, "10GB"), (True, "100KB"), (False, "10GB"), (False, "100KB")]
+    )
+    def test_load(self, safe_serialization, max_shard_size):
+        path = f"lwq_checkpoints/{safe_serialization}_{max_shard_size}"
+        self.model.save_pretrained(path, safe_serialization=safe_serialization, max_shard_size=max_shard_size)
+        loader = LayerWiseWeightLoader(path, prefix=self.model.base_model_prefix)
+        names = ["transformer.h.0.attn.q_proj.weight", "transformer.h.1.mlp.fc_in.bias", "lm_head.weight"]
+        loader.prefetch(names[:2])
+        for name in names:
+            value = loader.get_tensor(name)
+            assert torch.equal(value, self.state_dict[name])
+            # the loaded tensors are private copies
+            value += 1
+            assert torch.equal(loader.get_tensor(name), self.state_dict[name])
+        assert not loader._prefetched
+        assert torch.equal(
+            load_value(self.model, "transformer.wte.weight", path), self.state_dict["transformer.wte.weight"]
+        )
+        assert get_weight_loader(self.model, path) is get_weight_loader(self.model, path)
+        loader.close()
+
+    def test_block_prefetcher(self):
+        path = "lwq_checkpoints/prefetch"
+        self.model.save_pretrained(path, safe_serialization=True, max_shard_size="100KB")
+        assert get_block_name("transformer.h.10.attn.q_proj") == "transformer.h.10"
+        assert get_block_name("lm_head") == ""
+        module_names = [name for name, m in self.model.named_modules() if len(list(m.children())) == 0]
+        prefetcher = BlockPrefetcher(self.model, path, module_names, num_blocks=1)
+        loader = get_weight_loader(self.model, path)
+        # the first block, embeddings here, prefetches itself and the next block
+        prefetcher("transformer.wte")
+        assert list(loader._prefetched) == ["transformer.wte.weight"] + [
+            name for name, _ in self.model.named_parameters() if name.startswith("transformer.h.0.")
+        ]
+        prefetcher("transformer.h.0.ln_1")
+        assert "transformer.h.1.ln_1.weight" in loader._prefetched
+        for name in list(loader._prefetched):
+            assert torch.equal(loader.get_tensor(name), self.state_dict[name])
+        prefetcher("transformer.h.0.attn.q_proj")
+        assert not loader._prefetched, "only the first module of a block triggers prefetching."
+
+    def test_prefetch_bytes(self):
+        path = "lwq_checkpoints/prefetch_bytes"
+        self.model.save_pretrained(path, safe_serialization=True, max_shard_size="100KB")
+        names = [name for name in self.state_dict if name.startswith("transformer.h.0.")]
+        nbytes = [self.state_dict[name].nbytes for name in names]
+        with LayerWiseWeightLoader(path, max_prefetched_bytes=sum(nbytes[:3])) as loader:
+            assert [loader._nbytes(name) for name in names] == nbytes
+            # the prefetched tensors are bounded by bytes
+            loader.prefetch(names)
+            assert list(loader._prefetched) == names[:3]
+            assert torch.equal(loader.get_tensor(names[0]), self.state_dict[names[0]])
+            assert loader.max_prefetched_bytes - loader._prefetched_bytes < nbytes[3]
+            loader.prefetch(names[3:])
+            assert list(loader._prefetched) == names[1:3]
+            # the tensors prefetched by the earlier calls are dropped once a later one is consumed
+            name = "transformer.h.1.ln_1.weight"
+            loader.prefetch([name])
+            assert torch.equal(loader.get_tensor(name), self.state_dict[name])
+            assert list(loader._prefetched) == []
+            assert loader._prefetched_bytes == 0
+        assert not loader._files, "The opened files should be released on exit."
+
+    def test_weight_loader_cache(self):
+        paths = [f"lwq_checkpoints/cache_{i}" for i in range(3)]
+        for path in paths:
+            self.model.save_pretrained(path, safe_serialization=True, max_shard_size="100KB")
+        loader = get_weight_loader(self.model, paths[0])
+        # the loader is rebuilt if a checkpoint file is rewritten, even if the directory isn't modified
+        self.model.save_pretrained(paths[0], safe_serialization=True, max_shard_size="100KB")
+        assert get_weight_loader(self.model, paths[0]) is not loader
+        assert not loader._files
+        # the least recently used loader is closed
+        loaders = [get_weight_loader(self.model, path) for path in paths]
+        assert loaders[0]._files == {} and len(_weight_loaders) == 2
+        close_weight_loaders(paths[1])
+        assert not loaders[1]._files and len(_weight_loaders) == 1
+        close_weight_loaders()
+        assert not loaders[2]._files and not _weight_loaders
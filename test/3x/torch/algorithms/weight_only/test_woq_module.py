@@ -25,7 +25,7 @@ class TestWeightOnlyLinear:
             (2, torch.int64),
         ],
     )
-    def test_pack_with_numba(self, bits, compression_dtype):
+    def test_pack_with_numpy(self, bits, compression_dtype):
         m = torch.nn.Linear(64, 32)
         dtype = "int"
         weight = m.weight.detach()
@@ -50,3 +50,65 @@ class TestWeightOnlyLinear:
         new_module.pack(int_weight, scale, zp, m.bias)
         unpacked_int_weight = new_module.unpack_tensor(new_module.qweight)
         assert torch.equal(unpacked_int_weight, int_weight)
+
+    @pytest.mark.parametrize(
+        "dtype, bits, scheme, use_optimum_format, compression_dim, compression_dtype, g_idx",
+        [
+            ("int", 4, "asym", True, 1, torch.int32, False),
+            ("int", 4, "sym", True, 1, torch.int32, True),
+            ("int", 4, "asym", False, 1, torch.int32, False),
+            ("int", 4, "sym", False, 1, torch.int8, False),
+            ("int", 8, "sym", False, 1, torch.int8, False),
+            ("int", 8, "sym", False, 0, torch.int32, False),
+            ("int", 2, "asym", False, 0, torch.int64, False),
+            ("int", 3, "sym", False, 0, torch.int32, False),
+            ("nf4", 4, "sym", False, 1, torch.int32, False),
+        ],
+    )
+    def test_tiled_forward(self, dtype, bits, scheme, use_optimum_format, compression_dim, compression_dtype, g_idx):
+        from neural_compressor.torch.algorithms.weight_only.modules import enable_tiled_forward
+
+        m = torch.nn.Linear(100, 30)
+        int_weight, scale, zp = quant_tensor(
+            m.weight.detach().clone(), dtype=dtype, bits=bits, scheme=scheme, return_int=True, group_size=32
+        )
+        perm = torch.randperm(m.in_features) if g_idx else None
+        new_module = INCWeightOnlyLinear(
+            m.in_features,
+            m.out_features,
+            dtype=dtype,
+            bits=bits,
+            group_size=32,
+            zp=zp is not None,
+            bias=True,
+            g_idx=g_idx,
+            use_optimum_format=use_optimum_format,
+            compression_dim=compression_dim,
+            compression_dtype=compression_dtype,
+        )
+        g_idx_tensor = perm // 32 if g_idx else None
+        new_module.pack(int_weight, scale, zp, m.bias, g_idx_tensor)
+        input = torch.randn(2, 5, m.in_features)
+        out = new_module(input)
+        assert hasattr(new_module, "weight")
+        model = enable_tiled_forward(torch.nn.Sequential(new_module), tile_size=20)
+        assert not hasattr(new_module, "weight")
+        tiled_out = model(input)
+        assert not hasattr(new_module, "weight"), "tiled forward shouldn't cache the float weight."
+        assert tiled_out.shape == out.shape
+        # the float16 weight of optimum format is recovered in float16 by the default forward
+        assert torch.allclose(out, tiled_out, atol=1e-3 if use_optimum_format else 1e-5)
+
+    @pytest.mark.parametrize("bits", [2, 3, 4, 8])
+    @pytest.mark.parametrize("compression_dtype", [torch.int8, torch.int32, torch.int64])
+    @pytest.mark.parametrize("zp", [True, False])
+    def test_pack_with_torch(self, bits, compression_dtype, zp):
+        new_module = INCWeightOnlyLinear(
+            100, 30, bits=bits, zp=zp, use_optimum_format=False, compression_dtype=compression_dtype
+        )
+        low, high = (0, 2**bits) if zp else (-(2 ** (bits - 1)), 2 ** (bits - 1))
+        int_weight = torch.randint(low, high, (30, 100), dtype=torch.int32)
+        packed_weight = new_module.pack_tensor_with_torch(int_weight)
+        if not (bits == 8 and compression_dtype == torch.int8):
+            assert torch.equal(packed_weight, new_module.pack_tensor_with_numpy(int_weight))
+        assert torch.equal(new_module.unpack_tensor_with_torch(packed_weight)[:, :100], int_weight.type(torch.int16))
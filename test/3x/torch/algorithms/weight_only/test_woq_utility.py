@@ -29,3 +29,81 @@ def test_convert_dtype_str2torch():
     # Test for unsupported dtypes
     with pytest.raises(AssertionError):
         convert_dtype_str2torch("int16")
+
+
+@pytest.mark.parametrize(
+    "dtype, scheme, group_size, shape",
+    [
+        ("int", "asym", 32, (64, 128)),
+        ("int", "sym", 32, (64, 100)),
+        ("int", "sym", -1, (16, 64)),
+        ("nf4", "sym", 32, (32, 64)),
+    ],
+)
+def test_search_clip(dtype, scheme, group_size, shape):
+    from neural_compressor.torch.algorithms.weight_only.utility import quant_tensor, search_clip
+
+    linear = torch.nn.Linear(shape[1], shape[0])
+    org_weight = linear.weight.detach().clone()
+    # tiny chunk_numel to cover chunked search
+    best_clip_ratio = search_clip(linear, 4, group_size, scheme, dtype, chunk_numel=4096)
+    assert torch.equal(linear.weight, org_weight), "search_clip shouldn't modify the weight"
+    num_groups = 1 if group_size == -1 else (shape[1] + group_size - 1) // group_size
+    assert best_clip_ratio.shape == (shape[0], num_groups)
+    # the best ratio of each group is not worse than any tensor-wide ratio
+    qdq_weight = quant_tensor(
+        org_weight.clone(), bits=4, group_size=group_size, scheme=scheme, dtype=dtype, quantile=best_clip_ratio
+    )
+    loss = (qdq_weight - org_weight).pow(2).mean()
+    for ratio in [1.0, 0.95, 0.9, 0.805]:
+        qdq_weight = quant_tensor(
+            org_weight.clone(), bits=4, group_size=group_size, scheme=scheme, dtype=dtype, quantile=ratio
+        )
+        assert loss <= (qdq_weight - org_weight).pow(2).mean() + 1e-9
+    # the tensor of equal ratios is the same as the tensor-wide ratio
+    qdq_weight_1 = quant_tensor(org_weight.clone(), group_size=group_size, scheme=scheme, dtype=dtype, quantile=0.9)
+    qdq_weight_2 = quant_tensor(
+        org_weight.clone(),
+        group_size=group_size,
+        scheme=scheme,
+        dtype=dtype,
+        quantile=torch.full_like(best_clip_ratio, 0.9),
+    )
+    assert torch.allclose(qdq_weight_1, qdq_weight_2)
+
+
+@pytest.mark.parametrize("memory_budget, dtype", [(None, None), (0, None), (4096, "bf16"), (None, "fp16")])
+def test_block_input_store(tmp_path, memory_budget, dtype):
+    from neural_compressor.torch.algorithms.weight_only.utility import BlockInputStore
+
+    store = BlockInputStore(memory_budget=memory_budget, dtype=dtype, spill_dir=str(tmp_path), segment_size=1024)
+    hidden_states_list, kwargs_list = store.new_list(), store.new_list()
+    hidden_states, kwargs = [], []
+    for i in range(4):
+        hidden_states.append(torch.randn(2, 8, 16))
+        mask = torch.zeros(2, 1, 8, 8).masked_fill_(torch.rand(2, 1, 8, 8) > 0.5, torch.finfo(torch.float32).min)
+        kwargs.append({"attention_mask": mask, "position_ids": torch.arange(8)[None], "use_cache": False})
+        hidden_states_list.append(hidden_states[-1])
+        kwargs_list.append(kwargs[-1])
+    atol = 1e-2 if dtype else 0
+    assert len(hidden_states_list) == 4 and hidden_states_list.shapes == [(2, 8, 16)] * 4
+    for i, (h, kw) in enumerate(zip(hidden_states_list, kwargs_list)):
+        assert h.dtype == torch.float32 and torch.allclose(h, hidden_states[i], atol=atol, rtol=atol)
+        # the mask overflowing the storage dtype is kept in fp32, the integers are never converted
+        assert torch.equal(kw["attention_mask"], kwargs[i]["attention_mask"])
+        assert torch.equal(kw["position_ids"], kwargs[i]["position_ids"]) and kw["use_cache"] is False
+    # the items are copies, which are changed only by setting them back
+    h = hidden_states_list[0]
+    h.zero_()
+    assert hidden_states_list[0].abs().sum() > 0
+    hidden_states_list[0] = h
+    assert hidden_states_list[0].abs().sum() == 0
+    hidden_states_list[1] = torch.ones(3, 5)
+    assert torch.equal(hidden_states_list[1], torch.ones(3, 5))
+    if memory_budget is not None:
+        assert store.memory_bytes <= memory_budget and store.disk_bytes > 0
+        assert len(list(tmp_path.iterdir())) == 1
+    else:
+        assert store.disk_bytes == 0
+    store.close()
+    assert not list(tmp_path.iterdir())
@@ -211,3 +211,55 @@ class TestAWQQuant:
         out2 = model(self.example_inputs)
 
         assert torch.all(out1[0].eq(out2[0])), "The results should be equal."
+
+    def test_block_input_store(self, tmp_path):
+        from neural_compressor.torch.algorithms.weight_only.awq import AWQQuantizer
+
+        weight_config = {
+            name: {
+                "dtype": "int",
+                "bits": 4,
+                "group_size": 32,
+                "group_dim": 1,
+                "scheme": "asym",
+                "use_full_range": False,
+                "use_mse_search": False,
+                "use_double_quant": False,
+                "double_quant_dtype": "int",
+                "double_quant_bits": 8,
+                "double_quant_scheme": "sym",
+                "double_quant_group_size": 256,
+            }
+            for name, module in self.tiny_gptj.named_modules()
+            if isinstance(module, torch.nn.Linear) and "lm_head" not in name
+        }
+        outputs = []
+        for kwargs in [{}, {"block_input_memory_budget": 0}]:
+            quantizer = AWQQuantizer(quant_config=copy.deepcopy(weight_config))
+            model = quantizer.prepare(copy.deepcopy(self.tiny_gptj), block_input_spill_dir=str(tmp_path), **kwargs)
+            calib_func(model)
+            model = quantizer.convert(model, bits=-1, example_inputs=self.example_inputs)
+            outputs.append(model(self.example_inputs)[0])
+        assert torch.equal(outputs[0], outputs[1]), "Spilling block inputs shouldn't change the result."
+        assert not list(tmp_path.iterdir()), "The spill files should be removed after quantization."
+
+    def test_block_input_store_with_quantize_API(self, tmp_path, monkeypatch):
+        from neural_compressor.torch.algorithms.weight_only import awq
+
+        stores = []
+
+        class RecordedBlockInputStore(awq.BlockInputStore):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                stores.append(self)
+
+        monkeypatch.setattr(awq, "BlockInputStore", RecordedBlockInputStore)
+        quant_config = AWQConfig(
+            bits=4, group_size=32, block_input_memory_budget=0, block_input_spill_dir=str(tmp_path)
+        )
+        model = prepare(copy.deepcopy(self.tiny_gptj), quant_config, example_inputs=self.example_inputs)
+        calib_func(model)
+        model = convert(model)
+        assert len(stores) == 1, "AWQConfig should pass the block input options to AWQQuantizer."
+        assert (stores[0].memory_budget, stores[0].spill_dir) == (0, str(tmp_path))
+        assert not list(tmp_path.iterdir()), "The spill files should be removed after quantization."
@@ -347,3 +347,109 @@ class TestGPTQQuant:
         assert (
             get_woq_linear_num(loaded_model, "INCWeightOnlyLinear") == 30
         ), "Incorrect number of INCWeightOnlyLinear modules"
+
+    @pytest.mark.parametrize("chunk_size, packed", [(None, False), (4, False), (5, True)])
+    def test_hessian_accumulator(self, chunk_size, packed):
+        from neural_compressor.torch.algorithms.weight_only.gptq import HessianAccumulator
+
+        inputs = [torch.randn(10, 7) for _ in range(3)]
+        accumulator = HessianAccumulator(7, chunk_size=chunk_size, packed=packed)
+        accumulator._block_rows = 3
+        for inp in inputs:
+            accumulator.add_batch(inp, 1)
+        accumulator.num_consumers = 2
+        X = torch.cat(inputs)
+        ref = 2 / len(inputs) * X.t().matmul(X)
+        H = accumulator.take()
+        assert torch.allclose(H, ref, atol=1e-5)
+        H += 1
+        assert torch.allclose(accumulator.take(), ref, atol=1e-5), "H is shared with a consumer."
+        assert accumulator.H is None
+
+    def test_share_hessian(self):
+        from neural_compressor.torch.algorithms.weight_only.gptq import GPTQuantizer
+
+        weight_config = {".*": {"bits": 4, "group_size": 8, "act_order": True}}
+        outputs = []
+        for share_hessian, pack_hessian in [(False, False), (True, False), (True, True)]:
+            model = copy.deepcopy(self.tiny_gptj)
+            quantizer = GPTQuantizer(quant_config=copy.deepcopy(weight_config))
+            model = quantizer.prepare(model, share_hessian=share_hessian, pack_hessian=pack_hessian)
+            run_fn(model)
+            model(torch.tensor([[60, 50, 40]], dtype=torch.long).to(device))
+            model = quantizer.convert(model)
+            outputs.append(model(self.example_inputs)[0])
+        assert torch.allclose(outputs[0], outputs[1], atol=1e-5), "Sharing the Hessian shouldn't change the result."
+        assert torch.allclose(outputs[0], outputs[2], atol=1e-5), "Packing the Hessian shouldn't change the result."
+
+    def test_hessian_sharing_with_inplace_input(self):
+        from neural_compressor.torch.algorithms.weight_only.gptq import GPTQ, HessianSharing
+
+        layers = {name: torch.nn.Linear(8, 4) for name in ["q", "k", "v"]}
+        # k gets another input than q in the last batch, and the input of q and k is modified in place before v
+        batches = [
+            (torch.randn(2, 3, 8), None),
+            (torch.randn(2, 3, 8), None),
+            (torch.randn(2, 3, 8), torch.randn(6, 8)),
+        ]
+        hessians = []
+        for share_hessian in [False, True]:
+            gptq_objs = {name: GPTQ(layer, layer.weight.data) for name, layer in layers.items()}
+            hessian_sharing = HessianSharing(gptq_objs, enable=share_hessian)
+            handles = [layer.register_forward_hook(hessian_sharing.hook(name)) for name, layer in layers.items()]
+            with torch.no_grad():
+                for i, (x, k_input) in enumerate(batches):
+                    x = x.clone()
+                    layers["q"](x)
+                    layers["k"](x if k_input is None else k_input)
+                    x.mul_(2)
+                    layers["v"](x)
+                    hessian_sharing.flush()
+                    if share_hessian and i == 1:
+                        assert gptq_objs["q"].hessian is gptq_objs["k"].hessian
+                        assert gptq_objs["q"].hessian is not gptq_objs["v"].hessian
+            for h in handles:
+                h.remove()
+            hessians.append({name: gptq.hessian.take() for name, gptq in gptq_objs.items()})
+        for name in layers:
+            assert torch.allclose(hessians[0][name], hessians[1][name], atol=1e-5), "Unexpected Hessian of " + name
+
+    def test_block_input_store(self, tmp_path):
+        from neural_compressor.torch.algorithms.weight_only.gptq import GPTQuantizer
+
+        weight_config = {".*": {"bits": 4, "group_size": 8}}
+        outputs = []
+        for kwargs in [{}, {"block_input_memory_budget": 0}, {"block_input_dtype": "bf16"}]:
+            model = copy.deepcopy(self.tiny_gptj)
+            quantizer = GPTQuantizer(quant_config=copy.deepcopy(weight_config))
+            model = quantizer.prepare(model, block_input_spill_dir=str(tmp_path), **kwargs)
+            run_fn(model)
+            model(torch.tensor([[60, 50, 40]], dtype=torch.long).to(device))
+            model = quantizer.convert(model)
+            outputs.append(model(self.example_inputs)[0])
+        assert torch.allclose(outputs[0], outputs[1], atol=1e-5), "Spilling block inputs shouldn't change the result."
+        assert torch.allclose(outputs[0], outputs[2], atol=1e-1), "Storing block inputs in bf16 changes too much."
+        assert not list(tmp_path.iterdir()), "The spill files should be removed after quantization."
+
+    def test_block_input_store_with_quantize_API(self, tmp_path, monkeypatch):
+        from neural_compressor.torch.algorithms.weight_only import gptq
+
+        stores = []
+
+        class RecordedBlockInputStore(gptq.BlockInputStore):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                stores.append(self)
+
+        monkeypatch.setattr(gptq, "BlockInputStore", RecordedBlockInputStore)
+        model = copy.deepcopy(self.tiny_gptj)
+        quant_config = GPTQConfig(
+            block_input_memory_budget=0, block_input_dtype="bf16", block_input_spill_dir=str(tmp_path)
+        )
+        model = prepare(model, quant_config)
+        run_fn(model)
+        model = convert(model)
+        assert len(stores) == 1, "GPTQConfig should pass the block input options to GPTQuantizer."
+        assert (stores[0].memory_budget, stores[0].spill_dir) == (0, str(tmp_path))
+        assert stores[0].dtype == torch.bfloat16
+        assert not list(tmp_path.iterdir()), "The spill files should be removed after quantization."
@@ -365,6 +365,69 @@ class TestRTNQuant:
             get_woq_linear_num(loaded_model, "INCWeightOnlyLinear") == 30
         ), "Incorrect number of INCWeightOnlyLinear modules"
 
+    def test_save_and_load_safetensors(self):
+        import os
+
+        from neural_compressor.torch.quantization import load
+        from neural_compressor.torch.utils import SAFE_WEIGHT_NAME, WEIGHT_NAME
+
+        fp32_model = copy.deepcopy(self.tiny_gptj)
+        q_model = quantize(fp32_model, quant_config=get_default_rtn_config())
+        inc_out = q_model(self.example_inputs)[0]
+        shutil.rmtree("saved_results_safetensors", ignore_errors=True)
+        q_model.save("saved_results_safetensors", safe_serialization=True)
+        assert os.path.exists(os.path.join("saved_results_safetensors", SAFE_WEIGHT_NAME))
+        assert not os.path.exists(os.path.join("saved_results_safetensors", WEIGHT_NAME))
+
+        # the WeightOnlyLinear modules are built on meta device and bound to the memory mapped tensors
+        loaded_model = load("saved_results_safetensors", copy.deepcopy(self.tiny_gptj))
+        assert not any(tensor.is_meta for tensor in loaded_model.state_dict().values())
+        output = loaded_model(self.example_inputs)[0]
+        assert torch.allclose(inc_out, output), "Unexpected result. Please double check."
+        assert (
+            get_woq_linear_num(loaded_model, "INCWeightOnlyLinear") == 30
+        ), "Incorrect number of INCWeightOnlyLinear modules"
+        shutil.rmtree("saved_results_safetensors", ignore_errors=True)
+
+    @pytest.mark.parametrize("safe_serialization", [True, False])
+    def test_save_and_load_sharded(self, safe_serialization):
+        import json
+        import os
+
+        from neural_compressor.torch.quantization import load
+        from neural_compressor.torch.utils import SAFE_WEIGHT_NAME, WEIGHT_NAME, LoadFormat
+
+        q_model = quantize(copy.deepcopy(self.tiny_gptj), quant_config=get_default_rtn_config())
+        inc_out = q_model(self.example_inputs)[0]
+        shutil.rmtree("saved_results_sharded", ignore_errors=True)
+        q_model.save("saved_results_sharded", safe_serialization=safe_serialization, max_shard_size="50KB")
+        weight_name = SAFE_WEIGHT_NAME if safe_serialization else WEIGHT_NAME
+        with open(os.path.join("saved_results_sharded", weight_name + ".index.json")) as f:
+            weight_map = json.load(f)["weight_map"]
+        assert set(weight_map) == set(q_model.state_dict())
+        assert len(set(weight_map.values())) > 1
+        loaded_model = load("saved_results_sharded", copy.deepcopy(self.tiny_gptj))
+        assert torch.allclose(inc_out, loaded_model(self.example_inputs)[0]), "Unexpected result. Please double check."
+
+        # transformers-style shards with the quantization config in config.json
+        q_model = quantize(copy.deepcopy(self.tiny_gptj), quant_config=get_default_rtn_config())
+        q_model.config.quantization_config = {"quant_method": "gptq", "bits": 4, "group_size": 32, "sym": True}
+        shutil.rmtree("saved_results_sharded", ignore_errors=True)
+        q_model.save(
+            "saved_results_sharded",
+            format=LoadFormat.HUGGINGFACE,
+            safe_serialization=safe_serialization,
+            max_shard_size="50KB",
+        )
+        index_name = "model.safetensors.index.json" if safe_serialization else "pytorch_model.bin.index.json"
+        assert os.path.exists(os.path.join("saved_results_sharded", index_name))
+        loaded_model = load("saved_results_sharded", format="huggingface", torch_dtype=torch.float32)
+        assert (
+            get_woq_linear_num(loaded_model, "INCWeightOnlyLinear") == 30
+        ), "Incorrect number of INCWeightOnlyLinear modules"
+        assert torch.allclose(inc_out, loaded_model(self.example_inputs)[0]), "Unexpected result. Please double check."
+        shutil.rmtree("saved_results_sharded", ignore_errors=True)
+
     @pytest.mark.skipif(not is_hpex_available(), reason="no hpex in environment here.")
     def test_save_and_load_hpu(self):
         from neural_compressor.torch.quantization import load
@@ -1,4 +1,5 @@
 import unittest
+from collections import OrderedDict
 from functools import wraps
 from typing import Any, Callable, Dict, List, Optional, Union
 from unittest.mock import patch
@@ -137,6 +138,12 @@ def run_fn_for_gptq(model, dataloader_for_calibration, calibration_mode=False):
         print("Accuracy: 1.0")  # demo the usage
 
 
+def eval_bits_fn(model):
+    # only the fp32 and 8-bits models meet the accuracy goal
+    bits = getattr(model.fc1, "bits", 32)
+    return 1.0 if bits >= 8 else 0.9
+
+
 class TestAutoTune(unittest.TestCase):
     @classmethod
     def setUpClass(self):
@@ -305,6 +312,99 @@ class TestAutoTune(unittest.TestCase):
         best_model = autotune(model=build_simple_torch_model(), tune_config=custom_tune_config, eval_fn=eval_acc_fn)
         self.assertIsNone(best_model)
 
+    @reset_tuning_target
+    def test_autotune_restore_float_model_with_snapshot(self):
+        from neural_compressor.torch.algorithms.weight_only.modules import INCWeightOnlyLinear
+
+        model = build_simple_torch_model()
+        fp32_fc1 = model.fc1
+        fp32_state_dict = {k: v.clone() for k, v in model.state_dict().items()}
+        acc_res_lst = [1.0] + [0.9] * 4
+
+        def eval_acc_fn(model):
+            return acc_res_lst.pop(0)
+
+        custom_tune_config = TuningConfig(config_set=[RTNConfig(bits=[4, 6, 5, 8])], tolerable_loss=0.01)
+        best_model = autotune(model=model, tune_config=custom_tune_config, eval_fn=eval_acc_fn)
+        self.assertIsNone(best_model)
+        # the float model is restored in place after every trial
+        self.assertIs(model.fc1, fp32_fc1)
+        self.assertFalse(hasattr(model, "is_quantized"))
+        for key, value in model.state_dict().items():
+            self.assertTrue(torch.equal(value, fp32_state_dict[key]))
+
+        # the best model is re-quantized in place
+        acc_res_lst = [1.0] + [0.9, 0.995, 0.9]
+        custom_tune_config = TuningConfig(config_set=[RTNConfig(bits=[4, 6, 5])], tolerable_loss=0.01)
+        best_model = autotune(model=model, tune_config=custom_tune_config, eval_fn=eval_acc_fn)
+        self.assertIs(best_model, model)
+        self.assertIsInstance(best_model.fc1, INCWeightOnlyLinear)
+        self.assertEqual(best_model.fc1.bits, 6)
+
+    @reset_tuning_target
+    def test_autotune_with_parallel_trial_executor(self):
+        from neural_compressor.common.base_tuning import ParallelTrialExecutor
+
+        # the model is pickled to trial workers
+        model = torch.nn.Sequential(
+            OrderedDict(fc1=torch.nn.Linear(30, 50), fc2=torch.nn.Linear(50, 30), fc3=torch.nn.Linear(30, 5))
+        )
+        custom_tune_config = TuningConfig(
+            config_set=[RTNConfig(bits=[4, 6, 8, 5])], trial_executor=ParallelTrialExecutor(num_workers=2)
+        )
+        best_model = autotune(model=model, tune_config=custom_tune_config, eval_fn=eval_bits_fn)
+        self.assertIsNotNone(best_model)
+        self.assertEqual(best_model.fc1.bits, 8)
+
+    @reset_tuning_target
+    def test_autotune_resume_from_trial_cache(self):
+        import shutil
+        import tempfile
+
+        from neural_compressor.common import options
+
+        workspace, resume_from = options.workspace, options.resume_from
+        options.workspace = tempfile.mkdtemp()
+        model = build_simple_torch_model()
+        evaluated_bits = []
+
+        def eval_acc_fn(model):
+            bits = getattr(model.fc1, "bits", 32)
+            evaluated_bits.append(bits)
+            return 1.0 if bits >= 8 else 0.9
+
+        custom_tune_config = TuningConfig(config_set=[RTNConfig(bits=[4, 6])])
+        best_model = autotune(model=model, tune_config=custom_tune_config, eval_fn=eval_acc_fn)
+        self.assertIsNone(best_model)
+        self.assertEqual(evaluated_bits, [32, 4, 6])
+        # the extended tuning only evaluates the new trials
+        evaluated_bits.clear()
+        options.resume_from = options.workspace
+        custom_tune_config = TuningConfig(config_set=[RTNConfig(bits=[4, 6, 8])])
+        best_model = autotune(model=model, tune_config=custom_tune_config, eval_fn=eval_acc_fn)
+        self.assertEqual(best_model.fc1.bits, 8)
+        self.assertEqual(evaluated_bits, [32, 8])
+        shutil.rmtree(options.workspace, ignore_errors=True)
+        options.workspace, options.resume_from = workspace, resume_from
+
+    @reset_tuning_target
+    def test_autotune_with_staged_evaluation(self):
+        num_evaluated_batches = {}
+        bits_to_acc = {32: 1.0, 8: 0.95, 4: 0.5, 6: 1.0}
+
+        def staged_eval_fn(model):
+            bits = getattr(model.fc1, "bits", 32)
+            for i in range(1, 11):
+                num_evaluated_batches[bits] = i
+                # the partial accuracy of i * 100 samples
+                yield bits_to_acc[bits], i * 100
+
+        custom_tune_config = TuningConfig(config_set=[RTNConfig(bits=[8, 4, 6])], tolerable_loss=0.01)
+        best_model = autotune(model=build_simple_torch_model(), tune_config=custom_tune_config, eval_fn=staged_eval_fn)
+        self.assertEqual(best_model.fc1.bits, 6)
+        # only the trial which can neither meet the accuracy goal nor beat the best trial is stopped early
+        self.assertEqual(num_evaluated_batches, {32: 10, 8: 10, 4: 1, 6: 10})
+
     @reset_tuning_target
     def test_rtn_double_quant_config_set(self) -> None:
         from neural_compressor.torch.quantization import TuningConfig, autotune, get_rtn_double_quant_config_set
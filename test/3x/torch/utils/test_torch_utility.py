@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 import torch
 
@@ -34,7 +35,7 @@ def build_simple_torch_model():
     return model
 
 
-from neural_compressor.torch.utils.utility import fetch_module, set_module
+from neural_compressor.torch.utils.utility import ModelSnapshot, fetch_module, get_model_fingerprint, set_module
 
 
 class TestTorchUtils:
@@ -77,3 +78,60 @@ class TestTorchUtils:
     def test_double_quant_config_dict(self, double_quant_type):
         config_dict = get_double_quant_config_dict(double_quant_type)
         assert isinstance(config_dict, dict), "The returned object should be a dict."
+
+
+def test_model_snapshot():
+    model = build_simple_torch_model()
+    fc2, fc2_weight = model.fc2, model.fc2.weight
+    fp32_state_dict = {k: v.clone() for k, v in model.state_dict().items()}
+    snapshot = ModelSnapshot(model)
+    # replace module, re-bind data and attach attributes like quantization does
+    set_module(model, "fc2", torch.nn.Linear(30, 60))
+    model.fc1.weight.data = torch.zeros_like(model.fc1.weight)
+    model.is_quantized = True
+    assert snapshot.restore()
+    assert model.fc2 is fc2 and model.fc2.weight is fc2_weight
+    assert not hasattr(model, "is_quantized")
+    for key, value in model.state_dict().items():
+        assert torch.equal(value, fp32_state_dict[key])
+    # in-place modification can't be restored
+    with torch.no_grad():
+        model.fc3.weight.mul_(2)
+    assert snapshot.is_modified()
+    assert not snapshot.restore()
+
+
+def test_model_fingerprint():
+    model = build_simple_torch_model()
+    fingerprint = get_model_fingerprint(model)
+    # the bytes are hashed chunk by chunk, the fingerprint doesn't depend on the chunk size
+    assert get_model_fingerprint(model, chunk_bytes=100) == fingerprint
+    # every value is hashed
+    with torch.no_grad():
+        model.fc2.weight[-1, -1] += 1e-3
+    assert get_model_fingerprint(model) != fingerprint
+    fingerprint = get_model_fingerprint(model.to(torch.bfloat16))
+    assert get_model_fingerprint(model, chunk_bytes=100) == fingerprint
+
+
+@pytest.mark.parametrize("bits", [2, 3, 4, 8])
+@pytest.mark.parametrize("compression_dtype", [np.int8, np.int16, np.int32, np.int64])
+@pytest.mark.parametrize("signed", [True, False])
+def test_bit_packer(bits, compression_dtype, signed, monkeypatch):
+    from neural_compressor.torch.utils import bit_packer
+
+    # small chunks to cover packing with the thread pool
+    monkeypatch.setattr(bit_packer, "CHUNK_NUMEL", 256)
+    compress_bits = np.dtype(compression_dtype).itemsize * 8
+    n_pack = compress_bits // bits
+    low, high = (-(2 ** (bits - 1)), 2 ** (bits - 1)) if signed else (0, 2**bits)
+    raw_array = np.random.randint(low, high, size=(37, 101)).astype(np.int32)
+    packed_array = bit_packer.pack_array(raw_array, bits, compress_bits, compression_dtype, num_threads=4)
+    assert packed_array.shape == (37, (101 + n_pack - 1) // n_pack)
+    assert packed_array.dtype == compression_dtype
+    # the e-th element is stored at bits [bits * e, bits * (e + 1))
+    word = int(packed_array[3, 1]) & (2**compress_bits - 1)
+    for e in range(n_pack):
+        assert (word >> (bits * e)) & (2**bits - 1) == raw_array[3, n_pack + e] & (2**bits - 1)
+    unpacked_array = bit_packer.unpack_array(packed_array, bits, compress_bits, signed=signed, num_threads=4)
+    assert np.array_equal(unpacked_array[:, :101], raw_array)
@@ -865,6 +865,43 @@ class TestAdaptorONNXRT(unittest.TestCase):
         self.assertIsNone(res[1])
         del calibrator
 
+    def test_calibrator_merge(self):
+        import pickle
+
+        from neural_compressor.adaptor.ox_utils.calibrator import CALIBRATOR, CalibratorBase
+
+        datas = [np.random.randn(16, 64).astype("float32") * (i + 1) for i in range(8)]
+        for calib_method in ["minmax", "kl", "percentile"]:
+            calibrator = CALIBRATOR[calib_method]()
+            for data in datas:
+                calibrator.collect(data)
+
+            shard_states = []
+            for shard in [datas[:4], datas[4:]]:
+                shard_calibrator = CALIBRATOR[calib_method]()
+                for data in shard:
+                    shard_calibrator.collect(data)
+                shard_states.append(pickle.loads(pickle.dumps(shard_calibrator.state_dict())))
+            merged_calibrator = CalibratorBase.from_state_dict(shard_states[0])
+            merged_calibrator.merge(CalibratorBase.from_state_dict(shard_states[1]))
+            self.assertEqual(merged_calibrator.method_name, calib_method)
+
+            restored_calibrator = CalibratorBase.from_state_dict(calibrator.state_dict())
+            self.assertEqual(restored_calibrator.calib_range, calibrator.calib_range)
+            if calib_method == "minmax":
+                self.assertEqual(merged_calibrator.calib_range, calibrator.calib_range)
+            else:
+                self.assertEqual(merged_calibrator.collector.histogram[0].sum(), 8 * 16 * 64)
+            if calib_method == "percentile":
+                self.assertTrue(np.allclose(merged_calibrator.calib_range, calibrator.calib_range, rtol=0.01))
+
+        # the number of bins is bounded when the range keeps growing
+        calibrator = CALIBRATOR["percentile"](num_bins=128)
+        for i in range(30):
+            calibrator.collect(np.random.randn(1000).astype("float32") * 2**i)
+        self.assertTrue(128 <= len(calibrator.collector.histogram[0]) <= 4 * 128)
+        self.assertEqual(calibrator.collector.histogram[0].sum(), 30 * 1000)
+
     def test_query_block_info(self):
         framework_specific_info = {
             "device": "cpu",
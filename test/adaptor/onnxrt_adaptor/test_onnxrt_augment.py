@@ -1,4 +1,5 @@
 import os
+import pickle
 import shutil
 import sys
 import unittest
@@ -57,6 +58,29 @@ def create_nlp_session():
     return model, dataloader
 
 
+def create_conv_chain_session():
+    #   Conv
+    #    |
+    #   Relu
+    #    |
+    #   Conv
+    A = helper.make_tensor_value_info("A", TensorProto.FLOAT, ["N", 1, 5, 5])
+    E = helper.make_tensor_value_info("E", TensorProto.FLOAT, ["N", 1, 5, 5])
+    B_init = generate_input_initializer([1, 1, 3, 3], np.float32, "B")
+    D_init = generate_input_initializer([1, 1, 3, 3], np.float32, "D")
+    conv_node_1 = onnx.helper.make_node("Conv", ["A", "B"], ["C"], name="conv1", kernel_shape=[3, 3], pads=[1, 1, 1, 1])
+    relu_node = onnx.helper.make_node("Relu", ["C"], ["C_relu"], name="relu")
+    conv_node_2 = onnx.helper.make_node(
+        "Conv", ["C_relu", "D"], ["E"], name="conv2", kernel_shape=[3, 3], pads=[1, 1, 1, 1]
+    )
+    graph = helper.make_graph([conv_node_1, relu_node, conv_node_2], "test_graph_8", [A], [E], [B_init, D_init])
+    model = helper.make_model(graph, **{"opset_imports": [helper.make_opsetid("", 13)]})
+    model.ir_version = 7
+    dataset = Datasets("onnxrt_qlinearops")["dummy"](shape=(20, 1, 5, 5), low=-1.0, high=1.0)
+    dataloader = DATALOADERS["onnxrt_qlinearops"](dataset, batch_size=2)
+    return model, dataloader
+
+
 class TestDataset(Dataset):
     """Configuration for Imagenet dataset."""
 
@@ -567,6 +591,61 @@ class TestAugment(unittest.TestCase):
 
         print("Finished" + " test calculation of quantization params.")
 
+    def test_calib_num_workers(self):
+        model, dataloader = create_conv_chain_session()
+        for algorithm in ["minmax", "kl", "percentile"]:
+            q_config = {name: {"activation": {"algorithm": algorithm}} for name in ["conv1", "relu", "conv2"]}
+            min_max = []
+            for num_workers in [1, 3]:
+                augment = ONNXRTAugment(
+                    ONNXModel(model), dataloader, ["Conv", "Relu"], iterations=[1, 2, 5, 6, 7], num_workers=num_workers
+                )
+                min_max.append(augment.dump_minmax(q_config))
+            # the calibration ranges don't depend on the number of workers
+            self.assertEqual(min_max[0], min_max[1])
+            self.assertEqual(set(min_max[0].keys()), {"A", "B", "C", "C_relu", "D", "E"})
+
+        augment = ONNXRTAugment(
+            ONNXModel(model), dataloader, [], iterations=[0, 3], white_nodes=["conv2"], num_workers=2
+        )
+        map_dumped_tensors = augment.dump_tensor()
+        self.assertEqual(len(map_dumped_tensors["activation"]), 2)
+        self.assertTrue("C_relu" in map_dumped_tensors["activation"][1]["conv2"])
+
+    def test_merge_calibrator_state_dict(self):
+        model, dataloader = create_conv_chain_session()
+        for algorithm in ["minmax", "kl", "percentile"]:
+            q_config = {name: {"activation": {"algorithm": algorithm}} for name in ["conv1", "relu", "conv2"]}
+            augment = ONNXRTAugment(ONNXModel(model), dataloader, ["Conv", "Relu"], iterations=list(range(10)))
+            augment.augment_graph()
+            calib_range = augment.get_activation_tensors_calib_range(q_config)
+
+            # calibrate on 2 shards of the data and merge the states of calibrators
+            states = []
+            for iterations in [list(range(5)), list(range(5, 10))]:
+                augment = ONNXRTAugment(ONNXModel(model), dataloader, ["Conv", "Relu"], iterations=iterations)
+                augment.augment_graph()
+                augment.get_activation_tensors_calib_range(q_config)
+                states.append(pickle.loads(pickle.dumps(augment.calibrator_state_dict())))
+            augment = ONNXRTAugment(ONNXModel(model), dataloader, ["Conv", "Relu"])
+            merged_calib_range = {}
+            for state in states:
+                merged_calib_range = augment.merge_calibrator_state_dict(state)
+
+            self.assertEqual(set(merged_calib_range.keys()), {"A", "C", "C_relu", "E"})
+            self.assertEqual(augment.merge_calibrator_state_dict({}), merged_calib_range)
+            for name, [(rmin, rmax)] in calib_range.items():
+                (merged_rmin, merged_rmax) = merged_calib_range[name][0]
+                if algorithm == "minmax":
+                    self.assertEqual((rmin, rmax), (merged_rmin, merged_rmax))
+                elif algorithm == "percentile":
+                    # the histograms of shards are merged by bin centers
+                    self.assertTrue(np.allclose([rmin, rmax], [merged_rmin, merged_rmax], atol=0.01 * (rmax - rmin)))
+                else:
+                    # the kl threshold depends on the bins of histograms
+                    self.assertTrue(rmin <= 0 <= rmax)
+                    self.assertTrue(merged_rmin <= 0 <= merged_rmax)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1472,5 +1472,290 @@ class TestDataloader(unittest.TestCase):
         shutil.rmtree("./dataset_cached")
 
 
+class TestDefaultDataLoaderWorkers(unittest.TestCase):
+    class IndexDataset:
+        def __init__(self, num_samples, ragged=False, bad_index=None):
+            self.num_samples = num_samples
+            self.ragged = ragged
+            self.bad_index = bad_index
+
+        def __len__(self):
+            return self.num_samples
+
+        def __getitem__(self, index):
+            if index == self.bad_index:
+                raise ValueError("bad sample {}".format(index))
+            length = 8 + index % 5 if self.ragged else 8
+            return {"image": np.full((length, 4), index, dtype=np.float32), "mask": np.ones(length, bool)}, index
+
+    def assert_batches_equal(self, batches, expected):
+        self.assertEqual(len(batches), len(expected))
+        for (inputs, label), (expected_inputs, expected_label) in zip(batches, expected):
+            self.assertEqual(list(label), list(expected_label))
+            for key in expected_inputs:
+                self.assertEqual(type(inputs[key]), type(expected_inputs[key]))
+                for data, expected_data in zip(inputs[key], expected_inputs[key]):
+                    self.assertEqual(data.dtype, expected_data.dtype)
+                    np.testing.assert_array_equal(data, expected_data)
+
+    def test_num_workers(self):
+        from neural_compressor.data import DefaultDataLoader
+
+        for ragged in [False, True]:
+            dataset = self.IndexDataset(23, ragged=ragged)
+            expected = list(DefaultDataLoader(dataset, batch_size=4))
+            for num_workers, prefetch_factor in [(1, 1), (3, 2)]:
+                dataloader = DefaultDataLoader(
+                    dataset, batch_size=4, num_workers=num_workers, prefetch_factor=prefetch_factor
+                )
+                self.assert_batches_equal(list(dataloader), expected)
+                # the dataloader can be iterated again
+                self.assert_batches_equal(list(dataloader), expected)
+        dataloader = DefaultDataLoader(self.IndexDataset(23), batch_size=4, last_batch="discard", num_workers=2)
+        self.assertEqual(len(list(dataloader)), 5)
+
+    def test_num_workers_error(self):
+        from neural_compressor.data import DefaultDataLoader
+
+        dataloader = DefaultDataLoader(self.IndexDataset(20, bad_index=13), batch_size=2, num_workers=2)
+        with self.assertRaisesRegex(RuntimeError, "bad sample 13"):
+            for _ in dataloader:
+                pass
+        # stop iterating early
+        iterator = iter(DefaultDataLoader(self.IndexDataset(100), batch_size=2, num_workers=2))
+        _, label = next(iterator)
+        self.assertEqual(list(label), [0, 1])
+        iterator.close()
+
+    def test_batch_transform(self):
+        from neural_compressor.data import DefaultDataLoader
+        from neural_compressor.data.transforms.transform import TRANSFORMS
+
+        class ImageDataset:
+            def __init__(self, transform):
+                self.transform = transform
+
+            def __len__(self):
+                return 10
+
+            def __getitem__(self, index):
+                image, label = np.full((6, 5, 3), index, dtype=np.uint8), index
+                if self.transform is not None:
+                    image, label = self.transform((image, label))
+                return image, label
+
+        transforms = TRANSFORMS("onnxrt_qlinearops", "preprocess")
+        compose = transforms["Compose"](
+            [
+                transforms["Rescale"](),
+                transforms["Normalize"](mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+                transforms["Transpose"](perm=[2, 0, 1]),
+            ]
+        )
+        dataset = ImageDataset(compose)
+        expected = list(DefaultDataLoader(dataset, batch_size=4))
+        for num_workers in [0, 2]:
+            batches = list(DefaultDataLoader(dataset, batch_size=4, num_workers=num_workers, batch_transform=True))
+            self.assertEqual(len(batches), len(expected))
+            for (images, labels), (expected_images, expected_labels) in zip(batches, expected):
+                self.assertEqual(list(labels), list(expected_labels))
+                self.assertEqual(images.dtype, expected_images.dtype)
+                np.testing.assert_allclose(images, expected_images, rtol=1e-5, atol=1e-5)
+        self.assertIs(dataset.transform, compose)
+        # the transform without apply_batch is applied per sample
+        dataset = ImageDataset(transforms["Rescale"]())
+        batches = list(DefaultDataLoader(dataset, batch_size=4, batch_transform=True))
+        np.testing.assert_allclose(batches[0][0], list(DefaultDataLoader(dataset, batch_size=4))[0][0])
+
+
+class TestSchemaCollate(unittest.TestCase):
+    def test_fixed_shape(self):
+        from neural_compressor.data import SchemaCollate
+        from neural_compressor.data.dataloaders.default_dataloader import default_collate
+
+        collate = SchemaCollate()
+        for step in range(3):
+            batch = [(np.full((3, 4), step * 10 + i, np.float32), i) for i in range(5)]
+            expected = default_collate(batch)
+            images, labels = collate(batch)
+            self.assertEqual(images.dtype, np.float32)
+            np.testing.assert_array_equal(images, expected[0])
+            self.assertEqual(list(labels), list(expected[1]))
+        # the buffers are reused in a ring of num_buffers
+        outputs = [collate(batch)[0] for _ in range(3)]
+        self.assertFalse(np.shares_memory(outputs[0], outputs[1]))
+        self.assertTrue(np.shares_memory(outputs[0], outputs[2]))
+
+    def test_ragged(self):
+        from neural_compressor.data import SchemaCollate
+
+        collate = SchemaCollate(pad_value=-1)
+        batch = [
+            ({"input_ids": np.arange(n), "attention_mask": np.ones(n, np.int64), "text": "a" * n}, n) for n in [3, 5, 2]
+        ]
+        inputs, labels = collate(batch)
+        self.assertEqual(labels, [3, 5, 2])
+        self.assertEqual(inputs["text"], ["aaa", "aaaaa", "aa"])
+        np.testing.assert_array_equal(inputs["input_ids"], [[0, 1, 2, -1, -1], [0, 1, 2, 3, 4], [0, 1, -1, -1, -1]])
+        np.testing.assert_array_equal(inputs["input_ids_mask"], inputs["attention_mask"] == 1)
+        # the mask provided by the samples doesn't get a mask
+        self.assertNotIn("attention_mask_mask", inputs)
+        # the padded array is paired with its mask out of a dict
+        images, _ = SchemaCollate()([(np.ones((2, n, 3)), 0) for n in [1, 4]])
+        self.assertEqual(images[0].shape, (2, 2, 4, 3))
+        np.testing.assert_array_equal(images[1], [[True, False, False, False], [True] * 4])
+
+    def test_schema_change(self):
+        from neural_compressor.data import SchemaCollate
+
+        collate = SchemaCollate()
+        collate([(np.ones(4), 0), (np.ones(4), 1)])
+        # the axis whose size changes becomes ragged
+        out = collate([(np.ones(6), 0), (np.ones(6), 1)])[0]
+        self.assertEqual(out[0].shape, (2, 6))
+        out = collate([(np.ones(2, np.int32), 0), (np.ones(2, np.int32), 1)])[0]
+        self.assertEqual(out[0].dtype, np.int32)
+        # the ragged arrays are padded to the longest of the batch
+        np.testing.assert_array_equal(out[1], [[True, True]] * 2)
+        out = collate([{"a": np.ones(2)}, {"a": np.ones(2)}])
+        self.assertEqual(out["a"].shape, (2, 2))
+        with self.assertRaises(ValueError):
+            collate([np.ones(2), np.ones((2, 2))])
+
+    def test_mixed_dtypes(self):
+        from neural_compressor.data import SchemaCollate
+
+        collate = SchemaCollate()
+        # the arrays are cast to the promoted dtype, as the ones of later batches
+        for _ in range(2):
+            out = collate([(np.ones(3, np.float32), 0), (np.full(3, 2, np.float64), 1)])[0]
+            self.assertEqual(out.dtype, np.float64)
+            np.testing.assert_array_equal(out, [[1] * 3, [2] * 3])
+        out = collate([(np.ones(3, np.float32), 0), (np.ones(3, np.float32), 1)])[0]
+        self.assertEqual(out.dtype, np.float64)
+        out = collate([{"a": np.ones(n, np.float32 if n % 2 else np.float64)} for n in [1, 2, 3]])
+        self.assertEqual(out["a"].dtype, np.float64)
+        np.testing.assert_array_equal(out["a"], [[1, 0, 0], [1, 1, 0], [1, 1, 1]])
+        np.testing.assert_array_equal(out["a_mask"], out["a"] == 1)
+        out = collate([np.ones((), np.int32), np.ones((), np.int64)])
+        self.assertEqual(out.dtype, np.int64)
+
+    def test_dataloader(self):
+        from neural_compressor.data import DefaultDataLoader, SchemaCollate
+
+        dataset = TestDefaultDataLoaderWorkers.IndexDataset(10, ragged=True)
+        for num_workers in [0, 2]:
+            dataloader = DefaultDataLoader(dataset, batch_size=4, collate_fn=SchemaCollate(), num_workers=num_workers)
+            batches = [(inputs["image"].copy(), inputs["image_mask"].copy(), label) for inputs, label in dataloader]
+            self.assertEqual([list(label) for _, _, label in batches], [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+            image, mask, _ = batches[0]
+            self.assertEqual(image.shape, (4, 11, 4))
+            self.assertEqual(mask.sum(axis=1).tolist(), [8, 9, 10, 11])
+            np.testing.assert_array_equal(image[0, 8:], 0)
+
+
+class TestCachedDataset(unittest.TestCase):
+    class CountingDataset:
+        def __init__(self, num_samples, transform=None):
+            self.num_samples = num_samples
+            self.transform = transform
+            self.num_calls = 0
+
+        def __len__(self):
+            return self.num_samples
+
+        def __getitem__(self, index):
+            self.num_calls += 1
+            sample = ({"image": np.full((index % 3 + 1, 4), index, np.float32), "id": str(index)}, index)
+            return sample if self.transform is None else self.transform(sample)
+
+    def setUp(self):
+        self.cache_dir = "dataset_cached_test"
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_cache(self):
+        from neural_compressor.data import CachedDataset, DefaultDataLoader
+
+        dataset = self.CountingDataset(10)
+        cached_dataset = CachedDataset(dataset, cache_dir=self.cache_dir)
+        self.assertFalse(cached_dataset.cached)
+        expected = [dataset[i] for i in range(10)]
+        dataloader = DefaultDataLoader(cached_dataset, batch_size=3, collate_fn=list)
+        for _ in range(2):
+            samples = [sample for batch in dataloader for sample in batch]
+            self.assertTrue(cached_dataset.cached)
+            self.assertEqual(dataset.num_calls, 20)
+            for (inputs, label), (expected_inputs, expected_label) in zip(samples, expected):
+                self.assertEqual(label, expected_label)
+                self.assertEqual(inputs["id"], expected_inputs["id"])
+                np.testing.assert_array_equal(inputs["image"], expected_inputs["image"])
+        # the cached arrays are read-only views of the memory map
+        self.assertFalse(cached_dataset[-1][0]["image"].flags.writeable)
+        # the cache is loaded by another dataset of the same key
+        other = CachedDataset(self.CountingDataset(10), cache_dir=self.cache_dir)
+        self.assertTrue(other.cached)
+        np.testing.assert_array_equal(other[4][0]["image"], expected[4][0]["image"])
+        self.assertEqual(other.dataset.num_calls, 0)
+
+    def test_key(self):
+        from neural_compressor.data import TRANSFORMS, CachedDataset
+
+        transforms = TRANSFORMS("onnxrt_qlinearops", "preprocess")
+        keys = [
+            CachedDataset(self.CountingDataset(10, transform), cache_dir=self.cache_dir).key
+            for transform in [
+                None,
+                transforms["Compose"]([transforms["Transpose"](perm=[1, 0])]),
+                transforms["Compose"]([transforms["Transpose"](perm=[0, 1])]),
+                transforms["Compose"]([transforms["Transpose"](perm=[0, 1])]),
+            ]
+        ]
+        self.assertEqual(len(set(keys)), 3)
+        self.assertEqual(keys[2], keys[3])
+        self.assertEqual(CachedDataset(self.CountingDataset(10), cache_dir=self.cache_dir, key="val").key, "val")
+
+    def test_key_of_callables(self):
+        import functools
+
+        from neural_compressor.data import CachedDataset
+
+        def scale(sample, factor):
+            return sample[0]["image"] * factor, sample[1]
+
+        def closure(factor):
+            return lambda sample: (sample[0]["image"] * factor, sample[1])
+
+        class Scale:
+            def __init__(self, factor):
+                self.factor = factor
+
+            def apply(self, sample):
+                return sample[0]["image"] * self.factor, sample[1]
+
+        def key(transform):
+            return CachedDataset(self.CountingDataset(10, transform), cache_dir=self.cache_dir).key
+
+        self.assertNotEqual(key(lambda sample: sample[0]["image"] * 2), key(lambda sample: sample[0]["image"] / 255))
+        self.assertEqual(key(lambda sample: sample[0]["image"] * 2), key(lambda sample: sample[0]["image"] * 2))
+        self.assertNotEqual(key(functools.partial(scale, factor=2)), key(functools.partial(scale, factor=3)))
+        self.assertEqual(key(functools.partial(scale, factor=2)), key(functools.partial(scale, factor=2)))
+        self.assertNotEqual(key(closure(2)), key(closure(3)))
+        self.assertNotEqual(key(Scale(2).apply), key(Scale(3).apply))
+
+        class Opaque:
+            __slots__ = ()
+
+            def __call__(self, sample):
+                return sample
+
+        with self.assertRaises(ValueError):
+            key(Opaque())
+        self.assertEqual(
+            CachedDataset(self.CountingDataset(10, Opaque()), cache_dir=self.cache_dir, key="val").key, "val"
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
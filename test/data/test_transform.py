@@ -939,6 +939,36 @@ class TestONNXTransfrom(unittest.TestCase):
         with self.assertRaises(ValueError):
             TestONNXTransfrom.transforms["Normalize"](**args)
 
+    def testApplyBatch(self):
+        transforms = TestONNXTransfrom.transforms
+        cast = TRANSFORMS("onnxrt_qlinearops", "general")["Cast"]
+        samples = [(np.random.randint(0, 256, [40 + i, 50, 3], dtype=np.uint8), i) for i in range(5)]
+        mean, std = [0.485, 0.456, 0.406], [0.229, 0.224, 0.225]
+        for transform_list in [
+            [transforms["Resize"](size=32), transforms["Rescale"](), transforms["Normalize"](mean=mean, std=std)],
+            [transforms["Resize"](size=32), transforms["Transpose"](perm=[2, 0, 1]), cast(dtype="float32")],
+            [cast(dtype="float32"), transforms["Resize"](size=32), transforms["Normalize"](mean=mean, std=std)],
+            [
+                transforms["Resize"](size=32),
+                transforms["Rescale"](),
+                transforms["Normalize"](mean=mean, std=std),
+                transforms["Transpose"](perm=[2, 0, 1]),
+                cast(dtype="float32"),
+            ],
+            # the images of different shapes are transformed per sample
+            [transforms["Rescale"](), transforms["Resize"](size=32)],
+        ]:
+            compose = transforms["Compose"](transform_list)
+            expected = [compose(sample) for sample in samples]
+            results = compose.apply_batch(samples)
+            self.assertEqual(len(results), len(expected))
+            for (image, label), (expected_image, expected_label) in zip(results, expected):
+                self.assertEqual(label, expected_label)
+                self.assertEqual(image.dtype, expected_image.dtype)
+                np.testing.assert_allclose(image, expected_image, rtol=1e-5, atol=1e-5)
+        self.assertEqual(len(transforms["Compose"]([transforms["Rescale"]()]).batch_steps()), 2)
+        self.assertIsNone(transforms["Compose"]([transforms["Resize"](size=32)]).batch_steps())
+
     def testRandomCrop(self):
         args = {"size": [50]}
         randomcrop = TestONNXTransfrom.transforms["RandomCrop"](**args)
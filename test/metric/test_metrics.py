@@ -1137,6 +1137,74 @@ class TestMetrics(unittest.TestCase):
         loss.update(predicts, labels)
         self.assertEqual(loss.result(), 0.5)
 
+    def test_roc(self):
+        from sklearn.metrics import roc_auc_score
+
+        metrics = METRICS("pytorch")
+        roc = metrics["ROC"]()
+        rng = np.random.default_rng(0)
+        scores, targets = [], []
+        for _ in range(4):
+            preds = rng.random((64, 1))
+            labels = (rng.random((64, 1)) < preds).astype(np.float32)
+            roc.update([preds], [labels])
+            scores.append(preds)
+            targets.append(labels)
+        scores, targets = np.concatenate(scores).ravel(), np.concatenate(targets).ravel()
+        self.assertEqual(roc.result(), np.mean(np.round(scores) == targets))
+        self.assertAlmostEqual(roc.roc_auc(), roc_auc_score(targets, scores), places=3)
+        roc.reset()
+        roc.update([0.9, 0.2, 0.6, 0.4], [1, 0, 0, 1])
+        self.assertEqual(roc.result(), 0.5)
+        self.assertEqual(roc.roc_auc(), 0.75)
+
+    def test_hvd_reduction(self):
+        class FakeHvd:
+            """Two processes which update the same predictions and labels."""
+
+            @staticmethod
+            def allgather_object(obj):
+                return [obj, obj]
+
+            @staticmethod
+            def size():
+                return 2
+
+        metrics = METRICS("onnxrt_qlinearops")
+        for name, predicts, labels, expected in [
+            ("Accuracy", [1, 0, 1, 1], [0, 1, 1, 1], 0.5),
+            ("MSE", [1, 0, 0, 1], [0, 1, 0, 0], 0.75),
+            ("MAE", [1, 0, 0, 1], [0, 1, 0, 0], 0.75),
+            ("RMSE", [1, 0, 0, 1], [0, 1, 0, 0], np.sqrt(0.75)),
+            ("F1", [1, 2, 3, 4], [1, 2, 3, 5], 0.75),
+        ]:
+            metric = metrics[name]()
+            metric.hvd = FakeHvd()
+            metric.update(predicts, labels)
+            self.assertAlmostEqual(metric.result(), expected)
+
+    def test_hvd_f1(self):
+        class FakeHvd:
+            """Two processes, the other one updates the predictions and labels of each update in others."""
+
+            def __init__(self, others):
+                self.others = others
+
+            def allgather_object(self, obj):
+                return [self.others.pop(0), obj]
+
+            @staticmethod
+            def size():
+                return 2
+
+        metric = METRICS("onnxrt_qlinearops")["F1"]()
+        metric.hvd = FakeHvd([[1], [1], [1, 2], [1, 2]])
+        # the F1 score of each update is computed on the predictions and labels gathered from all processes,
+        # i.e. 0.5 and 0.6, instead of the mean of the scores of the processes, 1 and 1/3 for both updates
+        metric.update([2, 3, 4], [2, 5, 6])
+        metric.update([3, 4, 5], [3, 6, 7])
+        self.assertAlmostEqual(metric.result(), 0.55)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -303,6 +303,64 @@ class TestOnnxModel(unittest.TestCase):
         for init in inits:
             self.assertTrue(init in inits_name)
 
+    def test_name_indexes(self):
+        self.assertEqual(self.model.get_node("Conv2").op_type, "Conv")
+        self.assertEqual(self.model.get_initializer_share_num("X5_weight"), 1)
+
+        # the indexes follow the edits made through ONNXModel
+        self.model.remove_node(self.model.get_node("Conv3"))
+        self.assertIsNone(self.model.get_node("Conv3"))
+        self.assertEqual(self.model.get_initializer_share_num("X5_weight"), 0)
+        new_weight = generate_input_initializer([3, 3, 1, 1], np.float32, "X3_weight_new")
+        self.model.add_initializer(new_weight)
+        self.assertIs(self.model.get_initializer("X3_weight_new"), self.model.initializer()[-1])
+        self.model.replace_input_of_all_nodes("X3_weight", "X3_weight_new")
+        self.assertEqual(self.model.get_initializer_share_num("X3_weight"), 0)
+        self.assertEqual(self.model.get_initializer_share_num("X3_weight_new"), 1)
+        self.model.remove_initializer(self.model.get_initializer("X3_weight"))
+        self.assertIsNone(self.model.get_initializer("X3_weight"))
+        self.model.add_node(onnx.helper.make_node("Relu", ["X4"], ["X6"], name="Relu3"))
+        self.assertEqual(self.model.get_node("Relu3").output, ["X6"])
+
+        # the indexes are rebuilt after direct edits of the graph
+        self.model.model.graph.node.add().CopyFrom(onnx.helper.make_node("Relu", ["X6"], ["X7"], name="Relu4"))
+        self.assertEqual(self.model.get_node("Relu4").input, ["X6"])
+        del self.model.model.graph.initializer[:]
+        self.model.model.graph.initializer.extend([new_weight])
+        self.assertIsNone(self.model.get_initializer("X1_weight"))
+        self.assertIsNotNone(self.model.get_initializer("X3_weight_new"))
+
+    def test_lookup_after_rename(self):
+        self.assertEqual(self.model.get_node("Conv2").op_type, "Conv")
+        self.assertIsNotNone(self.model.get_initializer("X3_weight"))
+        # the operators rename the nodes in place after they are indexed
+        self.model.get_node("Conv2").name = "Conv2_quant"
+        self.assertEqual(self.model.get_node("Conv2_quant").op_type, "Conv")
+        self.assertIsNone(self.model.get_node("Conv2"))
+        self.model.get_initializer("X3_weight").name = "X3_weight_quant"
+        self.assertIsNone(self.model.get_initializer("X3_weight"))
+        self.assertIsNotNone(self.model.get_initializer("X3_weight_quant"))
+        self.assertEqual(self.model.get_node("Conv2_quant").op_type, "Conv")
+
+    def test_initializer_share_num_after_edits(self):
+        self.assertEqual(self.model.get_initializer_share_num("X1_weight"), 1)
+        self.model.set_node_input(self.model.get_node("Conv3"), 1, "X1_weight")
+        self.assertEqual(self.model.get_initializer_share_num("X1_weight"), 2)
+        self.assertEqual(self.model.get_initializer_share_num("X5_weight"), 0)
+        self.model.replace_input_of_all_nodes("X1_weight", "X5_weight", white_optype=["Conv"])
+        self.assertEqual(self.model.get_initializer_share_num("X1_weight"), 0)
+        self.assertEqual(self.model.get_initializer_share_num("X5_weight"), 2)
+        self.model.remove_node(self.model.get_node("Conv1"))
+        self.assertEqual(self.model.get_initializer_share_num("X5_weight"), 1)
+
+        # the counts are rebuilt by update after the inputs of nodes are assigned directly
+        self.model.get_node("Conv3").input[1] = "X1_weight"
+        ONNXModel.replace_node_input(self.model.get_node("Conv2"), "X3_weight", "X1_weight")
+        self.model.update()
+        self.assertEqual(self.model.get_initializer_share_num("X1_weight"), 2)
+        self.assertEqual(self.model.get_initializer_share_num("X3_weight"), 0)
+        self.assertEqual(self.model.get_initializer_share_num("X5_weight"), 0)
+
     def test_input_name_to_nodes(self):
         self.assertEqual(len(self.model.input_name_to_nodes), 12)
         ipts_name = [name for name in self.model.input_name_to_nodes]
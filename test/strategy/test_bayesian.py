@@ -293,5 +293,54 @@ class TestBayesianStrategy(unittest.TestCase):
         self.assertTrue(len(bayes_opt._space.res()) == 8)
 
 
+class TestBayesianOptimization(unittest.TestCase):
+    def test_incremental_gaussian_process(self):
+        from sklearn.gaussian_process import GaussianProcessRegressor
+
+        from neural_compressor.strategy.bayesian import IncrementalGaussianProcess
+
+        rng = np.random.default_rng(0)
+        X = rng.uniform(size=(8, 2))
+        y = np.sin(3 * X.sum(axis=1))
+        gp = IncrementalGaussianProcess(random_state=0)
+        gp.update(X[:4], y[:4])
+        # added incrementally without refitting the kernel
+        gp.update(X[:7], y[:7])
+        self.assertEqual(len(gp), 7)
+        reference = GaussianProcessRegressor(kernel=gp.kernel_, alpha=1e-6, normalize_y=True, optimizer=None)
+        reference.fit(X[:7], y[:7])
+        mean, std = gp.predict(X[7:], return_std=True)
+        ref_mean, ref_std = reference.predict(X[7:], return_std=True)
+        self.assertTrue(np.allclose(mean, ref_mean))
+        self.assertTrue(np.allclose(std, ref_std))
+        fantasy = gp.with_observation(X[7], y[7])
+        self.assertEqual(len(gp), 7)
+        self.assertEqual(len(fantasy), 8)
+        self.assertLess(fantasy.predict(X[7:], return_std=True)[1][0], std[0])
+
+    def test_suggest_batch(self):
+        from neural_compressor.strategy.bayesian import BayesianOptimization
+
+        np.random.seed(9527)
+        bayes_opt = BayesianOptimization(pbounds={"x1": (0, 1), "x2": (0, 1)}, random_seed=9527)
+        for _ in range(4):
+            batch = bayes_opt.suggest_batch(3)
+            self.assertEqual(len(batch), 3)
+            for params in batch:
+                try:
+                    bayes_opt._space.register(params, objective_func(params))
+                except KeyError:
+                    pass
+        self.assertEqual(bayes_opt._space.max()["target"], 2.0)
+        pending = bayes_opt.suggest_batch(2)
+        batch = bayes_opt.suggest_batch(2, pending=pending)
+        self.assertEqual(len(batch), 2)
+        # the points of a batch don't collapse to the same one
+        points = [bayes_opt._space.params_to_array(params) for params in pending + batch]
+        for i in range(len(points)):
+            for j in range(i + 1, len(points)):
+                self.assertFalse(np.allclose(points[i], points[j]))
+
+
 if __name__ == "__main__":
     unittest.main()
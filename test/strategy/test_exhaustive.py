@@ -2,6 +2,7 @@
 
 import shutil
 import unittest
+from unittest.mock import patch
 
 import numpy as np
 
@@ -95,6 +96,86 @@ class TestExhaustiveStrategy(unittest.TestCase):
         q_model = fit(model=self.constant_graph, conf=conf, calib_dataloader=dataloader, eval_func=fake_eval)
         self.assertNotEqual(q_model, None)
 
+    def test_ru_exhaustive_pipelined(self):
+        from neural_compressor.config import AccuracyCriterion, PostTrainingQuantConfig, TuningCriterion
+        from neural_compressor.data import DATALOADERS, Datasets
+        from neural_compressor.quantization import fit
+        from neural_compressor.strategy.strategy import TuneStrategy
+
+        # dataset and dataloader
+        dataset = Datasets("tensorflow")["dummy"]((100, 3, 3, 1), label=True)
+        dataloader = DATALOADERS["tensorflow"](dataset)
+
+        quantize = TuneStrategy._quantize
+        with_own_adaptor = []
+
+        def checked_quantize(strategy, tune_cfg, adaptor=None, algo_scheduler=None):
+            with_own_adaptor.append(adaptor is not None and adaptor is not strategy.adaptor)
+            return quantize(strategy, tune_cfg, adaptor, algo_scheduler)
+
+        acc_cri = AccuracyCriterion(tolerable_loss=0.01)
+        q_configs = []
+        with patch.object(TuneStrategy, "_quantize", checked_quantize):
+            for strategy_kwargs in [None, {"pipeline_lookahead": 2}]:
+                # the pipelined tuning gets the same result as the sequential one
+                acc = [0, 1, 0.9, 0.9, 1]
+
+                def fake_eval(model):
+                    acc.pop(0)
+                    return acc[0]
+
+                tune_cri = TuningCriterion(strategy="exhaustive", max_trials=3, strategy_kwargs=strategy_kwargs)
+                conf = PostTrainingQuantConfig(quant_level=1, tuning_criterion=tune_cri, accuracy_criterion=acc_cri)
+                q_model = fit(model=self.constant_graph, conf=conf, calib_dataloader=dataloader, eval_func=fake_eval)
+                self.assertNotEqual(q_model, None)
+                self.assertEqual(acc, [1])
+                q_configs.append(q_model.q_config)
+        self.assertEqual(q_configs[0], q_configs[1])
+        # the worker quantizes the trials with its own adaptor
+        self.assertEqual(with_own_adaptor[:3], [False] * 3)
+        self.assertTrue(len(with_own_adaptor) >= 6 and all(with_own_adaptor[3:]))
+
+    def test_ru_exhaustive_pipelined_best_not_last(self):
+        from neural_compressor.config import AccuracyCriterion, PostTrainingQuantConfig, TuningCriterion
+        from neural_compressor.data import DATALOADERS, Datasets
+        from neural_compressor.quantization import fit
+        from neural_compressor.strategy.strategy import TuneStrategy
+
+        # dataset and dataloader
+        dataset = Datasets("tensorflow")["dummy"]((100, 3, 3, 1), label=True)
+        dataloader = DATALOADERS["tensorflow"](dataset)
+
+        recover = TuneStrategy._recover_best_qmodel_from_tuning_cfg
+        recovered = []
+
+        def checked_recover(strategy):
+            # the speculative trials are discarded before the best quantized model is recovered
+            self.assertIsNone(strategy._trial_executor)
+            recovered.append(strategy.best_qmodel is None)
+            recover(strategy)
+
+        acc_cri = AccuracyCriterion(tolerable_loss=0.01)
+        q_configs = []
+        with patch.object(TuneStrategy, "_recover_best_qmodel_from_tuning_cfg", checked_recover):
+            for strategy_kwargs in [None, {"pipeline_lookahead": 2}]:
+                # the first trial is the best one, the model is quantized again after the last trial
+                acc = [0, 1, 1, 0.9, 0.9]
+
+                def fake_eval(model):
+                    acc.pop(0)
+                    return acc[0]
+
+                tune_cri = TuningCriterion(
+                    strategy="exhaustive", timeout=10000, max_trials=3, strategy_kwargs=strategy_kwargs
+                )
+                conf = PostTrainingQuantConfig(quant_level=1, tuning_criterion=tune_cri, accuracy_criterion=acc_cri)
+                q_model = fit(model=self.constant_graph, conf=conf, calib_dataloader=dataloader, eval_func=fake_eval)
+                self.assertNotEqual(q_model, None)
+                self.assertEqual(acc, [0.9])
+                q_configs.append(q_model.q_config)
+        self.assertTrue(recovered[0])
+        self.assertEqual(q_configs[0], q_configs[1])
+
 
 if __name__ == "__main__":
     unittest.main()
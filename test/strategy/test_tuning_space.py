@@ -225,6 +225,39 @@ class TestTuningSpace(unittest.TestCase):
         self.assertFalse(found_quant_op_name4)
         self.assertTrue(found_fp32_op_name4)
 
+    def test_tuning_space_index(self):
+        tuning_space = TuningSpace(deepcopy(self.capability), None)
+
+        def walk(path):
+            item = tuning_space.root_item
+            for name in path:
+                item = item.get_option_by_name(name) if item else None
+            return item
+
+        op_name_type = ("op_name1", "op_type1")
+        for path in [
+            (op_name_type,),
+            (op_name_type, "static", "activation", "int8", "signed"),
+            ("calib_sampling_size",),
+        ]:
+            self.assertIs(tuning_space.get_item_by_path(path), walk(path))
+        self.assertIsNone(tuning_space.get_item_by_path((op_name_type, "static", "activation", "int4")))
+        self.assertEqual(tuning_space.get_item_by_path((("not_exist", "op_type1"), "static"), default=-1), -1)
+        # the options appended after indexing are found
+        op_item = tuning_space.get_item_by_path((op_name_type,))
+        op_item.append(TuningItem(name="new_mode", options=[], item_type="new_mode"))
+        self.assertEqual(op_item.get_option_by_name("new_mode").name, "new_mode")
+        self.assertEqual(set(item.name for item in tuning_space.collect_op_by_quant_bits("int8")), set(op_cap.keys()))
+        self.assertEqual(tuning_space.collect_op_by_quant_bits("int4"), [])
+        full_path = tuning_space.get_op_default_path_by_pattern(op_name_type, "static")
+        self.assertEqual(full_path["activation"], ("static", "activation", "int8", "signed"))
+        # the cached result isn't changed by the caller
+        full_path["activation"] = None
+        self.assertEqual(
+            tuning_space.get_op_default_path_by_pattern(op_name_type, "static")["activation"],
+            ("static", "activation", "int8", "signed"),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,10 +1,43 @@
 """Tests for strategy utility."""
 
+import os
+import pickle
+import shutil
+import tempfile
 import unittest
 
+import numpy as np
+
+from neural_compressor.strategy.utils.surrogate import OpDivergenceSurrogate, op_output_divergence
+from neural_compressor.strategy.utils.tuning_history import TuningHistoryIndex, TuningHistoryJournal, canonicalize
 from neural_compressor.strategy.utils.utility import build_slave_faker_model
 
 
+class FakeInspectAdaptor:
+    def __init__(self, noise):
+        self.noise = noise
+        self.num_inspected = 0
+
+    def inspect_tensor(self, model, dataloader, op_list, iteration_list, inspect_type, quantization_cfg):
+        self.num_inspected += 1
+        activations = []
+        for iteration in iteration_list:
+            tensors = {}
+            for op_index, op_name in enumerate(op_list):
+                rng = np.random.default_rng([iteration, op_index])
+                tensor = rng.standard_normal(64)
+                if model == "q_model":
+                    tensor = tensor + self.noise.get(op_name, 0) * rng.standard_normal(64)
+                tensors[op_name] = {op_name + ".output0": tensor}
+            activations.append(tensors)
+        return {"activation": activations}
+
+
+class LegacyStrategy:
+    def __init__(self, tuning_history):
+        self.tuning_history = tuning_history
+
+
 class TestUtils(unittest.TestCase):
     def test_build_slave_faker_model(self):
         faker_model = build_slave_faker_model()
@@ -12,6 +45,87 @@ class TestUtils(unittest.TestCase):
         faker_model.some_attr
         faker_model.some_attr.another_attr[0].some_method()
 
+    def test_canonicalize(self):
+        cfg1 = {("conv", "Conv2d"): {"dtype": "int8", "scheme": ["sym"]}, "calib_sampling_size": 100}
+        cfg2 = {"calib_sampling_size": 100, ("conv", "Conv2d"): {"scheme": ["sym"], "dtype": "int8"}}
+        self.assertEqual(canonicalize(cfg1), canonicalize(cfg2))
+        self.assertEqual(hash(canonicalize(cfg1)), hash(canonicalize(cfg2)))
+        cfg2[("conv", "Conv2d")]["scheme"] = ("sym",)
+        self.assertNotEqual(canonicalize(cfg1), canonicalize(cfg2))
+
+    def test_op_output_divergence(self):
+        tensor = np.random.randn(100)
+        self.assertAlmostEqual(op_output_divergence(tensor, tensor), 0.0)
+        noise = np.random.randn(100) * 0.1
+        # independent of the scale of the output
+        self.assertAlmostEqual(
+            op_output_divergence(tensor, tensor + noise), op_output_divergence(tensor * 100, (tensor + noise) * 100)
+        )
+        self.assertGreater(op_output_divergence(tensor, -tensor), op_output_divergence(tensor, tensor + 0.1))
+
+    def test_op_divergence_surrogate(self):
+        noise = {"conv1": 0.01, "conv2": 1.0, "conv3": 0.1, "conv4": 0.001}
+        adaptor = FakeInspectAdaptor(noise)
+        surrogate = OpDivergenceSurrogate(adaptor, None, num_batches=2)
+        op_names = list(noise) + ["not_inspected"]
+        surrogate.update("fp32_model", "q_model", list(noise), {})
+        surrogate.update("fp32_model", "q_model", list(noise), {})
+        # the fp32 outputs are inspected once
+        self.assertEqual(adaptor.num_inspected, 3)
+        self.assertEqual(surrogate.rank(op_names), ["conv2", "conv3", "conv1", "conv4", "not_inspected"])
+        self.assertGreater(surrogate.predict(["conv2"]), surrogate.predict(["conv1", "conv3"]))
+        self.assertEqual(surrogate.select(op_names, 0.9), ["conv2", "not_inspected"])
+        self.assertEqual(surrogate.select(op_names, 1.0), surrogate.rank(op_names))
+
+    def test_tuning_history_index(self):
+        index = TuningHistoryIndex()
+        entry = {"cfg": 1, "history": [{"tune_cfg": {"a": 1, "trial_number": 1}, "tune_result": (1.0, [1.0])}]}
+        tuning_history = [entry]
+        self.assertEqual(index.find(tuning_history, {"a": 1, "trial_number": 5}), [entry])
+        self.assertEqual(index.find(tuning_history, {"a": 2}), [])
+        entry["history"].append({"tune_cfg": {"a": 2}, "tune_result": (0.5, [1.0])})
+        self.assertEqual(index.find(tuning_history, {"a": 2}), [entry])
+
+    def test_tuning_history_journal(self):
+        workspace = tempfile.mkdtemp()
+        path = os.path.join(workspace, "history.snapshot")
+        entry = {"version": "x", "cfg": 1, "best_tune_result": None, "history": [{"tune_cfg": {"a": 1}}]}
+        tuning_history = [entry]
+        journal = TuningHistoryJournal(path)
+        journal.reset(tuning_history)
+        entry["history"].append({"tune_cfg": {"a": 2}})
+        entry["best_tune_result"] = (1.0, [1.0])
+        journal.append(tuning_history, 0, entry["history"][-1])
+        tuning_history.append({"version": "x", "cfg": 2, "history": [{"tune_cfg": {"b": 1}}]})
+        journal.append(tuning_history, 1)
+        self.assertEqual(TuningHistoryJournal.load(path), tuning_history)
+        # only the new records are appended
+        size = os.path.getsize(path)
+        journal.append(tuning_history, 1)
+        self.assertLess(os.path.getsize(path) - size, size / 2)
+        # only the changed fields are journaled, and the journal is compacted once it grows
+        entry = tuning_history[1]
+        entry["cfg"] = list(range(10000))
+        journal.append(tuning_history, 1)
+        size = os.path.getsize(path)
+        for i in range(20):
+            entry["history"].append({"tune_cfg": {"b": i + 2}})
+            entry["best_tune_result"] = (float(i), [1.0])
+            journal.append(tuning_history, 1, entry["history"][-1])
+            self.assertEqual(TuningHistoryJournal.load(path), tuning_history)
+        self.assertLess(os.path.getsize(path), 2 * size)
+        # the fields changing every trial are journaled again each time
+        for i in range(20):
+            entry["state"] = [i] * 10000
+            journal.append(tuning_history, 1)
+            self.assertLess(os.path.getsize(path), journal.compact_ratio * 3 * size)
+        self.assertEqual(TuningHistoryJournal.load(path), tuning_history)
+        # the legacy snapshot pickles the whole strategy
+        with open(path, "wb") as f:
+            pickle.dump(LegacyStrategy(tuning_history), f)
+        self.assertEqual(TuningHistoryJournal.load(path), tuning_history)
+        shutil.rmtree(workspace, ignore_errors=True)
+
 
 if __name__ == "__main__":
     unittest.main()